@@ -45,6 +45,7 @@ class Settings(BaseSettings):
     CLOUD_DB_PASSWORD: str = os.getenv("CLOUD_DB_PASSWORD", "")
     CLOUD_DB_NAME: str = os.getenv("CLOUD_DB_NAME", "evo_alpha_os")
     CLOUD_DB_SSLMODE: str = os.getenv("CLOUD_DB_SSLMODE", "require")
+    CLOUD_DB_CONNECT_TIMEOUT: int = int(os.getenv("CLOUD_DB_CONNECT_TIMEOUT", "10"))  # 建立连接超时（秒）
 
     @property
     def CLOUD_DATABASE_URL(self) -> str:
@@ -63,6 +64,9 @@ class Settings(BaseSettings):
     R2_SECRET_ACCESS_KEY: str = os.getenv("R2_SECRET_ACCESS_KEY", "")
     R2_BUCKET_NAME: str = os.getenv("R2_BUCKET_NAME", "evo-alpha-data")
     R2_ENDPOINT: str = os.getenv("R2_ENDPOINT", "")
+    R2_UPLOAD_WORKERS: int = int(os.getenv("R2_UPLOAD_WORKERS", "8"))              # 并行上传的文件数
+    R2_MULTIPART_THRESHOLD_MB: int = int(os.getenv("R2_MULTIPART_THRESHOLD_MB", "16"))  # 超过该大小走分片上传
+    R2_MULTIPART_CHUNK_MB: int = int(os.getenv("R2_MULTIPART_CHUNK_MB", "16"))
 
     @property
     def R2_PUBLIC_DOMAIN(self) -> str:
@@ -99,6 +103,17 @@ class Settings(BaseSettings):
     # 是否强制同步 K 线到云端（海量数据时建议 False）
     FORCE_SYNC_KLINE: bool = os.getenv("FORCE_SYNC_KLINE", "false").lower() == "true"
 
+    # 云端写入方式：outbox（本地立即提交，云端由后台线程批量重放）/ sync（逐个引擎同步写入）
+    CLOUD_WRITE_MODE: str = os.getenv("CLOUD_WRITE_MODE", "outbox").lower()
+
+    # 列式K线仓库（Parquet）：off / mirror（同步写入）/ primary（同步写入且从 Parquet 读取）
+    KLINE_STORE_MODE: str = os.getenv("KLINE_STORE_MODE", "off").lower()
+    KLINE_STORE_DIR: str = os.getenv("KLINE_STORE_DIR", os.path.join(BASE_DIR, "data", "kline_store"))
+
+    # 内存映射价格立方体：采集后增量追加，因子计算 / 策略 / 回测直接 mmap 读取K线
+    PRICE_CUBE_ENABLED: bool = os.getenv("PRICE_CUBE_ENABLED", "false").lower() == "true"
+    PRICE_CUBE_DIR: str = os.getenv("PRICE_CUBE_DIR", os.path.join(BASE_DIR, "data", "price_cube"))
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -2,9 +2,14 @@
 EvoAlpha OS - 数据库管理
 从 EvoQuant OS 移植
 支持本地 SQLite + 云端 CockroachDB 双引擎
+
+引擎在首次使用时创建（导入本模块不会建库或连接云端）；
+旧代码中的 local_engine / cloud_engine / SessionLocal 模块属性仍可访问，访问时按需创建
 """
 
-from sqlalchemy import create_engine
+import threading
+
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.pool import QueuePool
 from loguru import logger
@@ -22,13 +27,41 @@ def _create_local_engine():
 
     engine = create_engine(
         settings.LOCAL_DATABASE_URL,
-        connect_args={"check_same_thread": False},
+        # 多个采集阶段并行写库：等待锁而不是立即报 "database is locked"
+        connect_args={"check_same_thread": False, "timeout": 60},
         echo=settings.APP_DEBUG,
     )
+
+    @event.listens_for(engine, "connect")
+    def _enable_wal(dbapi_connection, connection_record):
+        # WAL：读写互不阻塞，写者之间串行
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
+
     logger.info(f"✅ 本地数据库引擎已创建: {settings.LOCAL_DB_PATH}")
     return engine
 
 
+def build_cloud_engine():
+    """
+    创建云端引擎但不连接（未配置时返回 None）
+
+    连接错误在首次使用时才出现，由调用方决定重试（如 outbox 重放线程）
+    """
+    if not settings.CLOUD_DATABASE_URL:
+        return None
+    return create_engine(
+        settings.CLOUD_DATABASE_URL,
+        poolclass=QueuePool,
+        pool_size=10,
+        max_overflow=20,
+        pool_pre_ping=True,  # 连接健康检查
+        connect_args={"sslmode": settings.CLOUD_DB_SSLMODE, "connect_timeout": settings.CLOUD_DB_CONNECT_TIMEOUT},
+        echo=settings.APP_DEBUG,
+    )
+
+
 def _create_cloud_engine():
     """创建云端 CockroachDB 引擎（Display - Cloud）"""
     if not settings.CLOUD_DATABASE_URL:
@@ -40,19 +73,11 @@ def _create_cloud_engine():
         display_url = settings.CLOUD_DATABASE_URL.split('@')[-1] if '@' in settings.CLOUD_DATABASE_URL else settings.CLOUD_DATABASE_URL
         logger.info(f"🔌 正在连接云端数据库: {display_url}")
 
-        engine = create_engine(
-            settings.CLOUD_DATABASE_URL,
-            poolclass=QueuePool,
-            pool_size=10,
-            max_overflow=20,
-            pool_pre_ping=True,  # 连接健康检查
-            connect_args={"sslmode": settings.CLOUD_DB_SSLMODE},
-            echo=settings.APP_DEBUG,
-        )
+        engine = build_cloud_engine()
 
         # 测试连接
         with engine.connect() as conn:
-            conn.execute("SELECT 1")
+            conn.execute(text("SELECT 1"))
 
         logger.success("✅ 云端数据库引擎已创建")
         return engine
@@ -62,18 +87,49 @@ def _create_cloud_engine():
         return None
 
 
-# ================= 2. 预生成单例引擎 =================
+# ================= 2. 懒加载单例引擎 =================
+
+# 已创建的引擎（云端创建失败时缓存 None，不再重复连接）
+_engines = {}
+_engines_lock = threading.Lock()
+
+_ENGINE_FACTORIES = {
+    "local": _create_local_engine,   # 本地引擎（总是存在，作为工厂基础）
+    "cloud": _create_cloud_engine,   # 云端引擎（未配置或连接失败时为 None）
+}
+
+
+def _get_or_create(mode: str):
+    if mode not in _engines:
+        with _engines_lock:
+            if mode not in _engines:
+                _engines[mode] = _ENGINE_FACTORIES[mode]()
+    return _engines[mode]
+
 
-# 本地引擎（总是存在，作为工厂基础）
-local_engine = _create_local_engine()
+def __getattr__(name):
+    """兼容旧的模块级单例：local_engine / cloud_engine / SessionLocal 在首次访问时创建"""
+    if name == "local_engine":
+        return get_local_engine()
+    if name == "cloud_engine":
+        return get_cloud_engine()
+    if name == "SessionLocal":
+        return _get_session_factory()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# 云端引擎（按需生成）
-cloud_engine = _create_cloud_engine()
 
 # ================= 3. 会话与 ORM 基类 =================
 
-# SessionLocal 默认绑定到本地引擎
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=local_engine)
+_session_factory = None
+
+
+def _get_session_factory():
+    """SessionLocal 默认绑定到本地引擎（首次使用时创建）"""
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = sessionmaker(autocommit=False, autoflush=False, bind=get_local_engine())
+    return _session_factory
+
 
 # ORM 基类
 Base = declarative_base()
@@ -94,9 +150,10 @@ def get_active_engines() -> List[Tuple[str, object]]:
     active = []
 
     # 1. 本地引擎（总是激活）
-    active.append(("local", local_engine))
+    active.append(("local", get_local_engine()))
 
     # 2. 云端引擎（如果配置了）
+    cloud_engine = get_cloud_engine()
     if cloud_engine:
         active.append(("cloud", cloud_engine))
 
@@ -114,20 +171,21 @@ def get_engine(mode: str = "local"):
         SQLAlchemy Engine 对象
     """
     if mode == "cloud":
+        cloud_engine = get_cloud_engine()
         if not cloud_engine:
             raise ValueError("❌ 云端引擎未初始化")
         return cloud_engine
-    return local_engine
+    return get_local_engine()
 
 
 def get_local_engine():
-    """获取本地引擎（快捷方式）"""
-    return local_engine
+    """获取本地引擎（快捷方式，首次调用时创建）"""
+    return _get_or_create("local")
 
 
 def get_cloud_engine():
-    """获取云端引擎（快捷方式）"""
-    return cloud_engine
+    """获取云端引擎（快捷方式，首次调用时连接；未配置或连接失败时返回 None）"""
+    return _get_or_create("cloud")
 
 
 def get_db():
@@ -137,7 +195,7 @@ def get_db():
     Yields:
         数据库会话
     """
-    db = SessionLocal()
+    db = _get_session_factory()()
     try:
         yield db
     finally:
@@ -159,6 +217,7 @@ def init_database():
     logger.success("✅ 本地数据库初始化完成")
 
     # 云端数据库初始化（如果配置了）
+    cloud_engine = get_cloud_engine()
     if cloud_engine:
         logger.info("📊 正在初始化云端数据库...")
         try:
@@ -179,7 +238,7 @@ def write_to_local(table_name: str, df, if_exists="append"):
         df: pandas DataFrame
         if_exists: "fail", "replace", "append"
     """
-    df.to_sql(table_name, local_engine, if_exists=if_exists, index=False)
+    df.to_sql(table_name, get_local_engine(), if_exists=if_exists, index=False)
     logger.debug(f"写入本地数据库: {table_name} ({len(df)} 行)")
 
 
@@ -192,6 +251,7 @@ def write_to_cloud(table_name: str, df, if_exists="append"):
         df: pandas DataFrame
         if_exists: "fail", "replace", "append"
     """
+    cloud_engine = get_cloud_engine()
     if not cloud_engine:
         logger.warning("⚠️  云端引擎未配置，跳过写入")
         return
@@ -204,11 +264,23 @@ def write_to_all(table_name: str, df, if_exists="append"):
     """
     同时写入本地和云端数据库
 
+    本地立即写入；CLOUD_WRITE_MODE=outbox 时云端写入随本地事务入队、由后台线程异步重放
+
     Args:
         table_name: 表名
         df: pandas DataFrame
         if_exists: "fail", "replace", "append"
     """
+    from data_job.core.cloud_outbox import get_cloud_outbox, to_sql_step
+
+    outbox = get_cloud_outbox()
+    if outbox is not None:
+        with get_local_engine().begin() as conn:
+            df.to_sql(table_name, conn, if_exists=if_exists, index=False)
+            outbox.enqueue(conn, [to_sql_step(table_name, df, if_exists)], table_name)
+        logger.debug(f"写入local数据库并加入云端outbox: {table_name} ({len(df)} 行)")
+        return
+
     for mode, engine in get_active_engines():
         df.to_sql(table_name, engine, if_exists=if_exists, index=False)
         logger.debug(f"写入{mode}数据库: {table_name} ({len(df)} 行)")
@@ -0,0 +1,278 @@
+"""
+EvoAlpha OS - 列式K线仓库（Parquet）
+按 资产类别 / 月份 分区存放日K线，zstd 压缩，读取时按月份裁剪分区、
+按 日期 / 标的 谓词下推（行组统计信息过滤）、只读取需要的列
+
+目录结构:
+    {KLINE_STORE_DIR}/{asset}/month=YYYY-MM/part-0.parquet
+    asset: stock / etf / sector（对应 stock_daily_prices / etf_daily_prices / sector_daily_prices）
+
+运行模式（settings.KLINE_STORE_MODE）:
+    off     - 不使用（默认）
+    mirror  - 采集器写库后同步写入 Parquet，读取仍走数据库（用于回填、校验）
+    primary - 同步写入，且因子计算 / 策略 / 回测从 Parquet 读取K线
+
+依赖 pyarrow（仅在实际读写时导入）
+"""
+
+import os
+import threading
+from typing import Iterable, List, Optional
+
+import pandas as pd
+from loguru import logger
+
+from app.core.config import settings
+
+# 资产类别 -> (数据库表, 标的列)
+ASSETS = {
+    'stock': ('stock_daily_prices', 'symbol'),
+    'etf': ('etf_daily_prices', 'symbol'),
+    'sector': ('sector_daily_prices', 'sector_name'),
+}
+
+# 资产类别 -> 数值列（与数据库表一致，统一存 float64）
+PRICE_FIELDS = ['open', 'close', 'high', 'low', 'volume', 'amount', 'pct_chg']
+ASSET_FIELDS = {
+    'stock': PRICE_FIELDS + ['turnover_rate'],
+    'etf': PRICE_FIELDS,
+    'sector': PRICE_FIELDS,
+}
+
+MODES = ('off', 'mirror', 'primary')
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("列式K线仓库需要 pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def asset_schema(asset: str):
+    """
+    资产类别的固定 Arrow schema：标的 string、trade_date date32、数值列 float64
+
+    各月份文件必须同一 schema：同一列在不同批次里可能是 int64（akshare 历史）、
+    float64（SQLite FLOAT / 含 NaN）或全空，按各自 dtype 写入会导致跨月读取失败
+    """
+    pa = _pyarrow()
+    _, key = ASSETS[asset]
+    return pa.schema(
+        [pa.field(key, pa.string()), pa.field('trade_date', pa.date32())]
+        + [pa.field(name, pa.float64()) for name in ASSET_FIELDS[asset]]
+    )
+
+
+class KlineStore:
+    """按月分区的 Parquet K线仓库"""
+
+    def __init__(self, root: str, compression: str = 'zstd', row_group_size: int = 32768):
+        """
+        Args:
+            root: 仓库根目录
+            compression: 压缩算法
+            row_group_size: 行组大小（文件内按 标的, 日期 排序，行组越小标的过滤越精确）
+        """
+        self.root = root
+        self.compression = compression
+        self.row_group_size = row_group_size
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def asset_for_table(table: str) -> Optional[str]:
+        """数据库表名 -> 资产类别（不是K线表时返回 None）"""
+        for asset, (name, _) in ASSETS.items():
+            if name == table:
+                return asset
+        return None
+
+    def _month_path(self, asset: str, month: str) -> str:
+        return os.path.join(self.root, asset, f"month={month}", "part-0.parquet")
+
+    def months(self, asset: str) -> List[str]:
+        """已有的月份分区（YYYY-MM，升序）"""
+        asset_dir = os.path.join(self.root, asset)
+        if not os.path.isdir(asset_dir):
+            return []
+        return sorted(
+            name.split('=', 1)[1] for name in os.listdir(asset_dir)
+            if name.startswith('month=') and os.path.exists(os.path.join(asset_dir, name, 'part-0.parquet'))
+        )
+
+    def has_data(self, asset: str) -> bool:
+        return bool(self.months(asset))
+
+    # ================= 写入 =================
+
+    def write(self, asset: str, df: pd.DataFrame) -> int:
+        """
+        按 (标的, 日期) 合并写入（同键以新数据为准），每个涉及的月份整体重写一次
+
+        Args:
+            asset: 资产类别
+            df: K线数据（需包含标的列与 trade_date）
+
+        Returns:
+            int: 写入的行数
+        """
+        if df is None or df.empty:
+            return 0
+        pa = _pyarrow()
+        _, key = ASSETS[asset]
+
+        df = df.copy()
+        df['trade_date'] = pd.to_datetime(df['trade_date']).dt.normalize()
+        months = df['trade_date'].dt.strftime('%Y-%m')
+
+        with self._lock:
+            for month, part in df.groupby(months, sort=True):
+                path = self._month_path(asset, month)
+                if os.path.exists(path):
+                    existing = pa.parquet.read_table(path).to_pandas(date_as_object=False)
+                    part = pd.concat([existing, part], ignore_index=True)
+                part = (part.drop_duplicates([key, 'trade_date'], keep='last')
+                        .sort_values([key, 'trade_date'], kind='stable')
+                        .reset_index(drop=True))
+
+                table = self._to_table(asset, part)
+
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = path + '.tmp'
+                pa.parquet.write_table(table, tmp_path, compression=self.compression,
+                                       row_group_size=self.row_group_size)
+                os.replace(tmp_path, path)
+
+        return len(df)
+
+    @staticmethod
+    def _to_table(asset: str, df: pd.DataFrame):
+        """按 asset_schema 转换（不在 schema 中的列丢弃，缺少的列置空）"""
+        pa = _pyarrow()
+        schema = asset_schema(asset)
+        _, key = ASSETS[asset]
+        arrays = []
+        for field in schema:
+            if field.name not in df.columns:
+                arrays.append(pa.nulls(len(df), type=field.type))
+                continue
+            column = df[field.name]
+            if field.name == key:
+                values = column.map(lambda v: None if v is None or v != v else str(v))
+            elif field.name == 'trade_date':
+                values = pd.to_datetime(column).dt.date
+            else:
+                values = pd.to_numeric(column, errors='coerce').astype('float64')
+            arrays.append(pa.array(values, type=field.type, from_pandas=True))
+        return pa.Table.from_arrays(arrays, schema=schema)
+
+    def import_table(self, engine, asset: str, start_date: str = None) -> int:
+        """
+        从数据库回填（逐月读取、写入，内存占用为单月数据量）
+
+        Returns:
+            int: 导入的行数
+        """
+        from sqlalchemy import text
+
+        table, _ = ASSETS[asset]
+        condition = "WHERE trade_date >= :start" if start_date else ""
+        bounds = pd.read_sql(text(f"SELECT MIN(trade_date) AS lo, MAX(trade_date) AS hi FROM {table} {condition}"),
+                             engine, params={'start': start_date} if start_date else None)
+        if bounds.empty or pd.isna(bounds.loc[0, 'lo']):
+            return 0
+
+        total = 0
+        lo, hi = pd.to_datetime(bounds.loc[0, 'lo']), pd.to_datetime(bounds.loc[0, 'hi'])
+        for month_start in pd.date_range(lo.replace(day=1), hi, freq='MS'):
+            month_end = month_start + pd.offsets.MonthBegin(1)
+            df = pd.read_sql(
+                text(f"SELECT * FROM {table} WHERE trade_date >= :lo AND trade_date < :hi"),
+                engine, params={'lo': month_start.strftime('%Y-%m-%d'), 'hi': month_end.strftime('%Y-%m-%d')},
+            )
+            total += self.write(asset, df)
+            logger.info(f"   📦 {asset} {month_start:%Y-%m}: {len(df)} 行")
+        return total
+
+    # ================= 读取 =================
+
+    def read(self, asset: str, start_date: str = None, end_date: str = None,
+             symbols: Iterable[str] = None, columns: List[str] = None) -> pd.DataFrame:
+        """
+        读取K线
+
+        Args:
+            asset: 资产类别
+            start_date / end_date: 日期范围（含两端，YYYY-MM-DD），None 表示不限
+            symbols: 标的列表，None 表示全部
+            columns: 需要的列，None 表示全部
+
+        Returns:
+            pd.DataFrame: trade_date 为 datetime64，按 日期 排序
+        """
+        pa = _pyarrow()
+        ds = pa.dataset
+        _, key = ASSETS[asset]
+
+        # 分区裁剪：只打开与日期范围相交的月份
+        lo = pd.Timestamp(start_date).strftime('%Y-%m') if start_date else None
+        hi = pd.Timestamp(end_date).strftime('%Y-%m') if end_date else None
+        files = [self._month_path(asset, m) for m in self.months(asset)
+                 if (lo is None or m >= lo) and (hi is None or m <= hi)]
+        if not files:
+            return pd.DataFrame(columns=columns or [key, 'trade_date'])
+
+        # 谓词下推
+        expr = None
+        conditions = []
+        if start_date:
+            conditions.append(ds.field('trade_date') >= pa.scalar(pd.Timestamp(start_date).date(), pa.date32()))
+        if end_date:
+            conditions.append(ds.field('trade_date') <= pa.scalar(pd.Timestamp(end_date).date(), pa.date32()))
+        if symbols is not None:
+            conditions.append(ds.field(key).isin(list(symbols)))
+        for condition in conditions:
+            expr = condition if expr is None else expr & condition
+
+        # 显式 schema：早期按 pandas dtype 写入的月份（int64 / null 列）读取时统一转换
+        dataset = ds.dataset(files, format='parquet', schema=asset_schema(asset))
+        table = dataset.to_table(columns=columns, filter=expr)
+        df = table.to_pandas(date_as_object=False)
+        if 'trade_date' in df.columns:
+            df['trade_date'] = pd.to_datetime(df['trade_date'])
+            df = df.sort_values('trade_date', kind='stable').reset_index(drop=True)
+        return df
+
+
+# ================= 全局实例 =================
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_kline_store(for_read: bool = False) -> Optional[KlineStore]:
+    """
+    按 settings.KLINE_STORE_MODE 返回仓库实例
+
+    Args:
+        for_read: True 时只在 primary 模式下返回（读取方使用）
+
+    Returns:
+        KlineStore 或 None（未启用）
+    """
+    global _store
+    mode = settings.KLINE_STORE_MODE
+    if mode not in MODES:
+        logger.warning(f"⚠️ 未知的 KLINE_STORE_MODE: {mode}，按 off 处理")
+        return None
+    if mode == 'off' or (for_read and mode != 'primary'):
+        return None
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = KlineStore(settings.KLINE_STORE_DIR)
+    return _store
@@ -0,0 +1,356 @@
+"""
+EvoAlpha OS - 内存映射价格立方体
+把日K线存成一块持久化的 NumPy 数组（字段 × 交易日 × 标的），配一个 JSON 索引文件（交易日 / 标的 / 字段），
+各阶段（因子计算 / 策略 / 回测）直接 mmap 打开：不查库、不反序列化、不 pivot，
+多个进程共享操作系统页缓存中的同一份数据
+
+目录结构:
+    {PRICE_CUBE_DIR}/{asset}/cube.npy     形状 (字段, 交易日容量, 标的容量)，float64，NaN 表示无K线
+    {PRICE_CUBE_DIR}/{asset}/index.json   {"fields": [...], "dates": ["YYYY-MM-DD", ...], "symbols": [...]}
+
+- 字段放在第一维，单个字段的 (交易日 × 标的) 宽表是一段连续内存，取某字段某区间即为零拷贝视图
+- 交易日 / 标的两维预留容量，新交易日、新标的原地追加；超出容量时整体扩容（写临时文件后原子替换，
+  已打开的读者继续使用旧文件）
+- 先写数据、后原子替换索引：读者只能看到索引中已发布的交易日
+- 采集器每次运行结束后调用 sync_from_db 增量追加（重读最近 overlap_days 天以吸收修正）；
+  重叠窗口内与数据库不一致的标的（除权后前复权全历史重拉）整列从数据库重新载入
+"""
+
+import json
+import os
+import threading
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+from sqlalchemy import bindparam, text
+
+from app.core.config import settings
+
+# 资产类别 -> (数据库表, 标的列, 字段)
+CUBE_ASSETS = {
+    'stock': ('stock_daily_prices', 'symbol', ('open', 'high', 'low', 'close', 'volume', 'turnover_rate')),
+    'etf': ('etf_daily_prices', 'symbol', ('open', 'high', 'low', 'close', 'volume')),
+    'sector': ('sector_daily_prices', 'sector_name', ('open', 'high', 'low', 'close', 'volume')),
+}
+
+_DATE_CHUNK = 256
+_SYMBOL_CHUNK = 512
+# 重叠窗口比对的相对容差（浮点往返误差以内视为一致）
+_CHANGE_RTOL = 1e-6
+
+
+def _round_up(n: int, chunk: int) -> int:
+    return max(chunk, -(-n // chunk) * chunk)
+
+
+class PriceCube:
+    """单个资产类别的内存映射价格立方体"""
+
+    def __init__(self, root: str, asset: str):
+        """
+        Args:
+            root: 立方体根目录
+            asset: 资产类别（stock / etf / sector）
+        """
+        if asset not in CUBE_ASSETS:
+            raise ValueError(f"未知资产类别: {asset}")
+        self.asset = asset
+        self.table, self.key, self.fields = CUBE_ASSETS[asset]
+        self.fields = list(self.fields)
+        self.dir = os.path.join(root, asset)
+        self.cube_path = os.path.join(self.dir, 'cube.npy')
+        self.index_path = os.path.join(self.dir, 'index.json')
+        self._lock = threading.Lock()
+
+        self.dates = pd.DatetimeIndex([], name='trade_date')
+        self.symbols = pd.Index([], name=self.key)
+        self._cube = None
+        self._index_mtime = None
+
+    @staticmethod
+    def asset_for_table(table: str) -> Optional[str]:
+        """数据库表名 -> 资产类别（不是K线表时返回 None）"""
+        for asset, (name, _, _) in CUBE_ASSETS.items():
+            if name == table:
+                return asset
+        return None
+
+    def exists(self) -> bool:
+        return os.path.exists(self.index_path) and os.path.exists(self.cube_path)
+
+    # ================= 打开 =================
+
+    def refresh(self):
+        """索引文件有更新时重新映射（只读）"""
+        if not self.exists():
+            return self
+        mtime = os.stat(self.index_path).st_mtime_ns
+        if mtime == self._index_mtime and self._cube is not None:
+            return self
+
+        with open(self.index_path, encoding='utf-8') as f:
+            index = json.load(f)
+        self.fields = index['fields']
+        self.dates = pd.DatetimeIndex(pd.to_datetime(index['dates']), name='trade_date')
+        self.symbols = pd.Index(index['symbols'], name=self.key)
+        self._cube = np.load(self.cube_path, mmap_mode='r')
+        self._index_mtime = mtime
+        return self
+
+    @property
+    def last_date(self) -> Optional[pd.Timestamp]:
+        self.refresh()
+        return self.dates[-1] if len(self.dates) else None
+
+    # ================= 读取 =================
+
+    def _locate(self, start_date=None, end_date=None, symbols: Iterable[str] = None):
+        """日期范围 -> 行切片，标的列表 -> 列位置（None 表示全部）"""
+        self.refresh()
+        lo = self.dates.searchsorted(pd.Timestamp(start_date), side='left') if start_date else 0
+        hi = self.dates.searchsorted(pd.Timestamp(end_date), side='right') if end_date else len(self.dates)
+        if symbols is None:
+            return slice(lo, hi), None, self.symbols
+        cols = self.symbols.get_indexer(pd.Index(symbols).unique())
+        cols = np.sort(cols[cols >= 0])
+        return slice(lo, hi), cols, self.symbols[cols]
+
+    def panel(self, field: str, start_date=None, end_date=None, symbols: Iterable[str] = None) -> pd.DataFrame:
+        """
+        单字段宽表（交易日 × 标的），日期范围含两端
+
+        不指定 symbols 时为内存映射上的只读视图（零拷贝）；指定时按列取出（一次拷贝）
+        """
+        rows, cols, columns = self._locate(start_date, end_date, symbols)
+        if self._cube is None:
+            return pd.DataFrame(index=self.dates, columns=columns, dtype=float)
+        values = self._cube[self.fields.index(field), rows, :len(self.symbols)]
+        if cols is not None:
+            values = values[:, cols]
+        return pd.DataFrame(values, index=self.dates[rows], columns=columns, copy=False)
+
+    def to_long(self, fields: List[str] = None, start_date=None, end_date=None,
+                symbols: Iterable[str] = None) -> pd.DataFrame:
+        """
+        长表（标的, trade_date, 字段...），只包含有K线（close 非 NaN）的格子，按 trade_date 排序
+        """
+        fields = list(fields or self.fields)
+        rows, cols, columns = self._locate(start_date, end_date, symbols)
+        if self._cube is None:
+            return pd.DataFrame(columns=[self.key, 'trade_date'] + fields)
+
+        def block(field):
+            values = self._cube[self.fields.index(field), rows, :len(self.symbols)]
+            return values[:, cols] if cols is not None else values
+
+        r, c = np.nonzero(~np.isnan(block('close')))
+        df = pd.DataFrame({
+            self.key: np.asarray(columns, dtype=object)[c],
+            'trade_date': self.dates[rows][r],
+        })
+        for field in fields:
+            df[field] = block(field)[r, c]
+        return df
+
+    # ================= 写入 =================
+
+    def _publish(self, cube, dates, symbols):
+        """原子替换索引文件"""
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'fields': self.fields,
+                'dates': [d.strftime('%Y-%m-%d') for d in dates],
+                'symbols': list(symbols),
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+        self._cube, self.dates, self.symbols = cube, dates, symbols
+        self._index_mtime = os.stat(self.index_path).st_mtime_ns
+
+    def _allocate(self, n_dates: int, n_symbols: int, old=None, old_rows=None, n_old_symbols: int = 0):
+        """新建（或扩容）立方体文件，旧数据按 old_rows 放到新行位置"""
+        os.makedirs(self.dir, exist_ok=True)
+        tmp_path = self.cube_path + '.tmp'
+        shape = (len(self.fields), _round_up(n_dates, _DATE_CHUNK), _round_up(n_symbols, _SYMBOL_CHUNK))
+        cube = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float64, shape=shape)
+        cube[...] = np.nan
+        if old is not None and len(old_rows):
+            cube[:, old_rows, :n_old_symbols] = old[:, :len(old_rows), :n_old_symbols]
+        cube.flush()
+        del cube
+        os.replace(tmp_path, self.cube_path)
+        return np.load(self.cube_path, mmap_mode='r+')
+
+    def update(self, df: pd.DataFrame) -> int:
+        """
+        按 (标的, 交易日) 写入K线（同键覆盖）
+
+        新交易日晚于已有交易日、容量足够时原地追加；插入更早的交易日或超出容量时整体重建
+
+        Args:
+            df: K线长表（标的列、trade_date 与字段列，缺失字段按 NaN 处理）
+
+        Returns:
+            int: 写入的行数
+        """
+        if df is None or df.empty:
+            return 0
+        df = df.drop_duplicates([self.key, 'trade_date'], keep='last')
+        bar_dates = pd.to_datetime(df['trade_date']).dt.normalize()
+
+        with self._lock:
+            self.refresh()
+            old_dates, old_symbols = self.dates, self.symbols
+            old = np.load(self.cube_path, mmap_mode='r+') if self.exists() else None
+
+            dates = old_dates.union(pd.DatetimeIndex(bar_dates.unique())).rename('trade_date')
+            symbols = old_symbols.append(pd.Index(df[self.key].unique()).difference(old_symbols)).rename(self.key)
+
+            appended_only = len(old_dates) == 0 or dates[:len(old_dates)].equals(old_dates)
+            fits = old is not None and len(dates) <= old.shape[1] and len(symbols) <= old.shape[2]
+            if appended_only and fits:
+                cube = old
+                # 未发布的新行 / 新列可能残留上次中断写入的数据，先清空
+                cube[:, len(old_dates):len(dates), :len(symbols)] = np.nan
+                cube[:, :len(old_dates), len(old_symbols):len(symbols)] = np.nan
+            else:
+                logger.info(f"   📦 价格立方体 [{self.asset}] 重建: {len(dates)} 个交易日 × {len(symbols)} 个标的")
+                old_rows = dates.get_indexer(old_dates)
+                cube = self._allocate(len(dates), len(symbols), old, old_rows, len(old_symbols))
+
+            rows = dates.get_indexer(bar_dates)
+            cols = symbols.get_indexer(df[self.key])
+            for i, field in enumerate(self.fields):
+                if field in df.columns:
+                    cube[i, rows, cols] = pd.to_numeric(df[field], errors='coerce').to_numpy(dtype=np.float64)
+                else:
+                    cube[i, rows, cols] = np.nan
+            cube.flush()
+
+            self._publish(cube, dates, symbols)
+        return len(df)
+
+    def changed_symbols(self, df: pd.DataFrame) -> List[str]:
+        """
+        与立方体已有格子比对，返回任一字段取值变化的标的（双方都有值才比较）
+
+        Args:
+            df: 从数据库读出的K线长表
+        """
+        self.refresh()
+        if self._cube is None or df.empty:
+            return []
+        rows = self.dates.get_indexer(pd.to_datetime(df['trade_date']).dt.normalize())
+        cols = self.symbols.get_indexer(df[self.key])
+        known = (rows >= 0) & (cols >= 0)
+        if not known.any():
+            return []
+        rows, cols = rows[known], cols[known]
+        changed = np.zeros(len(rows), dtype=bool)
+        for i, field in enumerate(self.fields):
+            new = pd.to_numeric(df[field], errors='coerce').to_numpy(dtype=np.float64)[known]
+            old = self._cube[i, rows, cols]
+            both = ~np.isnan(new) & ~np.isnan(old)
+            changed |= both & ~np.isclose(new, old, rtol=_CHANGE_RTOL, atol=0.0)
+        return sorted(set(df[self.key].to_numpy()[known][changed]))
+
+    def reload_symbols(self, engine, symbols: List[str]) -> int:
+        """
+        从数据库整列重新载入指定标的的全部历史（库里已没有的交易日置为 NaN）
+
+        Returns:
+            int: 写入的行数
+        """
+        if not symbols:
+            return 0
+        columns = ', '.join([self.key, 'trade_date'] + self.fields)
+        query = text(f"SELECT {columns} FROM {self.table} WHERE {self.key} IN :symbols").bindparams(
+            bindparam('symbols', expanding=True)
+        )
+        df = pd.read_sql(query, engine, params={'symbols': list(symbols)})
+        df['trade_date'] = pd.to_datetime(df['trade_date']).dt.normalize()
+        self.refresh()
+        # 补齐立方体已有交易日，覆盖掉旧的整列
+        grid = pd.MultiIndex.from_product([list(symbols), self.dates], names=[self.key, 'trade_date'])
+        df = df.drop_duplicates([self.key, 'trade_date'], keep='last').set_index([self.key, 'trade_date'])
+        df = df.reindex(df.index.union(grid)).reset_index()
+        return self.update(df)
+
+    def sync_from_db(self, engine, overlap_days: int = 10) -> int:
+        """
+        从数据库增量同步：已有数据时重读最后 overlap_days 天之后的K线，否则逐月全量导入
+
+        重叠窗口内取值与立方体不一致的标的（除权后前复权历史被整体重写）整列重新载入，
+        避免窗口之前的历史停留在旧的复权基准上
+
+        Returns:
+            int: 写入的行数
+        """
+        columns = ', '.join([self.key, 'trade_date'] + self.fields)
+        last = self.last_date
+        if last is not None:
+            since = (last - pd.Timedelta(days=overlap_days)).strftime('%Y-%m-%d')
+            df = pd.read_sql(text(f"SELECT {columns} FROM {self.table} WHERE trade_date >= :since"),
+                             engine, params={'since': since})
+            changed = self.changed_symbols(df)
+            total = self.update(df)
+            if changed:
+                logger.info(f"   📦 价格立方体 [{self.asset}] {len(changed)} 个标的历史已变化，整列重新载入")
+                total += self.reload_symbols(engine, changed)
+            return total
+
+        bounds = pd.read_sql(text(f"SELECT MIN(trade_date) AS lo, MAX(trade_date) AS hi FROM {self.table}"), engine)
+        if bounds.empty or pd.isna(bounds.loc[0, 'lo']):
+            return 0
+        total = 0
+        lo, hi = pd.to_datetime(bounds.loc[0, 'lo']), pd.to_datetime(bounds.loc[0, 'hi'])
+        for month_start in pd.date_range(lo.replace(day=1), hi, freq='MS'):
+            month_end = month_start + pd.offsets.MonthBegin(1)
+            df = pd.read_sql(
+                text(f"SELECT {columns} FROM {self.table} WHERE trade_date >= :lo AND trade_date < :hi"),
+                engine, params={'lo': month_start.strftime('%Y-%m-%d'), 'hi': month_end.strftime('%Y-%m-%d')},
+            )
+            total += self.update(df)
+        return total
+
+
+# ================= 全局实例 =================
+
+_cubes = {}
+_cubes_lock = threading.Lock()
+
+
+def get_price_cube(asset: str, engine=None) -> Optional[PriceCube]:
+    """
+    读取方入口：settings.PRICE_CUBE_ENABLED 且立方体已建立时返回实例（进程内按资产复用同一映射）
+
+    Args:
+        asset: 资产类别
+        engine: 传入时校验新鲜度——立方体最后交易日早于采集水位时返回 None（调用方回退到数据库）
+
+    Returns:
+        PriceCube 或 None
+    """
+    if not settings.PRICE_CUBE_ENABLED or asset not in CUBE_ASSETS:
+        return None
+    with _cubes_lock:
+        cube = _cubes.get(asset)
+        if cube is None:
+            cube = _cubes[asset] = PriceCube(settings.PRICE_CUBE_DIR, asset)
+    if not cube.exists():
+        return None
+
+    if engine is not None:
+        try:
+            latest = pd.read_sql(
+                text("SELECT MAX(last_date) AS d FROM collection_watermarks WHERE table_name = :t"),
+                engine, params={'t': cube.table},
+            ).loc[0, 'd']
+        except Exception:
+            latest = None  # 无水位表时不做校验
+        if latest is not None and not pd.isna(latest) and cube.last_date < pd.Timestamp(latest).normalize():
+            logger.warning(f"⚠️ 价格立方体 [{asset}] 落后于采集水位 ({cube.last_date.date()} < {latest})，回退到数据库")
+            return None
+    return cube
@@ -1,14 +1,36 @@
 """
 EvoAlpha OS - 同步模块：云端导入器
 触发CockroachDB IMPORT命令，从R2导入CSV数据
+
+- import_from_r2: IMPORT TABLE，只能导入新表（首次全量）
+- merge_from_r2: 增量合并到已有表：IMPORT INTO 临时表 → INSERT ... ON CONFLICT DO UPDATE → 删除临时表
+- merge_parquet: 同上，但 CockroachDB 的 IMPORT 不读 Parquet，由客户端按行组批量写入临时表
+  （列类型来自文件 schema，日期 / 数值无需再解析）
 """
 
+import uuid
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy import text
 from loguru import logger
 from typing import List
 
 
+def build_merge_sql(table_name: str, staging_table: str, columns: List[str], key_columns: List[str]) -> str:
+    """临时表合并到目标表的 INSERT ... SELECT ... ON CONFLICT 语句（只有主键列时 DO NOTHING）"""
+    column_list = ", ".join(columns)
+    key_list = ", ".join(key_columns)
+    updates = [c for c in columns if c not in key_columns]
+    if updates:
+        conflict = f"DO UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in updates)}"
+    else:
+        conflict = "DO NOTHING"
+    return (
+        f"INSERT INTO {table_name} ({column_list}) "
+        f"SELECT {column_list} FROM {staging_table} "
+        f"ON CONFLICT ({key_list}) {conflict}"
+    )
+
+
 class CloudImporter:
     """云端数据库导入器"""
 
@@ -64,6 +86,112 @@ class CloudImporter:
             logger.error(f"导入失败: {e}")
             raise
 
+    async def merge_from_r2(
+        self,
+        table_name: str,
+        r2_urls: List[str],
+        columns: List[str],
+        key_columns: List[str],
+    ) -> int:
+        """
+        把增量分区文件合并到已有表（新增行插入、已有主键更新）
+
+        Args:
+            table_name: 目标表名
+            r2_urls: 分区文件URL（一次 IMPORT 并行读取）
+            columns: CSV列顺序（导出清单中的 columns）
+            key_columns: 主键列
+
+        Returns:
+            合并的行数
+        """
+        if not r2_urls:
+            return 0
+
+        staging_table = f"{table_name}_sync_{uuid.uuid4().hex[:8]}"
+        column_list = ", ".join(columns)
+        url_list = ", ".join(f"'{url}'" for url in r2_urls)
+        logger.info(f"开始增量合并: {table_name} <- {len(r2_urls)} 个分区")
+
+        try:
+            async with self.engine.begin() as conn:
+                await conn.execute(text(f"CREATE TABLE {staging_table} (LIKE {table_name} INCLUDING ALL)"))
+            try:
+                async with self.engine.begin() as conn:
+                    # 空字段按 NULL 导入（与 pandas to_csv 的缺失值一致）
+                    await conn.execute(text(
+                        f"IMPORT INTO {staging_table} ({column_list}) CSV DATA ({url_list}) "
+                        f"WITH skip = '1', nullif = ''"
+                    ))
+                async with self.engine.begin() as conn:
+                    result = await conn.execute(
+                        text(build_merge_sql(table_name, staging_table, columns, key_columns))
+                    )
+                    merged = result.rowcount
+            finally:
+                async with self.engine.begin() as conn:
+                    await conn.execute(text(f"DROP TABLE IF EXISTS {staging_table}"))
+
+            logger.success(f"增量合并完成: {table_name} ({merged} 条)")
+            return merged
+
+        except Exception as e:
+            logger.error(f"增量合并失败: {table_name}: {e}")
+            raise
+
+    async def merge_parquet(self, table_name: str, paths: List[str], key_columns: List[str]) -> int:
+        """
+        把 Parquet 分区文件合并到已有表（每个行组一次批量 INSERT 到临时表，最后一次合并）
+
+        Args:
+            table_name: 目标表名
+            paths: 本地 Parquet 文件路径
+            key_columns: 主键列
+
+        Returns:
+            合并的行数
+        """
+        if not paths:
+            return 0
+
+        from app.sync.parquet_writer import _pyarrow
+        pq = _pyarrow().parquet
+
+        staging_table = f"{table_name}_sync_{uuid.uuid4().hex[:8]}"
+        columns = pq.ParquetFile(paths[0]).schema_arrow.names
+        insert_sql = text(
+            f"INSERT INTO {staging_table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join(':' + c for c in columns)})"
+        )
+        logger.info(f"开始增量合并(Parquet): {table_name} <- {len(paths)} 个分区")
+
+        try:
+            async with self.engine.begin() as conn:
+                await conn.execute(text(f"CREATE TABLE {staging_table} (LIKE {table_name} INCLUDING ALL)"))
+            try:
+                async with self.engine.begin() as conn:
+                    for path in paths:
+                        parquet_file = pq.ParquetFile(path)
+                        for i in range(parquet_file.num_row_groups):
+                            records = parquet_file.read_row_group(i, columns=columns).to_pylist()
+                            if records:
+                                await conn.execute(insert_sql, records)
+                async with self.engine.begin() as conn:
+                    result = await conn.execute(
+                        text(build_merge_sql(table_name, staging_table, columns, key_columns))
+                    )
+                    merged = result.rowcount
+            finally:
+                async with self.engine.begin() as conn:
+                    await conn.execute(text(f"DROP TABLE IF EXISTS {staging_table}"))
+
+            logger.success(f"增量合并完成: {table_name} ({merged} 条)")
+            return merged
+
+        except Exception as e:
+            logger.error(f"增量合并失败: {table_name}: {e}")
+            raise
+
     async def import_tables(self, import_config: List[dict]):
         """
         批量导入表
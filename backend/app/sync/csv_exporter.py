@@ -1,8 +1,14 @@
 """
 EvoAlpha OS - 同步模块：CSV导出器
 将本地SQLite数据导出为CSV文件，准备上传到R2
+
+流式导出：每批数据读出后立即写入（gzip）文件流，峰值内存只与 batch_size 有关、与表大小无关
+增量导出：按 sync_state.SYNC_TABLES 的水位列只导出新增 / 变动的行，按日期分区写出
+Parquet：format='parquet' 时按表结构生成显式 schema，zstd 压缩、每批一个行组（见 parquet_writer）
 """
 
+import os
+import time
 import sqlite3
 import pandas as pd
 from loguru import logger
@@ -10,6 +16,34 @@ from pathlib import Path
 from typing import List
 import gzip
 
+from app.sync.sync_state import (
+    REEXPORT_KEYS, SYNC_REEXPORT_TABLE, SYNC_TABLES, ReexportLog, SyncWatermarks, table_since,
+)
+
+FORMATS = ("csv", "parquet")
+
+
+class _CsvChunkWriter:
+    """逐批写入单个 CSV（gzip）文件，只有第一批写表头"""
+
+    def __init__(self, path, compress: bool = True, compresslevel: int = 6):
+        self.raw = open(path, "wb")
+        # 固定 gzip 头（不写文件名与时间戳）：内容相同的导出字节一致，上传时可按内容哈希跳过
+        self.out = gzip.GzipFile(filename="", mode="wb", fileobj=self.raw, compresslevel=compresslevel, mtime=0) \
+            if compress else self.raw
+        self.header = True
+
+    def write(self, df: pd.DataFrame) -> int:
+        """写入一批数据，返回未压缩字节数"""
+        data = df.to_csv(index=False, header=self.header).encode("utf-8")
+        self.out.write(data)
+        self.header = False
+        return len(data)
+
+    def close(self):
+        self.out.close()
+        self.raw.close()
+
 
 class CSVExporter:
     """CSV导出器"""
@@ -18,64 +52,108 @@ class CSVExporter:
         self.db_path = db_path
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        # 表名 -> 最近一次导出统计（rows / bytes / file_bytes / elapsed / rows_per_sec）
+        self.stats = {}
 
-    def export_table_to_csv(
-        self, table_name: str, compress: bool = True, batch_size: int = 10000
+    @staticmethod
+    def _suffix(format: str, compress: bool = True) -> str:
+        if format == "parquet":
+            return ".parquet"
+        return ".csv.gz" if compress else ".csv"
+
+    @staticmethod
+    def _writer_factory(format: str, compress: bool = True, compresslevel: int = 6):
+        """返回 (临时路径, sqlite连接, 表名) -> 分批写入器"""
+        if format not in FORMATS:
+            raise ValueError(f"不支持的导出格式: {format}，可选 {FORMATS}")
+        if format == "parquet":
+            from app.sync.parquet_writer import ParquetChunkWriter, table_schema
+            return lambda path, conn, table_name: ParquetChunkWriter(path, table_schema(conn, table_name))
+        return lambda path, conn, table_name: _CsvChunkWriter(path, compress, compresslevel)
+
+    def _record(self, table_name: str, rows: int, raw_bytes: int, file_bytes: int, start: float, label: str):
+        elapsed = max(time.time() - start, 1e-6)
+        self.stats[table_name] = {
+            "rows": rows,
+            "bytes": raw_bytes,
+            "file_bytes": file_bytes,
+            "elapsed": elapsed,
+            "rows_per_sec": rows / elapsed,
+        }
+        logger.success(
+            f"{label} ({rows} 条, {file_bytes / 1024 / 1024:.2f} MB, "
+            f"原始 {raw_bytes / 1024 / 1024:.2f} MB, {rows / elapsed:,.0f} 行/秒, {elapsed:.1f}秒)"
+        )
+
+    def export_table(
+        self, table_name: str, format: str = "csv", compress: bool = True,
+        batch_size: int = 10000, compresslevel: int = 6
     ) -> str:
         """
-        导出单张表为CSV
+        导出单张表（流式写入，先写临时文件，完成后原子替换）
 
         Args:
             table_name: 表名
-            compress: 是否压缩（gzip）
-            batch_size: 批量读取大小
+            format: 'csv' / 'parquet'
+            compress: CSV 是否压缩（gzip）；Parquet 固定 zstd
+            batch_size: 批量读取大小（Parquet 即行组大小）
+            compresslevel: gzip 压缩级别（6 与默认的 9 体积相差很小，速度快得多）
 
         Returns:
             导出文件路径
         """
-        logger.info(f"开始导出表: {table_name}")
+        logger.info(f"开始导出表: {table_name} ({format})")
+
+        make_writer = self._writer_factory(format, compress, compresslevel)
+        output_file = self.output_dir / f"{table_name}{self._suffix(format, compress)}"
+        tmp_file = output_file.with_name(output_file.name + ".tmp")
+        start = time.time()
+        rows = 0
+        raw_bytes = 0
 
         try:
             # 连接数据库
             conn = sqlite3.connect(self.db_path)
+            try:
+                writer = make_writer(tmp_file, conn, table_name)
+                try:
+                    # 分批读取，逐批写出
+                    query = f"SELECT * FROM {table_name}"
+                    for chunk in pd.read_sql_query(query, conn, chunksize=batch_size):
+                        raw_bytes += writer.write(chunk)
+                        rows += len(chunk)
+                finally:
+                    writer.close()
+            finally:
+                conn.close()
 
-            # 分批读取数据
-            query = f"SELECT * FROM {table_name}"
-            chunks = []
-            for chunk in pd.read_sql_query(query, conn, chunksize=batch_size):
-                chunks.append(chunk)
-
-            df = pd.concat(chunks, ignore_index=True)
-            conn.close()
-
-            logger.info(f"从 {table_name} 读取了 {len(df)} 条记录")
-
-            # 生成文件路径
-            output_file = self.output_dir / f"{table_name}.csv"
-            if compress:
-                output_file = self.output_dir / f"{table_name}.csv.gz"
-
-            # 导出CSV
-            if compress:
-                df.to_csv(output_file, index=False, compression="gzip")
-            else:
-                df.to_csv(output_file, index=False)
-
-            file_size = output_file.stat().st_size / 1024 / 1024  # MB
-            logger.success(f"导出完成: {output_file} ({file_size:.2f} MB)")
-
-            return str(output_file)
+            os.replace(tmp_file, output_file)
 
         except Exception as e:
+            tmp_file.unlink(missing_ok=True)
             logger.error(f"导出表 {table_name} 失败: {e}")
             raise
 
-    def export_all_tables(self, table_names: List[str] = None) -> List[str]:
+        self._record(table_name, rows, raw_bytes, output_file.stat().st_size, start, f"导出完成: {output_file}")
+        return str(output_file)
+
+    def export_table_to_csv(
+        self, table_name: str, compress: bool = True, batch_size: int = 10000, compresslevel: int = 6
+    ) -> str:
+        """导出单张表为CSV（参数见 export_table）"""
+        return self.export_table(table_name, "csv", compress, batch_size, compresslevel)
+
+    def export_table_to_parquet(self, table_name: str, batch_size: int = 100000) -> str:
+        """导出单张表为 Parquet（zstd，每 batch_size 行一个行组）"""
+        return self.export_table(table_name, "parquet", batch_size=batch_size)
+
+    def export_all_tables(self, table_names: List[str] = None, format: str = "csv") -> List[str]:
         """
         导出所有表
 
         Args:
             table_names: 表名列表，如果为空则导出全部
+            format: 'csv' / 'parquet'
 
         Returns:
             导出文件路径列表
@@ -93,17 +171,163 @@ class CSVExporter:
         logger.info(f"开始导出 {len(table_names)} 张表")
 
         export_files = []
+        exported = []
         for table_name in table_names:
             try:
-                file_path = self.export_table_to_csv(table_name)
+                file_path = self.export_table(table_name, format)
                 export_files.append(file_path)
+                exported.append(table_name)
             except Exception as e:
                 logger.error(f"导出表 {table_name} 失败: {e}")
                 continue
 
-        logger.success(f"导出完成，共 {len(export_files)} 个文件")
+        total_rows = sum(self.stats[t]["rows"] for t in exported)
+        total_bytes = sum(self.stats[t]["file_bytes"] for t in exported)
+        logger.success(
+            f"导出完成，共 {len(export_files)} 个文件，{total_rows} 条，{total_bytes / 1024 / 1024:.2f} MB"
+        )
         return export_files
 
+    # ================= 增量导出 =================
+
+    def export_table_delta(
+        self, table_name: str, since: str = None, batch_size: int = 10000,
+        compresslevel: int = 6, format: str = "csv"
+    ) -> dict:
+        """
+        增量导出单张表：水位列 >= since 的行按日期分区写出
+        （{output_dir}/delta/{表名}/{YYYY-MM-DD}.csv.gz 或 .parquet；无水位列的表写出 full.*）；
+        已登记重新导出的标的（见 sync_state.record_reexport）额外导出其全部行
+
+        Args:
+            table_name: 表名（须在 SYNC_TABLES 中声明）
+            since: 起始日期（含），None 表示全量
+            batch_size: 批量读取大小
+            compresslevel: gzip 压缩级别
+            format: 'csv' / 'parquet'
+
+        Returns:
+            dict: 导出清单 {table, format, date_column, key_columns, since, high_water,
+                  columns, files, partitions, rows, file_bytes, reexport_until}
+                  （reexport_until: 本次已覆盖的重新导出登记的最晚登记时间，合并成功后据此清除登记）
+        """
+        date_column, key_columns, _ = SYNC_TABLES[table_name]
+        make_writer = self._writer_factory(format, True, compresslevel)
+        suffix = self._suffix(format)
+        table_dir = self.output_dir / "delta" / table_name
+        table_dir.mkdir(parents=True, exist_ok=True)
+        # 清掉上次导出的分区（含另一种格式），保证清单只包含本次文件
+        for stale_suffix in (".csv.gz", ".parquet"):
+            for stale in table_dir.glob(f"*{stale_suffix}*"):
+                stale.unlink()
+
+        reexport = ReexportLog(self.db_path).pending(table_name) if table_name in REEXPORT_KEYS else {}
+        reexport_until = max(reexport.values()) if reexport else None
+
+        query = f"SELECT * FROM {table_name}"
+        params = ()
+        if date_column:
+            if since:
+                query += f" WHERE {date_column} >= ?"
+                params = (since,)
+                if reexport_until:
+                    query += (f" OR {REEXPORT_KEYS[table_name]} IN (SELECT key_value FROM {SYNC_REEXPORT_TABLE}"
+                              f" WHERE table_name = ? AND recorded_at <= ?)")
+                    params = (since, table_name, reexport_until)
+            query += f" ORDER BY {date_column}"
+        logger.info(f"开始增量导出表: {table_name} ({date_column or '全量'} >= {since or '-'}, {format}"
+                    f"{f', 重新导出 {len(reexport)} 个标的' if since and reexport else ''})")
+
+        entry = {
+            "table": table_name, "format": format, "date_column": date_column, "key_columns": key_columns,
+            "since": since, "high_water": None, "columns": [], "files": [], "partitions": [],
+            "rows": 0, "file_bytes": 0, "reexport_until": reexport_until,
+        }
+        start = time.time()
+        raw_bytes = 0
+        current, tmp_file, writer = None, None, None
+
+        def close_partition():
+            writer.close()
+            final = table_dir / f"{current}{suffix}"
+            os.replace(tmp_file, final)
+            entry["files"].append(str(final))
+            entry["partitions"].append(current)
+
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                for chunk in pd.read_sql_query(query, conn, params=params, chunksize=batch_size):
+                    entry["columns"] = list(chunk.columns)
+                    if date_column:
+                        values = chunk[date_column].dropna().astype(str)
+                        if len(values):
+                            chunk_max = values.max()
+                            if entry["high_water"] is None or chunk_max > entry["high_water"]:
+                                entry["high_water"] = chunk_max
+                        parts = chunk[date_column].astype(str).str[:10].where(chunk[date_column].notna(), "none")
+                    else:
+                        parts = pd.Series("full", index=chunk.index)
+
+                    # 已按水位列排序，同一分区的行在各批次间连续
+                    for part, group in chunk.groupby(parts, sort=False):
+                        if part != current:
+                            if writer is not None:
+                                close_partition()
+                            current = part
+                            tmp_file = table_dir / f"{part}{suffix}.tmp"
+                            writer = make_writer(tmp_file, conn, table_name)
+                        raw_bytes += writer.write(group)
+                        entry["rows"] += len(group)
+                if writer is not None:
+                    close_partition()
+                    writer = None
+            finally:
+                conn.close()
+        except Exception as e:
+            if writer is not None:
+                writer.close()
+                tmp_file.unlink(missing_ok=True)
+            logger.error(f"增量导出表 {table_name} 失败: {e}")
+            raise
+
+        entry["file_bytes"] = sum(Path(f).stat().st_size for f in entry["files"])
+        self._record(
+            table_name, entry["rows"], raw_bytes, entry["file_bytes"], start,
+            f"增量导出完成: {table_name} ({len(entry['files'])} 个分区, 水位 {entry['high_water']})",
+        )
+        return entry
+
+    def export_delta(
+        self, table_names: List[str] = None, watermarks: SyncWatermarks = None, format: str = "csv"
+    ) -> List[dict]:
+        """
+        按已同步水位增量导出多张表（水位本身在云端合并成功后由调用方推进）
+
+        Args:
+            table_names: 表名列表，None 表示 SYNC_TABLES 中的全部表
+            watermarks: 已同步水位，默认读取本地库
+            format: 'csv' / 'parquet'
+
+        Returns:
+            导出清单列表（无新数据的表 rows 为 0、files 为空）
+        """
+        table_names = table_names or list(SYNC_TABLES)
+        watermarks = watermarks or SyncWatermarks(self.db_path)
+
+        entries = []
+        for table_name in table_names:
+            try:
+                entries.append(self.export_table_delta(table_name, since=table_since(table_name, watermarks), format=format))
+            except Exception as e:
+                logger.error(f"增量导出表 {table_name} 失败: {e}")
+                continue
+
+        total_rows = sum(e["rows"] for e in entries)
+        total_bytes = sum(e["file_bytes"] for e in entries)
+        logger.success(f"增量导出完成，{len(entries)} 张表，{total_rows} 条，{total_bytes / 1024 / 1024:.2f} MB")
+        return entries
+
 
 if __name__ == "__main__":
     exporter = CSVExporter()
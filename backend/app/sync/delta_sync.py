@@ -0,0 +1,163 @@
+"""
+EvoAlpha OS - 同步模块：增量同步
+本地SQLite → R2 → CockroachDB 的增量路径：
+按已同步水位导出新增 / 变动的行（按日期分区）→ 上传R2 → 合并到云端已有表 → 推进水位
+
+每晚的传输量与当天新增数据成正比；回看窗口之外被整段改写的标的（除权后前复权历史重拉）
+由采集器登记后整体重新导出（见 sync_state.record_reexport）。删除不会同步（本地只追加 / 覆盖），
+未登记的、早于回看窗口的旧行修改也不会同步
+命令行入口按表流水线执行三个阶段并支持断点续传（见 sync_pipeline）
+"""
+
+import os
+import argparse
+from typing import List
+from loguru import logger
+
+from app.sync.csv_exporter import CSVExporter
+from app.sync.cloud_importer import CloudImporter
+from app.sync.sync_state import SYNC_TABLES, ReexportLog, SyncWatermarks
+
+
+class DeltaSync:
+    """增量同步编排"""
+
+    def __init__(self, exporter: CSVExporter, r2_manager, importer: CloudImporter,
+                 watermarks: SyncWatermarks = None, prefix: str = "delta", format: str = "csv"):
+        """
+        Args:
+            exporter: CSV导出器（提供本地库路径与导出目录）
+            r2_manager: R2Manager
+            importer: 已连接的 CloudImporter
+            watermarks: 已同步水位，默认读取导出器的本地库
+            prefix: R2对象键前缀
+            format: 'csv'（云端 IMPORT 直接读取R2）/ 'parquet'（同时作为分析用数据上传，云端由客户端按行组写入）
+        """
+        self.exporter = exporter
+        self.r2_manager = r2_manager
+        self.importer = importer
+        self.watermarks = watermarks or SyncWatermarks(exporter.db_path)
+        self.reexports = ReexportLog(exporter.db_path)
+        self.prefix = prefix
+        self.format = format
+
+    def upload_entry(self, entry: dict) -> List[str]:
+        """并行上传一张表的增量分区（内容未变化的分区，如回看窗口内的旧日期，跳过），返回对象URL"""
+        if not entry["files"]:
+            return []
+        manifest = self.r2_manager.sync_files(entry["files"], prefix=f"{self.prefix}/{entry['table']}")
+        if manifest["failed"]:
+            raise RuntimeError(f"{manifest['failed']} 个分区上传失败")
+        return [r["url"] for r in manifest["files"]]
+
+    async def import_entry(self, entry: dict, urls: List[str]) -> int:
+        """把已上传的分区合并到云端，成功后推进水位、清除已覆盖的重新导出登记；返回合并行数"""
+        table_name = entry["table"]
+        merged = 0
+        if not entry["files"]:
+            logger.info(f"{table_name}: 无新数据")
+        elif entry.get("format") == "parquet":
+            merged = await self.importer.merge_parquet(table_name, entry["files"], entry["key_columns"])
+        else:
+            merged = await self.importer.merge_from_r2(table_name, urls, entry["columns"], entry["key_columns"])
+        if entry["files"]:
+            self.watermarks.commit(table_name, entry["high_water"], entry["rows"])
+        if entry.get("reexport_until"):
+            self.reexports.clear(table_name, entry["reexport_until"])
+        return merged
+
+    async def sync_entry(self, entry: dict) -> int:
+        """上传一张表的增量分区并合并到云端，成功后推进水位；返回合并行数"""
+        return await self.import_entry(entry, self.upload_entry(entry))
+
+    async def run(self, table_names: List[str] = None) -> dict:
+        """
+        增量同步多张表（单表失败不影响其他表，其水位不推进，下次重试）
+
+        Returns:
+            dict: 表名 -> {rows, partitions, merged, success, error}
+        """
+        entries = self.exporter.export_delta(table_names, self.watermarks, self.format)
+
+        results = {}
+        for entry in entries:
+            table_name = entry["table"]
+            result = {"rows": entry["rows"], "partitions": len(entry["files"]), "merged": 0, "success": True}
+            try:
+                result["merged"] = await self.sync_entry(entry)
+            except Exception as e:
+                result.update(success=False, error=str(e))
+                logger.error(f"增量同步 {table_name} 失败: {e}")
+            results[table_name] = result
+
+        success_count = sum(1 for r in results.values() if r["success"])
+        total_rows = sum(r["rows"] for r in results.values())
+        logger.success(f"增量同步完成: {success_count}/{len(results)} 张表，{total_rows} 条")
+        return results
+
+
+async def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="本地SQLite → R2 → CockroachDB 增量同步")
+    parser.add_argument("--tables", nargs="*", default=None, help="要同步的表（默认 SYNC_TABLES 全部）")
+    parser.add_argument("--db", default="./data/local_quant.db", help="本地数据库路径")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv", help="分区文件格式")
+    parser.add_argument("--export-only", action="store_true", help="只导出增量分区，不上传、不推进水位")
+    parser.add_argument("--resume", action="store_true", help="从上次失败的断点清单继续（已完成的表 / 阶段不重做）")
+    parser.add_argument("--queue-size", type=int, default=2, help="流水线相邻阶段之间最多积压的表数")
+    parser.add_argument("--status", action="store_true", help="查看各表已同步水位")
+    parser.add_argument("--reset", nargs="*", default=None, help="清除水位（不带表名时清除全部），下次全量导出")
+    args = parser.parse_args()
+
+    unknown = [t for t in (args.tables or []) + (args.reset or []) if t not in SYNC_TABLES]
+    if unknown:
+        parser.error(f"未声明的同步表: {unknown}")
+
+    watermarks = SyncWatermarks(args.db)
+    if args.status:
+        states = watermarks.all()
+        for table_name in SYNC_TABLES:
+            state = states.get(table_name)
+            logger.info(f"  {table_name}: {state['high_water'] + ' @ ' + state['synced_at'] if state else '未同步'}")
+        return 0
+    if args.reset is not None:
+        for table_name in args.reset or [None]:
+            watermarks.reset(table_name)
+        logger.info(f"已清除水位: {args.reset or '全部'}")
+        return 0
+
+    exporter = CSVExporter(db_path=args.db)
+    if args.export_only:
+        exporter.export_delta(args.tables, watermarks, args.format)
+        return 0
+
+    from app.sync.r2_manager import R2Manager
+    from app.sync.sync_pipeline import SyncPipeline
+
+    r2_manager = R2Manager(
+        account_id=os.getenv("R2_ACCOUNT_ID"),
+        access_key_id=os.getenv("R2_ACCESS_KEY_ID"),
+        secret_access_key=os.getenv("R2_SECRET_ACCESS_KEY"),
+        bucket_name=os.getenv("R2_BUCKET_NAME"),
+    )
+    db_url = (
+        f"postgresql+asyncpg://{os.getenv('CLOUD_DB_USER')}:{os.getenv('CLOUD_DB_PASSWORD')}"
+        f"@{os.getenv('CLOUD_DB_HOST')}:{os.getenv('CLOUD_DB_PORT')}/{os.getenv('CLOUD_DB_NAME')}"
+        f"?sslmode={os.getenv('CLOUD_DB_SSLMODE')}"
+    )
+    importer = CloudImporter(db_url)
+    await importer.connect()
+    try:
+        pipeline = SyncPipeline(
+            exporter, r2_manager, importer, watermarks, format=args.format, queue_size=args.queue_size
+        )
+        results = await pipeline.run(args.tables, resume=args.resume)
+    finally:
+        await importer.close()
+    return 0 if all(r["success"] for r in results.values()) else 1
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    exit(asyncio.run(main()))
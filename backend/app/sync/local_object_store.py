@@ -0,0 +1,99 @@
+"""
+EvoAlpha OS - 同步模块：本地对象存储
+以本地目录模拟 S3 兼容客户端（R2Manager 用到的 boto3 接口子集），用于测试与离线演练：
+
+    {root}/{bucket}/{key}                 对象内容
+    {root}/.meta/{bucket}/{key}.json      对象元数据（Metadata / ContentType）
+"""
+
+import io
+import os
+import json
+import shutil
+import threading
+from types import SimpleNamespace
+
+
+class ObjectNotFound(KeyError):
+    """对象不存在（与 botocore ClientError 一样带 response['Error']['Code']）"""
+
+    def __init__(self, key: str):
+        super().__init__(key)
+        self.response = {"Error": {"Code": "404", "Message": f"Not Found: {key}"}}
+
+
+class LocalObjectStore:
+    """本地目录版 S3 客户端"""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.meta = SimpleNamespace(endpoint_url=f"file://{self.root}")
+        self._lock = threading.Lock()
+        # 实际写入的对象键（测试中用于断言跳过未变化的文件）
+        self.put_keys = []
+
+    def _object_path(self, bucket: str, key: str) -> str:
+        return os.path.join(self.root, bucket, key)
+
+    def _meta_path(self, bucket: str, key: str) -> str:
+        return os.path.join(self.root, ".meta", bucket, key + ".json")
+
+    def _write_meta(self, bucket: str, key: str, extra: dict):
+        meta = {"Metadata": dict(extra.get("Metadata") or {}), "ContentType": extra.get("ContentType")}
+        path = self._meta_path(bucket, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(meta, f)
+        with self._lock:
+            self.put_keys.append(key)
+
+    # ================= boto3 接口子集 =================
+
+    def upload_file(self, Filename, Bucket, Key, ExtraArgs=None, Callback=None, Config=None):
+        path = self._object_path(Bucket, Key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        shutil.copyfile(Filename, tmp_path)
+        os.replace(tmp_path, path)
+        self._write_meta(Bucket, Key, ExtraArgs or {})
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        path = self._object_path(Bucket, Key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(Body.encode("utf-8") if isinstance(Body, str) else Body)
+        self._write_meta(Bucket, Key, kwargs)
+        return {}
+
+    def head_object(self, Bucket, Key):
+        path = self._object_path(Bucket, Key)
+        if not os.path.exists(path):
+            raise ObjectNotFound(Key)
+        meta = {}
+        if os.path.exists(self._meta_path(Bucket, Key)):
+            with open(self._meta_path(Bucket, Key)) as f:
+                meta = json.load(f)
+        return {"ContentLength": os.path.getsize(path), "Metadata": meta.get("Metadata", {}),
+                "ContentType": meta.get("ContentType")}
+
+    def get_object(self, Bucket, Key):
+        head = self.head_object(Bucket, Key)
+        with open(self._object_path(Bucket, Key), "rb") as f:
+            head["Body"] = io.BytesIO(f.read())
+        return head
+
+    def list_objects_v2(self, Bucket, Prefix=""):
+        bucket_dir = os.path.join(self.root, Bucket)
+        contents = []
+        for dirpath, _, filenames in os.walk(bucket_dir):
+            for name in filenames:
+                key = os.path.relpath(os.path.join(dirpath, name), bucket_dir).replace(os.sep, "/")
+                if key.startswith(Prefix) and not key.endswith(".tmp"):
+                    contents.append({"Key": key, "Size": os.path.getsize(os.path.join(dirpath, name))})
+        return {"Contents": sorted(contents, key=lambda c: c["Key"]), "KeyCount": len(contents)}
+
+    def delete_object(self, Bucket, Key):
+        for path in (self._object_path(Bucket, Key), self._meta_path(Bucket, Key)):
+            if os.path.exists(path):
+                os.remove(path)
+        return {}
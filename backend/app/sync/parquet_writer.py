@@ -0,0 +1,118 @@
+"""
+EvoAlpha OS - 同步模块：Parquet 写入
+按 SQLite 声明类型生成显式 Arrow schema（日期为 date32、整数为 int64 ...），
+逐批写入行组（zstd 压缩，保留行组统计信息），下游无需再解析日期 / 推断类型
+
+依赖 pyarrow（仅在实际读写时导入）
+"""
+
+import pandas as pd
+
+# 写入 Parquet 文件元数据的键
+META_TABLE = b"evoalpha.table"
+META_PRIMARY_KEY = b"evoalpha.primary_key"
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet 导出需要 pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def arrow_type(declared: str):
+    """SQLite 声明类型 -> Arrow 类型（按 SQLite 类型亲和性规则，未知类型按字符串）"""
+    pa = _pyarrow()
+    upper = (declared or "").upper()
+    if "INT" in upper:
+        return pa.int64()
+    if any(t in upper for t in ("REAL", "FLOA", "DOUB", "NUMERIC", "DECIMAL")):
+        return pa.float64()
+    if "TIMESTAMP" in upper or "DATETIME" in upper:
+        return pa.timestamp("s")
+    if upper.startswith("DATE"):
+        return pa.date32()
+    return pa.string()
+
+
+def table_schema(conn, table_name: str):
+    """
+    从 SQLite 表结构生成 Arrow schema（主键写入 schema 元数据）
+
+    Args:
+        conn: sqlite3 连接
+        table_name: 表名
+    """
+    pa = _pyarrow()
+    info = conn.execute(f"PRAGMA table_info({table_name})").fetchall()
+    if not info:
+        raise ValueError(f"表不存在: {table_name}")
+    # PRAGMA table_info: (cid, name, type, notnull, dflt_value, pk)
+    fields = [pa.field(name, arrow_type(declared)) for _, name, declared, _, _, _ in info]
+    primary_key = [row[1] for row in sorted(info, key=lambda r: r[5]) if row[5]]
+    return pa.schema(fields, metadata={
+        META_TABLE: table_name.encode(),
+        META_PRIMARY_KEY: ",".join(primary_key).encode(),
+    })
+
+
+def to_arrow(df: pd.DataFrame, schema):
+    """
+    按 schema 转换 DataFrame（无法解析的值置空，SQLite 动态类型下同列可能混有异常值）
+
+    日期列逐值解析：同一列常混有 '2024-01-02' 与 '2024-01-03 00:00:00'，
+    按首个值推断格式会把另一种格式全部变成空值。主键列出现空值时抛出 ValueError
+    """
+    pa = _pyarrow()
+    primary_key = (schema.metadata or {}).get(META_PRIMARY_KEY, b"").decode().split(",")
+    arrays = []
+    for field in schema:
+        column = df[field.name] if field.name in df.columns else pd.Series([None] * len(df), dtype=object)
+        if pa.types.is_date32(field.type):
+            values = pd.to_datetime(column, errors="coerce", format="mixed").dt.date
+        elif pa.types.is_timestamp(field.type):
+            values = pd.to_datetime(column, errors="coerce", format="mixed")
+        elif pa.types.is_integer(field.type):
+            values = pd.to_numeric(column, errors="coerce").astype("Int64")
+        elif pa.types.is_floating(field.type):
+            values = pd.to_numeric(column, errors="coerce")
+        else:
+            values = column.map(lambda v: None if v is None or v != v else str(v))
+        array = pa.array(values, type=field.type, from_pandas=True)
+        if field.name in primary_key and array.null_count:
+            bad = column[pd.Series(array.is_null().to_numpy(zero_copy_only=False), index=column.index)]
+            raise ValueError(
+                f"主键列 {field.name} 有 {array.null_count} 个空值或无法解析的值: {bad.head(3).tolist()}"
+            )
+        arrays.append(array)
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+class ParquetChunkWriter:
+    """逐批写入单个 Parquet 文件，每批一个行组"""
+
+    def __init__(self, path, schema, compression: str = "zstd", compression_level: int = 3):
+        """
+        Args:
+            path: 输出路径
+            schema: Arrow schema（见 table_schema）
+            compression: 压缩算法
+            compression_level: 压缩级别（zstd 3 为速度 / 体积的常用折中）
+        """
+        pa = _pyarrow()
+        self.schema = schema
+        self.writer = pa.parquet.ParquetWriter(
+            str(path), schema, compression=compression, compression_level=compression_level,
+            write_statistics=True,
+        )
+
+    def write(self, df: pd.DataFrame) -> int:
+        """写入一批数据，返回未压缩的 Arrow 字节数"""
+        table = to_arrow(df, self.schema)
+        self.writer.write_table(table, row_group_size=max(len(table), 1))
+        return table.nbytes
+
+    def close(self):
+        self.writer.close()
@@ -1,13 +1,34 @@
 """
 EvoAlpha OS - 同步模块：R2管理器
 上传CSV文件到Cloudflare R2对象存储
+
+- 多个文件并行上传（settings.R2_UPLOAD_WORKERS），大文件分片上传
+- 对象元数据携带内容哈希（sha256），远端哈希一致时跳过上传
+- 每次批量同步写一个清单对象（{prefix}/_manifests/{时间}.json），列出本次上传 / 跳过 / 失败的文件
+- 可注入任意 S3 兼容客户端（LocalObjectStore、moto 等）进行测试
 """
 
-import boto3
 from loguru import logger
 from pathlib import Path
 from typing import List
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import os
+import json
+import hashlib
+
+from app.core.config import settings
+
+HASH_METADATA_KEY = "sha256"
+
+
+def file_sha256(file_path, chunk_size: int = 1 << 20) -> str:
+    """文件内容哈希（流式读取）"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
 
 
 class R2Manager:
@@ -15,10 +36,12 @@ class R2Manager:
 
     def __init__(
         self,
-        account_id: str,
-        access_key_id: str,
-        secret_access_key: str,
-        bucket_name: str,
+        account_id: str = None,
+        access_key_id: str = None,
+        secret_access_key: str = None,
+        bucket_name: str = None,
+        s3_client=None,
+        max_workers: int = None,
     ):
         """
         初始化R2客户端
@@ -28,10 +51,24 @@ class R2Manager:
             access_key_id: R2访问密钥ID
             secret_access_key: R2密钥
             bucket_name: 存储桶名称
+            s3_client: 已创建的 S3 兼容客户端（传入时不创建 boto3 客户端）
+            max_workers: 并行上传的文件数，默认 settings.R2_UPLOAD_WORKERS
         """
+        self.bucket_name = bucket_name
+        self.max_workers = max(1, max_workers or settings.R2_UPLOAD_WORKERS)
+        self.transfer_config = None
+
+        if s3_client is not None:
+            self.s3_client = s3_client
+            return
+
         # 构建R2端点
         endpoint = f"https://{account_id}.r2.cloudflarestorage.com"
 
+        # boto3 导入较慢，只在真正创建客户端时导入
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+
         # 创建S3客户端（R2兼容S3 API）
         self.s3_client = boto3.client(
             "s3",
@@ -39,15 +76,61 @@ class R2Manager:
             aws_access_key_id=access_key_id,
             aws_secret_access_key=secret_access_key,
         )
-        self.bucket_name = bucket_name
+        # 超过阈值的文件分片并行上传
+        mb = 1024 * 1024
+        self.transfer_config = TransferConfig(
+            multipart_threshold=settings.R2_MULTIPART_THRESHOLD_MB * mb,
+            multipart_chunksize=settings.R2_MULTIPART_CHUNK_MB * mb,
+            max_concurrency=4,
+        )
+
+    def object_url(self, key: str) -> str:
+        """对象URL（路径风格）"""
+        return f"{self.s3_client.meta.endpoint_url.rstrip('/')}/{self.bucket_name}/{key}"
+
+    def remote_hash(self, key: str):
+        """远端对象的内容哈希；对象不存在或无哈希元数据时返回 None"""
+        try:
+            response = self.s3_client.head_object(Bucket=self.bucket_name, Key=key)
+        except Exception:
+            return None
+        return (response.get("Metadata") or {}).get(HASH_METADATA_KEY)
+
+    def _upload(self, file_path: Path, key: str, skip_unchanged: bool = True) -> dict:
+        """上传单个文件，返回清单记录 {file, key, url, sha256, size, status}"""
+        digest = file_sha256(file_path)
+        record = {
+            "file": file_path.name,
+            "key": key,
+            "url": self.object_url(key),
+            "sha256": digest,
+            "size": file_path.stat().st_size,
+        }
+
+        if skip_unchanged and self.remote_hash(key) == digest:
+            record["status"] = "skipped"
+            logger.info(f"内容未变化，跳过上传: {key}")
+            return record
+
+        extra_args = {"ACL": "public-read", "Metadata": {HASH_METADATA_KEY: digest}}
+        if self.transfer_config is not None:
+            self.s3_client.upload_file(
+                str(file_path), self.bucket_name, key, ExtraArgs=extra_args, Config=self.transfer_config
+            )
+        else:
+            self.s3_client.upload_file(str(file_path), self.bucket_name, key, ExtraArgs=extra_args)
+        record["status"] = "uploaded"
+        logger.success(f"上传成功: {record['url']} ({record['size'] / 1024 / 1024:.2f} MB)")
+        return record
 
-    def upload_file(self, file_path: str, key: str = None) -> str:
+    def upload_file(self, file_path: str, key: str = None, skip_unchanged: bool = True) -> str:
         """
-        上传文件到R2
+        上传文件到R2（远端内容哈希一致时跳过）
 
         Args:
             file_path: 本地文件路径
             key: R2对象键，如果为空则使用文件名
+            skip_unchanged: 远端哈希一致时跳过
 
         Returns:
             R2对象URL
@@ -60,46 +143,92 @@ class R2Manager:
         logger.info(f"开始上传文件到R2: {file_path.name}")
 
         try:
-            # 上传文件
-            self.s3_client.upload_file(
-                str(file_path), self.bucket_name, key, ExtraArgs={"ACL": "public-read"}
-            )
-
-            # 构建公开URL
-            url = f"https://{self.bucket_name}.{self.s3_client._endpoint.host}/{key}"
-
-            logger.success(f"上传成功: {url}")
-            return url
+            return self._upload(file_path, key, skip_unchanged)["url"]
 
         except Exception as e:
             logger.error(f"上传文件失败: {e}")
             raise
 
-    def upload_files(self, file_paths: List[str], prefix: str = "") -> List[str]:
+    def sync_files(
+        self, file_paths: List[str], prefix: str = "", max_workers: int = None,
+        skip_unchanged: bool = True, write_manifest: bool = True,
+    ) -> dict:
         """
-        批量上传文件
+        并行上传一批文件并写清单对象
 
         Args:
             file_paths: 文件路径列表
             prefix: R2对象键前缀
+            max_workers: 并行上传的文件数，默认实例配置
+            skip_unchanged: 远端哈希一致时跳过
+            write_manifest: 是否写清单对象
 
         Returns:
-            R2对象URL列表
+            dict: 清单 {created_at, prefix, manifest_key, files: [记录], changed: [本次上传的键],
+                  uploaded, skipped, failed, uploaded_bytes}
+                  files 与 file_paths 顺序一致，失败记录带 status='failed' 与 error
         """
-        logger.info(f"开始批量上传 {len(file_paths)} 个文件")
+        paths = [Path(p) for p in file_paths]
+        workers = max(1, min(max_workers or self.max_workers, len(paths) or 1))
+        logger.info(f"开始批量上传 {len(paths)} 个文件（{workers} 个并行）")
 
-        urls = []
-        for file_path in file_paths:
+        def upload_one(file_path):
+            key = f"{prefix}/{file_path.name}" if prefix else file_path.name
             try:
-                key = f"{prefix}/{Path(file_path).name}" if prefix else None
-                url = self.upload_file(file_path, key)
-                urls.append(url)
+                return self._upload(file_path, key, skip_unchanged)
             except Exception as e:
                 logger.error(f"上传文件 {file_path} 失败: {e}")
-                continue
+                return {"file": file_path.name, "key": key, "status": "failed", "error": str(e)}
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="r2-upload") as pool:
+            records = list(pool.map(upload_one, paths))
+
+        created_at = datetime.now()
+        manifest = {
+            "created_at": created_at.isoformat(timespec="seconds"),
+            "prefix": prefix,
+            "manifest_key": None,
+            "files": records,
+            "changed": [r["key"] for r in records if r["status"] == "uploaded"],
+            "uploaded": sum(1 for r in records if r["status"] == "uploaded"),
+            "skipped": sum(1 for r in records if r["status"] == "skipped"),
+            "failed": sum(1 for r in records if r["status"] == "failed"),
+            "uploaded_bytes": sum(r["size"] for r in records if r["status"] == "uploaded"),
+        }
+
+        if write_manifest and records:
+            manifest_dir = f"{prefix}/_manifests" if prefix else "_manifests"
+            manifest_key = f"{manifest_dir}/{created_at:%Y%m%dT%H%M%S%f}.json"
+            manifest["manifest_key"] = manifest_key
+            try:
+                self.s3_client.put_object(
+                    Bucket=self.bucket_name, Key=manifest_key,
+                    Body=json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8"),
+                    ContentType="application/json",
+                )
+            except Exception as e:
+                manifest["manifest_key"] = None
+                logger.error(f"写入清单失败: {e}")
+
+        logger.success(
+            f"批量上传完成: 上传 {manifest['uploaded']}，跳过 {manifest['skipped']}，失败 {manifest['failed']}，"
+            f"{manifest['uploaded_bytes'] / 1024 / 1024:.2f} MB"
+        )
+        return manifest
 
-        logger.success(f"批量上传完成，共 {len(urls)} 个文件")
-        return urls
+    def upload_files(self, file_paths: List[str], prefix: str = "") -> List[str]:
+        """
+        批量上传文件（并行，跳过未变化的文件，写清单对象）
+
+        Args:
+            file_paths: 文件路径列表
+            prefix: R2对象键前缀
+
+        Returns:
+            R2对象URL列表（含内容未变化而跳过的文件，不含失败的文件）
+        """
+        manifest = self.sync_files(file_paths, prefix)
+        return [r["url"] for r in manifest["files"] if r["status"] != "failed"]
 
     def list_objects(self, prefix: str = "") -> List[str]:
         """
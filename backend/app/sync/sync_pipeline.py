@@ -0,0 +1,227 @@
+"""
+EvoAlpha OS - 同步模块：流水线同步
+增量同步的三个阶段按表流水线执行，阶段之间用有界队列衔接：
+
+    导出(线程) --队列--> 上传(线程) --队列--> 导入(云端, 异步)
+
+第 N 张表上传的同时导出第 N+1 张、导入第 N-1 张；队列满时上游等待，
+已导出未上传的表最多 queue_size 张（限制本地磁盘占用）
+
+每张表完成一个阶段即写入断点清单（{导出目录}/delta/_pipeline_manifest.json），
+失败后 resume=True 从各表最后完成的阶段继续：已导入的表跳过，已导出 / 已上传的表不再重新导出
+"""
+
+import os
+import json
+import time
+import asyncio
+from datetime import datetime
+from pathlib import Path
+from typing import List
+from loguru import logger
+
+from app.sync.delta_sync import DeltaSync
+from app.sync.sync_state import SYNC_TABLES, table_since
+
+STAGES = ("export", "upload", "import")
+
+
+class PipelineManifest:
+    """流水线断点清单：表名 -> {stage 最后完成的阶段, entry 导出清单, urls, merged, timings, error}"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.data = {}
+
+    def start(self, format: str):
+        """开始新一轮同步（清空上次的断点）"""
+        self.data = {
+            "format": format,
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "complete": False,
+            "tables": {},
+        }
+        self.save()
+
+    def resume(self, format: str) -> bool:
+        """加载上次未完成、格式相同的断点清单，可续传时返回 True"""
+        if not self.path.exists():
+            return False
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("complete") or data.get("format") != format:
+            return False
+        self.data = data
+        return True
+
+    def table(self, table_name: str) -> dict:
+        return self.data["tables"].setdefault(table_name, {"stage": None, "timings": {}})
+
+    def save(self):
+        """原子写入（先写临时文件再替换）"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class SyncPipeline(DeltaSync):
+    """流水线增量同步（导出 / 上传 / 导入按表重叠执行）"""
+
+    def __init__(self, exporter, r2_manager, importer, watermarks=None, prefix: str = "delta",
+                 format: str = "csv", queue_size: int = 2, manifest_path: str = None):
+        """
+        Args:
+            exporter / r2_manager / importer / watermarks / prefix / format: 见 DeltaSync
+            queue_size: 相邻阶段之间最多积压的表数
+            manifest_path: 断点清单路径，默认 {导出目录}/delta/_pipeline_manifest.json
+        """
+        super().__init__(exporter, r2_manager, importer, watermarks, prefix, format)
+        self.queue_size = queue_size
+        self.manifest = PipelineManifest(
+            manifest_path or Path(exporter.output_dir) / "delta" / "_pipeline_manifest.json"
+        )
+        # 阶段 -> 累计耗时（秒），各阶段重叠执行，总耗时接近其中最大者
+        self.stage_stats = {}
+
+    def _export(self, table_name: str) -> dict:
+        return self.exporter.export_table_delta(
+            table_name, since=table_since(table_name, self.watermarks), format=self.format
+        )
+
+    async def _timed(self, state: dict, stage: str, awaitable):
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            elapsed = time.perf_counter() - start
+            state["timings"][stage] = round(elapsed, 3)
+            self.stage_stats[stage] += elapsed
+
+    @staticmethod
+    def _result(state: dict, resumed: bool = False) -> dict:
+        entry = state.get("entry") or {}
+        result = {
+            "rows": entry.get("rows", 0),
+            "partitions": len(entry.get("files", [])),
+            "merged": state.get("merged", 0),
+            "success": state["stage"] == "imported",
+            "timings": dict(state["timings"]),
+            "resumed": resumed,
+        }
+        if state.get("error"):
+            result["error"] = state["error"]
+        return result
+
+    def _fail(self, results: dict, table_name: str, stage: str, error: Exception):
+        state = self.manifest.table(table_name)
+        state["error"] = f"{stage}: {error}"
+        self.manifest.save()
+        results[table_name] = self._result(state)
+        logger.error(f"流水线同步 {table_name} 失败（{stage}）: {error}")
+
+    async def _export_stage(self, table_names: List[str], upload_queue: asyncio.Queue, results: dict):
+        try:
+            for table_name in table_names:
+                state = self.manifest.table(table_name)
+                if state["stage"] == "imported":
+                    logger.info(f"{table_name}: 上次已完成，跳过")
+                    results[table_name] = self._result(state, resumed=True)
+                    continue
+                # 断点续传：导出文件还在就不重新导出（水位未推进，文件内容仍然有效）
+                if state["stage"] in ("exported", "uploaded") and all(
+                    os.path.exists(f) for f in state["entry"]["files"]
+                ):
+                    logger.info(f"{table_name}: 从断点继续（已完成 {state['stage']}）")
+                    state["resumed"] = True
+                    await upload_queue.put(table_name)
+                    continue
+
+                try:
+                    entry = await self._timed(state, "export", asyncio.to_thread(self._export, table_name))
+                except Exception as e:
+                    self._fail(results, table_name, "export", e)
+                    continue
+                state.update(stage="exported", entry=entry, urls=None, error=None)
+                self.manifest.save()
+                await upload_queue.put(table_name)
+        finally:
+            await upload_queue.put(None)
+
+    async def _upload_stage(self, upload_queue: asyncio.Queue, import_queue: asyncio.Queue, results: dict):
+        try:
+            while (table_name := await upload_queue.get()) is not None:
+                state = self.manifest.table(table_name)
+                if state["stage"] == "exported":
+                    try:
+                        urls = await self._timed(
+                            state, "upload", asyncio.to_thread(self.upload_entry, state["entry"])
+                        )
+                    except Exception as e:
+                        self._fail(results, table_name, "upload", e)
+                        continue
+                    state.update(stage="uploaded", urls=urls, error=None)
+                    self.manifest.save()
+                await import_queue.put(table_name)
+        finally:
+            await import_queue.put(None)
+
+    async def _import_stage(self, import_queue: asyncio.Queue, results: dict):
+        while (table_name := await import_queue.get()) is not None:
+            state = self.manifest.table(table_name)
+            try:
+                merged = await self._timed(
+                    state, "import", self.import_entry(state["entry"], state["urls"])
+                )
+            except Exception as e:
+                self._fail(results, table_name, "import", e)
+                continue
+            state.update(stage="imported", merged=merged, error=None)
+            self.manifest.save()
+            results[table_name] = self._result(state, resumed=state.pop("resumed", False))
+            timings = " / ".join(f"{s} {state['timings'][s]:.1f}秒" for s in STAGES if s in state["timings"])
+            logger.info(f"{table_name}: 完成 ({state['entry']['rows']} 条, {timings})")
+
+    async def run(self, table_names: List[str] = None, resume: bool = False) -> dict:
+        """
+        流水线增量同步多张表（单表失败不影响其他表，其水位不推进）
+
+        Args:
+            table_names: 表名列表，None 表示 SYNC_TABLES 中的全部表
+            resume: 从上次未完成的断点清单继续
+
+        Returns:
+            dict: 表名 -> {rows, partitions, merged, success, timings, resumed, error}
+        """
+        table_names = table_names or list(SYNC_TABLES)
+        if resume and self.manifest.resume(self.format):
+            logger.info(f"从断点清单继续: {self.manifest.path} (开始于 {self.manifest.data['started_at']})")
+        else:
+            self.manifest.start(self.format)
+
+        self.stage_stats = {stage: 0.0 for stage in STAGES}
+        upload_queue = asyncio.Queue(maxsize=self.queue_size)
+        import_queue = asyncio.Queue(maxsize=self.queue_size)
+        results = {}
+        start = time.perf_counter()
+        await asyncio.gather(
+            self._export_stage(table_names, upload_queue, results),
+            self._upload_stage(upload_queue, import_queue, results),
+            self._import_stage(import_queue, results),
+        )
+        elapsed = time.perf_counter() - start
+
+        results = {t: results[t] for t in table_names if t in results}
+        self.manifest.data["complete"] = all(r["success"] for r in results.values())
+        self.manifest.data["stage_seconds"] = {s: round(v, 3) for s, v in self.stage_stats.items()}
+        self.manifest.save()
+
+        success_count = sum(1 for r in results.values() if r["success"])
+        total_rows = sum(r["rows"] for r in results.values())
+        stage_text = " / ".join(f"{s} {self.stage_stats[s]:.1f}秒" for s in STAGES)
+        logger.success(
+            f"流水线同步完成: {success_count}/{len(results)} 张表，{total_rows} 条，耗时 {elapsed:.1f}秒 "
+            f"（{stage_text}，串行约 {sum(self.stage_stats.values()):.1f}秒）"
+        )
+        return results
@@ -0,0 +1,177 @@
+"""
+EvoAlpha OS - 同步模块：增量同步状态
+每张表的同步规格（水位列 / 主键 / 回看天数）与已同步水位（存于本地库 sync_watermarks 表）
+
+水位只在云端合并成功后推进；下次导出从「水位 - 回看天数」开始（含当天），
+覆盖当日重采、财报晚披露（同一 report_date 陆续出现新公司）等对旧日期行的修改
+
+回看窗口之外的整段改写（除权后前复权历史重拉）按标的登记在 sync_reexports 表（采集器在写入的同一事务内登记），
+下次增量导出额外带上这些标的的全部行，云端合并成功后清除登记
+"""
+
+import sqlite3
+from datetime import datetime, timedelta
+from loguru import logger
+
+SYNC_WATERMARK_TABLE = "sync_watermarks"
+SYNC_REEXPORT_TABLE = "sync_reexports"
+
+# 表名 -> (水位列, 主键列, 回看天数)；水位列为 None 的小表每次全量导出
+SYNC_TABLES = {
+    "stock_daily_prices": ("trade_date", ["symbol", "trade_date"], 0),
+    "sector_daily_prices": ("trade_date", ["sector_name", "trade_date"], 0),
+    "etf_daily_prices": ("trade_date", ["symbol", "trade_date"], 0),
+    "stock_valuation_daily": ("trade_date", ["code", "trade_date"], 0),
+    "quant_feature_rps": ("trade_date", ["symbol", "trade_date"], 3),
+    "quant_feature_sector_rps": ("trade_date", ["sector_name", "trade_date"], 3),
+    "quant_strategy_results": ("trade_date", ["strategy_name", "trade_date", "symbol"], 0),
+    "limit_board_trading": ("trade_date", ["trade_date", "symbol"], 0),
+    "consecutive_boards_stats": ("trade_date", ["trade_date", "boards"], 0),
+    "stock_northbound_holdings": ("hold_date", ["symbol", "hold_date"], 0),
+    "news_articles": ("publish_time", ["article_id"], 1),
+    "macro_indicators": ("publish_date", ["indicator_code", "period"], 31),
+    # 报告期为季末日期，财报 / 基金持仓在其后数月内陆续披露
+    "stock_finance_summary": ("report_date", ["code", "report_date"], 200),
+    "finance_fund_holdings": ("report_date", ["symbol", "report_date"], 200),
+    "stock_info": (None, ["symbol"], 0),
+    "etf_info": (None, ["symbol"], 0),
+    "stock_sector_map": (None, ["sector_name", "symbol"], 0),
+    "news_stock_relation": (None, ["article_id", "symbol"], 0),
+}
+
+# 表名 -> 标的列：可按标的登记整段重新导出的表
+REEXPORT_KEYS = {
+    "stock_daily_prices": "symbol",
+}
+
+_REEXPORT_DDL = f"""
+    CREATE TABLE IF NOT EXISTS {SYNC_REEXPORT_TABLE} (
+        table_name TEXT,
+        key_value TEXT,
+        recorded_at TEXT,
+        PRIMARY KEY (table_name, key_value)
+    )
+"""
+
+
+def export_since(high_water: str, lookback_days: int) -> str:
+    """增量导出起点：水位日期回看 lookback_days 天（ISO 日期字符串）"""
+    day = datetime.strptime(str(high_water)[:10], "%Y-%m-%d").date()
+    return (day - timedelta(days=lookback_days)).isoformat()
+
+
+def table_since(table_name: str, watermarks: "SyncWatermarks"):
+    """按已同步水位与回看天数计算表的增量导出起点，未同步过 / 无水位列的表返回 None（全量）"""
+    date_column, _, lookback_days = SYNC_TABLES[table_name]
+    high_water = watermarks.get(table_name) if date_column else None
+    return export_since(high_water, lookback_days) if high_water else None
+
+
+class SyncWatermarks:
+    """本地库中的已同步水位（表名 -> 已合并到云端的最大水位值）"""
+
+    def __init__(self, db_path: str = "./data/local_quant.db"):
+        self.db_path = db_path
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {SYNC_WATERMARK_TABLE} (
+                    table_name TEXT PRIMARY KEY,
+                    high_water TEXT,
+                    rows INTEGER,
+                    synced_at TEXT
+                )
+            """)
+
+    def get(self, table_name: str):
+        """已同步水位，未同步过返回 None"""
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                f"SELECT high_water FROM {SYNC_WATERMARK_TABLE} WHERE table_name = ?", (table_name,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def all(self) -> dict:
+        """全部水位: 表名 -> {high_water, rows, synced_at}"""
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(
+                f"SELECT table_name, high_water, rows, synced_at FROM {SYNC_WATERMARK_TABLE} ORDER BY table_name"
+            ).fetchall()
+        return {r[0]: {"high_water": r[1], "rows": r[2], "synced_at": r[3]} for r in rows}
+
+    def commit(self, table_name: str, high_water, rows: int = 0):
+        """云端合并成功后推进水位（只前进不后退）"""
+        if high_water is None:
+            return
+        current = self.get(table_name)
+        if current is not None and str(high_water) < current:
+            return
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                f"""INSERT INTO {SYNC_WATERMARK_TABLE} (table_name, high_water, rows, synced_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (table_name) DO UPDATE SET
+                        high_water = excluded.high_water, rows = excluded.rows, synced_at = excluded.synced_at""",
+                (table_name, str(high_water), rows, datetime.now().isoformat(timespec="seconds")),
+            )
+        logger.info(f"同步水位推进: {table_name} -> {high_water}")
+
+    def reset(self, table_name: str = None):
+        """清除水位（下次全量导出）"""
+        with sqlite3.connect(self.db_path) as conn:
+            if table_name:
+                conn.execute(f"DELETE FROM {SYNC_WATERMARK_TABLE} WHERE table_name = ?", (table_name,))
+            else:
+                conn.execute(f"DELETE FROM {SYNC_WATERMARK_TABLE}")
+
+
+def record_reexport(conn, table_name: str, keys):
+    """
+    登记历史被整段改写的标的，下次增量导出带上它们的全部行（采集器在写入的同一事务内调用）
+
+    Args:
+        conn: 本地库的 SQLAlchemy 连接（已开启事务）
+        table_name: 表名（须在 REEXPORT_KEYS 中声明）
+        keys: 标的列表
+    """
+    from sqlalchemy import text
+
+    keys = sorted(set(keys))
+    if not keys:
+        return
+    if table_name not in REEXPORT_KEYS:
+        raise ValueError(f"未声明可重新导出的表: {table_name}")
+    recorded_at = datetime.now().isoformat(timespec="microseconds")
+    conn.execute(text(_REEXPORT_DDL))
+    conn.execute(
+        text(f"""INSERT INTO {SYNC_REEXPORT_TABLE} (table_name, key_value, recorded_at)
+                 VALUES (:table_name, :key_value, :recorded_at)
+                 ON CONFLICT (table_name, key_value) DO UPDATE SET recorded_at = excluded.recorded_at"""),
+        [{"table_name": table_name, "key_value": key, "recorded_at": recorded_at} for key in keys],
+    )
+
+
+class ReexportLog:
+    """本地库中待重新导出的标的（表名, 标的 -> 登记时间）"""
+
+    def __init__(self, db_path: str = "./data/local_quant.db"):
+        self.db_path = db_path
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(_REEXPORT_DDL)
+
+    def pending(self, table_name: str) -> dict:
+        """待重新导出的标的 -> 登记时间"""
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(
+                f"SELECT key_value, recorded_at FROM {SYNC_REEXPORT_TABLE} WHERE table_name = ?", (table_name,)
+            ).fetchall()
+        return dict(rows)
+
+    def clear(self, table_name: str, until: str):
+        """云端合并成功后清除登记（只清除导出时已存在的登记，之后新登记的保留）"""
+        with sqlite3.connect(self.db_path) as conn:
+            cleared = conn.execute(
+                f"DELETE FROM {SYNC_REEXPORT_TABLE} WHERE table_name = ? AND recorded_at <= ?",
+                (table_name, until),
+            ).rowcount
+        if cleared:
+            logger.info(f"已清除重新导出登记: {table_name} {cleared} 个标的")
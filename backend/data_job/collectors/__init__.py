@@ -1,39 +1,41 @@
 """
 数据采集器实现层 - 各种业务数据采集器
+
+采集器类在首次访问时才导入对应模块（from data_job.collectors import X 只加载 X 所在模块）
 """
 
-# Batch 1: Simple Collectors
-from .stock_valuation_collector import StockValuationCollector
-from .macro_data_collector import MacroDataCollector
-from .limit_boards_collector import LimitBoardsCollector
-
-# Batch 2: K-line Collectors
-from .stock_kline_collector import StockKlineCollector
-from .sector_kline_collector import SectorKlineCollector
-from .etf_kline_collector import ETFKlineCollector
-
-# Batch 3: Complex Collectors
-from .fund_holdings_collector import FundHoldingsCollector
-from .northbound_holdings_collector import NorthboundHoldingsCollector
-from .etf_info_collector import ETFInfoCollector
-from .finance_summary_collector import FinanceSummaryCollector
-from .news_collector import NewsCollector
-from .stock_sector_list_collector import StockSectorListCollector
-
-__all__ = [
+import importlib
+
+# 类名 -> 模块名
+_COLLECTOR_MODULES = {
     # Batch 1: Simple Collectors
-    'StockValuationCollector',
-    'MacroDataCollector',
-    'LimitBoardsCollector',
+    'StockValuationCollector': 'stock_valuation_collector',
+    'MacroDataCollector': 'macro_data_collector',
+    'LimitBoardsCollector': 'limit_boards_collector',
     # Batch 2: K-line Collectors
-    'StockKlineCollector',
-    'SectorKlineCollector',
-    'ETFKlineCollector',
+    'StockKlineCollector': 'stock_kline_collector',
+    'SectorKlineCollector': 'sector_kline_collector',
+    'ETFKlineCollector': 'etf_kline_collector',
     # Batch 3: Complex Collectors
-    'FundHoldingsCollector',
-    'NorthboundHoldingsCollector',
-    'ETFInfoCollector',
-    'FinanceSummaryCollector',
-    'NewsCollector',
-    'StockSectorListCollector',
-]
+    'FundHoldingsCollector': 'fund_holdings_collector',
+    'NorthboundHoldingsCollector': 'northbound_holdings_collector',
+    'ETFInfoCollector': 'etf_info_collector',
+    'FinanceSummaryCollector': 'finance_summary_collector',
+    'NewsCollector': 'news_collector',
+    'StockSectorListCollector': 'stock_sector_list_collector',
+}
+
+__all__ = list(_COLLECTOR_MODULES)
+
+
+def __getattr__(name):
+    module_name = _COLLECTOR_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    collector_class = getattr(importlib.import_module(f"{__name__}.{module_name}"), name)
+    globals()[name] = collector_class
+    return collector_class
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -185,7 +185,7 @@ class ETFInfoCollector(BaseCollector):
             try:
                 with engine.begin() as conn:
                     conn.execute(text(f"DELETE FROM {self.table_name}"))
-                    df.to_sql(self.table_name, conn, if_exists='append', index=False)
+                    self.writer.insert(df, self.table_name, conn=conn)
 
                 logger.info(f"✅ [{mode}] 保存 {len(df)} 条 ETF 信息")
             except Exception as e:
@@ -5,15 +5,19 @@ EvoAlpha OS - ETF K线数据采集器
 
 import time
 import pandas as pd
-import akshare as ak
 from sqlalchemy import text
 from datetime import datetime, timedelta, date
 
 # 公共工具导入
-from data_job.common import setup_network_emergency_kit, setup_backend_path, setup_logger
+from data_job.common import setup_network_emergency_kit, setup_backend_path, setup_logger, lazy_import
 
 # 基类导入
 from data_job.core.base_collector import BaseCollector
+from data_job.core.cloud_outbox import upsert_step, watermark_step
+from data_job.core.market_snapshot import (
+    load_trade_calendar, resolve_snapshot_date, build_etf_bars, split_by_watermark, ETF_BAR_COLUMNS
+)
+from data_job.config.collector_config import CollectorConfig
 
 from app.core.database import get_active_engines
 
@@ -24,6 +28,9 @@ setup_network_emergency_kit()
 # Logger配置
 logger = setup_logger(__name__)
 
+# akshare 延迟到首次调用接口时导入
+ak = lazy_import('akshare')
+
 
 class ETFKlineCollector(BaseCollector):
     """ETF K线数据采集器"""
@@ -97,17 +104,15 @@ class ETFKlineCollector(BaseCollector):
         return etf_list
 
     def get_last_dates(self):
-        """获取增量更新进度 - 每个ETF的最后日期"""
+        """获取增量更新进度 - 每个ETF的最后日期（读取采集水位表）"""
         last_dates = {}
         for mode, engine in self.engines:
             try:
-                with engine.connect() as conn:
-                    query = text(f"SELECT symbol, MAX(trade_date) as last_date FROM {self.table_name} GROUP BY symbol")
-                    df = pd.read_sql(query, conn)
-                    if not df.empty:
-                        last_dates = dict(zip(df['symbol'], pd.to_datetime(df['last_date']).dt.date))
-                        logger.info(f"✅ [{mode}] 获取到 {len(last_dates)} 只 ETF 的最后日期")
-                        break
+                marks = self.watermarks.load_or_bootstrap(engine, self.table_name, 'symbol', 'trade_date')
+                if marks:
+                    last_dates = marks
+                    logger.info(f"✅ [{mode}] 获取到 {len(last_dates)} 只 ETF 的最后日期")
+                    break
             except Exception as e:
                 logger.warning(f"⚠️  [{mode}] 获取最后日期失败: {e}")
                 continue
@@ -185,31 +190,73 @@ class ETFKlineCollector(BaseCollector):
         if df is None or df.empty:
             return
 
-        for mode, engine in self.engines:
-            try:
-                with engine.begin() as conn:
-                    # 删除旧数据
-                    conn.execute(text(f"""
-                        DELETE FROM {self.table_name}
-                        WHERE symbol = :symbol
-                    """), {"symbol": symbol})
+        try:
+            # 按主键 Upsert（增量数据不再整段删除该 ETF 的历史），云端经 outbox 异步同步
+            self.write_all([
+                upsert_step(self.table_name, df, ['symbol', 'trade_date']),
+                watermark_step(self.table_name, df, 'symbol', 'trade_date'),
+            ], label=f"{self.table_name}:{symbol}")
+            logger.debug(f"✅ {symbol} 保存 {len(df)} 条K线")
+            self.buffer_kline_store(self.table_name, df)
+        except Exception as e:
+            logger.error(f"❌ 保存 {symbol} K线失败: {e}")
 
-                    # 插入新数据（使用 chunksize 避免 SQLite 变量限制）
-                    df.to_sql(self.table_name, conn, if_exists='append', index=False,
-                             method='multi', chunksize=100)
+    def apply_snapshot(self, symbols, last_dates):
+        """
+        收盘快照快速通道：一次 fund_etf_spot_em 调用补齐所有只缺当日K线的 ETF
 
-                logger.debug(f"✅ [{mode}] {symbol} 保存 {len(df)} 条K线")
-            except Exception as e:
-                logger.error(f"❌ [{mode}] 保存 {symbol} K线失败: {e}")
+        Args:
+            symbols: ETF 代码列表
+            last_dates: 采集水位 {symbol: last_date}
 
-    def run(self, symbols=None, days=1095):
+        Returns:
+            list: 仍需逐只拉取历史的 ETF
+        """
+        try:
+            calendar = load_trade_calendar(lambda: self._retry_call(ak.tool_trade_date_hist_sina))
+        except Exception as e:
+            logger.warning(f"⚠️ 获取交易日历失败，跳过快照模式: {e}")
+            return symbols
+
+        snapshot_dates = resolve_snapshot_date(calendar)
+        if snapshot_dates is None:
+            logger.info("ℹ️ 非交易日或尚未收盘，跳过快照模式")
+            return symbols
+        trade_date, prev_trade_date = snapshot_dates
+
+        eligible, _ = split_by_watermark(symbols, last_dates, prev_trade_date)
+        if not eligible:
+            return symbols
+
+        try:
+            bars = build_etf_bars(self._retry_call(ak.fund_etf_spot_em), trade_date)
+        except Exception as e:
+            logger.warning(f"⚠️ 拉取 ETF 快照失败，回退逐只拉取: {e}")
+            return symbols
+
+        bars = bars[bars['symbol'].isin(eligible)]
+        if bars.empty:
+            return symbols
+
+        self.save_etf_kline("快照", bars[ETF_BAR_COLUMNS])
+
+        covered = set(bars['symbol'])
+        remaining = [symbol for symbol in symbols if symbol not in covered]
+        logger.info(f"📸 快照补齐 {len(covered)} 只 ETF ({trade_date})，其余 {len(remaining)} 只走历史接口")
+        return remaining
+
+    def run(self, symbols=None, days=1095, snapshot=None):
         """
         执行 ETF K线采集
 
         Args:
             symbols: ETF 代码列表，如果为None则从数据库获取
             days: 采集天数（默认1095天=3年）
+            snapshot: 是否启用收盘快照快速通道，默认 CollectorConfig.SNAPSHOT_MODE
         """
+        if snapshot is None:
+            snapshot = CollectorConfig.SNAPSHOT_MODE
+
         self.log_collection_start()
         logger.info("🚀 开始采集 ETF K线数据...")
 
@@ -237,8 +284,12 @@ class ETFKlineCollector(BaseCollector):
         last_dates = self.get_last_dates()
         today = date.today()
 
+        total = len(symbols)
+        if snapshot:
+            symbols = self.apply_snapshot(symbols, last_dates)
+
         # 采集每个 ETF 的K线
-        success_count = 0
+        success_count = total - len(symbols)  # 快照已补齐的 ETF
         skipped_count = 0
         for i, symbol in enumerate(symbols, 1):
             logger.info(f"[{i}/{len(symbols)}] 采集 {symbol}...")
@@ -279,8 +330,10 @@ class ETFKlineCollector(BaseCollector):
                 logger.error(f"❌ {symbol} 采集失败: {e}")
                 continue
 
-        logger.info(f"🎉 ETF K线采集完成，成功 {success_count}/{len(symbols)}，跳过 {skipped_count}")
-        self.log_collection_end(True, f"成功 {success_count}/{len(symbols)}，跳过 {skipped_count}")
+        logger.info(f"🎉 ETF K线采集完成，成功 {success_count}/{total}，跳过 {skipped_count}")
+        self.flush_kline_store()
+        self.sync_price_cube(self.table_name)
+        self.log_collection_end(True, f"成功 {success_count}/{total}，跳过 {skipped_count}")
 
 
 if __name__ == "__main__":
@@ -6,12 +6,11 @@ EvoAlpha OS - 财务摘要数据采集器
 import time
 import random
 import pandas as pd
-import akshare as ak
 from datetime import date
 from sqlalchemy import text, inspect
 
 # 公共工具导入
-from data_job.common import setup_network_emergency_kit, setup_backend_path, setup_logger
+from data_job.common import setup_network_emergency_kit, setup_backend_path, setup_logger, lazy_import
 
 # 基类导入
 from data_job.core.base_collector import BaseCollector
@@ -25,6 +24,9 @@ setup_network_emergency_kit()
 # Logger配置
 logger = setup_logger(__name__)
 
+# akshare 延迟到首次调用接口时导入
+ak = lazy_import('akshare')
+
 
 class FinanceSummaryCollector(BaseCollector):
     """财务摘要数据采集器"""
@@ -115,7 +117,7 @@ class FinanceSummaryCollector(BaseCollector):
 
             with self.engine.begin() as conn:
                 conn.execute(text(f"DELETE FROM {self.table_name} WHERE report_date = :dt"), {"dt": fmt_date})
-                df_save.to_sql(self.table_name, conn, if_exists='append', index=False, method='multi', chunksize=100)
+                self.writer.insert(df_save, self.table_name, conn=conn)
 
             return True
 
@@ -5,12 +5,11 @@ EvoAlpha OS - 基金持股数据采集器
 
 import time
 import pandas as pd
-import akshare as ak
 from datetime import date, timedelta, datetime
 from sqlalchemy import text
 
 # 公共工具导入
-from data_job.common import setup_network_emergency_kit, setup_backend_path, setup_logger
+from data_job.common import setup_network_emergency_kit, setup_backend_path, setup_logger, lazy_import
 
 # 基类导入
 from data_job.core.base_collector import BaseCollector
@@ -24,6 +23,9 @@ setup_network_emergency_kit()
 # Logger配置
 logger = setup_logger(__name__)
 
+# akshare 延迟到首次调用接口时导入
+ak = lazy_import('akshare')
+
 
 class FundHoldingsCollector(BaseCollector):
     """基金持股数据采集器"""
@@ -133,8 +135,7 @@ class FundHoldingsCollector(BaseCollector):
                         DELETE FROM finance_fund_holdings
                         WHERE report_date = :report_date
                     """), {"report_date": report_date})
-                    df_save.to_sql('finance_fund_holdings', conn, if_exists='append',
-                                  index=False, method='multi', chunksize=1000)
+                    self.writer.insert(df_save, 'finance_fund_holdings', conn=conn)
 
                 logger.info(f"✅ {report_date} 入库成功: {len(df_save)} 条记录")
                 success_count += 1
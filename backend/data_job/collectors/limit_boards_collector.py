@@ -5,15 +5,15 @@ EvoAlpha OS - 连板数据采集器
 
 import time
 import pandas as pd
-import akshare as ak
 from sqlalchemy import text
 from datetime import datetime, timedelta, date
 
 # 公共工具导入
-from data_job.common import setup_network_emergency_kit, setup_backend_path, setup_logger
+from data_job.common import setup_network_emergency_kit, setup_backend_path, setup_logger, lazy_import
 
 # 基类导入
 from data_job.core.base_collector import BaseCollector
+from data_job.core.cloud_outbox import execute_step, insert_step
 
 from app.core.database import get_active_engines
 
@@ -24,6 +24,9 @@ setup_network_emergency_kit()
 # Logger配置
 logger = setup_logger(__name__)
 
+# akshare 延迟到首次调用接口时导入
+ak = lazy_import('akshare')
+
 
 class LimitBoardsCollector(BaseCollector):
     """连板数据采集器"""
@@ -167,24 +170,18 @@ class LimitBoardsCollector(BaseCollector):
         if df is None or df.empty:
             return
 
-        for mode, engine in self.engines:
-            try:
-                with engine.begin() as conn:
-                    # 删除旧数据
-                    trade_date_str = df['trade_date'].iloc[0].strftime('%Y-%m-%d')
-                    conn.execute(text(f"""
-                        DELETE FROM {self.boards_table}
-                        WHERE trade_date = :trade_date
-                    """), {"trade_date": trade_date_str})
-
-                    # 插入新数据（使用 chunksize 避免 SQLite 变量限制）
-                    df.to_sql(self.boards_table, conn, if_exists='append', index=False,
-                             method='multi', chunksize=100)
-
-                    logger.info(f"✅ [{mode}] 保存 {len(df)} 条涨停板数据")
+        try:
+            # 先删后插（幂等），云端经 outbox 异步同步
+            trade_date_str = df['trade_date'].iloc[0].strftime('%Y-%m-%d')
+            self.write_all([
+                execute_step(f"DELETE FROM {self.boards_table} WHERE trade_date = :trade_date",
+                             {"trade_date": trade_date_str}),
+                insert_step(self.boards_table, df),
+            ], label=f"{self.boards_table}:{trade_date_str}")
+            logger.info(f"✅ 保存 {len(df)} 条涨停板数据")
 
-            except Exception as e:
-                logger.error(f"❌ [{mode}] 保存涨停板数据失败: {e}")
+        except Exception as e:
+            logger.error(f"❌ 保存涨停板数据失败: {e}")
 
     def calculate_stats(self, df):
         """
@@ -223,24 +220,17 @@ class LimitBoardsCollector(BaseCollector):
         if stats_df is None or stats_df.empty:
             return
 
-        for mode, engine in self.engines:
-            try:
-                with engine.begin() as conn:
-                    # 删除旧数据
-                    trade_date_str = stats_df['trade_date'].iloc[0].strftime('%Y-%m-%d')
-                    conn.execute(text(f"""
-                        DELETE FROM {self.stats_table}
-                        WHERE trade_date = :trade_date
-                    """), {"trade_date": trade_date_str})
-
-                    # 插入新数据
-                    stats_df.to_sql(self.stats_table, conn, if_exists='append', index=False,
-                                   method='multi', chunksize=100)
-
-                    logger.info(f"✅ [{mode}] 保存 {len(stats_df)} 条连板统计")
+        try:
+            trade_date_str = stats_df['trade_date'].iloc[0].strftime('%Y-%m-%d')
+            self.write_all([
+                execute_step(f"DELETE FROM {self.stats_table} WHERE trade_date = :trade_date",
+                             {"trade_date": trade_date_str}),
+                insert_step(self.stats_table, stats_df),
+            ], label=f"{self.stats_table}:{trade_date_str}")
+            logger.info(f"✅ 保存 {len(stats_df)} 条连板统计")
 
-            except Exception as e:
-                logger.error(f"❌ [{mode}] 保存连板统计失败: {e}")
+        except Exception as e:
+            logger.error(f"❌ 保存连板统计失败: {e}")
 
     def get_last_date(self):
         """获取最后采集的日期"""
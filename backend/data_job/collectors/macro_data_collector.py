@@ -5,12 +5,11 @@ EvoAlpha OS - 宏观经济数据采集器
 
 import time
 import pandas as pd
-import akshare as ak
 from sqlalchemy import text
 from datetime import datetime
 
 # 公共工具导入
-from data_job.common import setup_network_emergency_kit, setup_backend_path, setup_logger
+from data_job.common import setup_network_emergency_kit, setup_backend_path, setup_logger, lazy_import
 
 # 基类导入
 from data_job.core.base_collector import BaseCollector
@@ -24,6 +23,9 @@ setup_network_emergency_kit()
 # Logger配置
 logger = setup_logger(__name__)
 
+# akshare 延迟到首次调用接口时导入
+ak = lazy_import('akshare')
+
 
 class MacroDataCollector(BaseCollector):
     """宏观经济数据采集器"""
@@ -195,8 +197,7 @@ class MacroDataCollector(BaseCollector):
                         """), {"indicator_code": indicator_code})
 
                         # 插入新数据（使用 chunksize 避免 SQLite 变量限制）
-                        df_indicator.to_sql(self.table_name, conn, if_exists='append', index=False,
-                                          method='multi', chunksize=100)
+                        self.writer.insert(df_indicator, self.table_name, conn=conn)
 
                     logger.info(f"✅ [{mode}] 保存 {len(combined_df)} 条宏观数据")
 
@@ -5,16 +5,16 @@ EvoAlpha OS - 新闻舆情数据采集器
 
 import time
 import pandas as pd
-import akshare as ak
 from sqlalchemy import text
 from datetime import datetime, timedelta, date
 import re
 
 # 公共工具导入
-from data_job.common import setup_network_emergency_kit, setup_backend_path, setup_logger
+from data_job.common import setup_network_emergency_kit, setup_backend_path, setup_logger, lazy_import
 
 # 基类导入
 from data_job.core.base_collector import BaseCollector
+from data_job.core.cloud_outbox import upsert_step, insert_step, execute_step
 
 from app.core.database import get_active_engines
 
@@ -25,6 +25,9 @@ setup_network_emergency_kit()
 # Logger配置
 logger = setup_logger(__name__)
 
+# akshare 延迟到首次调用接口时导入
+ak = lazy_import('akshare')
+
 
 class NewsCollector(BaseCollector):
     """新闻舆情数据采集器"""
@@ -137,45 +140,36 @@ class NewsCollector(BaseCollector):
         if df is None or df.empty:
             return
 
-        for mode, engine in self.engines:
-            try:
-                with engine.begin() as conn:
-                    articles_df = df[['article_id', 'title', 'content', 'source', 'publish_time', 'url', 'sentiment_type']]
-
-                    article_ids = "', '".join([str(aid) for aid in articles_df['article_id']])
-                    conn.execute(text(f"""
-                        DELETE FROM {self.articles_table}
-                        WHERE article_id IN ('{article_ids}')
-                    """))
-
-                    articles_df.to_sql(self.articles_table, conn, if_exists='append', index=False)
-
-                    relations = []
-                    for _, row in df.iterrows():
-                        symbols = self.extract_stock_symbols(row['title'] + ' ' + str(row['content']))
-
-                        for symbol in symbols:
-                            relations.append({
-                                'article_id': row['article_id'],
-                                'symbol': symbol,
-                                'relevance_score': 1.0,
-                                'sentiment_type': row['sentiment_type']
-                            })
-
-                    if relations:
-                        relations_df = pd.DataFrame(relations)
-
-                        conn.execute(text(f"""
-                            DELETE FROM {self.relation_table}
-                            WHERE article_id IN ('{article_ids}')
-                        """))
-
-                        relations_df.to_sql(self.relation_table, conn, if_exists='append', index=False)
-
-                    logger.info(f"✅ [{mode}] 保存 {len(df)} 条新闻，{len(relations)} 个股票关联")
+        try:
+            articles_df = df[['article_id', 'title', 'content', 'source', 'publish_time', 'url', 'sentiment_type']]
+            article_ids = "', '".join([str(aid) for aid in articles_df['article_id']])
+            steps = [upsert_step(self.articles_table, articles_df, ['article_id'])]
+
+            relations = []
+            for _, row in df.iterrows():
+                symbols = self.extract_stock_symbols(row['title'] + ' ' + str(row['content']))
+
+                for symbol in symbols:
+                    relations.append({
+                        'article_id': row['article_id'],
+                        'symbol': symbol,
+                        'relevance_score': 1.0,
+                        'sentiment_type': row['sentiment_type']
+                    })
+
+            if relations:
+                steps.append(execute_step(f"""
+                    DELETE FROM {self.relation_table}
+                    WHERE article_id IN ('{article_ids}')
+                """))
+                steps.append(insert_step(self.relation_table, pd.DataFrame(relations)))
+
+            # 本地立即提交，云端经 outbox 异步同步
+            self.write_all(steps, label=self.articles_table)
+            logger.info(f"✅ 保存 {len(df)} 条新闻，{len(relations)} 个股票关联")
 
-            except Exception as e:
-                logger.error(f"❌ [{mode}] 保存新闻失败: {e}")
+        except Exception as e:
+            logger.error(f"❌ 保存新闻失败: {e}")
 
     def get_last_date(self):
         """获取最后采集的新闻日期"""
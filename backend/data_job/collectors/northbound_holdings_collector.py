@@ -5,12 +5,11 @@ EvoAlpha OS - 北向资金持股数据采集器
 
 import time
 import pandas as pd
-import akshare as ak
 from sqlalchemy import text, inspect
 from datetime import date
 
 # 公共工具导入
-from data_job.common import setup_network_emergency_kit, setup_backend_path, setup_logger
+from data_job.common import setup_network_emergency_kit, setup_backend_path, setup_logger, lazy_import
 
 # 基类导入
 from data_job.core.base_collector import BaseCollector
@@ -24,6 +23,9 @@ setup_network_emergency_kit()
 # Logger配置
 logger = setup_logger(__name__)
 
+# akshare 延迟到首次调用接口时导入
+ak = lazy_import('akshare')
+
 
 class NorthboundHoldingsCollector(BaseCollector):
     """北向资金持股数据采集器"""
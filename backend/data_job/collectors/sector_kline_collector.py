@@ -5,12 +5,11 @@ EvoAlpha OS - 板块K线数据采集器
 
 import time
 import pandas as pd
-import akshare as ak
 from sqlalchemy import text
 from datetime import timedelta, datetime
 
 # 公共工具导入
-from data_job.common import setup_network_emergency_kit, setup_backend_path, setup_logger
+from data_job.common import setup_network_emergency_kit, setup_backend_path, setup_logger, lazy_import
 
 # 基类导入
 from data_job.core.base_collector import BaseCollector
@@ -24,6 +23,9 @@ setup_network_emergency_kit()
 # Logger配置
 logger = setup_logger(__name__)
 
+# akshare 延迟到首次调用接口时导入
+ak = lazy_import('akshare')
+
 
 class SectorKlineCollector(BaseCollector):
     """板块K线数据采集器"""
@@ -37,6 +39,7 @@ class SectorKlineCollector(BaseCollector):
         )
         self.engine = get_engine()
         self.table_name = "sector_daily_prices"
+        self.last_dates = None  # 板块 -> 最后交易日（采集水位）
 
     def _init_table(self):
         """确保目标表存在"""
@@ -60,31 +63,32 @@ class SectorKlineCollector(BaseCollector):
             except Exception:
                 pass
 
+    def load_last_dates(self) -> dict:
+        """一次性读取所有板块的采集水位（首次运行时从K线表回填）"""
+        try:
+            self.last_dates = self.watermarks.load_or_bootstrap(
+                self.engine, self.table_name, 'sector_name', 'trade_date'
+            )
+        except Exception as e:
+            logger.warning(f"读取采集水位失败，默认下载3年数据: {e}")
+            self.last_dates = {}
+        return self.last_dates
+
     def get_start_date(self, sector_name: str) -> str:
         """
-        核心逻辑：检查数据库，决定是【全量下载】还是【增量更新】
+        核心逻辑：检查采集水位，决定是【全量下载】还是【增量更新】
         返回格式: 'YYYYMMDD'
         """
-        query = text(f"SELECT MAX(trade_date) FROM {self.table_name} WHERE sector_name = :name")
-        try:
-            with self.engine.connect() as conn:
-                result = conn.execute(query, {"name": sector_name}).scalar()
-
-            if result:
-                # 确保是 date 对象
-                if isinstance(result, str):
-                    result = datetime.strptime(result, '%Y-%m-%d').date()
-                elif isinstance(result, datetime):
-                    result = result.date()
-                next_date = result + timedelta(days=1)
-                return next_date.strftime("%Y%m%d")
-            else:
-                three_years_ago = (datetime.now() - timedelta(days=1095)).strftime("%Y%m%d")
-                return three_years_ago
-        except Exception as e:
-            logger.warning(f"获取起始日期失败，默认下载3年数据: {e}")
-            three_years_ago = (datetime.now() - timedelta(days=1095)).strftime("%Y%m%d")
-            return three_years_ago
+        if self.last_dates is None:
+            self.load_last_dates()
+
+        last_date = self.last_dates.get(sector_name)
+        if last_date:
+            next_date = last_date + timedelta(days=1)
+            return next_date.strftime("%Y%m%d")
+
+        three_years_ago = (datetime.now() - timedelta(days=1095)).strftime("%Y%m%d")
+        return three_years_ago
 
     def fetch_data(self, name: str, s_type: str, start_date: str) -> pd.DataFrame:
         """调用 AkShare 接口，支持指定开始日期"""
@@ -150,21 +154,11 @@ class SectorKlineCollector(BaseCollector):
         if final_df.empty:
             return False
 
-        # 2. 入库逻辑
+        # 2. 入库逻辑（按主键批量 Upsert，同一事务推进采集水位）
         with self.engine.begin() as conn:
-            # 删除已存在的数据
-            for _, row in final_df.iterrows():
-                conn.execute(text(f"""
-                    DELETE FROM {self.table_name}
-                    WHERE sector_name = :sector_name
-                    AND trade_date = :trade_date
-                """), {
-                    'sector_name': row['sector_name'],
-                    'trade_date': row['trade_date']
-                })
-
-            # 插入新数据
-            final_df.to_sql(self.table_name, conn, if_exists='append', index=False)
+            self.writer.upsert(final_df, self.table_name, ['sector_name', 'trade_date'], conn=conn)
+            self.watermarks.advance(conn, self.table_name, final_df, 'sector_name', 'trade_date')
+        self.mirror_to_kline_store(self.table_name, final_df)
 
         return True
 
@@ -193,6 +187,7 @@ class SectorKlineCollector(BaseCollector):
 
         total = len(df_sectors)
         logger.info(f"📋 待处理板块总数: {total}")
+        self.load_last_dates()
 
         update_count = 0
         skip_count = 0
@@ -223,6 +218,7 @@ class SectorKlineCollector(BaseCollector):
             time.sleep(self.request_delay)
 
         print(f"\n🎉 同步完成！更新/插入板块数: {update_count}, 无新数据/跳过: {skip_count}")
+        self.sync_price_cube(self.table_name)
         self.log_collection_end(True, f"更新 {update_count}/{total} 个板块")
 
 
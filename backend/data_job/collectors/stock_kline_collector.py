@@ -6,17 +6,24 @@ EvoAlpha OS - 个股K线数据采集器
 import time
 import datetime
 import pandas as pd
-import akshare as ak
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from sqlalchemy import text, inspect
 from datetime import timedelta
 
 # 公共工具导入
-from data_job.common import setup_network_emergency_kit, setup_backend_path, setup_logger
+from data_job.common import setup_network_emergency_kit, setup_backend_path, setup_logger, lazy_import
 
 # 基类导入
 from data_job.core.base_collector import BaseCollector
+from data_job.core.rate_limiter import get_host_limiter, get_host_slots
+from data_job.core.market_snapshot import (
+    load_trade_calendar, resolve_snapshot_date, build_stock_bars,
+    split_by_watermark, find_adjusted, load_stored_close, STOCK_BAR_COLUMNS
+)
+from data_job.config.collector_config import CollectorConfig
 
 from app.core.database import get_engine
+from app.sync.sync_state import record_reexport
 
 # 路径和网络初始化
 setup_backend_path()
@@ -25,6 +32,15 @@ setup_network_emergency_kit()
 # Logger配置
 logger = setup_logger(__name__)
 
+# akshare 延迟到首次调用接口时导入
+ak = lazy_import('akshare')
+
+# stock_zh_a_hist 的上游主机（用于共享限流）
+KLINE_UPSTREAM_HOST = "push2his.eastmoney.com"
+
+# 新股票 / 需要重算前复权历史时的起始日期
+DEFAULT_START_DATE = "20230101"
+
 
 class StockKlineCollector(BaseCollector):
     """个股K线数据采集器"""
@@ -39,6 +55,8 @@ class StockKlineCollector(BaseCollector):
         self.engine = get_engine()
         self.table_name = "stock_daily_prices"
         self.batch_size = 500
+        # 本次运行中需整段重拉前复权历史的股票（除权），写入时登记重新导出
+        self.rewrite_symbols = set()
 
     def _init_table(self):
         """初始化 daily_prices 表结构"""
@@ -99,62 +117,41 @@ class StockKlineCollector(BaseCollector):
         return []
 
     def get_last_dates(self):
-        """获取增量更新进度"""
+        """获取增量更新进度（读取采集水位表，首次运行时从K线表回填）"""
         try:
-            query = text(f"SELECT symbol, MAX(trade_date) as last_date FROM {self.table_name} GROUP BY symbol")
-            with self.engine.connect() as conn:
-                df = pd.read_sql(query, conn)
-            if df.empty:
-                return {}
-            return dict(zip(df['symbol'], pd.to_datetime(df['last_date']).dt.date))
-        except:
+            return self.watermarks.load_or_bootstrap(self.engine, self.table_name, 'symbol', 'trade_date')
+        except Exception as e:
+            logger.warning(f"⚠️ 读取采集水位失败: {e}")
             return {}
 
     def _bulk_save_kline(self, df_list):
-        """批量存入数据库"""
+        """批量存入数据库，返回是否成功"""
         if not df_list:
-            return
+            return True
         try:
             final_df = pd.concat(df_list, ignore_index=True)
             with self.engine.begin() as conn:
-                final_df.to_sql(self.table_name, conn, if_exists='append', index=False, method='multi', chunksize=1000)
+                self.writer.upsert(final_df, self.table_name, ['symbol', 'trade_date'], conn=conn)
+                self.watermarks.advance(conn, self.table_name, final_df, 'symbol', 'trade_date')
+                record_reexport(conn, self.table_name, self.rewrite_symbols.intersection(final_df['symbol']))
+            self.mirror_to_kline_store(self.table_name, final_df)
+            return True
         except Exception as e:
             logger.error(f"❌ 批量写入失败: {e}")
+            return False
 
-    def run(self):
-        """主执行入口"""
-        self.log_collection_start()
-        logger.info("🚀 [K线] 启动个股行情同步...")
-        self._init_table()
-
-        try:
-            # 健康检查
-            self._health_check()
-        except Exception as e:
-            logger.error(f"❌ 健康检查失败: {e}")
-            self.log_collection_end(False, str(e))
-            return
-
-        stock_list = self.get_stock_list()
-        if not stock_list:
-            logger.error("❌ 未获取到股票列表")
-            self.log_collection_end(False, "无股票列表")
-            return
-
-        existing_records = self.get_last_dates()
-        DEFAULT_START_DATE = "20230101"
-        today = datetime.date.today()
-        total = len(stock_list)
+    def plan_tasks(self, stock_list, existing_records, today):
+        """
+        生成待拉取任务
 
-        collected_data = []
-        BATCH_SIZE = self.batch_size
+        Returns:
+            list: [(code, name, start_date_str, end_date_str), ...]
+        """
+        end_date_str = today.strftime("%Y%m%d")
 
-        logger.info(f"📊 准备处理 {total} 只股票...")
-
-        for i, stock in enumerate(stock_list):
+        tasks = []
+        for stock in stock_list:
             code = stock['symbol']
-            name = stock['name']
-
             last_date = existing_records.get(code)
             if last_date:
                 if last_date >= today:
@@ -163,42 +160,112 @@ class StockKlineCollector(BaseCollector):
             else:
                 start_date_str = DEFAULT_START_DATE
 
-            end_date_str = today.strftime("%Y%m%d")
             if start_date_str > end_date_str:
                 continue
+            tasks.append((code, stock['name'], start_date_str, end_date_str))
+        return tasks
+
+    def apply_snapshot(self, tasks, existing_records):
+        """
+        收盘快照快速通道：一次 stock_zh_a_spot_em 调用补齐所有只缺当日K线的股票
+
+        Args:
+            tasks: plan_tasks 生成的任务
+            existing_records: 采集水位 {symbol: last_date}
+
+        Returns:
+            list: 仍需逐只拉取历史的任务
+        """
+        try:
+            calendar = load_trade_calendar(lambda: self._retry_call(ak.tool_trade_date_hist_sina))
+        except Exception as e:
+            logger.warning(f"⚠️ 获取交易日历失败，跳过快照模式: {e}")
+            return tasks
+
+        snapshot_dates = resolve_snapshot_date(calendar)
+        if snapshot_dates is None:
+            logger.info("ℹ️ 非交易日或尚未收盘，跳过快照模式")
+            return tasks
+        trade_date, prev_trade_date = snapshot_dates
+
+        task_map = {task[0]: task for task in tasks}
+        eligible, _ = split_by_watermark(task_map, existing_records, prev_trade_date)
+        if not eligible:
+            return tasks
+
+        try:
+            bars = build_stock_bars(self._retry_call(ak.stock_zh_a_spot_em), trade_date)
+        except Exception as e:
+            logger.warning(f"⚠️ 拉取全市场快照失败，回退逐只拉取: {e}")
+            return tasks
+
+        bars = bars[bars['symbol'].isin(eligible)]
+
+        # 昨收与库中收盘价不一致：当日除权，前复权历史需整段重拉
+        with self.engine.connect() as conn:
+            stored = load_stored_close(conn, self.table_name, prev_trade_date)
+        adjusted = find_adjusted(bars, stored)
+        bars = bars[~bars['symbol'].isin(adjusted)]
+        self.rewrite_symbols.update(adjusted)
+
+        if not bars.empty and not self._bulk_save_kline([bars[STOCK_BAR_COLUMNS]]):
+            return tasks
+
+        covered = set(bars['symbol'])
+        remaining = []
+        for code, task in task_map.items():
+            if code in covered:
+                continue
+            if code in adjusted:
+                task = (code, task[1], DEFAULT_START_DATE, task[3])
+            remaining.append(task)
+
+        logger.info(f"📸 快照补齐 {len(covered)} 只股票 ({trade_date})，"
+                    f"除权重拉 {len(adjusted)} 只，其余 {len(remaining)} 只走历史接口")
+        return remaining
+
+    def fetch_symbol(self, code, start_date_str, end_date_str):
+        """拉取并清洗单只股票的K线（可在工作线程中调用）"""
+        df = self._retry_call(
+            ak.stock_zh_a_hist,
+            symbol=code, period="daily", start_date=start_date_str,
+            end_date=end_date_str, adjust="qfq"
+        )
+
+        if df is None or df.empty:
+            return None
+
+        rename_dict = {
+            '日期': 'trade_date', '开盘': 'open', '收盘': 'close',
+            '最高': 'high', '最低': 'low', '成交量': 'volume',
+            '成交额': 'amount', '涨跌幅': 'pct_chg', '换手率': 'turnover_rate'
+        }
+        df = df.rename(columns=rename_dict)
+        df['symbol'] = code
+
+        for col in ['open', 'close', 'high', 'low', 'volume', 'amount', 'pct_chg', 'turnover_rate']:
+            if col not in df.columns:
+                df[col] = None
+
+        df['trade_date'] = pd.to_datetime(df['trade_date']).dt.date
+        return df[['symbol', 'trade_date', 'open', 'close', 'high', 'low', 'volume', 'amount', 'pct_chg', 'turnover_rate']]
 
+    def _run_sequential(self, tasks):
+        """串行拉取（workers=1）"""
+        collected_data = []
+        total = len(tasks)
+
+        for i, (code, name, start_date_str, end_date_str) in enumerate(tasks):
             if i % 10 == 0:
                 print(f"[{i+1}/{total}] 同步进度: {code} {name} ...", end="\r")
 
             try:
-                # 使用基类的重试机制
-                df = self._retry_call(
-                    ak.stock_zh_a_hist,
-                    symbol=code, period="daily", start_date=start_date_str,
-                    end_date=end_date_str, adjust="qfq"
-                )
-
-                if df is None or df.empty:
+                save_df = self.fetch_symbol(code, start_date_str, end_date_str)
+                if save_df is None:
                     continue
 
-                rename_dict = {
-                    '日期': 'trade_date', '开盘': 'open', '收盘': 'close',
-                    '最高': 'high', '最低': 'low', '成交量': 'volume',
-                    '成交额': 'amount', '涨跌幅': 'pct_chg', '换手率': 'turnover_rate'
-                }
-                df = df.rename(columns=rename_dict)
-                df['symbol'] = code
-
-                for col in ['open', 'close', 'high', 'low', 'volume', 'amount', 'pct_chg', 'turnover_rate']:
-                    if col not in df.columns:
-                        df[col] = None
-
-                df['trade_date'] = pd.to_datetime(df['trade_date']).dt.date
-                save_df = df[['symbol', 'trade_date', 'open', 'close', 'high', 'low', 'volume', 'amount', 'pct_chg', 'turnover_rate']]
-
                 collected_data.append(save_df)
-
-                if len(collected_data) >= BATCH_SIZE:
+                if len(collected_data) >= self.batch_size:
                     self._bulk_save_kline(collected_data)
                     collected_data = []
 
@@ -209,10 +276,120 @@ class StockKlineCollector(BaseCollector):
         if collected_data:
             self._bulk_save_kline(collected_data)
 
-        logger.info(f"\n✅ 个股 K 线同步完成！")
+    def _run_concurrent(self, tasks, workers):
+        """
+        并发拉取：工作线程负责网络请求（共享主机令牌桶限流），
+        当前线程作为唯一写入线程，每攒够 batch_size 个结果批量写库
+        """
+        self.rate_limiter = get_host_limiter(KLINE_UPSTREAM_HOST)
+        self.call_slots = get_host_slots(KLINE_UPSTREAM_HOST)
+        logger.info(f"⚡ 并发模式: {workers} 线程, 限流 {self.rate_limiter.rate:.1f} 次/秒 ({KLINE_UPSTREAM_HOST})")
+
+        collected_data = []
+        total = len(tasks)
+        done_count = 0
+        max_in_flight = workers * 4  # 限制在途任务数，控制内存
+        task_iter = iter(tasks)
+        in_flight = {}
+
+        def submit_next(executor):
+            task = next(task_iter, None)
+            if task is None:
+                return False
+            code, _, start_date_str, end_date_str = task
+            in_flight[executor.submit(self.fetch_symbol, code, start_date_str, end_date_str)] = code
+            return True
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="kline") as executor:
+                while len(in_flight) < max_in_flight and submit_next(executor):
+                    pass
+
+                while in_flight:
+                    finished, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        code = in_flight.pop(future)
+                        done_count += 1
+                        try:
+                            save_df = future.result()
+                            if save_df is not None:
+                                collected_data.append(save_df)
+                        except Exception as e:
+                            logger.debug(f"采集 {code} 失败: {e}")
+
+                        submit_next(executor)
+
+                    if done_count % 50 == 0 or not in_flight:
+                        print(f"[{done_count}/{total}] 同步进度 ...", end="\r")
+
+                    if len(collected_data) >= self.batch_size:
+                        self._bulk_save_kline(collected_data)
+                        collected_data = []
+        finally:
+            if collected_data:
+                self._bulk_save_kline(collected_data)
+            self.rate_limiter = None
+            self.call_slots = None
+
+    def run(self, workers=None, snapshot=None):
+        """
+        主执行入口
+
+        Args:
+            workers: 并发拉取线程数，默认 CollectorConfig.KLINE_FETCH_WORKERS；1 表示串行
+            snapshot: 是否启用收盘快照快速通道，默认 CollectorConfig.SNAPSHOT_MODE
+        """
+        if workers is None:
+            workers = CollectorConfig.KLINE_FETCH_WORKERS
+        if snapshot is None:
+            snapshot = CollectorConfig.SNAPSHOT_MODE
+
+        self.log_collection_start()
+        logger.info("🚀 [K线] 启动个股行情同步...")
+        self._init_table()
+
+        try:
+            # 健康检查
+            self._health_check()
+        except Exception as e:
+            logger.error(f"❌ 健康检查失败: {e}")
+            self.log_collection_end(False, str(e))
+            return
+
+        stock_list = self.get_stock_list()
+        if not stock_list:
+            logger.error("❌ 未获取到股票列表")
+            self.log_collection_end(False, "无股票列表")
+            return
+
+        existing_records = self.get_last_dates()
+        today = datetime.date.today()
+        total = len(stock_list)
+
+        tasks = self.plan_tasks(stock_list, existing_records, today)
+        logger.info(f"📊 准备处理 {total} 只股票，其中 {len(tasks)} 只需要更新...")
+
+        start_time = time.time()
+        if snapshot and tasks:
+            tasks = self.apply_snapshot(tasks, existing_records)
+
+        if workers > 1 and len(tasks) > 1:
+            self._run_concurrent(tasks, workers)
+        else:
+            self._run_sequential(tasks)
+
+        logger.info(f"\n✅ 个股 K 线同步完成！耗时 {time.time() - start_time:.1f}秒")
+        self.sync_price_cube(self.table_name)
         self.log_collection_end(True, f"处理 {total} 只股票")
 
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=None, help='并发拉取线程数（1 表示串行）')
+    parser.add_argument('--no-snapshot', action='store_true', help='禁用收盘快照，全部走逐只历史接口')
+    args = parser.parse_args()
+
     collector = StockKlineCollector()
-    collector.run()
+    collector.run(workers=args.workers, snapshot=False if args.no_snapshot else None)
@@ -6,14 +6,14 @@ EvoAlpha OS - 股票板块映射数据采集器
 import time
 import random
 import pandas as pd
-import akshare as ak
 from sqlalchemy import text, inspect
 
 # 公共工具导入
-from data_job.common import setup_network_emergency_kit, setup_backend_path, setup_logger
+from data_job.common import setup_network_emergency_kit, setup_backend_path, setup_logger, lazy_import
 
 # 基类导入
 from data_job.core.base_collector import BaseCollector
+from data_job.core.cloud_outbox import upsert_step, insert_step, execute_step
 
 from app.core.database import get_active_engines
 from app.core.config import settings
@@ -25,6 +25,9 @@ setup_network_emergency_kit()
 # Logger配置
 logger = setup_logger(__name__)
 
+# akshare 延迟到首次调用接口时导入
+ak = lazy_import('akshare')
+
 
 class StockSectorListCollector(BaseCollector):
     """股票板块映射数据采集器"""
@@ -82,14 +85,12 @@ class StockSectorListCollector(BaseCollector):
             df['symbol'] = df['symbol'].astype(str).str.zfill(6)
             df = df[['symbol', 'name']].drop_duplicates(subset=['symbol'])
 
-            for name, engine in self.active_engines:
-                with engine.begin() as conn:
-                    if name == "local":
-                        df.to_sql('stock_info', conn, if_exists='replace', index=False)
-                    else:
-                        conn.execute(text("DELETE FROM stock_info"))
-                        df.to_sql('stock_info', conn, if_exists='append', index=False, method='multi', chunksize=1000)
-                logger.info(f"✅ [{name}] 写入完成。")
+            # 全量替换：先清空再插入（本地与云端同一组步骤，云端经 outbox 异步同步）
+            self.write_all([
+                execute_step("DELETE FROM stock_info"),
+                insert_step('stock_info', df),
+            ], label='stock_info')
+            logger.info(f"✅ 股票列表写入完成 ({len(df)} 只)。")
 
         except Exception as e:
             logger.error(f"❌ 更新股票列表失败: {e}")
@@ -145,25 +146,21 @@ class StockSectorListCollector(BaseCollector):
         final_df = pd.concat(df_list, ignore_index=True)
         final_df = final_df.drop_duplicates(subset=['sector_name', 'symbol'])
 
-        for name, engine in self.active_engines:
-            try:
-                with engine.begin() as conn:
-                    method = 'multi' if name == "cloud" else None
-                    final_df.to_sql('stock_sector_map', conn, if_exists='append', index=False, method=method, chunksize=1000)
-            except Exception as e:
-                logger.error(f"❌ [{name}] 批量写入失败: {e}")
+        try:
+            self.write_all([upsert_step('stock_sector_map', final_df, ['sector_name', 'symbol'])],
+                           label='stock_sector_map')
+        except Exception as e:
+            logger.error(f"❌ 批量写入失败: {e}")
 
     def update_sectors(self):
         """更新板块映射"""
         logger.info("🧩 [2/2] 开始更新板块映射...")
 
-        for name, engine in self.active_engines:
-            try:
-                with engine.begin() as conn:
-                    conn.execute(text("DELETE FROM stock_sector_map"))
-                    logger.info(f"🧹 [{name}] 历史映射已清理")
-            except Exception:
-                pass
+        try:
+            self.write_all([execute_step("DELETE FROM stock_sector_map")], label='stock_sector_map')
+            logger.info("🧹 历史映射已清理")
+        except Exception:
+            pass
 
         self._fetch_and_save_sector_category(ak.stock_board_industry_name_em, ak.stock_board_industry_cons_em, 'Industry')
         self._fetch_and_save_sector_category(ak.stock_board_concept_name_em, ak.stock_board_concept_cons_em, 'Concept')
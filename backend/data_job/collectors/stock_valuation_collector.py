@@ -4,12 +4,11 @@ EvoAlpha OS - 股票估值数据采集器
 """
 
 import pandas as pd
-import akshare as ak
 from datetime import date
 from sqlalchemy import text, inspect
 
 # 公共工具导入
-from data_job.common import setup_network_emergency_kit, setup_backend_path, setup_logger
+from data_job.common import setup_network_emergency_kit, setup_backend_path, setup_logger, lazy_import
 
 # 基类导入
 from data_job.core.base_collector import BaseCollector
@@ -21,6 +20,9 @@ setup_network_emergency_kit()
 # Logger配置
 logger = setup_logger(__name__)
 
+# akshare 延迟到首次调用接口时导入
+ak = lazy_import('akshare')
+
 
 class StockValuationCollector(BaseCollector):
     """股票估值数据采集器"""
@@ -139,7 +141,7 @@ class StockValuationCollector(BaseCollector):
             conn.execute(text(f"DELETE FROM {self.table_name} WHERE trade_date = :dt"), {"dt": date_str})
 
             # 追加插入
-            df.to_sql(self.table_name, conn, if_exists='append', index=False)
+            self.writer.insert(df, self.table_name, conn=conn)
 
         logger.info(f"✅ {date_str} 估值数据入库成功！")
 
@@ -5,6 +5,7 @@
 from .network_utils import setup_network_emergency_kit
 from .path_utils import setup_backend_path
 from .logger_utils import setup_logger
+from .lazy_utils import lazy_import
 from .exception_utils import (
     CollectorException,
     NetworkError,
@@ -17,6 +18,7 @@ __all__ = [
     'setup_network_emergency_kit',
     'setup_backend_path',
     'setup_logger',
+    'lazy_import',
     'CollectorException',
     'NetworkError',
     'DataSourceError',
@@ -0,0 +1,42 @@
+"""
+懒加载工具 - 推迟重量级依赖（akshare 等）的导入，加快脚本启动
+"""
+import importlib
+import types
+
+
+class LazyModule(types.ModuleType):
+    """
+    模块代理：首次访问属性时才真正导入目标模块
+
+    属性不做缓存，每次都转发到 sys.modules 中的真实模块（mock.patch 真实模块同样生效）
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_lazy_target'] = name
+
+    def _load(self):
+        return importlib.import_module(self.__dict__['_lazy_target'])
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        return f"<lazy module '{self.__dict__['_lazy_target']}'>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """
+    返回模块代理，用法与 import 一致: ak = lazy_import('akshare'); ak.stock_zh_a_spot_em()
+
+    Args:
+        name: 模块名
+
+    Returns:
+        LazyModule: 首次访问属性时导入的模块代理
+    """
+    return LazyModule(name)
@@ -12,13 +12,52 @@ class CollectorConfig:
     REQUEST_DELAY = 0.5  # 请求间隔（秒）
     MAX_RETRIES = 3  # 最大重试次数
     RETRY_DELAY = 1.0  # 重试延迟（秒）
+    CALL_TIMEOUT = 120  # 单次接口调用硬超时（秒），线程安全，工作线程中同样生效
+    COLLECTOR_TIME_BUDGET = None  # 单个采集任务总时间预算（秒），None 表示不限
     EXPONENTIAL_BACKOFF = True  # 指数退避
 
+    # 健康检查配置（进程级缓存）
+    HEALTH_PROBE_URL = "https://www.baidu.com"  # 网络探测地址
+    HEALTH_PROBE_TIMEOUT = 5  # 探测超时（秒）
+    HEALTH_CHECK_TTL = 60  # 健康状态缓存时间（秒）
+    HEALTH_CHECK_FAILURE_TTL = 5  # 失败状态缓存时间（秒），短一些以便尽快发现恢复
+    HEALTH_PROBE_INTERVAL = 30  # 后台探测间隔（秒）
+    HEALTH_BACKGROUND_PROBE = True  # 首次健康检查时启动后台探测线程
+
     # 批量配置
     BATCH_SIZE = 100  # 批量处理大小
     CHUNK_SIZE = 100  # SQLite批量插入大小
+    UPSERT_BATCH_SIZE = 5000  # Upsert executemany 每批行数
+    UPSERT_STAGING_THRESHOLD = 20000  # 超过该行数走临时表合并
     PARALLEL_WORKERS = 4  # 并发工作进程数
 
+    # 并发采集配置
+    KLINE_FETCH_WORKERS = 8  # 个股K线并发拉取线程数（1 表示串行）
+    DEFAULT_HOST_RATE_LIMIT = 5.0  # 未单独配置的上游主机：每秒请求数
+    HOST_RATE_LIMITS = {  # 按上游主机限流（每秒请求数，进程内所有线程共享）
+        "push2his.eastmoney.com": 8.0,  # 东财历史K线（stock_zh_a_hist）
+        "push2.eastmoney.com": 5.0,  # 东财实时行情
+    }
+    DEFAULT_HOST_MAX_IN_FLIGHT = 8  # 未单独配置的上游主机：同时在途的调用数（超时未结束的调用继续占用）
+    HOST_MAX_IN_FLIGHT = {
+        "push2his.eastmoney.com": 16,  # KLINE_FETCH_WORKERS 个工作线程 + 同样数量的超时挂起调用
+    }
+
+    # 阶段图（DAG）执行配置
+    DAG_MAX_WORKERS = 4  # 同时运行的阶段数（采集器 / 因子计算 / 策略）
+
+    # 收盘快照配置（一次 spot 调用生成全市场当日日线）
+    SNAPSHOT_MODE = True  # 日常增量优先使用收盘快照
+    SNAPSHOT_READY_TIME = "15:05"  # 该时间之后的 spot 数据视为当日收盘数据
+    SNAPSHOT_PRICE_TOLERANCE = 0.005  # 昨收与库中收盘价的相对误差容忍度（超出视为除权，重拉历史）
+
+    # 云端写入 Outbox（CLOUD_WRITE_MODE=outbox 时生效）
+    OUTBOX_BATCH_ROWS = 50000  # 每次云端事务合并的最大行数
+    OUTBOX_REPLAY_INTERVAL = 30  # 后台重放间隔（秒）
+    OUTBOX_MAX_BACKOFF = 600  # 重放失败退避上限（秒）
+    OUTBOX_MAX_ATTEMPTS = 8  # 云端可达时条目连续失败该次数后移入死信表 cloud_outbox_dead，不再阻塞后续条目
+    OUTBOX_FLUSH_TIMEOUT = 60  # 采集脚本结束前尽量重放的时间预算（秒），剩余条目留待下次
+
     # 数据保留策略
     DATA_RETENTION_DAYS = 1095  # 数据保留3年
     CLEANUP_OLD_DATA = True  # 自动清理旧数据
@@ -2,10 +2,26 @@
 核心框架层 - 提供采集器基类和核心功能
 """
 from .base_collector import BaseCollector, BatchCollector, NetworkError, ConnectionTimeout
+from .upsert_writer import UpsertWriter
+from .watermark_store import WatermarkStore
+from .rate_limiter import TokenBucket, get_host_limiter, get_host_slots
+from .deadline import Deadline, TimeBudgetExceeded, run_with_timeout, arun_with_timeout
+from .health_monitor import HealthMonitor, get_health_monitor
 
 __all__ = [
     'BaseCollector',
     'BatchCollector',
     'NetworkError',
-    'ConnectionTimeout'
+    'ConnectionTimeout',
+    'UpsertWriter',
+    'WatermarkStore',
+    'TokenBucket',
+    'get_host_limiter',
+    'get_host_slots',
+    'Deadline',
+    'TimeBudgetExceeded',
+    'run_with_timeout',
+    'arun_with_timeout',
+    'HealthMonitor',
+    'get_health_monitor'
 ]
@@ -9,7 +9,7 @@ import time
 import json
 import logging
 import random
-import signal
+import threading
 import pandas as pd
 import requests
 from abc import ABC, abstractmethod
@@ -17,7 +17,6 @@ from datetime import datetime, timedelta
 from typing import Callable, Any, Optional
 from sqlalchemy import text
 from pathlib import Path
-from contextlib import contextmanager
 
 # ================= 环境路径适配 =================
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -25,7 +24,19 @@ backend_dir = os.path.abspath(os.path.join(current_dir, ".."))
 if backend_dir not in sys.path:
     sys.path.insert(0, backend_dir)
 
-from app.core.database import get_engine
+from app.core.config import settings
+from app.core.database import get_engine, get_active_engines
+from app.core.kline_store import get_kline_store
+from app.core.price_cube import PriceCube
+from data_job.core.upsert_writer import UpsertWriter
+from data_job.core.watermark_store import WatermarkStore
+from data_job.core.cloud_outbox import apply_steps, get_cloud_outbox
+from data_job.core.deadline import (
+    ConnectionTimeout, TimeBudgetExceeded, Deadline, run_with_timeout, deadline_scope
+)
+from data_job.core.health_monitor import get_health_monitor
+from data_job.core.rate_limiter import get_host_slots
+from data_job.config.collector_config import CollectorConfig
 
 
 class NetworkError(Exception):
@@ -33,18 +44,15 @@ class NetworkError(Exception):
     pass
 
 
-class ConnectionTimeout(Exception):
-    """连接超时"""
-    pass
-
-
 class BaseCollector(ABC):
     """数据采集基类 - 提供通用功能和连接稳定性保障"""
 
     def __init__(self, collector_name: str,
                  request_timeout: int = 30,
                  request_delay: float = 0.5,
-                 max_retries: int = 3):
+                 max_retries: int = 3,
+                 call_timeout: Optional[float] = None,
+                 time_budget: Optional[float] = None):
         """
         初始化采集器
 
@@ -53,6 +61,8 @@ class BaseCollector(ABC):
             request_timeout: 请求超时时间（秒）
             request_delay: 请求间隔（秒）
             max_retries: 最大重试次数
+            call_timeout: 单次接口调用（如一次 akshare 调用）的超时时间（秒），默认 CollectorConfig.CALL_TIMEOUT
+            time_budget: 整个采集任务的时间预算（秒），默认 CollectorConfig.COLLECTOR_TIME_BUDGET（None 不限）
         """
         self.collector_name = collector_name
         self.engine = get_engine()
@@ -61,8 +71,13 @@ class BaseCollector(ABC):
         self.request_timeout = request_timeout
         self.request_delay = request_delay
         self.max_retries = max_retries
+        self.call_timeout = call_timeout if call_timeout is not None else CollectorConfig.CALL_TIMEOUT
+        self.time_budget = time_budget if time_budget is not None else CollectorConfig.COLLECTOR_TIME_BUDGET
         self.session = self._create_session()
 
+        # 采集任务截止时间（log_collection_start 时按 time_budget 重置）
+        self.deadline = Deadline(None)
+
         # 进度文件路径
         self.progress_dir = Path(backend_dir) / "data" / "collection_progress"
         self.progress_dir.mkdir(parents=True, exist_ok=True)
@@ -74,13 +89,40 @@ class BaseCollector(ABC):
         # 日志配置
         self.logger = logging.getLogger(f"collector.{collector_name}")
 
+        # 批量 Upsert 写入器（按连接解析方言，可服务多个引擎）
+        self.writer = UpsertWriter(self.engine, logger=self.logger)
+
+        # 采集水位（与数据写入同事务推进，用于增量规划）
+        self.watermarks = WatermarkStore()
+
+        # 列式K线仓库（KLINE_STORE_MODE=off 时为 None）
+        self.kline_store = get_kline_store()
+        # 待写入列式K线仓库的数据 {table_name: [DataFrame]}（逐标的落库的采集器在运行结束时一次性写入）
+        self.kline_buffer = {}
+
         # 统计信息
         self.stats = {
             "total_requests": 0,
             "failed_requests": 0,
             "retry_count": 0,
-            "timeout_count": 0
+            "timeout_count": 0,
+            "budget_exceeded_count": 0
         }
+        self._stats_lock = threading.Lock()
+
+        # 上游限流器（并发采集时设置为 get_host_limiter(...) 返回的共享令牌桶）
+        self.rate_limiter = None
+        # 上游调用槽（并发采集时设置为 get_host_slots(...)；None 时使用未指定主机的公共槽）
+        self.call_slots = None
+
+        # 进程级健康监测（所有采集器共享缓存状态）
+        self.health_monitor = get_health_monitor()
+        self.health_monitor.register_engine(self.engine)
+
+    def _incr_stat(self, key: str, value: int = 1):
+        """线程安全地累加统计项"""
+        with self._stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + value
 
     def _create_session(self) -> requests.Session:
         """
@@ -105,56 +147,56 @@ class BaseCollector(ABC):
 
         return session
 
-    @contextmanager
     def _timeout_context(self, timeout_seconds: int):
         """
-        超时上下文管理器
+        超时上下文管理器（线程安全，可在工作线程中使用）
+
+        协作式超时：块内可通过 yield 出的 Deadline 检查剩余时间，
+        退出时若已超时则抛出 ConnectionTimeout；需要中断阻塞调用时使用 _call_with_timeout
 
         Args:
             timeout_seconds: 超时时间（秒）
         """
-        def timeout_handler(signum, frame):
-            raise ConnectionTimeout(f"操作超时（{timeout_seconds}秒）")
+        return deadline_scope(self.deadline.cap(timeout_seconds), what="操作")
 
-        # 设置信号处理器
-        old_handler = signal.signal(signal.SIGALRM, timeout_handler)
-        signal.alarm(timeout_seconds)
+    def _call_with_timeout(self, func: Callable, timeout: Optional[float] = None, **kwargs):
+        """
+        带硬超时执行单次调用（超时时间同时受采集任务剩余预算约束）
 
-        try:
-            yield
-        finally:
-            # 恢复原来的处理器
-            signal.alarm(0)
-            signal.signal(signal.SIGALRM, old_handler)
+        Args:
+            func: 要执行的函数
+            timeout: 单次超时（秒），默认 self.call_timeout
+            **kwargs: 函数参数
+
+        Returns:
+            函数返回值；超时抛出 ConnectionTimeout，预算耗尽抛出 TimeBudgetExceeded
+        """
+        self.deadline.check(f"采集任务 [{self.collector_name}]")
+        effective = self.deadline.cap(timeout if timeout is not None else self.call_timeout)
+        return run_with_timeout(func, effective, slots=self.call_slots or get_host_slots(), **kwargs)
 
     def _check_network_connection(self) -> bool:
         """
-        检查网络连接
+        检查网络连接（读取进程级缓存，过期时才真正探测）
 
         Returns:
             网络是否可用
         """
-        try:
-            # 尝试连接百度检测网络
-            response = self.session.get(
-                "https://www.baidu.com",
-                timeout=5
-            )
-            return response.status_code == 200
-        except:
-            return False
+        return self.health_monitor.network_status().ok
 
     def _health_check(self):
-        """连接健康检查"""
-        if not self._check_network_connection():
-            raise NetworkError("网络连接不可用")
+        """连接健康检查（TTL 缓存 + 后台探测，命中缓存时为 O(1)）"""
+        if CollectorConfig.HEALTH_BACKGROUND_PROBE and not self.health_monitor.is_running:
+            self.health_monitor.start()
+
+        network = self.health_monitor.network_status()
+        if not network.ok:
+            raise NetworkError(f"网络连接不可用: {network.error}")
 
         # 测试数据库连接
-        try:
-            with self.engine.connect() as conn:
-                conn.execute(text("SELECT 1"))
-        except Exception as e:
-            raise NetworkError(f"数据库连接失败: {e}")
+        database = self.health_monitor.database_status(self.engine)
+        if not database.ok:
+            raise NetworkError(f"数据库连接失败: {database.error}")
 
     def _load_progress(self) -> dict:
         """加载采集进度"""
@@ -181,7 +223,7 @@ class BaseCollector(ABC):
             self.logger.warning(f"保存进度文件失败: {e}")
 
     def _retry_call(self, func, max_retries=None, delay=None,
-                    exponential_backoff=True, **kwargs):
+                    exponential_backoff=True, call_timeout=None, **kwargs):
         """
         增强的重试机制（支持指数退避和抖动）
 
@@ -190,10 +232,14 @@ class BaseCollector(ABC):
             max_retries: 最大重试次数（默认使用self.max_retries）
             delay: 初始延迟（秒）
             exponential_backoff: 是否使用指数退避
+            call_timeout: 单次调用超时（秒），默认 self.call_timeout
             **kwargs: 函数参数
 
         Returns:
             函数执行结果，失败返回None
+
+        Raises:
+            TimeBudgetExceeded: 采集任务时间预算已耗尽（不再重试）
         """
         if max_retries is None:
             max_retries = self.max_retries
@@ -204,30 +250,39 @@ class BaseCollector(ABC):
 
         for attempt in range(max_retries):
             try:
-                self.stats["total_requests"] += 1
+                self._incr_stat("total_requests")
 
                 # 健康检查
                 if attempt > 0:
                     self._health_check()
 
-                # 执行函数
-                result = func(**kwargs)
+                # 限流：等待上游主机的令牌
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire()
+
+                # 执行函数（硬超时，受采集任务剩余预算约束）
+                result = self._call_with_timeout(func, call_timeout, **kwargs)
 
-                # 请求成功后添加随机延迟（避免被封）
-                if result is not None:
+                # 请求成功后添加随机延迟（避免被封）；有限流器时由令牌桶控制节奏
+                if result is not None and self.rate_limiter is None:
                     jitter = random.uniform(0, 0.3)  # 0-0.3秒随机抖动
                     time.sleep(self.request_delay + jitter)
 
                 return result
 
+            except TimeBudgetExceeded:
+                self._incr_stat("budget_exceeded_count")
+                self.logger.warning(f"⏰ 采集任务 [{self.collector_name}] 时间预算已耗尽，停止请求")
+                raise
+
             except (ConnectionTimeout, requests.exceptions.Timeout) as e:
-                self.stats["timeout_count"] += 1
+                self._incr_stat("timeout_count")
                 last_error = e
                 self.logger.warning(f"请求超时 (尝试 {attempt + 1}/{max_retries})")
 
             except (requests.exceptions.ConnectionError,
                    requests.exceptions.RequestException) as e:
-                self.stats["failed_requests"] += 1
+                self._incr_stat("failed_requests")
                 last_error = e
                 self.logger.warning(f"网络错误 (尝试 {attempt + 1}/{max_retries}): {e}")
 
@@ -237,7 +292,7 @@ class BaseCollector(ABC):
                     self.logger.warning(f"请求失败 (尝试 {attempt + 1}/{max_retries}): {e}")
                 else:
                     self.logger.error(f"请求失败，已达最大重试次数: {e}")
-                    self.stats["failed_requests"] += 1
+                    self._incr_stat("failed_requests")
                     return None
 
             # 计算等待时间
@@ -248,7 +303,8 @@ class BaseCollector(ABC):
                 else:
                     wait_time = delay + random.uniform(0, 0.5)
 
-                self.stats["retry_count"] += 1
+                self._incr_stat("retry_count")
+                wait_time = self.deadline.cap(wait_time)
                 self.logger.info(f"等待 {wait_time:.1f} 秒后重试...")
                 time.sleep(wait_time)
 
@@ -309,6 +365,7 @@ class BaseCollector(ABC):
     def log_collection_start(self):
         """记录采集开始"""
         self.logger.info(f"🚀 开始采集 [{self.collector_name}]")
+        self.deadline = Deadline(self.time_budget)
         self.progress["collection_start_time"] = datetime.now().isoformat()
         self._save_progress()
 
@@ -346,65 +403,126 @@ class BaseCollector(ABC):
         }
 
     def save_with_deduplication(self, df: pd.DataFrame, table_name: str,
-                                key_columns: list, date_column: str = None):
+                                key_columns: list, date_column: str = None,
+                                conn=None):
         """
         保存数据并去重（增量更新）
 
+        使用 UpsertWriter 按主键批量 Upsert，替代逐行 DELETE + INSERT
+
         Args:
             df: 要保存的数据
             table_name: 表名
             key_columns: 主键列列表
-            date_column: 日期列名（用于增量更新）
+            date_column: 日期列名（不在主键中时并入主键，保证同一标的多日数据不被合并）
+            conn: 已开启事务的连接（为空则使用 self.engine 新开事务）
         """
         if df.empty:
             self.logger.warning("数据为空，跳过保存")
             return 0
 
-        try:
-            with self.engine.begin() as conn:
-                # 如果有日期列，只删除日期范围内的数据
-                if date_column and date_column in df.columns:
-                    min_date = df[date_column].min()
-                    max_date = df[date_column].max()
-
-                    # 构建删除条件
-                    key_condition = " AND ".join([f"{col} = :{col}" for col in key_columns])
-
-                    # 删除重复数据
-                    for _, row in df.iterrows():
-                        params = {col: row[col] for col in key_columns}
-                        params.update({
-                            "min_date": min_date,
-                            "max_date": max_date
-                        })
-                        conn.execute(text(f"""
-                            DELETE FROM {table_name}
-                            WHERE {key_condition}
-                            AND {date_column} BETWEEN :min_date AND :max_date
-                        """), params)
-                else:
-                    # 删除所有主键重复的数据
-                    for _, row in df.iterrows():
-                        params = {col: row[col] for col in key_columns}
-                        conn.execute(text(f"""
-                            DELETE FROM {table_name}
-                            WHERE {" AND ".join([f"{col} = :{col}" for col in key_columns])}
-                        """), params)
+        keys = list(key_columns)
+        if date_column and date_column in df.columns and date_column not in keys:
+            keys.append(date_column)
 
-                # 插入新数据（使用 chunksize 避免 SQLite 变量限制）
-                df.to_sql(table_name, conn, if_exists='append', index=False,
-                         method='multi', chunksize=100)
+        try:
+            inserted_count = self.writer.upsert(df, table_name, keys, conn=conn)
 
-                inserted_count = len(df)
-                self.progress["collection_count"] = self.progress.get("collection_count", 0) + inserted_count
-                self._save_progress()
+            self.progress["collection_count"] = self.progress.get("collection_count", 0) + inserted_count
+            self._save_progress()
 
-                return inserted_count
+            return inserted_count
 
         except Exception as e:
             self.logger.error(f"保存数据失败: {e}")
             raise
 
+    def write_all(self, steps: list, label: str = "") -> int:
+        """
+        把一组写入步骤（见 data_job.core.cloud_outbox）写入所有激活的数据库
+
+        本地在一个事务中立即提交；云端在 outbox 模式下随本地事务入队、由后台线程批量重放，
+        sync 模式下逐个云端引擎同步写入（失败只记录日志）
+
+        Args:
+            steps: 写入步骤列表（按顺序在同一事务中执行）
+            label: 日志 / outbox 标签
+
+        Returns:
+            int: 本地写入的行数（本地写入失败时抛出异常）
+        """
+        label = label or self.collector_name
+        outbox = get_cloud_outbox()
+        with self.engine.begin() as conn:
+            rows = apply_steps(conn, steps, self.writer, self.watermarks)
+            if outbox is not None:
+                outbox.enqueue(conn, steps, label)
+
+        if outbox is None:
+            for mode, engine in get_active_engines():
+                if engine is self.engine:
+                    continue
+                try:
+                    with engine.begin() as conn:
+                        apply_steps(conn, steps, self.writer, self.watermarks)
+                except Exception as e:
+                    self.logger.error(f"❌ [{mode}] {label} 写入失败: {e}")
+        return rows
+
+    def mirror_to_kline_store(self, table_name: str, df: pd.DataFrame):
+        """
+        数据库写入成功后同步写入列式K线仓库（未启用或非K线表时跳过；失败只告警，不影响主库）
+
+        Args:
+            table_name: 已写入的数据库表名
+            df: 已写入的数据
+        """
+        if self.kline_store is None or df is None or df.empty:
+            return
+        asset = self.kline_store.asset_for_table(table_name)
+        if asset is None:
+            return
+        try:
+            self.kline_store.write(asset, df)
+        except Exception as e:
+            self.logger.warning(f"⚠️ 写入列式K线仓库失败（{table_name}）: {e}")
+
+    def buffer_kline_store(self, table_name: str, df: pd.DataFrame):
+        """
+        暂存待写入列式K线仓库的数据，由 flush_kline_store 合并写入
+
+        仓库按月分区、每次写入整体重写涉及的月份，逐标的写入会让同一月份被重写 N 次
+
+        Args:
+            table_name: 已写入的数据库表名
+            df: 已写入的数据
+        """
+        if self.kline_store is None or df is None or df.empty:
+            return
+        self.kline_buffer.setdefault(table_name, []).append(df)
+
+    def flush_kline_store(self):
+        """把暂存的数据合并后写入列式K线仓库（每个月份只重写一次）"""
+        buffer, self.kline_buffer = self.kline_buffer, {}
+        for table_name, frames in buffer.items():
+            self.mirror_to_kline_store(table_name, pd.concat(frames, ignore_index=True))
+
+    def sync_price_cube(self, table_name: str):
+        """
+        采集结束后把新K线增量追加到内存映射价格立方体（未启用或非K线表时跳过；失败只告警）
+
+        Args:
+            table_name: K线表名
+        """
+        asset = PriceCube.asset_for_table(table_name)
+        if not settings.PRICE_CUBE_ENABLED or asset is None:
+            return
+        try:
+            rows = PriceCube(settings.PRICE_CUBE_DIR, asset).sync_from_db(self.engine)
+            self.logger.info(f"📦 价格立方体 [{asset}] 已同步 {rows} 行")
+        except Exception as e:
+            self.logger.warning(f"⚠️ 价格立方体同步失败（{table_name}）: {e}")
+
     def clean_old_data(self, table_name: str, date_column: str,
                       keep_days: int = 365):
         """
@@ -555,6 +673,11 @@ class BatchCollector(BaseCollector):
                     # 避免请求过快
                     time.sleep(0.5)
 
+                except TimeBudgetExceeded:
+                    # 时间预算耗尽：停止本轮，下次从 last_item 断点继续
+                    self.logger.warning(f"⏰ 时间预算耗尽，已处理到第 {i} 个项目，剩余项目下次继续")
+                    break
+
                 except Exception as e:
                     self.logger.error(f"处理失败 [{item}]: {e}")
                     failed_items.append(str(item))
@@ -0,0 +1,500 @@
+"""
+EvoAlpha OS - 云端写入 Outbox（写后异步同步）
+本地写入立即提交；发往云端的同一组写入步骤在同一个本地事务中序列化进 cloud_outbox 表，
+由后台重放线程按顺序、合并成大批量写入云端（失败指数退避重试）。
+云端慢或不可达时只会让 outbox 积压，不会拖慢采集。
+
+写入步骤（按顺序在同一事务中执行）：
+    upsert_step(table, df, keys)      按主键 Upsert
+    insert_step(table, df)            追加插入
+    execute_step(sql, params)         任意语句（如幂等删除），重放时作为合并屏障
+    watermark_step(table, df, e, d)   推进采集水位
+    to_sql_step(table, df, if_exists) DataFrame.to_sql
+
+重放语义为"至少一次"：云端提交后、本地出队前进程退出会导致重复重放，步骤需幂等
+（现有调用方均为 Upsert / 先删后插 / 水位只进不退）。
+
+云端可达但条目本身无法写入（表结构不一致、约束冲突等）时，该条目失败 OUTBOX_MAX_ATTEMPTS 次后
+移入死信表 cloud_outbox_dead，不再阻塞后续条目（查看 / 重新入队: replay_outbox.py --dead / --requeue）。
+"""
+
+import pickle
+import threading
+import time
+import logging
+from datetime import datetime, timedelta
+
+import pandas as pd
+from sqlalchemy import text
+
+from data_job.config.collector_config import CollectorConfig
+
+OUTBOX_TABLE = "cloud_outbox"
+DEAD_LETTER_TABLE = "cloud_outbox_dead"
+
+logger = logging.getLogger("collector.cloud_outbox")
+
+
+# ================= 写入步骤 =================
+
+def upsert_step(table: str, df: pd.DataFrame, keys: list) -> dict:
+    return {'op': 'upsert', 'table': table, 'df': df, 'keys': list(keys)}
+
+
+def insert_step(table: str, df: pd.DataFrame) -> dict:
+    return {'op': 'insert', 'table': table, 'df': df}
+
+
+def execute_step(sql: str, params: dict = None) -> dict:
+    return {'op': 'execute', 'table': None, 'sql': sql, 'params': params or {}}
+
+
+def watermark_step(table: str, df: pd.DataFrame, entity_column: str, date_column: str) -> dict:
+    return {'op': 'watermark', 'table': table, 'df': df[[entity_column, date_column]],
+            'keys': [entity_column, date_column]}
+
+
+def to_sql_step(table: str, df: pd.DataFrame, if_exists: str = 'append') -> dict:
+    return {'op': 'to_sql', 'table': table, 'df': df, 'if_exists': if_exists}
+
+
+def step_rows(steps: list) -> int:
+    return sum(len(s['df']) for s in steps if s.get('df') is not None)
+
+
+def apply_steps(conn, steps: list, writer, watermarks) -> int:
+    """
+    在给定连接（已开启事务）上按顺序执行写入步骤
+
+    Returns:
+        int: 写入的数据行数
+    """
+    rows = 0
+    for step in steps:
+        op = step['op']
+        if op == 'execute':
+            conn.execute(text(step['sql']), step['params'])
+            continue
+
+        df = step['df']
+        if df is None or df.empty:
+            continue
+        if op == 'upsert':
+            writer.upsert(df, step['table'], step['keys'], conn=conn)
+        elif op == 'insert':
+            writer.insert(df, step['table'], conn=conn)
+        elif op == 'watermark':
+            watermarks.advance(conn, step['table'], df, *step['keys'])
+        elif op == 'to_sql':
+            df.to_sql(step['table'], conn, if_exists=step['if_exists'], index=False)
+        else:
+            raise ValueError(f"未知写入步骤: {op}")
+        rows += len(df)
+    return rows
+
+
+def _write_target(step: dict):
+    """步骤实际写入的对象（watermark 写的是水位表，与同名数据表的写入互不影响）"""
+    return ('watermark', step['table']) if step['op'] == 'watermark' else step['table']
+
+
+def coalesce_steps(steps: list) -> list:
+    """
+    合并多个 outbox 条目的步骤：同表同操作的 upsert / insert / watermark 合并为一步（一次大批量写入）
+
+    不同写入对象之间互不影响，可以跨越合并；execute / to_sql 为屏障，同一对象上的不同操作保持原有先后顺序
+    """
+    merged = []
+    for step in steps:
+        target = None
+        if step['op'] in ('upsert', 'insert', 'watermark'):
+            for prev in reversed(merged):
+                if prev['op'] in ('execute', 'to_sql'):
+                    break
+                if _write_target(prev) == _write_target(step):
+                    same = (prev['op'] == step['op'] and prev.get('keys') == step.get('keys')
+                            and list(prev['parts'][0].columns) == list(step['df'].columns))
+                    target = prev if same else None
+                    break
+        if target is not None:
+            target['parts'].append(step['df'])
+        else:
+            merged.append(dict(step, parts=[step['df']] if step.get('df') is not None else []))
+
+    result = []
+    for step in merged:
+        parts = step.pop('parts')
+        if len(parts) > 1:
+            df = pd.concat(parts, ignore_index=True)
+            if step['op'] == 'upsert':
+                df = df.drop_duplicates(step['keys'], keep='last')
+            step['df'] = df
+        result.append(step)
+    return result
+
+
+# ================= Outbox =================
+
+class CloudOutbox:
+    """
+    云端写入 Outbox
+
+    - write(): 本地执行写入步骤，并在同一事务中把步骤入队（本地写入与入队原子提交）
+    - drain(): 把积压条目按 id 顺序合并成大批量写入云端，成功后出队；失败时记录错误并退避，
+      反复失败的条目移入死信表
+    - start() / stop(): 后台重放线程
+    """
+
+    def __init__(self, local_engine, cloud_engine=None, writer=None, watermarks=None,
+                 batch_rows: int = None, interval: float = None, max_backoff: float = None,
+                 max_attempts: int = None, engine_factory=None):
+        """
+        Args:
+            local_engine: 本地引擎（outbox 表所在库）
+            cloud_engine: 云端引擎（为 None 时由重放线程通过 engine_factory 按需创建）
+            writer: UpsertWriter（默认新建）
+            watermarks: WatermarkStore（默认新建）
+            batch_rows: 每次云端事务合并的最大行数
+            interval: 后台重放间隔（秒）
+            max_backoff: 失败退避上限（秒）
+            max_attempts: 云端可达时条目失败多少次后移入死信表
+            engine_factory: 创建云端引擎的函数；创建失败时条目照常入队，下次重放时重试
+        """
+        from data_job.core.upsert_writer import UpsertWriter
+        from data_job.core.watermark_store import WatermarkStore
+
+        self.local_engine = local_engine
+        self.cloud_engine = cloud_engine
+        self.engine_factory = engine_factory
+        self.writer = writer or UpsertWriter(local_engine, logger=logger)
+        self.watermarks = watermarks or WatermarkStore()
+        self.batch_rows = batch_rows or CollectorConfig.OUTBOX_BATCH_ROWS
+        self.interval = interval if interval is not None else CollectorConfig.OUTBOX_REPLAY_INTERVAL
+        self.max_backoff = max_backoff or CollectorConfig.OUTBOX_MAX_BACKOFF
+        self.max_attempts = max_attempts or CollectorConfig.OUTBOX_MAX_ATTEMPTS
+
+        self._ensured = False
+        self._drain_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    # ================= 入队 =================
+
+    def ensure_table(self, conn):
+        if self._ensured:
+            return
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {OUTBOX_TABLE} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                label VARCHAR(200),
+                payload BLOB,
+                row_count INTEGER,
+                attempts INTEGER DEFAULT 0,
+                last_error TEXT,
+                next_attempt_at TIMESTAMP,
+                created_at TIMESTAMP
+            )
+        """))
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {DEAD_LETTER_TABLE} (
+                id INTEGER PRIMARY KEY,
+                label VARCHAR(200),
+                payload BLOB,
+                row_count INTEGER,
+                attempts INTEGER,
+                last_error TEXT,
+                created_at TIMESTAMP,
+                failed_at TIMESTAMP
+            )
+        """))
+        self._ensured = True
+
+    def enqueue(self, conn, steps: list, label: str = "") -> None:
+        """在调用方的本地事务中入队（随本地写入一起提交）"""
+        self.ensure_table(conn)
+        now = datetime.now()
+        conn.execute(text(f"""
+            INSERT INTO {OUTBOX_TABLE} (label, payload, row_count, attempts, next_attempt_at, created_at)
+            VALUES (:label, :payload, :rows, 0, :now, :now)
+        """), {
+            "label": label, "payload": pickle.dumps(steps, protocol=pickle.HIGHEST_PROTOCOL),
+            "rows": step_rows(steps), "now": now,
+        })
+        self._wakeup.set()
+
+    def write(self, steps: list, label: str = "") -> int:
+        """本地写入 + 入队（同一事务）"""
+        with self.local_engine.begin() as conn:
+            rows = apply_steps(conn, steps, self.writer, self.watermarks)
+            self.enqueue(conn, steps, label)
+        return rows
+
+    def pending(self) -> dict:
+        """
+        积压情况: {'entries': 条目数, 'rows': 行数, 'oldest': 最早入队时间, 'last_error': 队首错误,
+                  'dead': 死信条目数}
+        """
+        with self.local_engine.begin() as conn:
+            self.ensure_table(conn)
+            row = conn.execute(text(f"""
+                SELECT COUNT(*), COALESCE(SUM(row_count), 0), MIN(created_at) FROM {OUTBOX_TABLE}
+            """)).fetchone()
+            head = conn.execute(text(f"SELECT last_error FROM {OUTBOX_TABLE} ORDER BY id LIMIT 1")).scalar()
+            dead = conn.execute(text(f"SELECT COUNT(*) FROM {DEAD_LETTER_TABLE}")).scalar()
+        return {'entries': int(row[0]), 'rows': int(row[1]), 'oldest': row[2], 'last_error': head,
+                'dead': int(dead)}
+
+    def dead_letters(self) -> list:
+        """死信条目: [{'id', 'label', 'rows', 'attempts', 'last_error', 'created_at', 'failed_at'}]"""
+        with self.local_engine.begin() as conn:
+            self.ensure_table(conn)
+            rows = conn.execute(text(f"""
+                SELECT id, label, row_count, attempts, last_error, created_at, failed_at
+                FROM {DEAD_LETTER_TABLE} ORDER BY id
+            """)).fetchall()
+        keys = ('id', 'label', 'rows', 'attempts', 'last_error', 'created_at', 'failed_at')
+        return [dict(zip(keys, row)) for row in rows]
+
+    def requeue_dead(self, ids: list = None) -> int:
+        """
+        把死信条目重新加入队尾（修复云端问题后使用）
+
+        Args:
+            ids: 死信条目 id，None 表示全部
+
+        Returns:
+            int: 重新入队的条目数
+        """
+        condition = f"WHERE id IN ({','.join(str(int(i)) for i in ids)})" if ids else ""
+        with self.local_engine.begin() as conn:
+            self.ensure_table(conn)
+            now = datetime.now()
+            count = conn.execute(text(f"""
+                INSERT INTO {OUTBOX_TABLE} (label, payload, row_count, attempts, next_attempt_at, created_at)
+                SELECT label, payload, row_count, 0, :now, created_at FROM {DEAD_LETTER_TABLE} {condition} ORDER BY id
+            """), {"now": now}).rowcount
+            conn.execute(text(f"DELETE FROM {DEAD_LETTER_TABLE} {condition}"))
+        if count:
+            self._wakeup.set()
+        return count
+
+    # ================= 重放 =================
+
+    def _next_batch(self, conn, isolate_until: int = 0):
+        """
+        按 id 顺序取一批条目（至少一条，累计行数不超过 batch_rows）；队首处于退避期时返回空
+
+        Args:
+            isolate_until: 队首 id 不超过该值时只取队首一条（合并批次失败后逐条定位失败条目）
+        """
+        head = conn.execute(text(f"""
+            SELECT id, next_attempt_at, row_count, payload FROM {OUTBOX_TABLE} ORDER BY id LIMIT 1
+        """)).fetchone()
+        if head is None:
+            return []
+        if head[1] is not None and pd.Timestamp(head[1]) > pd.Timestamp(datetime.now()):
+            return []
+        if head[0] <= isolate_until:
+            return [(head[0], head[3])]
+
+        entries, total = [], 0
+        result = conn.execute(text(f"SELECT id, row_count, payload FROM {OUTBOX_TABLE} ORDER BY id"))
+        for entry_id, rows, payload in result:
+            if entries and total + (rows or 0) > self.batch_rows:
+                break
+            entries.append((entry_id, payload))
+            total += rows or 0
+        result.close()
+        return entries
+
+    def drain(self, time_budget: float = None) -> int:
+        """
+        重放积压条目，直到队列为空、遇到失败或超出时间预算
+
+        Args:
+            time_budget: 时间预算（秒），None 表示不限；超出后不再开始新的批次
+
+        Returns:
+            int: 成功重放的条目数
+        """
+        if self.cloud_engine is None and self.engine_factory is None:
+            return 0
+        deadline = time.monotonic() + time_budget if time_budget is not None else None
+        replayed = 0
+        isolate_until = 0
+
+        # 另一线程正在重放（可能卡在慢速云端）时，最多等待到预算用完
+        if not self._drain_lock.acquire(timeout=time_budget if time_budget is not None else -1):
+            return 0
+        try:
+            if self._ensure_cloud_engine() is None:
+                return 0
+            while deadline is None or time.monotonic() < deadline:
+                with self.local_engine.begin() as conn:
+                    self.ensure_table(conn)
+                    entries = self._next_batch(conn, isolate_until)
+                if not entries:
+                    break
+
+                ids = [entry_id for entry_id, _ in entries]
+                try:
+                    steps = coalesce_steps([s for _, payload in entries for s in pickle.loads(payload)])
+                    start = time.time()
+                    with self.cloud_engine.begin() as conn:
+                        rows = apply_steps(conn, steps, self.writer, self.watermarks)
+                except Exception as e:
+                    if len(ids) > 1:
+                        # 合并批次失败：逐条重放这批条目，只让真正失败的条目计入重试次数
+                        logger.warning(f"⚠️ Outbox 合并重放 {len(ids)} 个条目失败，改为逐条重放: {e}")
+                        isolate_until = ids[-1]
+                        continue
+                    if self._record_failure(ids[0], e):
+                        continue
+                    break
+
+                with self.local_engine.begin() as conn:
+                    conn.execute(text(f"DELETE FROM {OUTBOX_TABLE} WHERE id IN ({','.join(map(str, ids))})"))
+                replayed += len(ids)
+                logger.info(f"☁️ Outbox 重放 {len(ids)} 个条目 / {rows} 行 → 云端，耗时 {time.time() - start:.1f}秒")
+        finally:
+            self._drain_lock.release()
+
+        return replayed
+
+    def _ensure_cloud_engine(self):
+        """按需创建云端引擎（在重放线程中执行，不阻塞本地写入）；失败时返回 None，下次重放再试"""
+        if self.cloud_engine is None and self.engine_factory is not None:
+            try:
+                self.cloud_engine = self.engine_factory()
+            except Exception as e:
+                logger.warning(f"⚠️ 云端引擎暂不可用，条目保留在 outbox 中: {e}")
+        return self.cloud_engine
+
+    def _cloud_reachable(self) -> bool:
+        try:
+            with self.cloud_engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            return True
+        except Exception:
+            return False
+
+    def _record_failure(self, entry_id: int, error: Exception) -> bool:
+        """
+        队首条目失败：按指数退避推迟下次重放
+
+        只有云端可达时的失败才累加重试次数（云端不可达不是条目本身的问题），
+        达到 max_attempts 后移入死信表
+
+        Returns:
+            bool: 条目是否已移入死信表（后续条目可以继续重放）
+        """
+        reachable = self._cloud_reachable()
+        with self.local_engine.begin() as conn:
+            attempts = conn.execute(text(f"SELECT attempts FROM {OUTBOX_TABLE} WHERE id = :id"),
+                                    {"id": entry_id}).scalar() or 0
+            if reachable:
+                attempts += 1
+            params = {"attempts": attempts, "error": str(error)[:1000], "id": entry_id}
+
+            if attempts >= self.max_attempts:
+                conn.execute(text(f"""
+                    INSERT INTO {DEAD_LETTER_TABLE}
+                        (id, label, payload, row_count, attempts, last_error, created_at, failed_at)
+                    SELECT id, label, payload, row_count, :attempts, :error, created_at, :now
+                    FROM {OUTBOX_TABLE} WHERE id = :id
+                """), dict(params, now=datetime.now()))
+                conn.execute(text(f"DELETE FROM {OUTBOX_TABLE} WHERE id = :id"), {"id": entry_id})
+                label = conn.execute(text(f"SELECT label FROM {DEAD_LETTER_TABLE} WHERE id = :id"),
+                                     {"id": entry_id}).scalar()
+                logger.error(f"❌ Outbox 条目 #{entry_id} ({label}) 重放失败 {attempts} 次，"
+                             f"已移入死信表 {DEAD_LETTER_TABLE}: {error}")
+                return True
+
+            delay = min(self.max_backoff, CollectorConfig.RETRY_DELAY * (2 ** max(attempts - 1, 0)))
+            conn.execute(text(f"""
+                UPDATE {OUTBOX_TABLE}
+                SET attempts = :attempts, last_error = :error, next_attempt_at = :next
+                WHERE id = :id
+            """), dict(params, next=datetime.now() + timedelta(seconds=delay)))
+        reason = f"第 {attempts}/{self.max_attempts} 次" if reachable else "云端不可达"
+        logger.warning(f"⚠️ Outbox 重放失败（{reason}，{delay:.0f}秒后重试）: {error}")
+        return False
+
+    # ================= 后台线程 =================
+
+    def start(self):
+        """启动后台重放线程（守护线程，重复调用无副作用）"""
+        if self.cloud_engine is None and self.engine_factory is None:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="cloud-outbox-replayer", daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.drain()
+            except Exception as e:
+                logger.warning(f"⚠️ Outbox 重放线程异常: {e}")
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+    def stop(self, flush_timeout: float = 0) -> dict:
+        """
+        停止后台线程；flush_timeout > 0 时先在预算内尽量重放剩余条目
+
+        Returns:
+            dict: 剩余积压（见 pending）
+        """
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=max(flush_timeout, 1))
+            self._thread = None
+        if flush_timeout > 0:
+            self.drain(time_budget=flush_timeout)
+        return self.pending()
+
+
+# ================= 全局实例 =================
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+
+def get_cloud_outbox(start: bool = True):
+    """
+    返回进程内共享的 CloudOutbox（未配置云端或 CLOUD_WRITE_MODE != outbox 时返回 None）
+
+    只看配置、不连接云端：云端暂时不可达时写入照常入队，云端引擎由重放线程按需创建并重试
+
+    Args:
+        start: 是否确保后台重放线程已启动
+    """
+    global _outbox
+    from app.core.config import settings
+    from app.core.database import build_cloud_engine, get_local_engine
+
+    if not settings.CLOUD_DATABASE_URL or settings.CLOUD_WRITE_MODE != 'outbox':
+        return None
+    if _outbox is None:
+        with _outbox_lock:
+            if _outbox is None:
+                _outbox = CloudOutbox(get_local_engine(), engine_factory=build_cloud_engine)
+    if start:
+        _outbox.start()
+    return _outbox
+
+
+def shutdown_cloud_outbox(flush_timeout: float = None):
+    """进程结束前调用：在预算内重放剩余条目并停止后台线程（未重放的条目留待下次）"""
+    if _outbox is None:
+        return None
+    flush_timeout = CollectorConfig.OUTBOX_FLUSH_TIMEOUT if flush_timeout is None else flush_timeout
+    remaining = _outbox.stop(flush_timeout)
+    if remaining['entries']:
+        logger.info(f"☁️ Outbox 剩余 {remaining['entries']} 个条目 / {remaining['rows']} 行待同步云端")
+    return remaining
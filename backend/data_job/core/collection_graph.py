@@ -0,0 +1,66 @@
+"""
+EvoAlpha OS - 采集阶段声明
+采集器之间的数据依赖（下游从上游写入的表中读取待采集列表）：
+
+    StockSectorList ─┬─> StockKline          (stock_sector_map / stock_info)
+                     ├─> SectorKline         (stock_sector_map)
+                     └─> NorthboundHoldings  (stock_info)
+    ETFInfo ─────────└─> ETFKline            (etf_info)
+
+其余采集器（估值、宏观、财务、基金持仓、新闻、连板）互不依赖，可与上述链并行
+"""
+
+import importlib
+
+from data_job.core.dag_executor import StageGraph
+
+# 阶段名 -> (采集器类名, 上游阶段, 预计耗时(分钟), run() 参数)
+COLLECTION_STAGES = {
+    'StockSectorList': ('StockSectorListCollector', [], 15, {}),
+    'ETFInfo': ('ETFInfoCollector', [], 8, {}),
+    'StockValuation': ('StockValuationCollector', [], 8, {}),
+    'MacroData': ('MacroDataCollector', [], 12, {}),
+    'FinanceSummary': ('FinanceSummaryCollector', [], 150, {}),
+    'FundHoldings': ('FundHoldingsCollector', [], 12, {}),
+    'NorthboundHoldings': ('NorthboundHoldingsCollector', ['StockSectorList'], 210, {'collect_all_stocks': True}),
+    'StockKline': ('StockKlineCollector', ['StockSectorList'], 40, {}),
+    'SectorKline': ('SectorKlineCollector', ['StockSectorList'], 8, {}),
+    'ETFKline': ('ETFKlineCollector', ['ETFInfo'], 12, {}),
+    'News': ('NewsCollector', [], 15, {}),
+    'LimitBoards': ('LimitBoardsCollector', [], 3, {}),
+}
+
+
+def collector_stage(class_name: str, **run_kwargs):
+    """返回阶段函数：在工作线程中导入并实例化采集器，然后执行 run()"""
+    def run():
+        collector_class = getattr(importlib.import_module("data_job.collectors"), class_name)
+        return collector_class().run(**run_kwargs)
+    return run
+
+
+def build_collection_graph(names: list, run_kwargs: dict = None, graph: StageGraph = None) -> StageGraph:
+    """
+    按 COLLECTION_STAGES 构建采集阶段图
+
+    上游阶段不在本次图中时忽略该依赖（如每日增量不重采股票列表，直接使用库中已有数据）
+
+    Args:
+        names: 要运行的阶段名（顺序即同层的启动顺序）
+        run_kwargs: 阶段名 -> 额外的 run() 参数（覆盖默认值）
+        graph: 追加到已有的阶段图，None 表示新建
+
+    Returns:
+        StageGraph: 阶段图
+    """
+    graph = graph if graph is not None else StageGraph()
+    run_kwargs = run_kwargs or {}
+    for name in names:
+        class_name, deps, estimate, kwargs = COLLECTION_STAGES[name]
+        graph.add(
+            name,
+            collector_stage(class_name, **{**kwargs, **run_kwargs.get(name, {})}),
+            deps=[d for d in deps if d in names or d in graph],
+            estimate=estimate,
+        )
+    return graph
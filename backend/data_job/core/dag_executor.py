@@ -0,0 +1,273 @@
+"""
+EvoAlpha OS - 阶段图（DAG）并行执行器
+把采集器 / 因子计算 / 策略等阶段声明为依赖图，在有限并发下执行：
+每个阶段在其全部上游完成后立即启动，互不依赖的阶段并行，整体耗时收敛到最长依赖链
+
+    graph = StageGraph()
+    graph.add('StockSectorList', run_sector_list, estimate=15)
+    graph.add('SectorKline', run_sector_kline, deps=['StockSectorList'], estimate=8)
+    graph.add('SectorRPS', run_sector_rps, deps=['SectorKline'], allow_failed_deps=True)
+    results = DagExecutor(graph, max_workers=4).run()
+
+失败语义：上游失败或被跳过时，下游默认跳过；allow_failed_deps=True 的阶段只等待上游结束、不要求成功
+（如采集部分失败时仍用已有数据计算因子）
+"""
+
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from data_job.config.collector_config import CollectorConfig
+
+
+class Stage:
+    """图中的一个阶段"""
+
+    def __init__(self, name: str, func, deps=(), estimate: float = 0.0,
+                 description: str = "", allow_failed_deps: bool = False):
+        """
+        Args:
+            name: 阶段名（图内唯一）
+            func: 无参可调用对象；抛出异常或返回 False 视为失败
+            deps: 上游阶段名
+            estimate: 预计耗时（分钟），用于关键路径优先调度与计划耗时估算
+            description: 日志中展示的说明
+            allow_failed_deps: 上游失败 / 跳过时仍然执行
+        """
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.estimate = float(estimate or 0.0)
+        self.description = description
+        self.allow_failed_deps = allow_failed_deps
+
+
+class StageResult:
+    """阶段执行结果（status: success / failed / skipped）"""
+
+    def __init__(self, name: str, status: str, elapsed: float = 0.0, error: str = None):
+        self.name = name
+        self.status = status
+        self.elapsed = elapsed
+        self.error = error
+
+    @property
+    def success(self) -> bool:
+        return self.status == 'success'
+
+    def __repr__(self):
+        return f"StageResult({self.name!r}, {self.status!r}, elapsed={self.elapsed:.1f})"
+
+
+class StageGraph:
+    """声明式阶段依赖图"""
+
+    def __init__(self):
+        self.stages = {}
+
+    def __contains__(self, name):
+        return name in self.stages
+
+    def __len__(self):
+        return len(self.stages)
+
+    def add(self, name: str, func, deps=(), estimate: float = 0.0,
+            description: str = "", allow_failed_deps: bool = False) -> "StageGraph":
+        """添加阶段（参数见 Stage），返回自身便于链式声明"""
+        if name in self.stages:
+            raise ValueError(f"阶段重复: {name}")
+        self.stages[name] = Stage(name, func, deps, estimate, description, allow_failed_deps)
+        return self
+
+    def dependents(self, name: str) -> list:
+        """直接下游阶段"""
+        return [s.name for s in self.stages.values() if name in s.deps]
+
+    def topological_order(self) -> list:
+        """拓扑序（同层保持声明顺序）；存在未知依赖或环时抛出 ValueError"""
+        for stage in self.stages.values():
+            unknown = [d for d in stage.deps if d not in self.stages]
+            if unknown:
+                raise ValueError(f"阶段 {stage.name} 依赖未声明的阶段: {unknown}")
+
+        remaining = {name: set(stage.deps) for name, stage in self.stages.items()}
+        order = []
+        while remaining:
+            layer = [name for name, deps in remaining.items() if not deps]
+            if not layer:
+                raise ValueError(f"阶段图存在循环依赖: {sorted(remaining)}")
+            for name in layer:
+                del remaining[name]
+                for deps in remaining.values():
+                    deps.discard(name)
+            order.extend(layer)
+        return order
+
+    def path_weights(self, durations: dict = None) -> dict:
+        """每个阶段到终点的最长路径耗时（含自身），用于关键路径优先调度"""
+        durations = durations or {}
+        weights = {}
+        for name in reversed(self.topological_order()):
+            own = durations.get(name, self.stages[name].estimate)
+            weights[name] = own + max((weights[d] for d in self.dependents(name)), default=0.0)
+        return weights
+
+    def critical_path(self, durations: dict = None) -> tuple:
+        """
+        最长依赖链
+
+        Args:
+            durations: 阶段名 -> 耗时，缺省使用 estimate
+
+        Returns:
+            tuple: (阶段名列表, 总耗时)
+        """
+        weights = self.path_weights(durations)
+        if not weights:
+            return [], 0.0
+        roots = [name for name, stage in self.stages.items() if not stage.deps]
+        name = max(roots, key=lambda n: weights[n])
+        total = weights[name]
+        path = [name]
+        while True:
+            children = self.dependents(name)
+            if not children:
+                break
+            name = max(children, key=lambda n: weights[n])
+            path.append(name)
+        return path, total
+
+
+class DagExecutor:
+    """
+    有限并发执行阶段图（线程池；采集阶段以网络 I/O 为主，上游限流由各主机共享的 TokenBucket 负责）
+
+    就绪阶段按到终点的最长路径排序，关键路径上的阶段优先占用并发槽位
+    """
+
+    def __init__(self, graph: StageGraph, max_workers: int = None, logger: logging.Logger = None):
+        """
+        Args:
+            graph: 阶段图
+            max_workers: 最大并行阶段数，默认 CollectorConfig.DAG_MAX_WORKERS
+            logger: 日志对象
+        """
+        self.graph = graph
+        self.max_workers = max(1, max_workers or CollectorConfig.DAG_MAX_WORKERS)
+        self.logger = logger or logging.getLogger("collector.dag_executor")
+        self.results = {}
+        self.elapsed = 0.0
+
+    def run(self) -> dict:
+        """
+        执行全部阶段
+
+        Returns:
+            dict: 阶段名 -> StageResult（按拓扑序）
+        """
+        order = self.graph.topological_order()
+        priority = self.graph.path_weights()
+        remaining = {name: set(self.graph.stages[name].deps) for name in order}
+        ready = [name for name in order if not remaining[name]]
+        running = {}
+        results = {}
+        interrupted = False
+        start = time.time()
+
+        planned_path, planned_total = self.graph.critical_path()
+        self.logger.info(f"🧭 阶段图: {len(order)} 个阶段，最多 {self.max_workers} 个并行；"
+                         f"预计关键路径 {' → '.join(planned_path)} ({planned_total:.0f} 分钟)")
+
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stage")
+        try:
+            while ready or running:
+                ready.sort(key=lambda n: -priority[n])
+                while ready and len(running) < self.max_workers:
+                    name = ready.pop(0)
+                    stage = self.graph.stages[name]
+                    blocked = [d for d in stage.deps if not results[d].success]
+                    if blocked and not stage.allow_failed_deps:
+                        results[name] = StageResult(name, 'skipped', error=f"上游未成功: {blocked}")
+                        self.logger.warning(f"⏭️ [{name}] 跳过（上游未成功: {', '.join(blocked)}）")
+                        self._release(name, remaining, ready)
+                        continue
+                    running[pool.submit(self._run_stage, stage)] = name
+
+                if not running:
+                    continue
+                try:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                except KeyboardInterrupt:
+                    if interrupted:
+                        raise
+                    interrupted = True
+                    self.logger.warning(f"⚠️ 用户中断：不再启动新阶段，等待运行中的阶段结束: {sorted(running.values())}")
+                    for name in order:
+                        if name not in results and name not in running.values():
+                            results[name] = StageResult(name, 'skipped', error='用户中断')
+                    ready = []
+                    continue
+
+                for future in done:
+                    name = running.pop(future)
+                    results[name] = future.result()
+                    if not interrupted:
+                        self._release(name, remaining, ready)
+        finally:
+            pool.shutdown(wait=not interrupted)
+
+        self.elapsed = time.time() - start
+        self.results = {name: results[name] for name in order if name in results}
+        return self.results
+
+    def _release(self, name, remaining, ready):
+        """阶段结束：上游全部结束的下游进入就绪队列"""
+        for child in self.graph.dependents(name):
+            remaining[child].discard(name)
+            if not remaining[child]:
+                ready.append(child)
+
+    def _run_stage(self, stage: Stage) -> StageResult:
+        estimate = f" (预计 {stage.estimate:.0f} 分钟)" if stage.estimate else ""
+        self.logger.info(f"▶️ [{stage.name}] 开始{estimate}{' - ' + stage.description if stage.description else ''}")
+        start = time.time()
+        try:
+            outcome = stage.func()
+        except Exception as e:
+            elapsed = time.time() - start
+            self.logger.error(f"❌ [{stage.name}] 失败 ({elapsed:.1f}秒): {e}")
+            return StageResult(stage.name, 'failed', elapsed, str(e))
+
+        elapsed = time.time() - start
+        if outcome is False:
+            self.logger.error(f"❌ [{stage.name}] 返回失败 ({elapsed:.1f}秒)")
+            return StageResult(stage.name, 'failed', elapsed, '阶段返回失败')
+        self.logger.info(f"✅ [{stage.name}] 完成，耗时 {elapsed:.1f}秒")
+        return StageResult(stage.name, 'success', elapsed)
+
+    # ================= 汇总 =================
+
+    def summary(self) -> dict:
+        """与原串行脚本一致的汇总格式: {'success': [名称], 'failed': [(名称, 错误)], 'total': 数量}"""
+        return {
+            'success': [r.name for r in self.results.values() if r.success],
+            'failed': [(r.name, r.error or r.status) for r in self.results.values() if not r.success],
+            'total': len(self.results),
+        }
+
+    def log_summary(self, title: str = "阶段图执行完成"):
+        """输出逐阶段结果、墙钟耗时与实际关键路径"""
+        durations = {name: r.elapsed for name, r in self.results.items()}
+        path, total = self.graph.critical_path(durations)
+        serial = sum(durations.values())
+        icons = {'success': '✅ 成功', 'failed': '❌ 失败', 'skipped': '⏭️ 跳过'}
+
+        self.logger.info("\n" + "=" * 80)
+        self.logger.info(f"📊 {title}")
+        self.logger.info("=" * 80)
+        for name, result in self.results.items():
+            detail = f": {result.error}" if result.error else ""
+            self.logger.info(f"  {name}: {icons[result.status]} ({result.elapsed:.1f}秒){detail}")
+        self.logger.info(f"⏱️ 墙钟耗时 {self.elapsed:.1f}秒，串行累计 {serial:.1f}秒，"
+                         f"关键路径 {' → '.join(path)} ({total:.1f}秒)")
+        self.logger.info("=" * 80)
@@ -0,0 +1,165 @@
+"""
+EvoAlpha OS - 截止时间与超时控制
+线程安全的超时机制（替代只能在主线程使用的 signal.alarm），
+可在工作线程和 asyncio 任务中使用
+"""
+
+import time
+import asyncio
+import threading
+from contextlib import contextmanager
+from typing import Callable, Any, Optional
+
+
+class ConnectionTimeout(Exception):
+    """连接超时"""
+    pass
+
+
+class TimeBudgetExceeded(ConnectionTimeout):
+    """采集器总时间预算耗尽"""
+    pass
+
+
+class Deadline:
+    """
+    截止时间（基于 time.monotonic，线程安全、只读）
+
+    用法：
+        deadline = Deadline(600)        # 10 分钟后到期
+        deadline.remaining()            # 剩余秒数
+        deadline.check()                # 已到期则抛出 TimeBudgetExceeded
+        deadline.cap(30)                # min(30, 剩余时间)
+    """
+
+    def __init__(self, seconds: Optional[float]):
+        """
+        Args:
+            seconds: 从现在起的时长（秒），None 表示永不到期
+        """
+        self.seconds = seconds
+        self._expires_at = None if seconds is None else time.monotonic() + seconds
+
+    def remaining(self) -> Optional[float]:
+        """剩余秒数（不小于0），永不到期返回 None"""
+        if self._expires_at is None:
+            return None
+        return max(0.0, self._expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        """是否已到期"""
+        return self._expires_at is not None and time.monotonic() >= self._expires_at
+
+    def check(self, what: str = "操作"):
+        """已到期则抛出 TimeBudgetExceeded"""
+        if self.expired:
+            raise TimeBudgetExceeded(f"{what}超出时间预算（{self.seconds}秒）")
+
+    def cap(self, timeout: Optional[float]) -> Optional[float]:
+        """把单次超时限制在剩余时间以内"""
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        if timeout is None:
+            return remaining
+        return min(timeout, remaining)
+
+
+def run_with_timeout(func: Callable, timeout: Optional[float], *args,
+                     slots: Optional[threading.Semaphore] = None, **kwargs) -> Any:
+    """
+    在独立的守护线程中执行 func，超过 timeout 秒未返回则抛出 ConnectionTimeout
+
+    可从任意线程调用。注意：Python 无法强制终止线程，超时后该调用会在后台
+    继续运行至结束，其结果被丢弃（守护线程不会阻塞进程退出）。
+    传入 slots 时每次调用占用一个调用槽，直到工作线程真正结束才归还：
+    超时后仍挂起的调用继续占槽，同一上游的在途线程数不会超过槽数
+
+    Args:
+        func: 要执行的函数
+        timeout: 超时时间（秒），None 表示不限时（直接在当前线程执行）
+        *args, **kwargs: 函数参数
+        slots: 调用槽（见 rate_limiter.get_host_slots），等待空闲槽的时间计入 timeout
+
+    Returns:
+        函数返回值（函数抛出的异常会原样抛出）
+    """
+    if timeout is None:
+        return func(*args, **kwargs)
+    if timeout <= 0:
+        raise ConnectionTimeout("操作超时（剩余时间为0）")
+
+    expires_at = time.monotonic() + timeout
+    if slots is not None and not slots.acquire(timeout=timeout):
+        raise ConnectionTimeout(f"操作超时（{timeout:.0f}秒内无空闲调用槽，上游仍有未结束的调用）")
+
+    outcome = {}
+    done = threading.Event()
+
+    def _target():
+        try:
+            outcome["result"] = func(*args, **kwargs)
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            done.set()
+            if slots is not None:
+                slots.release()
+
+    remaining = expires_at - time.monotonic()
+    if remaining <= 0:
+        if slots is not None:
+            slots.release()
+        raise ConnectionTimeout(f"操作超时（{timeout:.0f}秒）")
+
+    worker = threading.Thread(target=_target, name=f"deadline-{getattr(func, '__name__', 'call')}", daemon=True)
+    try:
+        worker.start()
+    except BaseException:
+        if slots is not None:
+            slots.release()
+        raise
+
+    if not done.wait(remaining):
+        raise ConnectionTimeout(f"操作超时（{timeout:.0f}秒）")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome.get("result")
+
+
+async def arun_with_timeout(func: Callable, timeout: Optional[float], *args, **kwargs) -> Any:
+    """
+    run_with_timeout 的 asyncio 版本：在线程池中执行同步函数（如 akshare 调用），
+    不阻塞事件循环，超时抛出 ConnectionTimeout
+
+    Args:
+        func: 要执行的同步函数
+        timeout: 超时时间（秒），None 表示不限时
+        *args, **kwargs: 函数参数
+
+    Returns:
+        函数返回值
+    """
+    try:
+        return await asyncio.wait_for(asyncio.to_thread(func, *args, **kwargs), timeout)
+    except asyncio.TimeoutError:
+        raise ConnectionTimeout(f"操作超时（{timeout:.0f}秒）")
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float], what: str = "操作"):
+    """
+    协作式超时上下文：进入时创建 Deadline，块内可调用 deadline.check()，
+    退出时若已超时则抛出 ConnectionTimeout
+
+    与 signal.alarm 不同，它不会中断阻塞调用；需要硬超时的调用请用 run_with_timeout
+
+    Args:
+        seconds: 时长（秒）
+        what: 用于错误信息的操作描述
+    """
+    deadline = Deadline(seconds)
+    yield deadline
+    if deadline.expired:
+        raise ConnectionTimeout(f"{what}超时（{seconds}秒）")
@@ -0,0 +1,204 @@
+"""
+EvoAlpha OS - 网络/数据库健康监测
+进程级共享的健康状态缓存（TTL）+ 后台探测线程，
+采集器读取缓存状态为 O(1)，重试时不再额外发起探测请求
+"""
+
+import time
+import logging
+import threading
+import requests
+from typing import Optional
+from sqlalchemy import text
+
+from data_job.config.collector_config import CollectorConfig
+
+logger = logging.getLogger("collector.health")
+
+
+class _ProbeResult:
+    """单项探测结果"""
+
+    __slots__ = ("ok", "error", "checked_at")
+
+    def __init__(self, ok: bool, error: str = "", checked_at: float = None):
+        self.ok = ok
+        self.error = error
+        self.checked_at = checked_at if checked_at is not None else time.monotonic()
+
+    def age(self) -> float:
+        return time.monotonic() - self.checked_at
+
+
+class HealthMonitor:
+    """
+    健康监测服务（进程内单例，通过 get_health_monitor() 获取）
+
+    - 探测结果带 TTL 缓存：成功结果缓存 ttl 秒，失败结果缓存 failure_ttl 秒（便于快速发现恢复）
+    - 缓存过期时只有一个线程发起探测，其余线程等待并复用结果
+    - 可选后台线程按 interval 定期刷新，采集器读取时几乎总能命中缓存
+    """
+
+    def __init__(self, probe_url: str = None, probe_timeout: float = None,
+                 ttl: float = None, failure_ttl: float = None):
+        self.probe_url = probe_url or CollectorConfig.HEALTH_PROBE_URL
+        self.probe_timeout = probe_timeout or CollectorConfig.HEALTH_PROBE_TIMEOUT
+        self.ttl = ttl or CollectorConfig.HEALTH_CHECK_TTL
+        self.failure_ttl = failure_ttl or CollectorConfig.HEALTH_CHECK_FAILURE_TTL
+
+        self._session = requests.Session()
+        self._network: Optional[_ProbeResult] = None
+        self._databases = {}  # 引擎URL -> _ProbeResult
+        self._engines = {}  # 引擎URL -> engine（后台线程需要探测的引擎）
+
+        self._lock = threading.Lock()
+        self._probe_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.probe_count = 0
+
+    # ================= 读取状态 =================
+
+    def _is_fresh(self, result: Optional[_ProbeResult]) -> bool:
+        if result is None:
+            return False
+        return result.age() < (self.ttl if result.ok else self.failure_ttl)
+
+    def network_status(self) -> _ProbeResult:
+        """网络状态（缓存过期时同步探测一次）"""
+        result = self._network
+        if self._is_fresh(result):
+            return result
+
+        with self._probe_lock:
+            # 等锁期间可能已被其他线程刷新
+            if self._is_fresh(self._network):
+                return self._network
+            self._network = self._probe_network()
+            return self._network
+
+    def database_status(self, engine) -> _ProbeResult:
+        """数据库状态（缓存过期时同步探测一次）"""
+        key = str(engine.url)
+        with self._lock:
+            self._engines.setdefault(key, engine)
+            result = self._databases.get(key)
+        if self._is_fresh(result):
+            return result
+
+        with self._probe_lock:
+            result = self._databases.get(key)
+            if self._is_fresh(result):
+                return result
+            result = self._probe_database(engine)
+            with self._lock:
+                self._databases[key] = result
+            return result
+
+    def snapshot(self) -> dict:
+        """当前缓存状态（不触发探测）"""
+        with self._lock:
+            databases = {
+                url.split('@')[-1]: {"ok": r.ok, "error": r.error, "age": round(r.age(), 1)}
+                for url, r in self._databases.items()
+            }
+        network = self._network
+        return {
+            "network": None if network is None else {"ok": network.ok, "error": network.error,
+                                                     "age": round(network.age(), 1)},
+            "databases": databases,
+            "background": self.is_running,
+            "probe_count": self.probe_count,
+        }
+
+    def invalidate(self):
+        """清空缓存（下次读取时重新探测）"""
+        with self._lock:
+            self._network = None
+            self._databases.clear()
+
+    # ================= 探测 =================
+
+    def _probe_network(self) -> _ProbeResult:
+        self.probe_count += 1
+        try:
+            response = self._session.get(self.probe_url, timeout=self.probe_timeout)
+            if response.status_code == 200:
+                return _ProbeResult(True)
+            return _ProbeResult(False, f"HTTP {response.status_code}")
+        except Exception as e:
+            return _ProbeResult(False, str(e))
+
+    def _probe_database(self, engine) -> _ProbeResult:
+        self.probe_count += 1
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            return _ProbeResult(True)
+        except Exception as e:
+            return _ProbeResult(False, str(e))
+
+    def refresh(self):
+        """立即探测网络和所有已登记的数据库"""
+        network = self._probe_network()
+        with self._lock:
+            engines = dict(self._engines)
+        databases = {key: self._probe_database(engine) for key, engine in engines.items()}
+        with self._lock:
+            self._network = network
+            self._databases.update(databases)
+
+    # ================= 后台探测线程 =================
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def register_engine(self, engine):
+        """登记需要后台探测的数据库引擎"""
+        with self._lock:
+            self._engines.setdefault(str(engine.url), engine)
+
+    def start(self, interval: float = None):
+        """启动后台探测线程（幂等）"""
+        interval = interval or CollectorConfig.HEALTH_PROBE_INTERVAL
+        with self._lock:
+            if self.is_running:
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._loop, args=(interval,), name="health-monitor", daemon=True
+            )
+            self._thread.start()
+        logger.debug(f"🩺 健康监测后台线程已启动（间隔 {interval} 秒）")
+
+    def stop(self):
+        """停止后台探测线程"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.probe_timeout + 1)
+        self._thread = None
+
+    def _loop(self, interval: float):
+        while not self._stop_event.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"健康探测异常: {e}")
+            self._stop_event.wait(interval)
+
+
+# ================= 进程级单例 =================
+
+_monitor: Optional[HealthMonitor] = None
+_monitor_lock = threading.Lock()
+
+
+def get_health_monitor() -> HealthMonitor:
+    """获取进程内共享的 HealthMonitor"""
+    global _monitor
+    with _monitor_lock:
+        if _monitor is None:
+            _monitor = HealthMonitor()
+        return _monitor
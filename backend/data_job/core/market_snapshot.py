@@ -0,0 +1,180 @@
+"""
+EvoAlpha OS - 全市场快照日线
+收盘后用一次实时行情（spot）接口为全市场生成当日日线，
+只有水位落后超过一个交易日的标的才回退到逐只历史K线接口
+"""
+
+import logging
+import threading
+import pandas as pd
+from datetime import datetime, date
+from typing import Callable, Iterable, Optional, Tuple
+
+from sqlalchemy import text
+
+from data_job.config.collector_config import CollectorConfig
+from quant_engine.common.date_utils import DAY_CONDITION, day_bounds
+
+logger = logging.getLogger("collector.snapshot")
+
+# 快照日线输出列（与 stock_daily_prices 一致，额外带 prev_close 用于除权校验）
+STOCK_BAR_COLUMNS = ['symbol', 'trade_date', 'open', 'close', 'high', 'low',
+                     'volume', 'amount', 'pct_chg', 'turnover_rate']
+ETF_BAR_COLUMNS = ['symbol', 'trade_date', 'open', 'high', 'low', 'close',
+                   'volume', 'amount', 'pct_chg']
+
+STOCK_SPOT_COLUMNS = {
+    '代码': 'symbol', '今开': 'open', '最新价': 'close', '最高': 'high', '最低': 'low',
+    '成交量': 'volume', '成交额': 'amount', '涨跌幅': 'pct_chg', '换手率': 'turnover_rate',
+    '昨收': 'prev_close'
+}
+ETF_SPOT_COLUMNS = {
+    '代码': 'symbol', '开盘价': 'open', '最新价': 'close', '最高价': 'high', '最低价': 'low',
+    '成交量': 'volume', '成交额': 'amount', '涨跌幅': 'pct_chg', '昨收': 'prev_close',
+    '数据日期': 'data_date'
+}
+
+# 交易日历缓存：{自然日: [交易日, ...]}，每天最多拉取一次
+_calendar_cache = {}
+_calendar_lock = threading.Lock()
+
+
+def load_trade_calendar(fetch: Callable[[], pd.DataFrame]) -> list:
+    """
+    获取交易日历（进程内按自然日缓存）
+
+    Args:
+        fetch: 拉取函数，返回含 trade_date 列的 DataFrame（如 ak.tool_trade_date_hist_sina）
+
+    Returns:
+        list[date]: 升序交易日列表
+    """
+    today = date.today()
+    with _calendar_lock:
+        if today not in _calendar_cache:
+            df = fetch()
+            days = sorted(pd.to_datetime(df['trade_date']).dt.date.unique())
+            _calendar_cache.clear()
+            _calendar_cache[today] = days
+        return _calendar_cache[today]
+
+
+def resolve_snapshot_date(calendar: Iterable[date], now: datetime = None) -> Optional[Tuple[date, date]]:
+    """
+    判断当前能否使用收盘快照
+
+    Args:
+        calendar: 交易日列表
+        now: 当前时间（默认 datetime.now()）
+
+    Returns:
+        (当日交易日, 上一交易日)；非交易日或尚未收盘返回 None
+    """
+    now = now or datetime.now()
+    ready = datetime.strptime(CollectorConfig.SNAPSHOT_READY_TIME, "%H:%M").time()
+    if now.time() < ready:
+        return None
+
+    days = sorted(calendar)
+    today = now.date()
+    if today not in days:
+        return None
+
+    idx = days.index(today)
+    if idx == 0:
+        return None
+    return today, days[idx - 1]
+
+
+def _normalize(spot_df: pd.DataFrame, columns: dict, trade_date: date) -> pd.DataFrame:
+    df = spot_df.rename(columns=columns)
+    for col in columns.values():
+        if col not in df.columns:
+            df[col] = None
+
+    df['symbol'] = df['symbol'].astype(str).str.zfill(6)
+    for col in ['open', 'close', 'high', 'low', 'volume', 'amount', 'pct_chg', 'turnover_rate', 'prev_close']:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    # 停牌/未成交的标的在历史接口中也没有当日K线
+    df = df[df['close'].notna() & (df['close'] > 0) & (df['volume'].fillna(0) > 0)].copy()
+    df['trade_date'] = trade_date
+    return df
+
+
+def build_stock_bars(spot_df: pd.DataFrame, trade_date: date) -> pd.DataFrame:
+    """
+    由 ak.stock_zh_a_spot_em 结果生成当日个股日线
+
+    Returns:
+        DataFrame: STOCK_BAR_COLUMNS + prev_close
+    """
+    if spot_df is None or spot_df.empty:
+        return pd.DataFrame(columns=STOCK_BAR_COLUMNS + ['prev_close'])
+    df = _normalize(spot_df, STOCK_SPOT_COLUMNS, trade_date)
+    return df[STOCK_BAR_COLUMNS + ['prev_close']].reset_index(drop=True)
+
+
+def build_etf_bars(spot_df: pd.DataFrame, trade_date: date) -> pd.DataFrame:
+    """
+    由 ak.fund_etf_spot_em 结果生成当日 ETF 日线
+
+    接口带"数据日期"列时，只保留数据日期等于 trade_date 的行
+
+    Returns:
+        DataFrame: ETF_BAR_COLUMNS + prev_close
+    """
+    if spot_df is None or spot_df.empty:
+        return pd.DataFrame(columns=ETF_BAR_COLUMNS + ['prev_close'])
+    df = _normalize(spot_df, ETF_SPOT_COLUMNS, trade_date)
+    if df['data_date'].notna().any():
+        df = df[pd.to_datetime(df['data_date'], errors='coerce').dt.date == trade_date]
+    return df[ETF_BAR_COLUMNS + ['prev_close']].reset_index(drop=True)
+
+
+def split_by_watermark(symbols: Iterable[str], last_dates: dict, prev_trade_date: date) -> Tuple[list, list]:
+    """
+    按水位划分标的
+
+    Returns:
+        (可用快照补齐的标的, 需走历史接口的标的)
+        水位恰为上一交易日的标的只缺当日一根K线，可用快照；
+        其余（新标的、缺口超过一天）仍需逐只拉取历史
+    """
+    eligible, rest = [], []
+    for symbol in symbols:
+        if last_dates.get(symbol) == prev_trade_date:
+            eligible.append(symbol)
+        else:
+            rest.append(symbol)
+    return eligible, rest
+
+
+def load_stored_close(conn, table: str, day) -> dict:
+    """
+    库中某个交易日的收盘价 {symbol: close}
+
+    按半开区间匹配（DAY_CONDITION），迁移前带时间戳的行（'2024-01-02 00:00:00'）同样能匹配
+    """
+    rows = conn.execute(text(f"SELECT symbol, close FROM {table} WHERE {DAY_CONDITION}"), day_bounds(day))
+    return {symbol: close for symbol, close in rows}
+
+
+def find_adjusted(bars: pd.DataFrame, stored_close: dict, tolerance: float = None) -> set:
+    """
+    找出昨收与库中上一交易日收盘价不一致的标的（当日除权除息，前复权历史需要整段重算）
+
+    Args:
+        bars: build_stock_bars 的结果
+        stored_close: {symbol: 库中上一交易日收盘价}
+        tolerance: 相对误差容忍度
+
+    Returns:
+        set: 需要重拉历史的标的
+    """
+    tolerance = CollectorConfig.SNAPSHOT_PRICE_TOLERANCE if tolerance is None else tolerance
+    stored = bars['symbol'].map(stored_close)
+    prev = bars['prev_close']
+    mask = stored.notna() & prev.notna() & ((prev - stored).abs() > stored.abs() * tolerance)
+    return set(bars.loc[mask, 'symbol'])
@@ -0,0 +1,140 @@
+"""
+EvoAlpha OS - 令牌桶限流器
+按上游主机限制请求速率（线程安全），供并发采集时全局共享；
+另按上游主机限制在途调用数（调用槽，超时后仍挂起的调用继续占槽，见 deadline.run_with_timeout）
+"""
+
+import time
+import threading
+from typing import Optional
+
+from data_job.config.collector_config import CollectorConfig
+
+
+class TokenBucket:
+    """
+    令牌桶限流器（线程安全）
+
+    以 rate 个/秒 的速度补充令牌，桶容量为 capacity；
+    每次请求消耗一个令牌，令牌不足时阻塞等待
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        初始化令牌桶
+
+        Args:
+            rate: 每秒补充的令牌数（即允许的请求数/秒）
+            capacity: 桶容量（允许的瞬时突发量），默认等于 rate
+        """
+        if rate <= 0:
+            raise ValueError(f"rate 必须大于0: {rate}")
+
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1.0))
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._last_refill = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """
+        非阻塞获取令牌
+
+        Returns:
+            是否获取成功
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """
+        阻塞获取令牌
+
+        Args:
+            tokens: 需要的令牌数
+            timeout: 最长等待时间（秒），None 表示一直等待
+
+        Returns:
+            是否在超时前获取到令牌
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait_time = (tokens - self._tokens) / self.rate
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait_time = min(wait_time, remaining)
+
+            time.sleep(wait_time)
+
+
+# ================= 进程级主机限流器注册表 =================
+
+_host_limiters = {}
+_registry_lock = threading.Lock()
+
+
+def get_host_limiter(host: str) -> TokenBucket:
+    """
+    获取指定上游主机的共享限流器（同一进程内所有采集器共用）
+
+    速率取自 CollectorConfig.HOST_RATE_LIMITS，未配置的主机使用 DEFAULT_HOST_RATE_LIMIT
+
+    Args:
+        host: 上游主机名，如 push2his.eastmoney.com
+
+    Returns:
+        TokenBucket 对象
+    """
+    with _registry_lock:
+        limiter = _host_limiters.get(host)
+        if limiter is None:
+            rate = CollectorConfig.HOST_RATE_LIMITS.get(host, CollectorConfig.DEFAULT_HOST_RATE_LIMIT)
+            limiter = TokenBucket(rate)
+            _host_limiters[host] = limiter
+        return limiter
+
+
+# ================= 进程级主机调用槽注册表 =================
+
+_host_slots = {}
+
+
+def get_host_slots(host: Optional[str] = None) -> threading.BoundedSemaphore:
+    """
+    获取指定上游主机的共享调用槽（同一进程内所有采集器共用）
+
+    槽数取自 CollectorConfig.HOST_MAX_IN_FLIGHT，未配置的主机（及 host=None 的公共槽）
+    使用 DEFAULT_HOST_MAX_IN_FLIGHT
+
+    Args:
+        host: 上游主机名，None 表示未指定主机的调用共用的公共槽
+
+    Returns:
+        threading.BoundedSemaphore 对象
+    """
+    with _registry_lock:
+        slots = _host_slots.get(host)
+        if slots is None:
+            size = CollectorConfig.HOST_MAX_IN_FLIGHT.get(host, CollectorConfig.DEFAULT_HOST_MAX_IN_FLIGHT)
+            slots = threading.BoundedSemaphore(size)
+            _host_slots[host] = slots
+        return slots
@@ -0,0 +1,277 @@
+"""
+EvoAlpha OS - 批量 Upsert 写入器
+方言感知的批量写入：SQLite / PostgreSQL / CockroachDB 统一使用
+INSERT ... ON CONFLICT DO UPDATE，大批量数据经临时表中转后一次性合并
+"""
+
+import time
+import uuid
+import logging
+import pandas as pd
+from typing import Optional
+from sqlalchemy import text, inspect
+
+from data_job.config.collector_config import CollectorConfig
+
+
+class UpsertWriter:
+    """
+    批量 Upsert 写入器
+
+    写入路径：
+    1. 小批量 + 表有匹配的主键/唯一约束 → INSERT ... ON CONFLICT DO UPDATE（executemany 分批）
+    2. 大批量（>= staging_threshold）→ executemany 写入临时表 → 一条 INSERT ... SELECT ... ON CONFLICT 合并
+    3. 表没有匹配的约束 → 临时表中转 → 按主键集合 DELETE + INSERT ... SELECT
+
+    同一个写入器可以服务多个引擎（传入 conn 时按 conn 所属引擎解析方言和表结构）
+    """
+
+    def __init__(self, engine=None,
+                 batch_size: int = None,
+                 staging_threshold: int = None,
+                 logger: logging.Logger = None):
+        """
+        初始化写入器
+
+        Args:
+            engine: 默认引擎（未传入 conn 时使用）
+            batch_size: 每次 executemany 的行数
+            staging_threshold: 超过该行数时走临时表中转
+            logger: 日志对象
+        """
+        self.engine = engine
+        self.batch_size = batch_size or CollectorConfig.UPSERT_BATCH_SIZE
+        self.staging_threshold = staging_threshold or CollectorConfig.UPSERT_STAGING_THRESHOLD
+        self.logger = logger or logging.getLogger("collector.upsert_writer")
+
+        # 表结构缓存: (引擎URL, 表名, 主键) -> 是否存在匹配的冲突约束
+        self._conflict_cache = {}
+        # CockroachDB 识别缓存: 引擎URL -> bool
+        self._cockroach_cache = {}
+
+        # 累计写入统计
+        self.stats = {
+            "rows": 0,
+            "seconds": 0.0,
+            "batches": 0,
+            "staged_merges": 0
+        }
+
+    # ================= 对外接口 =================
+
+    def upsert(self, df: pd.DataFrame, table_name: str, key_columns: list,
+               conn=None) -> int:
+        """
+        按主键 Upsert 一批数据
+
+        Args:
+            df: 要写入的数据
+            table_name: 目标表名
+            key_columns: 主键列列表（冲突判断依据）
+            conn: 已开启事务的连接（为空则在 self.engine 上新开事务）
+
+        Returns:
+            写入行数
+        """
+        if df is None or df.empty:
+            return 0
+
+        missing = [col for col in key_columns if col not in df.columns]
+        if missing:
+            raise ValueError(f"主键列不存在: {missing}")
+
+        # 同一批次内按主键去重（保留最后一条），否则 ON CONFLICT 会在同一语句内冲突两次
+        df = df.drop_duplicates(subset=key_columns, keep='last')
+
+        if conn is None:
+            with self.engine.begin() as new_conn:
+                return self._upsert(new_conn, df, table_name, key_columns)
+        return self._upsert(conn, df, table_name, key_columns)
+
+    def insert(self, df: pd.DataFrame, table_name: str, conn=None) -> int:
+        """
+        纯追加写入（executemany 分批，替代 to_sql(method='multi') 的小批次插入）
+
+        Args:
+            df: 要写入的数据
+            table_name: 目标表名
+            conn: 已开启事务的连接（为空则在 self.engine 上新开事务）
+
+        Returns:
+            写入行数
+        """
+        if df is None or df.empty:
+            return 0
+
+        if conn is None:
+            with self.engine.begin() as new_conn:
+                return self._insert(new_conn, df, table_name)
+        return self._insert(conn, df, table_name)
+
+    @property
+    def rows_per_sec(self) -> float:
+        """累计写入速度（行/秒）"""
+        if self.stats["seconds"] <= 0:
+            return 0.0
+        return self.stats["rows"] / self.stats["seconds"]
+
+    # ================= 内部实现 =================
+
+    def _upsert(self, conn, df: pd.DataFrame, table_name: str, key_columns: list) -> int:
+        start = time.time()
+        self._ensure_table(conn, df, table_name)
+
+        columns = list(df.columns)
+        has_conflict_target = self._has_conflict_target(conn, table_name, key_columns)
+
+        if has_conflict_target and len(df) < self.staging_threshold:
+            sql = self._build_insert_sql(conn, table_name, columns, key_columns)
+            self._executemany(conn, sql, df)
+            mode = "upsert"
+        else:
+            self._staged_merge(conn, df, table_name, columns, key_columns, has_conflict_target)
+            mode = "staged-merge" if has_conflict_target else "staged-replace"
+
+        self._record(table_name, len(df), time.time() - start, mode)
+        return len(df)
+
+    def _insert(self, conn, df: pd.DataFrame, table_name: str) -> int:
+        start = time.time()
+        self._ensure_table(conn, df, table_name)
+        sql = self._build_insert_sql(conn, table_name, list(df.columns))
+        self._executemany(conn, sql, df)
+        self._record(table_name, len(df), time.time() - start, "insert")
+        return len(df)
+
+    def _staged_merge(self, conn, df, table_name, columns, key_columns, has_conflict_target):
+        """临时表中转 + 一次集合式合并"""
+        q = conn.dialect.identifier_preparer.quote
+        stage_table = f"_stage_{table_name}_{uuid.uuid4().hex[:8]}"
+        col_list = ", ".join(q(c) for c in columns)
+        key_list = ", ".join(q(c) for c in key_columns)
+
+        if self._is_cockroach(conn):
+            conn.execute(text("SET experimental_enable_temp_tables = 'on'"))
+
+        # 1. 建立结构相同的临时表（只复制需要的列）
+        where_false = "WHERE 0" if conn.dialect.name == "sqlite" else "WHERE false"
+        conn.execute(text(
+            f"CREATE TEMP TABLE {q(stage_table)} AS SELECT {col_list} FROM {q(table_name)} {where_false}"
+        ))
+
+        try:
+            # 2. executemany 写入临时表
+            self._executemany(conn, self._build_insert_sql(conn, stage_table, columns), df)
+
+            # 3. 集合式合并
+            if has_conflict_target:
+                conn.execute(text(
+                    f"INSERT INTO {q(table_name)} ({col_list}) "
+                    f"SELECT {col_list} FROM {q(stage_table)} WHERE true "
+                    f"{self._build_conflict_clause(conn, columns, key_columns)}"
+                ))
+            else:
+                conn.execute(text(
+                    f"DELETE FROM {q(table_name)} WHERE ({key_list}) IN "
+                    f"(SELECT {key_list} FROM {q(stage_table)})"
+                ))
+                conn.execute(text(
+                    f"INSERT INTO {q(table_name)} ({col_list}) SELECT {col_list} FROM {q(stage_table)}"
+                ))
+            self.stats["staged_merges"] += 1
+        finally:
+            conn.execute(text(f"DROP TABLE IF EXISTS {q(stage_table)}"))
+
+    def _build_insert_sql(self, conn, table_name: str, columns: list,
+                          key_columns: Optional[list] = None) -> str:
+        """构建 INSERT 语句（绑定参数统一命名为 p0..pn，兼容中文/特殊列名）"""
+        q = conn.dialect.identifier_preparer.quote
+        col_list = ", ".join(q(c) for c in columns)
+        params = ", ".join(f":p{i}" for i in range(len(columns)))
+        sql = f"INSERT INTO {q(table_name)} ({col_list}) VALUES ({params})"
+        if key_columns:
+            sql += " " + self._build_conflict_clause(conn, columns, key_columns)
+        return sql
+
+    def _build_conflict_clause(self, conn, columns: list, key_columns: list) -> str:
+        q = conn.dialect.identifier_preparer.quote
+        key_list = ", ".join(q(c) for c in key_columns)
+        update_cols = [c for c in columns if c not in key_columns]
+        if not update_cols:
+            return f"ON CONFLICT ({key_list}) DO NOTHING"
+        assignments = ", ".join(f"{q(c)} = excluded.{q(c)}" for c in update_cols)
+        return f"ON CONFLICT ({key_list}) DO UPDATE SET {assignments}"
+
+    def _executemany(self, conn, sql: str, df: pd.DataFrame):
+        """按 batch_size 分批 executemany"""
+        stmt = text(sql)
+        records = self._to_records(df)
+        for i in range(0, len(records), self.batch_size):
+            conn.execute(stmt, records[i:i + self.batch_size])
+            self.stats["batches"] += 1
+
+    @staticmethod
+    def _to_records(df: pd.DataFrame) -> list:
+        """DataFrame → 绑定参数列表（NaN→None，Timestamp→datetime，numpy标量→Python标量）"""
+        data = df.copy()
+        for col in data.columns:
+            if pd.api.types.is_datetime64_any_dtype(data[col]):
+                data[col] = data[col].map(lambda v: v.to_pydatetime() if pd.notnull(v) else None).astype(object)
+        data = data.astype(object).where(pd.notnull(data), None)
+
+        names = [f"p{i}" for i in range(len(data.columns))]
+        return [dict(zip(names, row)) for row in data.itertuples(index=False, name=None)]
+
+    def _ensure_table(self, conn, df: pd.DataFrame, table_name: str):
+        """目标表不存在时按 DataFrame 结构建表（与 to_sql 行为一致）"""
+        if inspect(conn).has_table(table_name):
+            return
+        self.logger.info(f"🛠️ 表 {table_name} 不存在，按数据结构自动创建")
+        df.head(0).to_sql(table_name, conn, if_exists='append', index=False)
+        # 新建的表没有主键，清理该表的约束缓存
+        url = str(conn.engine.url)
+        for cache_key in [k for k in self._conflict_cache if k[0] == url and k[1] == table_name]:
+            del self._conflict_cache[cache_key]
+
+    def _has_conflict_target(self, conn, table_name: str, key_columns: list) -> bool:
+        """表上是否存在与 key_columns 完全匹配的主键或唯一约束（ON CONFLICT 的前提）"""
+        cache_key = (str(conn.engine.url), table_name, tuple(key_columns))
+        if cache_key in self._conflict_cache:
+            return self._conflict_cache[cache_key]
+
+        target = set(key_columns)
+        candidates = []
+        try:
+            inspector = inspect(conn)
+            candidates.append(inspector.get_pk_constraint(table_name).get("constrained_columns") or [])
+            candidates.extend(uc.get("column_names") or [] for uc in inspector.get_unique_constraints(table_name))
+            candidates.extend(ix.get("column_names") or [] for ix in inspector.get_indexes(table_name) if ix.get("unique"))
+        except Exception as e:
+            self.logger.warning(f"读取 {table_name} 约束信息失败，改用临时表替换模式: {e}")
+
+        result = any(set(cols) == target for cols in candidates if cols)
+        self._conflict_cache[cache_key] = result
+        return result
+
+    def _is_cockroach(self, conn) -> bool:
+        """识别 CockroachDB（psycopg2 下方言名仍为 postgresql）"""
+        if conn.dialect.name == "cockroachdb":
+            return True
+        if conn.dialect.name != "postgresql":
+            return False
+
+        url = str(conn.engine.url)
+        if url not in self._cockroach_cache:
+            try:
+                version = conn.execute(text("SELECT version()")).scalar() or ""
+            except Exception:
+                version = ""
+            self._cockroach_cache[url] = "CockroachDB" in version
+        return self._cockroach_cache[url]
+
+    def _record(self, table_name: str, rows: int, elapsed: float, mode: str):
+        """记录并输出写入速度"""
+        self.stats["rows"] += rows
+        self.stats["seconds"] += elapsed
+        speed = rows / elapsed if elapsed > 0 else float(rows)
+        self.logger.info(f"💾 [{table_name}] {mode}: {rows} 行, 耗时 {elapsed:.2f}秒 ({speed:,.0f} 行/秒)")
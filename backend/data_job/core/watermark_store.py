@@ -0,0 +1,160 @@
+"""
+EvoAlpha OS - 采集水位表
+collection_watermarks 记录每张表每个标的已采集到的最新日期，
+与数据写入在同一事务中推进，增量规划只需一次按主键前缀的索引读取
+"""
+
+import logging
+import pandas as pd
+from datetime import datetime
+from sqlalchemy import text, inspect
+
+WATERMARK_TABLE = "collection_watermarks"
+
+logger = logging.getLogger("collector.watermark")
+
+
+class WatermarkStore:
+    """
+    采集水位存储
+
+    表结构: (table_name, entity, last_date, last_fetch_ts)，主键 (table_name, entity)
+
+    - load(): 读取某张表所有标的的水位（替代 SELECT MAX(trade_date) ... GROUP BY）
+    - advance(): 在写入数据的同一事务中推进水位（只前进不后退）
+    - bootstrap(): 水位表为空时，从源表做一次性 GROUP BY 回填
+    """
+
+    def __init__(self):
+        # 已建表的引擎URL集合（避免每次写入都执行 CREATE TABLE IF NOT EXISTS）
+        self._ensured = set()
+
+    def ensure_table(self, conn, remember: bool = True):
+        """
+        确保水位表存在
+
+        Args:
+            conn: 数据库连接
+            remember: 是否记入已建表缓存；在外部事务中建表时传 False，
+                      避免事务回滚后缓存与实际不一致
+        """
+        url = str(conn.engine.url)
+        if url in self._ensured:
+            return
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} (
+                table_name VARCHAR(100),
+                entity VARCHAR(200),
+                last_date DATE,
+                last_fetch_ts TIMESTAMP,
+                PRIMARY KEY (table_name, entity)
+            )
+        """))
+        if remember:
+            self._ensured.add(url)
+
+    def load(self, engine, table_name: str) -> dict:
+        """
+        读取水位
+
+        Args:
+            engine: 数据库引擎
+            table_name: 数据表名
+
+        Returns:
+            dict: {entity: date}
+        """
+        with engine.begin() as conn:
+            self.ensure_table(conn)
+            df = pd.read_sql(
+                text(f"SELECT entity, last_date FROM {WATERMARK_TABLE} WHERE table_name = :t"),
+                conn, params={"t": table_name}
+            )
+        if df.empty:
+            return {}
+        return dict(zip(df['entity'], pd.to_datetime(df['last_date']).dt.date))
+
+    def advance(self, conn, table_name: str, df: pd.DataFrame,
+                entity_column: str, date_column: str) -> int:
+        """
+        按本次写入的数据推进水位（须在写入数据的同一个 conn/事务中调用）
+
+        Args:
+            conn: 已开启事务的连接
+            table_name: 数据表名
+            df: 本次写入的数据
+            entity_column: 标的列名（symbol / sector_name）
+            date_column: 日期列名（trade_date）
+
+        Returns:
+            推进的标的数
+        """
+        if df is None or df.empty:
+            return 0
+
+        latest = (
+            df[[entity_column, date_column]]
+            .assign(**{date_column: pd.to_datetime(df[date_column], errors='coerce')})
+            .dropna()
+            .groupby(entity_column)[date_column].max()
+        )
+        if latest.empty:
+            return 0
+
+        now = datetime.now()
+        records = [
+            {"t": table_name, "e": str(entity), "d": ts.date(), "ts": now}
+            for entity, ts in latest.items()
+        ]
+
+        self.ensure_table(conn, remember=False)
+        # 只前进不后退：回补历史数据时不会把水位拉回去
+        conn.execute(text(f"""
+            INSERT INTO {WATERMARK_TABLE} (table_name, entity, last_date, last_fetch_ts)
+            VALUES (:t, :e, :d, :ts)
+            ON CONFLICT (table_name, entity) DO UPDATE SET
+                last_date = CASE
+                    WHEN {WATERMARK_TABLE}.last_date IS NULL OR excluded.last_date > {WATERMARK_TABLE}.last_date
+                    THEN excluded.last_date
+                    ELSE {WATERMARK_TABLE}.last_date
+                END,
+                last_fetch_ts = excluded.last_fetch_ts
+        """), records)
+        return len(records)
+
+    def bootstrap(self, engine, table_name: str, entity_column: str, date_column: str) -> int:
+        """
+        从源表一次性回填水位（仅在该表尚无任何水位记录时执行）
+
+        Returns:
+            回填的标的数
+        """
+        if not inspect(engine).has_table(table_name):
+            return 0
+
+        with engine.begin() as conn:
+            self.ensure_table(conn)
+            exists = conn.execute(
+                text(f"SELECT 1 FROM {WATERMARK_TABLE} WHERE table_name = :t LIMIT 1"),
+                {"t": table_name}
+            ).scalar()
+            if exists:
+                return 0
+
+            logger.info(f"🔖 首次建立 {table_name} 的采集水位（一次性全表扫描）...")
+            df = pd.read_sql(
+                text(f"SELECT {entity_column}, MAX({date_column}) AS {date_column} "
+                     f"FROM {table_name} GROUP BY {entity_column}"),
+                conn
+            )
+            count = self.advance(conn, table_name, df, entity_column, date_column)
+
+        logger.info(f"   ✅ 回填 {count} 个标的的水位")
+        return count
+
+    def load_or_bootstrap(self, engine, table_name: str, entity_column: str, date_column: str) -> dict:
+        """读取水位；水位表中没有该表记录时先从源表回填"""
+        marks = self.load(engine, table_name)
+        if not marks and self.bootstrap(engine, table_name, entity_column, date_column):
+            marks = self.load(engine, table_name)
+        return marks
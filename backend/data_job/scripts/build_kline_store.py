@@ -0,0 +1,69 @@
+"""
+列式K线仓库回填脚本
+把数据库中的日K线按月导出为 Parquet 分区（KLINE_STORE_DIR），供 KLINE_STORE_MODE=primary 时读取
+"""
+import sys
+import time
+
+# 路径适配
+sys.path.insert(0, '.')
+
+from data_job.common import setup_backend_path, setup_logger
+
+from app.core.config import settings
+from app.core.database import get_engine
+from app.core.kline_store import ASSETS, KlineStore
+
+# 路径初始化
+setup_backend_path()
+
+# Logger配置
+logger = setup_logger(__name__)
+
+
+def build_kline_store(assets=None, start_date=None, root=None):
+    """
+    回填列式K线仓库
+
+    Args:
+        assets: 资产类别列表（stock / etf / sector），None 表示全部
+        start_date: 起始日期（YYYY-MM-DD），None 表示全量
+        root: 仓库目录，None 表示 settings.KLINE_STORE_DIR
+
+    Returns:
+        bool: 是否全部成功
+    """
+    store = KlineStore(root or settings.KLINE_STORE_DIR)
+    engine = get_engine()
+    success = True
+
+    logger.info(f"🚀 开始回填列式K线仓库: {store.root}")
+    for asset in assets or list(ASSETS):
+        start = time.time()
+        try:
+            rows = store.import_table(engine, asset, start_date=start_date)
+            logger.info(f"✅ {asset}: {rows} 行, 耗时 {time.time() - start:.1f} 秒")
+        except Exception as e:
+            logger.error(f"❌ {asset} 回填失败: {e}")
+            success = False
+
+    return success
+
+
+def main():
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="EvoAlpha OS 列式K线仓库回填")
+    parser.add_argument('--asset', choices=list(ASSETS), action='append', default=None,
+                        help='资产类别，可重复指定，默认全部')
+    parser.add_argument('--start', type=str, default=None, help='起始日期 (YYYY-MM-DD)，默认全量')
+    parser.add_argument('--root', type=str, default=None, help='仓库目录，默认 KLINE_STORE_DIR')
+    args = parser.parse_args()
+
+    return build_kline_store(args.asset, args.start, args.root)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
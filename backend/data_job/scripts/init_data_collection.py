@@ -36,6 +36,7 @@ from data_job.collectors import (
     NewsCollector,
     LimitBoardsCollector,
 )
+from data_job.core.cloud_outbox import shutdown_cloud_outbox
 
 
 class InitialDataCollector:
@@ -319,4 +320,7 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        shutdown_cloud_outbox()
@@ -0,0 +1,81 @@
+"""
+云端写入 Outbox 重放脚本
+查看积压，或在时间预算内把本地 cloud_outbox 中积压的写入重放到云端数据库；
+查看 / 重新入队反复失败后移入死信表（cloud_outbox_dead）的条目
+"""
+import sys
+
+# 路径适配
+sys.path.insert(0, '.')
+
+from data_job.common import setup_backend_path, setup_logger
+
+# 路径初始化
+setup_backend_path()
+
+# Logger配置
+logger = setup_logger(__name__)
+
+
+def replay_outbox(time_budget=None, status_only=False, show_dead=False, requeue=None):
+    """
+    重放云端写入 Outbox
+
+    Args:
+        time_budget: 时间预算（秒），None 表示直到队列为空或遇到失败
+        status_only: 只查看积压
+        show_dead: 列出死信条目
+        requeue: 重新入队的死信条目 id 列表（空列表表示全部），None 表示不处理
+
+    Returns:
+        bool: 队列是否已清空
+    """
+    from data_job.core.cloud_outbox import get_cloud_outbox
+
+    outbox = get_cloud_outbox(start=False)
+    if outbox is None:
+        logger.info("⏭️ 未配置云端数据库或 CLOUD_WRITE_MODE != outbox，无需重放")
+        return True
+
+    if requeue is not None:
+        count = outbox.requeue_dead(requeue or None)
+        logger.info(f"🔁 {count} 个死信条目已重新入队")
+
+    status = outbox.pending()
+    logger.info(f"📦 积压: {status['entries']} 个条目 / {status['rows']} 行，最早入队 {status['oldest']}")
+    if status['last_error']:
+        logger.info(f"⚠️ 队首最近错误: {status['last_error']}")
+    if status['dead']:
+        logger.warning(f"❌ 死信: {status['dead']} 个条目重放失败次数超限，未同步到云端"
+                       f"（--dead 查看，--requeue 修复后重新入队）")
+    if show_dead:
+        for entry in outbox.dead_letters():
+            logger.info(f"   #{entry['id']} {entry['label']} ({entry['rows']} 行, {entry['attempts']} 次, "
+                        f"{entry['failed_at']}): {entry['last_error']}")
+    if status_only or show_dead or not status['entries']:
+        return not status['entries']
+
+    replayed = outbox.drain(time_budget=time_budget)
+    status = outbox.pending()
+    logger.info(f"✅ 重放 {replayed} 个条目，剩余 {status['entries']} 个条目 / {status['rows']} 行")
+    return not status['entries']
+
+
+def main():
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="EvoAlpha OS 云端写入 Outbox 重放")
+    parser.add_argument('--status', action='store_true', help='只查看积压')
+    parser.add_argument('--budget', type=float, default=None, help='时间预算（秒），默认不限')
+    parser.add_argument('--dead', action='store_true', help='列出死信条目（不重放）')
+    parser.add_argument('--requeue', type=int, nargs='*', default=None,
+                        help='把死信条目重新加入队尾（不带 id 时全部），随后重放')
+    args = parser.parse_args()
+
+    return replay_outbox(args.budget, args.status, args.dead, args.requeue)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -17,16 +17,9 @@ setup_network_emergency_kit()
 # Logger配置
 logger = setup_logger(__name__)
 
-# 导入采集器
-from data_job.collectors import (
-    StockValuationCollector,
-    MacroDataCollector,
-    StockKlineCollector,
-    SectorKlineCollector,
-    ETFKlineCollector,
-    NewsCollector,
-    LimitBoardsCollector,
-)
+from data_job.core.dag_executor import DagExecutor
+from data_job.core.collection_graph import build_collection_graph
+from data_job.core.cloud_outbox import shutdown_cloud_outbox
 
 
 def run_daily_update():
@@ -39,39 +32,19 @@ def run_daily_update():
     logger.info(f"📅 开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     logger.info("=" * 80)
 
-    results = {
-        'success': [],
-        'failed': [],
-        'total': 0
-    }
-
-    # 每日需要更新的采集器列表
-    daily_collectors = [
-        ('StockValuation', StockValuationCollector()),
-        ('MacroData', MacroDataCollector()),
-        ('News', NewsCollector(days=1)),
-        ('LimitBoards', LimitBoardsCollector(days=1)),
-    ]
+    # 每日需要更新的采集器列表（新闻 / 连板只补最近1天）
+    daily_stages = ['StockValuation', 'MacroData', 'News', 'LimitBoards']
 
     # K线数据更新（根据需要启用，数据量大）
     update_kline = False  # 默认不更新K线，可根据需要修改
     if update_kline:
-        daily_collectors.extend([
-            ('StockKline', StockKlineCollector()),
-            ('SectorKline', SectorKlineCollector()),
-            ('ETFKline', ETFKlineCollector()),
-        ])
-
-    for name, collector in daily_collectors:
-        results['total'] += 1
-        try:
-            logger.info(f"\n▶️  正在运行: {name}")
-            collector.run()
-            results['success'].append(name)
-            logger.info(f"✅ {name} 完成")
-        except Exception as e:
-            results['failed'].append((name, str(e)))
-            logger.error(f"❌ {name} 失败: {e}")
+        daily_stages.extend(['StockKline', 'SectorKline', 'ETFKline'])
+
+    graph = build_collection_graph(daily_stages, {'News': {'days': 1}, 'LimitBoards': {'days': 1}})
+    executor = DagExecutor(graph, logger=logger)
+    executor.run()
+    executor.log_summary("每日更新阶段图执行完成")
+    results = executor.summary()
 
     # 输出结果
     logger.info("\n" + "=" * 80)
@@ -98,5 +71,9 @@ def run_daily_update():
 
 
 if __name__ == "__main__":
-    success = run_daily_update()
+    try:
+        success = run_daily_update()
+    finally:
+        # 在预算内把积压的云端写入重放完（剩余条目下次运行继续）
+        shutdown_cloud_outbox()
     sys.exit(0 if success else 1)
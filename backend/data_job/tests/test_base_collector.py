@@ -116,5 +116,71 @@ class TestRetryCall(unittest.TestCase):
         self.assertIsNone(result)
 
 
+class TestDeadline(unittest.TestCase):
+    """测试线程安全的超时机制"""
+
+    def setUp(self):
+        """测试前准备"""
+        class TestCollector(BaseCollector):
+            def run(self):
+                return True
+
+        self.collector = TestCollector(
+            collector_name="test_deadline",
+            max_retries=2,
+            call_timeout=0.1
+        )
+        self.collector.request_delay = 0
+
+    def test_timeout_in_worker_thread(self):
+        """测试在工作线程中超时同样生效，并计入 timeout_count"""
+        import threading
+        import time
+
+        results = []
+
+        def slow():
+            time.sleep(1)
+            return "late"
+
+        def worker():
+            results.append(self.collector._retry_call(slow, delay=0, exponential_backoff=False))
+
+        with patch.object(self.collector, '_health_check'):
+            t = threading.Thread(target=worker)
+            t.start()
+            t.join(5)
+
+        self.assertEqual(results, [None])
+        self.assertEqual(self.collector.stats['timeout_count'], 2)
+
+    def test_time_budget_exceeded(self):
+        """测试采集任务时间预算耗尽后不再请求"""
+        from data_job.core.deadline import Deadline, TimeBudgetExceeded
+
+        self.collector.deadline = Deadline(0)
+        with self.assertRaises(TimeBudgetExceeded):
+            self.collector._retry_call(lambda: "ok")
+        self.assertEqual(self.collector.stats['budget_exceeded_count'], 1)
+
+    def test_timeout_context_without_signal(self):
+        """测试 _timeout_context 可在非主线程使用"""
+        import threading
+
+        errors = []
+
+        def worker():
+            try:
+                with self.collector._timeout_context(5) as deadline:
+                    self.assertFalse(deadline.expired)
+            except Exception as e:
+                errors.append(e)
+
+        t = threading.Thread(target=worker)
+        t.start()
+        t.join(5)
+        self.assertEqual(errors, [])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,209 @@
+"""
+测试云端写入 Outbox（两个临时 SQLite 库分别充当本地与云端）
+"""
+import sys
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, '.')
+
+from data_job.core.cloud_outbox import (
+    CloudOutbox, coalesce_steps, upsert_step, insert_step, execute_step, watermark_step
+)
+
+DDL = """
+    CREATE TABLE prices (
+        symbol TEXT, trade_date TEXT, close FLOAT,
+        PRIMARY KEY (symbol, trade_date)
+    )
+"""
+
+
+class TestCloudOutbox(unittest.TestCase):
+    """入队、合并重放与失败退避"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.local = create_engine(f"sqlite:///{os.path.join(self.tmp_dir.name, 'local.db')}")
+        self.cloud = create_engine(f"sqlite:///{os.path.join(self.tmp_dir.name, 'cloud.db')}")
+        with self.local.begin() as conn:
+            conn.execute(text(DDL))
+        self.outbox = CloudOutbox(self.local, self.cloud, interval=0.05)
+
+    def tearDown(self):
+        self.outbox.stop()
+        self.local.dispose()
+        self.cloud.dispose()
+        self.tmp_dir.cleanup()
+
+    def _prices(self, rows):
+        return pd.DataFrame(rows, columns=['symbol', 'trade_date', 'close'])
+
+    def _cloud_rows(self):
+        return pd.read_sql("SELECT * FROM prices ORDER BY symbol, trade_date", self.cloud)
+
+    def test_local_write_and_replay(self):
+        with self.cloud.begin() as conn:
+            conn.execute(text(DDL))
+        self.outbox.write([upsert_step('prices', self._prices([('a', '2024-01-02', 1.0)]), ['symbol', 'trade_date'])])
+        self.outbox.write([upsert_step('prices', self._prices([('a', '2024-01-02', 1.5)]), ['symbol', 'trade_date'])])
+
+        self.assertEqual(pd.read_sql("SELECT close FROM prices", self.local)['close'].tolist(), [1.5])
+        self.assertEqual(self.outbox.pending()['entries'], 2)
+
+        self.assertEqual(self.outbox.drain(), 2)
+        self.assertEqual(self._cloud_rows()['close'].tolist(), [1.5])
+        self.assertEqual(self.outbox.pending()['entries'], 0)
+
+    def test_failure_backs_off_and_keeps_order(self):
+        # 云端尚无 prices 表：先删后插的删除语句失败
+        self.outbox.write([
+            execute_step("DELETE FROM prices WHERE trade_date = :d", {"d": '2024-01-02'}),
+            insert_step('prices', self._prices([('a', '2024-01-02', 1.0)])),
+        ])
+        self.assertEqual(self.outbox.drain(), 0)
+
+        status = self.outbox.pending()
+        self.assertEqual(status['entries'], 1)
+        self.assertIsNotNone(status['last_error'])
+        # 退避期内不重放
+        with self.cloud.begin() as conn:
+            conn.execute(text(DDL))
+        self.assertEqual(self.outbox.drain(), 0)
+
+        with self.local.begin() as conn:
+            conn.execute(text("UPDATE cloud_outbox SET next_attempt_at = NULL"))
+        self.outbox.write([
+            execute_step("DELETE FROM prices WHERE trade_date = :d", {"d": '2024-01-02'}),
+            insert_step('prices', self._prices([('b', '2024-01-02', 2.0)])),
+        ])
+        self.assertEqual(self.outbox.drain(), 2)
+        self.assertEqual(self._cloud_rows()['symbol'].tolist(), ['b'])
+
+    def test_poisoned_entry_moves_to_dead_letter(self):
+        # 云端 ghost 表结构不一致（多一个 NOT NULL 列）：该条目在云端永远无法写入
+        with self.cloud.begin() as conn:
+            conn.execute(text(DDL))
+            conn.execute(text("CREATE TABLE ghost (symbol TEXT, name TEXT NOT NULL)"))
+        with self.local.begin() as conn:
+            conn.execute(text("CREATE TABLE ghost (symbol TEXT)"))
+        outbox = CloudOutbox(self.local, self.cloud, max_attempts=2)
+        outbox.write([insert_step('prices', self._prices([('a', '2024-01-02', 1.0)]))], label='a')
+        outbox.write([insert_step('ghost', pd.DataFrame({'symbol': ['x']}))], label='ghost')
+        outbox.write([insert_step('prices', self._prices([('c', '2024-01-02', 3.0)]))], label='c')
+
+        # 合并批次失败后逐条重放：a 成功，ghost 失败退避
+        self.assertEqual(outbox.drain(), 1)
+        self.assertEqual(outbox.pending()['entries'], 2)
+
+        with self.local.begin() as conn:
+            conn.execute(text("UPDATE cloud_outbox SET next_attempt_at = NULL"))
+        # 第二次失败达到上限：ghost 移入死信表，c 继续重放
+        self.assertEqual(outbox.drain(), 1)
+        self.assertEqual(self._cloud_rows()['symbol'].tolist(), ['a', 'c'])
+        status = outbox.pending()
+        self.assertEqual((status['entries'], status['dead']), (0, 1))
+        dead = outbox.dead_letters()
+        self.assertEqual((dead[0]['label'], dead[0]['attempts']), ('ghost', 2))
+        self.assertIn('NOT NULL', dead[0]['last_error'])
+
+        self.assertEqual(outbox.requeue_dead(), 1)
+        status = outbox.pending()
+        self.assertEqual((status['entries'], status['dead']), (1, 0))
+
+    def test_unreachable_cloud_does_not_dead_letter(self):
+        cloud = create_engine(f"sqlite:///{os.path.join(self.tmp_dir.name, 'missing', 'cloud.db')}")
+        outbox = CloudOutbox(self.local, cloud, max_attempts=1)
+        outbox.write([insert_step('prices', self._prices([('a', '2024-01-02', 1.0)]))])
+
+        self.assertEqual(outbox.drain(), 0)
+        status = outbox.pending()
+        self.assertEqual((status['entries'], status['dead']), (1, 0))
+
+    def test_queues_while_cloud_engine_unavailable(self):
+        attempts = []
+
+        def factory():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RuntimeError("cloud down")
+            return self.cloud
+
+        outbox = CloudOutbox(self.local, engine_factory=factory)
+        outbox.write([insert_step('prices', self._prices([('a', '2024-01-02', 1.0)]))])
+        # 写入不创建云端引擎，条目照常入队
+        self.assertEqual(attempts, [])
+        self.assertEqual(outbox.pending()['entries'], 1)
+
+        self.assertEqual(outbox.drain(), 0)
+        self.assertEqual(outbox.pending()['entries'], 1)
+
+        with self.cloud.begin() as conn:
+            conn.execute(text(DDL))
+        self.assertEqual(outbox.drain(), 1)
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(len(self._cloud_rows()), 1)
+
+    def test_outbox_mode_from_settings(self):
+        from app.core.config import settings
+        from data_job.core import cloud_outbox
+
+        saved = {k: getattr(settings, k) for k in ('CLOUD_DB_HOST', 'CLOUD_DB_USER', 'CLOUD_DB_PASSWORD')}
+        try:
+            for key in saved:
+                setattr(settings, key, 'unreachable.invalid')
+            cloud_outbox._outbox = None
+            outbox = cloud_outbox.get_cloud_outbox(start=False)
+            # 只看配置：不连接云端也返回 outbox，引擎留给重放线程创建
+            self.assertIsNotNone(outbox)
+            self.assertIsNone(outbox.cloud_engine)
+        finally:
+            for key, value in saved.items():
+                setattr(settings, key, value)
+            cloud_outbox._outbox = None
+        self.assertIsNone(cloud_outbox.get_cloud_outbox(start=False))
+
+    def test_background_replay(self):
+        with self.cloud.begin() as conn:
+            conn.execute(text(DDL))
+        self.outbox.start()
+        self.outbox.write([insert_step('prices', self._prices([('a', '2024-01-02', 1.0)]))])
+
+        remaining = self.outbox.stop(flush_timeout=5)
+        self.assertEqual(remaining['entries'], 0)
+        self.assertEqual(len(self._cloud_rows()), 1)
+
+
+class TestCoalesceSteps(unittest.TestCase):
+    """跨条目合并"""
+
+    def _prices(self, symbol, close):
+        return pd.DataFrame({'symbol': [symbol], 'trade_date': ['2024-01-02'], 'close': [close]})
+
+    def test_merges_across_watermarks(self):
+        steps = []
+        for symbol, close in [('a', 1.0), ('b', 2.0), ('a', 3.0)]:
+            df = self._prices(symbol, close)
+            steps += [upsert_step('prices', df, ['symbol', 'trade_date']),
+                      watermark_step('prices', df, 'symbol', 'trade_date')]
+
+        merged = coalesce_steps(steps)
+        self.assertEqual([s['op'] for s in merged], ['upsert', 'watermark'])
+        self.assertEqual(merged[0]['df'].set_index('symbol')['close'].to_dict(), {'a': 3.0, 'b': 2.0})
+        self.assertEqual(len(merged[1]['df']), 3)
+
+    def test_execute_is_barrier(self):
+        merged = coalesce_steps([
+            insert_step('prices', self._prices('a', 1.0)),
+            execute_step("DELETE FROM prices"),
+            insert_step('prices', self._prices('b', 2.0)),
+        ])
+        self.assertEqual([s['op'] for s in merged], ['insert', 'execute', 'insert'])
+
+
+if __name__ == '__main__':
+    unittest.main()
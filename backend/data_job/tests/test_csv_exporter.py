@@ -0,0 +1,102 @@
+"""
+测试流式 CSV 导出（临时 SQLite 库）
+"""
+import sys
+import os
+import sqlite3
+import tempfile
+import unittest
+
+import pandas as pd
+
+sys.path.insert(0, '.')
+
+from app.sync.csv_exporter import CSVExporter
+
+try:
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+class TestCSVExporter(unittest.TestCase):
+    """分批写出、表头与统计"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, 'local.db')
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("CREATE TABLE prices (symbol TEXT, trade_date DATE, close FLOAT, volume INT,"
+                         " PRIMARY KEY (symbol, trade_date))")
+            conn.execute("CREATE TABLE empty_table (symbol TEXT, close FLOAT)")
+            conn.executemany("INSERT INTO prices VALUES (?, ?, ?, ?)",
+                             [(f"{i:06d}", '2024-01-02', i * 0.5, i) for i in range(2500)])
+        self.exporter = CSVExporter(self.db_path, os.path.join(self.tmp_dir.name, 'exports'))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_streaming_gzip_round_trip(self):
+        path = self.exporter.export_table_to_csv('prices', batch_size=1000)
+
+        self.assertTrue(path.endswith('prices.csv.gz'))
+        df = pd.read_csv(path, dtype={'symbol': str})
+        self.assertEqual(len(df), 2500)
+        self.assertEqual(df['symbol'].iloc[-1], '002499')
+
+        stats = self.exporter.stats['prices']
+        self.assertEqual(stats['rows'], 2500)
+        self.assertEqual(stats['file_bytes'], os.path.getsize(path))
+        self.assertGreater(stats['bytes'], stats['file_bytes'])
+        self.assertFalse(os.path.exists(path + '.tmp'))
+
+    def test_plain_csv_and_empty_table(self):
+        path = self.exporter.export_table_to_csv('empty_table', compress=False)
+        with open(path) as f:
+            self.assertEqual(f.read().strip(), 'symbol,close')
+        self.assertEqual(self.exporter.stats['empty_table']['rows'], 0)
+
+    def test_failure_leaves_no_partial_file(self):
+        with self.assertRaises(Exception):
+            self.exporter.export_table_to_csv('missing_table')
+        self.assertEqual(os.listdir(self.exporter.output_dir), [])
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            self.exporter.export_table('prices', format='xlsx')
+
+    @unittest.skipUnless(HAS_PYARROW, "需要 pyarrow")
+    def test_parquet_schema_and_row_groups(self):
+        path = self.exporter.export_table_to_parquet('prices', batch_size=1000)
+
+        parquet_file = pq.ParquetFile(path)
+        self.assertEqual(parquet_file.num_row_groups, 3)
+        self.assertEqual(str(parquet_file.schema_arrow.field('trade_date').type), 'date32[day]')
+        self.assertEqual(str(parquet_file.schema_arrow.field('volume').type), 'int64')
+        self.assertEqual(parquet_file.schema_arrow.metadata[b'evoalpha.primary_key'], b'symbol,trade_date')
+        self.assertIsNotNone(parquet_file.metadata.row_group(0).column(0).statistics)
+        self.assertEqual(parquet_file.metadata.row_group(0).column(0).compression, 'ZSTD')
+        self.assertEqual(parquet_file.read().num_rows, 2500)
+
+    @unittest.skipUnless(HAS_PYARROW, "需要 pyarrow")
+    def test_parquet_mixed_date_formats(self):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("INSERT INTO prices VALUES ('600000', '2024-01-03 00:00:00', 1.0, 1)")
+            conn.execute("INSERT INTO prices VALUES ('600001', '2024/01/04', 1.0, 1)")
+        path = self.exporter.export_table_to_parquet('prices')
+        dates = pq.read_table(path).column('trade_date').to_pylist()
+        self.assertNotIn(None, dates)
+        self.assertEqual(sorted({str(d) for d in dates}), ['2024-01-02', '2024-01-03', '2024-01-04'])
+
+    @unittest.skipUnless(HAS_PYARROW, "需要 pyarrow")
+    def test_parquet_rejects_null_primary_key(self):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("INSERT INTO prices VALUES ('600000', 'not a date', 1.0, 1)")
+        with self.assertRaises(ValueError):
+            self.exporter.export_table_to_parquet('prices')
+        self.assertFalse(os.path.exists(os.path.join(self.exporter.output_dir, 'prices.parquet')))
+
+
+if __name__ == '__main__':
+    unittest.main()
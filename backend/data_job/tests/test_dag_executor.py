@@ -0,0 +1,140 @@
+"""
+测试阶段图（DAG）并行执行器
+"""
+import sys
+import time
+import threading
+import unittest
+
+sys.path.insert(0, '.')
+
+from data_job.core.dag_executor import StageGraph, DagExecutor
+from data_job.core.collection_graph import build_collection_graph
+
+
+def sleeper(seconds, log=None, name=None):
+    def run():
+        if log is not None:
+            log.append(('start', name))
+        time.sleep(seconds)
+        if log is not None:
+            log.append(('end', name))
+    return run
+
+
+def failing():
+    raise RuntimeError("boom")
+
+
+class TestStageGraph(unittest.TestCase):
+    """拓扑序、环检测与关键路径"""
+
+    def test_cycle_and_unknown_deps(self):
+        graph = StageGraph().add('a', None, deps=['b']).add('b', None, deps=['a'])
+        with self.assertRaises(ValueError):
+            graph.topological_order()
+        with self.assertRaises(ValueError):
+            StageGraph().add('a', None, deps=['missing']).topological_order()
+        with self.assertRaises(ValueError):
+            StageGraph().add('a', None).add('a', None)
+
+    def test_critical_path(self):
+        graph = (StageGraph()
+                 .add('list', None, estimate=15)
+                 .add('kline', None, deps=['list'], estimate=40)
+                 .add('northbound', None, deps=['list'], estimate=210)
+                 .add('finance', None, estimate=150)
+                 .add('rps', None, deps=['kline'], estimate=10))
+        self.assertEqual(graph.critical_path(), (['list', 'northbound'], 225.0))
+        self.assertEqual(graph.critical_path({'northbound': 1, 'finance': 1})[0], ['list', 'kline', 'rps'])
+
+
+class TestDagExecutor(unittest.TestCase):
+    """并行执行、依赖顺序与失败传播"""
+
+    def test_independent_stages_run_in_parallel(self):
+        graph = StageGraph()
+        for name in 'abcd':
+            graph.add(name, sleeper(0.2))
+        executor = DagExecutor(graph, max_workers=4)
+        start = time.time()
+        results = executor.run()
+        self.assertLess(time.time() - start, 0.6)
+        self.assertTrue(all(r.success for r in results.values()))
+
+    def test_dependents_wait_for_upstream(self):
+        log = []
+        graph = (StageGraph()
+                 .add('list', sleeper(0.1, log, 'list'))
+                 .add('kline', sleeper(0.05, log, 'kline'), deps=['list'])
+                 .add('news', sleeper(0.05, log, 'news')))
+        DagExecutor(graph, max_workers=2).run()
+        self.assertLess(log.index(('end', 'list')), log.index(('start', 'kline')))
+        # 无依赖的阶段不等待
+        self.assertLess(log.index(('start', 'news')), log.index(('end', 'list')))
+
+    def test_bounded_concurrency(self):
+        lock = threading.Lock()
+        state = {'running': 0, 'peak': 0}
+
+        def stage():
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            time.sleep(0.05)
+            with lock:
+                state['running'] -= 1
+
+        graph = StageGraph()
+        for i in range(6):
+            graph.add(f's{i}', stage)
+        DagExecutor(graph, max_workers=2).run()
+        self.assertEqual(state['peak'], 2)
+
+    def test_failure_skips_dependents_unless_allowed(self):
+        graph = (StageGraph()
+                 .add('kline', failing)
+                 .add('valuation', lambda: False)
+                 .add('strategy', lambda: None, deps=['kline'])
+                 .add('after_strategy', lambda: None, deps=['strategy'])
+                 .add('rps', lambda: None, deps=['kline'], allow_failed_deps=True))
+        executor = DagExecutor(graph, max_workers=2)
+        results = executor.run()
+
+        self.assertEqual(results['kline'].status, 'failed')
+        self.assertEqual(results['valuation'].status, 'failed')
+        self.assertEqual(results['strategy'].status, 'skipped')
+        self.assertEqual(results['after_strategy'].status, 'skipped')
+        self.assertEqual(results['rps'].status, 'success')
+
+        summary = executor.summary()
+        self.assertEqual(summary['total'], 5)
+        self.assertEqual(summary['success'], ['rps'])
+        self.assertEqual(dict(summary['failed'])['kline'], 'boom')
+
+    def test_critical_path_starts_first(self):
+        log = []
+        graph = (StageGraph()
+                 .add('short', sleeper(0.01, log, 'short'), estimate=1)
+                 .add('long', sleeper(0.01, log, 'long'), estimate=100))
+        DagExecutor(graph, max_workers=1).run()
+        self.assertEqual(log[0], ('start', 'long'))
+
+
+class TestCollectionGraph(unittest.TestCase):
+    """采集阶段图"""
+
+    def test_absent_upstream_is_ignored(self):
+        graph = build_collection_graph(['StockKline', 'ETFKline', 'News'])
+        self.assertEqual(graph.stages['StockKline'].deps, [])
+        self.assertEqual(graph.stages['ETFKline'].deps, [])
+
+    def test_full_graph_dependencies(self):
+        graph = build_collection_graph(['StockSectorList', 'ETFInfo', 'StockKline', 'NorthboundHoldings', 'ETFKline'])
+        self.assertEqual(graph.stages['StockKline'].deps, ['StockSectorList'])
+        self.assertEqual(graph.stages['ETFKline'].deps, ['ETFInfo'])
+        self.assertEqual(graph.critical_path()[0], ['StockSectorList', 'NorthboundHoldings'])
+
+
+if __name__ == '__main__':
+    unittest.main()
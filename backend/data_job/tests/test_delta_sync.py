@@ -0,0 +1,227 @@
+"""
+测试水位增量导出与增量同步编排（临时 SQLite 库；R2 用本地目录模拟，云端用内存替身）
+"""
+import sys
+import os
+import asyncio
+import sqlite3
+import tempfile
+import unittest
+
+import pandas as pd
+from sqlalchemy import create_engine
+
+sys.path.insert(0, '.')
+
+from app.sync.csv_exporter import CSVExporter
+from app.sync.cloud_importer import build_merge_sql
+from app.sync.delta_sync import DeltaSync
+from app.sync.local_object_store import LocalObjectStore
+from app.sync.r2_manager import R2Manager
+from app.sync.sync_pipeline import SyncPipeline
+from app.sync.sync_state import ReexportLog, SyncWatermarks, export_since, record_reexport
+
+try:
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+class FakeImporter:
+    def __init__(self, fail=False, delay=0, events=None):
+        # fail: True 全部失败，或失败的表名集合
+        self.fail = fail
+        self.delay = delay
+        self.events = events if events is not None else []
+        self.calls = []
+
+    async def merge_from_r2(self, table_name, urls, columns, key_columns):
+        if self.fail is True or (self.fail and table_name in self.fail):
+            raise RuntimeError("cloud down")
+        await asyncio.sleep(self.delay)
+        self.calls.append((table_name, urls, columns, key_columns))
+        self.events.append(('import', table_name))
+        return len(urls)
+
+
+class SyncTestCase(unittest.TestCase):
+    """临时本地库（3 个交易日 × 300 只股票）+ 本地目录模拟的 R2"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, 'local.db')
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("CREATE TABLE stock_daily_prices (symbol TEXT, trade_date TEXT, close FLOAT,"
+                         " PRIMARY KEY (symbol, trade_date))")
+            conn.execute("CREATE TABLE stock_info (symbol TEXT PRIMARY KEY, name TEXT)")
+            conn.executemany("INSERT INTO stock_daily_prices VALUES (?, ?, ?)",
+                             [(f"{i:06d}", day, 1.0) for day in ('2024-01-02', '2024-01-03', '2024-01-04')
+                              for i in range(300)])
+            conn.execute("INSERT INTO stock_info VALUES ('000001', '平安银行')")
+        self.exporter = CSVExporter(self.db_path, os.path.join(self.tmp_dir.name, 'exports'))
+        self.watermarks = SyncWatermarks(self.db_path)
+        self.store = LocalObjectStore(os.path.join(self.tmp_dir.name, 'r2'))
+        self.r2 = R2Manager(bucket_name='bucket', s3_client=self.store)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+
+class TestDeltaExport(SyncTestCase):
+    """水位、回看与日期分区"""
+
+    def test_partitions_and_since(self):
+        entry = self.exporter.export_table_delta('stock_daily_prices', batch_size=250)
+        self.assertEqual(entry['partitions'], ['2024-01-02', '2024-01-03', '2024-01-04'])
+        self.assertEqual(entry['rows'], 900)
+        self.assertEqual(entry['high_water'], '2024-01-04')
+        self.assertEqual(len(pd.read_csv(entry['files'][1])), 300)
+
+        entry = self.exporter.export_table_delta('stock_daily_prices', since='2024-01-04')
+        self.assertEqual(entry['partitions'], ['2024-01-04'])
+        self.assertEqual(entry['rows'], 300)
+        # 上次的分区文件已清理
+        self.assertEqual(len(os.listdir(os.path.dirname(entry['files'][0]))), 1)
+
+    @unittest.skipUnless(HAS_PYARROW, "需要 pyarrow")
+    def test_parquet_partitions(self):
+        self.exporter.export_table_delta('stock_daily_prices')
+        entry = self.exporter.export_table_delta('stock_daily_prices', since='2024-01-03', format='parquet')
+        self.assertEqual([os.path.basename(f) for f in entry['files']], ['2024-01-03.parquet', '2024-01-04.parquet'])
+        # 切换格式时清掉上次的 CSV 分区
+        self.assertEqual(len(os.listdir(os.path.dirname(entry['files'][0]))), 2)
+        self.assertEqual(pq.read_table(entry['files'][0]).num_rows, 300)
+
+    def test_full_table_without_date_column(self):
+        entry = self.exporter.export_table_delta('stock_info', since='2024-01-04')
+        self.assertEqual(entry['partitions'], ['full'])
+        self.assertIsNone(entry['high_water'])
+
+    def test_watermark_only_moves_forward(self):
+        self.watermarks.commit('stock_daily_prices', '2024-01-03', 300)
+        self.watermarks.commit('stock_daily_prices', '2024-01-02', 300)
+        self.assertEqual(self.watermarks.get('stock_daily_prices'), '2024-01-03')
+        self.assertEqual(export_since('2024-03-01', 1), '2024-02-29')
+
+    def test_sync_advances_watermark_after_merge(self):
+        importer = FakeImporter()
+        sync = DeltaSync(self.exporter, self.r2, importer, self.watermarks)
+        results = asyncio.run(sync.run(['stock_daily_prices', 'stock_info']))
+
+        self.assertEqual(results['stock_daily_prices']['partitions'], 3)
+        self.assertEqual(self.watermarks.get('stock_daily_prices'), '2024-01-04')
+        self.assertIn('delta/stock_daily_prices/2024-01-02.csv.gz', self.store.put_keys)
+        self.assertEqual(importer.calls[0][3], ['symbol', 'trade_date'])
+
+        # 第二次只同步水位当天（回看 0 天）
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("INSERT INTO stock_daily_prices VALUES ('000001', '2024-01-05', 2.0)")
+        self.store.put_keys.clear()
+        results = asyncio.run(sync.run(['stock_daily_prices']))
+        self.assertEqual(results['stock_daily_prices']['rows'], 301)
+        self.assertEqual(self.watermarks.get('stock_daily_prices'), '2024-01-05')
+        # 回看窗口内未变化的分区（2024-01-04）不重复上传，但仍参与合并
+        uploaded = [k for k in self.store.put_keys if '_manifests' not in k]
+        self.assertEqual(uploaded, ['delta/stock_daily_prices/2024-01-05.csv.gz'])
+        self.assertEqual(len(importer.calls[-1][1]), 2)
+
+    def test_failed_merge_keeps_watermark(self):
+        sync = DeltaSync(self.exporter, self.r2, FakeImporter(fail=True), self.watermarks)
+        results = asyncio.run(sync.run(['stock_daily_prices']))
+        self.assertFalse(results['stock_daily_prices']['success'])
+        self.assertIsNone(self.watermarks.get('stock_daily_prices'))
+
+
+    def _rewrite_history(self, symbol):
+        """模拟除权后前复权重拉：整段改写该标的历史，并在同一事务内登记重新导出"""
+        engine = create_engine(f"sqlite:///{self.db_path}")
+        with engine.begin() as conn:
+            conn.exec_driver_sql("UPDATE stock_daily_prices SET close = 0.5 WHERE symbol = ?", (symbol,))
+            record_reexport(conn, 'stock_daily_prices', [symbol])
+        engine.dispose()
+
+    def test_rewritten_symbol_is_reexported(self):
+        importer = FakeImporter()
+        sync = DeltaSync(self.exporter, self.r2, importer, self.watermarks)
+        asyncio.run(sync.run(['stock_daily_prices']))
+
+        self._rewrite_history('000005')
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("INSERT INTO stock_daily_prices VALUES ('000001', '2024-01-05', 2.0)")
+
+        # 失败时保留登记
+        failed = DeltaSync(self.exporter, self.r2, FakeImporter(fail=True), self.watermarks)
+        asyncio.run(failed.run(['stock_daily_prices']))
+        self.assertEqual(list(ReexportLog(self.db_path).pending('stock_daily_prices')), ['000005'])
+
+        entry = self.exporter.export_table_delta('stock_daily_prices', since='2024-01-04')
+        self.assertEqual(entry['partitions'], ['2024-01-02', '2024-01-03', '2024-01-04', '2024-01-05'])
+        self.assertEqual(entry['rows'], 300 + 1 + 2)
+        old = pd.read_csv(entry['files'][0], dtype={'symbol': str})
+        self.assertEqual(list(old['symbol']), ['000005'])
+        self.assertEqual(list(old['close']), [0.5])
+
+        results = asyncio.run(sync.run(['stock_daily_prices']))
+        self.assertEqual(results['stock_daily_prices']['rows'], 303)
+        self.assertEqual(ReexportLog(self.db_path).pending('stock_daily_prices'), {})
+
+        # 合并后不再重复导出
+        entry = self.exporter.export_table_delta('stock_daily_prices', since='2024-01-05')
+        self.assertEqual(entry['rows'], 1)
+
+
+class TestSyncPipeline(SyncTestCase):
+    """流水线执行与断点续传"""
+
+    def _pipeline(self, importer):
+        return SyncPipeline(self.exporter, self.r2, importer, self.watermarks, queue_size=1)
+
+    def test_stages_overlap(self):
+        events = []
+        export = self.exporter.export_table_delta
+        self.exporter.export_table_delta = lambda table, **kw: events.append(('export', table)) or export(table, **kw)
+        pipeline = self._pipeline(FakeImporter(delay=0.3, events=events))
+        results = asyncio.run(pipeline.run(['stock_daily_prices', 'stock_info']))
+
+        # 第一张表还在导入时第二张表已经导出
+        self.assertLess(events.index(('export', 'stock_info')), events.index(('import', 'stock_daily_prices')))
+        self.assertTrue(all(r['success'] for r in results.values()))
+        self.assertEqual(set(results['stock_daily_prices']['timings']), {'export', 'upload', 'import'})
+        self.assertEqual(self.watermarks.get('stock_daily_prices'), '2024-01-04')
+        self.assertTrue(pipeline.manifest.data['complete'])
+
+    def test_resume_from_manifest(self):
+        pipeline = self._pipeline(FakeImporter(fail={'stock_daily_prices'}))
+        results = asyncio.run(pipeline.run(['stock_daily_prices', 'stock_info']))
+        self.assertFalse(results['stock_daily_prices']['success'])
+        self.assertTrue(results['stock_info']['success'])
+        self.assertIsNone(self.watermarks.get('stock_daily_prices'))
+
+        # 续传：stock_info 跳过，stock_daily_prices 不重新导出 / 上传，直接导入
+        self.store.put_keys.clear()
+        importer = FakeImporter()
+        results = asyncio.run(self._pipeline(importer).run(['stock_daily_prices', 'stock_info'], resume=True))
+        self.assertTrue(results['stock_info']['resumed'])
+        self.assertTrue(results['stock_daily_prices']['success'])
+        self.assertEqual([c[0] for c in importer.calls], ['stock_daily_prices'])
+        self.assertEqual(self.store.put_keys, [])
+        self.assertEqual(self.watermarks.get('stock_daily_prices'), '2024-01-04')
+
+        # 已完成的清单不再续传，重新开始一轮
+        pipeline = self._pipeline(FakeImporter())
+        asyncio.run(pipeline.run(['stock_info'], resume=True))
+        self.assertEqual(list(pipeline.manifest.data['tables']), ['stock_info'])
+
+
+class TestMergeSql(unittest.TestCase):
+
+    def test_merge_sql(self):
+        sql = build_merge_sql('prices', 'prices_sync_x', ['symbol', 'trade_date', 'close'], ['symbol', 'trade_date'])
+        self.assertIn("ON CONFLICT (symbol, trade_date) DO UPDATE SET close = excluded.close", sql)
+        sql = build_merge_sql('rel', 'rel_sync_x', ['article_id', 'symbol'], ['article_id', 'symbol'])
+        self.assertTrue(sql.endswith("DO NOTHING"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+测试因子增量状态：增量模式与窗口模式结果一致（含停止交易的标的）
+"""
+import sys
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+
+sys.path.insert(0, '.')
+
+from quant_engine.core.base_feature_calculator import BaseFeatureCalculator
+
+
+class DemoCalculator(BaseFeatureCalculator):
+    def get_source_table(self):
+        return 'demo_daily_prices'
+
+    def get_target_table(self):
+        return 'quant_feature_demo'
+
+    def get_entity_column(self):
+        return 'symbol'
+
+    def get_periods(self):
+        return [2, 5]
+
+
+class TestIncrementalState(unittest.TestCase):
+    """滚动状态增量计算"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.calc = DemoCalculator()
+        self.calc.engine = create_engine(f"sqlite:///{os.path.join(self.tmp_dir.name, 'local.db')}")
+        config = self.calc.config
+        config.INCREMENTAL_WINDOW_DAYS = 20
+        config.ROLLING_STATE_ROWS = 40
+        config.SAVE_RECENT_DAYS = 3
+        config.FEATURE_STATE_DIR = os.path.join(self.tmp_dir.name, 'state')
+
+        today = pd.Timestamp(datetime.now().date())
+        days = pd.bdate_range(end=today, periods=45)
+        rng = np.random.default_rng(0)
+        rows = [(symbol, day.strftime('%Y-%m-%d'), float(rng.uniform(5, 50)))
+                for day in days for symbol in ('A', 'B', 'C', 'D')
+                # C 在一个月前停止交易，窗口模式已不再包含它
+                if not (symbol == 'C' and day > today - timedelta(days=30))]
+        self.prices = pd.DataFrame(rows, columns=['symbol', 'trade_date', 'close'])
+        self.split = (today - timedelta(days=10)).strftime('%Y-%m-%d')
+
+    def tearDown(self):
+        self.calc.engine.dispose()
+        self.tmp_dir.cleanup()
+
+    def _write_prices(self, df):
+        df.to_sql('demo_daily_prices', self.calc.engine, if_exists='append', index=False)
+
+    def _result(self):
+        df = pd.read_sql("SELECT * FROM quant_feature_demo", self.calc.engine)
+        return df.sort_values(['trade_date', 'symbol']).reset_index(drop=True)
+
+    def _build_state(self):
+        """状态建立于 10 天前（当时窗口仍包含 C 的K线），之后的行情增量到达"""
+        self._write_prices(self.prices[self.prices['trade_date'] <= self.split])
+        self.calc.config.INCREMENTAL_WINDOW_DAYS = 60
+        self.calc.run_init(days=60)
+        self.assertIn('C', self.calc.load_state()[0].columns)
+        self.calc.config.INCREMENTAL_WINDOW_DAYS = 20
+
+    def _incremental_and_window(self):
+        """增量模式结果与窗口模式重算同一区间的结果"""
+        self.calc.run_daily()
+        incremental = self._result()
+        incremental = incremental[incremental['trade_date'] > self.split].reset_index(drop=True)
+
+        self.calc.reset_state()
+        with self.calc.engine.begin() as conn:
+            conn.exec_driver_sql("DELETE FROM quant_feature_demo")
+        self.calc.config.USE_ROLLING_STATE = False
+        self.calc.run_daily()
+        window = self._result()
+
+        self.assertFalse(window.empty)
+        incremental = incremental[incremental['trade_date'].isin(window['trade_date'])].reset_index(drop=True)
+        return incremental, window
+
+    def test_incremental_matches_window_after_symbol_stops(self):
+        self._build_state()
+        self._write_prices(self.prices[self.prices['trade_date'] > self.split])
+        self.calc.run_daily()
+        closes, last_bar = self.calc.load_state()
+        self.assertNotIn('C', closes.columns)
+        self.assertEqual(list(last_bar.index), list(closes.columns))
+
+        incremental, window = self._incremental_and_window()
+        self.assertEqual(sorted(window['symbol'].unique()), ['A', 'B', 'D'])
+        pd.testing.assert_frame_equal(incremental, window)
+
+    def test_rewritten_history_is_reloaded(self):
+        self._build_state()
+        # A 在 split 次日除权：前复权重拉后整段历史减半，状态中仍是旧的价格基准
+        with self.calc.engine.begin() as conn:
+            conn.exec_driver_sql(
+                "UPDATE demo_daily_prices SET close = close / 2 WHERE symbol = 'A' AND trade_date <= ?",
+                (self.split,),
+            )
+        self._write_prices(self.prices[self.prices['trade_date'] > self.split])
+        expected = pd.read_sql("SELECT trade_date, close FROM demo_daily_prices WHERE symbol = 'A'",
+                               self.calc.engine, parse_dates=['trade_date']).set_index('trade_date')['close']
+
+        self.calc.run_daily()
+        closes, _ = self.calc.load_state()
+        pd.testing.assert_series_equal(closes['A'], expected.reindex(closes.index),
+                                       check_names=False, check_freq=False)
+
+        incremental, window = self._incremental_and_window()
+        pd.testing.assert_frame_equal(incremental, window)
+
+if __name__ == '__main__':
+    unittest.main()
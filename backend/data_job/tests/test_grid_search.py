@@ -0,0 +1,91 @@
+"""
+测试参数网格寻优：排名与逐组直接回测一致、共享内存释放、单进程与多进程结果一致
+"""
+import sys
+import unittest
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, '.')
+
+from quant_engine.backtest import grid_search
+from quant_engine.backtest.grid_search import GridSearchOptimizer, expand_grid
+from quant_engine.backtest.vector_engine import BacktestRules, VectorBacktester
+
+GRID = {'x_min': [0.3, 0.7], 'max_hold_days': [1, 3]}
+METRICS = ['signal_count', 'total_return', 'annual_return', 'max_drawdown', 'sharpe', 'win_rate', 'trade_count']
+
+
+def x_mask(features, params):
+    return features['x'] >= params['x_min']
+
+
+class RecordingSharedArrays(grid_search.SharedArrays):
+    """记录创建过的共享内存段名称"""
+    names = []
+
+    def __init__(self, arrays):
+        super().__init__(arrays)
+        self.names.append(self.spec['name'])
+
+
+class TestGridSearch(unittest.TestCase):
+    """2 × 2 网格"""
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        dates = pd.bdate_range('2024-01-01', periods=12)
+        symbols = ['A', 'B', 'C']
+        close = pd.DataFrame(rng.uniform(9, 11, (len(dates), len(symbols))), index=dates, columns=symbols)
+        self.open = close.shift(1).fillna(10.0)
+        self.close = close
+        self.features = pd.DataFrame(
+            [(symbol, day, float(rng.uniform())) for day in dates[:-2] for symbol in symbols],
+            columns=['symbol', 'trade_date', 'x'],
+        )
+        self.features['rps_250'] = self.features['x'] * 100
+        self.base_rules = BacktestRules(stop_loss=0.05, max_hold_days=2)
+
+    def _optimizer(self):
+        return GridSearchOptimizer(self.features, x_mask, self.open, self.close,
+                                   base_params={'x_min': 0.5}, base_rules=self.base_rules)
+
+    def _direct(self):
+        """逐组直接用 VectorBacktester 回测"""
+        rows = []
+        for combo in expand_grid(GRID):
+            hit = self.features[self.features['x'] >= combo['x_min']]
+            signals = hit.rename(columns={'rps_250': 'score'})[['symbol', 'trade_date', 'score']]
+            rules = BacktestRules(stop_loss=0.05, max_hold_days=combo['max_hold_days'])
+            metrics = VectorBacktester(self.open, self.close, rules).run(signals).metrics
+            rows.append({**combo, 'signal_count': len(hit), **metrics})
+        return pd.DataFrame(rows).sort_values('sharpe', ascending=False, kind='stable').reset_index(drop=True)
+
+    def test_ranking_matches_direct_backtests(self):
+        table = self._optimizer().run(GRID, workers=1)
+
+        self.assertEqual(list(table['rank']), [1, 2, 3, 4])
+        expected = self._direct()
+        pd.testing.assert_frame_equal(table[list(GRID) + METRICS], expected[list(GRID) + METRICS])
+
+    def test_workers_give_same_results_and_release_shared_memory(self):
+        original = grid_search.SharedArrays
+        grid_search.SharedArrays = RecordingSharedArrays
+        RecordingSharedArrays.names = []
+        try:
+            parallel = self._optimizer().run(GRID, workers=2)
+        finally:
+            grid_search.SharedArrays = original
+
+        serial = self._optimizer().run(GRID, workers=1)
+        pd.testing.assert_frame_equal(parallel, serial)
+
+        self.assertEqual(len(RecordingSharedArrays.names), 1)
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=RecordingSharedArrays.names[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
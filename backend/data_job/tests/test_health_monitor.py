@@ -0,0 +1,68 @@
+"""
+测试 HealthMonitor 健康状态缓存
+"""
+import sys
+import time
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+
+sys.path.insert(0, '.')
+
+from data_job.core.health_monitor import HealthMonitor, _ProbeResult
+
+
+class TestHealthMonitor(unittest.TestCase):
+    """测试健康监测缓存与后台探测"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.monitor = HealthMonitor(ttl=60, failure_ttl=0.05)
+        self.engine = create_engine("sqlite://")
+
+    def tearDown(self):
+        """测试后清理"""
+        self.monitor.stop()
+        self.engine.dispose()
+
+    def test_network_status_is_cached(self):
+        """测试成功结果在 TTL 内只探测一次"""
+        with patch.object(self.monitor, '_probe_network', return_value=_ProbeResult(True)) as probe:
+            for _ in range(100):
+                self.assertTrue(self.monitor.network_status().ok)
+            self.assertEqual(probe.call_count, 1)
+
+    def test_failure_expires_quickly(self):
+        """测试失败结果使用较短 TTL"""
+        with patch.object(self.monitor, '_probe_network', return_value=_ProbeResult(False, "down")) as probe:
+            self.assertFalse(self.monitor.network_status().ok)
+            self.assertFalse(self.monitor.network_status().ok)
+            self.assertEqual(probe.call_count, 1)
+
+            time.sleep(0.06)
+            self.monitor.network_status()
+            self.assertEqual(probe.call_count, 2)
+
+    def test_database_status(self):
+        """测试数据库探测与缓存"""
+        self.assertTrue(self.monitor.database_status(self.engine).ok)
+        count = self.monitor.probe_count
+        self.monitor.database_status(self.engine)
+        self.assertEqual(self.monitor.probe_count, count)
+
+    def test_background_refresh(self):
+        """测试后台线程刷新已登记的引擎"""
+        self.monitor.register_engine(self.engine)
+        with patch.object(self.monitor, '_probe_network', return_value=_ProbeResult(True)):
+            self.monitor.start(interval=0.01)
+            time.sleep(0.1)
+            self.assertTrue(self.monitor.is_running)
+
+            snapshot = self.monitor.snapshot()
+            self.assertTrue(snapshot['network']['ok'])
+            self.assertEqual(len(snapshot['databases']), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
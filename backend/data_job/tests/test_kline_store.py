@@ -0,0 +1,144 @@
+"""
+测试列式K线仓库（需要 pyarrow，未安装时跳过）
+"""
+import sys
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+sys.path.insert(0, '.')
+
+from app.core.kline_store import KlineStore
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+class TestKlineStoreMapping(unittest.TestCase):
+    """表名 -> 资产类别"""
+
+    def test_asset_for_table(self):
+        self.assertEqual(KlineStore.asset_for_table('stock_daily_prices'), 'stock')
+        self.assertEqual(KlineStore.asset_for_table('sector_daily_prices'), 'sector')
+        self.assertIsNone(KlineStore.asset_for_table('stock_info'))
+
+    def test_empty_store(self):
+        with tempfile.TemporaryDirectory() as root:
+            store = KlineStore(root)
+            self.assertEqual(store.months('stock'), [])
+            self.assertFalse(store.has_data('stock'))
+
+
+@unittest.skipUnless(HAS_PYARROW, "需要 pyarrow")
+class TestKlineStoreReadWrite(unittest.TestCase):
+    """按月分区写入、合并与谓词读取"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = KlineStore(os.path.join(self.tmp_dir.name, "kline"))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _kline(self, rows):
+        return pd.DataFrame(rows, columns=['symbol', 'trade_date', 'open', 'close'])
+
+    def test_write_partitions_by_month(self):
+        self.store.write('stock', self._kline([
+            ('000001', '2024-01-30', 10.0, 10.5),
+            ('000001', '2024-02-01', 10.5, 11.0),
+            ('600000', '2024-02-01', 8.0, 8.2),
+        ]))
+        self.assertEqual(self.store.months('stock'), ['2024-01', '2024-02'])
+
+    def test_write_merges_same_key(self):
+        self.store.write('stock', self._kline([('000001', '2024-01-30', 10.0, 10.5)]))
+        self.store.write('stock', self._kline([('000001', '2024-01-30', 10.0, 12.0),
+                                               ('000001', '2024-01-31', 12.0, 12.5)]))
+
+        df = self.store.read('stock')
+        self.assertEqual(len(df), 2)
+        self.assertEqual(df.loc[df['trade_date'] == '2024-01-30', 'close'].iloc[0], 12.0)
+
+    def test_read_filters(self):
+        self.store.write('stock', self._kline([
+            ('000001', '2024-01-30', 10.0, 10.5),
+            ('000001', '2024-02-01', 10.5, 11.0),
+            ('600000', '2024-02-01', 8.0, 8.2),
+            ('600000', '2024-03-01', 8.2, 8.4),
+        ]))
+
+        df = self.store.read('stock', start_date='2024-02-01', end_date='2024-02-29',
+                             symbols=['600000'], columns=['symbol', 'trade_date', 'close'])
+        self.assertEqual(list(df.columns), ['symbol', 'trade_date', 'close'])
+        self.assertEqual(len(df), 1)
+        self.assertEqual(df['trade_date'].iloc[0], pd.Timestamp('2024-02-01'))
+
+    def test_read_across_months_with_different_dtypes(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        columns = ['symbol', 'trade_date', 'close', 'volume']
+        self.store.write('stock', pd.DataFrame([('000001', '2024-01-30', 10.0, 1000)], columns=columns))
+        self.store.write('stock', pd.DataFrame([('000001', '2024-02-01', 10.5, 100.5)], columns=columns))
+        self.store.write('stock', pd.DataFrame([('000001', '2024-03-01', 11.0, None)], columns=columns))
+        # 旧版按 pandas dtype 写入的月份文件（volume 为 int64）
+        legacy = os.path.join(self.store.root, 'stock', 'month=2024-04', 'part-0.parquet')
+        os.makedirs(os.path.dirname(legacy))
+        pq.write_table(pa.table({'symbol': ['000001'], 'trade_date': pa.array([pd.Timestamp('2024-04-01').date()]),
+                                 'close': [11.5], 'volume': pa.array([7], pa.int64())}), legacy)
+
+        df = self.store.read('stock', columns=columns)
+        self.assertEqual(len(df), 4)
+        self.assertEqual(df['volume'].dtype, 'float64')
+        self.assertEqual(df['volume'].iloc[1], 100.5)
+        self.assertTrue(pd.isna(df['volume'].iloc[2]))
+        self.assertEqual(df['volume'].iloc[3], 7.0)
+
+
+@unittest.skipUnless(HAS_PYARROW, "需要 pyarrow")
+class TestKlineStoreBuffer(unittest.TestCase):
+    """采集器暂存逐标的写入，运行结束时每个月份只重写一次"""
+
+    def setUp(self):
+        from data_job.core.base_collector import BaseCollector
+
+        class TestCollector(BaseCollector):
+            def run(self):
+                return True
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.collector = TestCollector(collector_name="test_kline_buffer")
+        self.collector.kline_store = KlineStore(os.path.join(self.tmp_dir.name, "kline"))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_flush_writes_once(self):
+        store = self.collector.kline_store
+        for symbol in ['510300', '510500', '159915']:
+            self.collector.buffer_kline_store('etf_daily_prices', pd.DataFrame({
+                'symbol': symbol,
+                'trade_date': ['2024-01-30', '2024-02-01'],
+                'close': [1.0, 1.1],
+            }))
+        self.assertEqual(store.months('etf'), [])
+
+        with patch.object(store, 'write', wraps=store.write) as write:
+            self.collector.flush_kline_store()
+            self.collector.flush_kline_store()
+        self.assertEqual(write.call_count, 1)
+
+        self.assertEqual(store.months('etf'), ['2024-01', '2024-02'])
+        self.assertEqual(len(store.read('etf')), 6)
+        self.assertEqual(self.collector.kline_buffer, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+"""
+测试懒加载：导入采集器包 / 命令行入口不加载重量级依赖
+"""
+import sys
+import subprocess
+import unittest
+
+sys.path.insert(0, '.')
+
+from data_job.common.lazy_utils import lazy_import
+
+
+def loaded_modules(code: str) -> set:
+    """在干净的子进程中执行代码，返回已加载的模块名"""
+    output = subprocess.run(
+        [sys.executable, '-c', f"{code}\nimport sys; print('\\n'.join(sys.modules))"],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return set(output.split())
+
+
+class TestLazyImports(unittest.TestCase):
+    """导入时不加载 akshare / pandas，不创建数据库引擎"""
+
+    def test_collector_import_defers_akshare(self):
+        modules = loaded_modules("from data_job.collectors import LimitBoardsCollector")
+        self.assertIn('data_job.collectors.limit_boards_collector', modules)
+        self.assertNotIn('data_job.collectors.news_collector', modules)
+        self.assertNotIn('akshare', modules)
+
+    def test_runner_registry_defers_pandas(self):
+        modules = loaded_modules("import quant_engine.runner.strategy_runner, quant_engine.runner.feature_runner")
+        self.assertNotIn('pandas', modules)
+        self.assertNotIn('quant_engine.strategies.mrgc_strategy', modules)
+
+    def test_database_import_creates_no_engine(self):
+        modules = loaded_modules(
+            "import app.core.database as db; assert not db._engines, db._engines"
+        )
+        self.assertIn('app.core.database', modules)
+
+    def test_lazy_module_proxy(self):
+        json_proxy = lazy_import('json')
+        self.assertEqual(json_proxy.dumps([1]), '[1]')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+测试全市场快照日线
+"""
+import sys
+import unittest
+from datetime import date, datetime
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, '.')
+
+from data_job.core.market_snapshot import (
+    resolve_snapshot_date, build_stock_bars, build_etf_bars, split_by_watermark, find_adjusted,
+    load_stored_close
+)
+
+
+class TestMarketSnapshot(unittest.TestCase):
+    """测试快照日线生成与任务划分"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.calendar = [date(2024, 1, 2), date(2024, 1, 3), date(2024, 1, 4)]
+        self.spot = pd.DataFrame({
+            '代码': ['000001', '600000', '300750'],
+            '名称': ['平安银行', '浦发银行', '宁德时代'],
+            '最新价': [10.5, 7.2, None],
+            '今开': [10.1, 7.0, None],
+            '最高': [10.6, 7.3, None],
+            '最低': [10.0, 6.9, None],
+            '成交量': [1000, 2000, 0],
+            '成交额': [1.05e6, 1.44e6, 0],
+            '涨跌幅': [1.2, -0.5, 0],
+            '换手率': [0.5, 0.3, 0],
+            '昨收': [10.375, 7.236, 180.0],
+        })
+
+    def test_resolve_snapshot_date(self):
+        """测试只有交易日收盘后才使用快照"""
+        self.assertEqual(resolve_snapshot_date(self.calendar, datetime(2024, 1, 3, 16, 0)),
+                         (date(2024, 1, 3), date(2024, 1, 2)))
+        self.assertIsNone(resolve_snapshot_date(self.calendar, datetime(2024, 1, 3, 10, 0)))
+        self.assertIsNone(resolve_snapshot_date(self.calendar, datetime(2024, 1, 6, 16, 0)))
+
+    def test_build_stock_bars_skips_suspended(self):
+        """测试停牌股票不生成K线"""
+        bars = build_stock_bars(self.spot, date(2024, 1, 3))
+        self.assertEqual(list(bars['symbol']), ['000001', '600000'])
+        self.assertEqual(bars.iloc[0]['close'], 10.5)
+        self.assertEqual(bars.iloc[0]['trade_date'], date(2024, 1, 3))
+
+    def test_build_etf_bars_filters_stale_rows(self):
+        """测试数据日期不是当日的 ETF 行被丢弃"""
+        spot = pd.DataFrame({
+            '代码': ['510300', '159915'],
+            '最新价': [3.5, 2.1], '开盘价': [3.4, 2.0], '最高价': [3.6, 2.2], '最低价': [3.4, 2.0],
+            '成交量': [100, 200], '成交额': [350.0, 420.0], '涨跌幅': [1.0, 0.5], '昨收': [3.46, 2.09],
+            '数据日期': ['2024-01-03', '2024-01-02'],
+        })
+        bars = build_etf_bars(spot, date(2024, 1, 3))
+        self.assertEqual(list(bars['symbol']), ['510300'])
+
+    def test_split_by_watermark(self):
+        """测试只缺当日一根K线的标的走快照"""
+        last_dates = {'000001': date(2024, 1, 2), '600000': date(2023, 12, 20)}
+        eligible, rest = split_by_watermark(['000001', '600000', '688001'], last_dates, date(2024, 1, 2))
+        self.assertEqual(eligible, ['000001'])
+        self.assertEqual(rest, ['600000', '688001'])
+
+    def test_find_adjusted(self):
+        """测试昨收与库中收盘价不一致的股票被识别为除权"""
+        bars = build_stock_bars(self.spot, date(2024, 1, 3))
+        adjusted = find_adjusted(bars, {'000001': 10.375, '600000': 7.8})
+        self.assertEqual(adjusted, {'600000'})
+
+    def test_stored_close_matches_timestamp_rows(self):
+        """测试库中带时间戳的旧行也能取到上一交易日收盘价"""
+        engine = create_engine("sqlite://")
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE prices (symbol TEXT, trade_date TEXT, close FLOAT)"))
+            conn.execute(text("INSERT INTO prices VALUES ('000001', '2024-01-02', 10.375), "
+                              "('600000', '2024-01-02 00:00:00', 7.8), ('600000', '2024-01-03', 7.2)"))
+        with engine.connect() as conn:
+            stored = load_stored_close(conn, 'prices', date(2024, 1, 2))
+        self.assertEqual(stored, {'000001': 10.375, '600000': 7.8})
+
+        bars = build_stock_bars(self.spot, date(2024, 1, 3))
+        self.assertEqual(find_adjusted(bars, stored), {'600000'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+测试 MRGC 全池向量化选股与逐只参照实现一致（含停牌缺口、K线不足、缺失 RPS）
+"""
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, '.')
+
+from quant_engine.strategies.mrgc_strategy import MrgcStrategy
+
+
+def make_bars(symbol, closes, dates, rng, turnover=3.0):
+    closes = np.asarray(closes, dtype=float)
+    spread = rng.uniform(0.0, 0.02, len(closes))
+    return pd.DataFrame({
+        'symbol': symbol,
+        'trade_date': dates[:len(closes)],
+        'open': closes * (1 - spread / 2),
+        'high': closes * (1 + spread),
+        'low': closes * (1 - spread),
+        'close': closes,
+        'volume': rng.uniform(1e5, 1e6, len(closes)),
+        'turnover_rate': turnover,
+    })
+
+
+class TestMrgcPanelParity(unittest.TestCase):
+    """_check_signals_panel 与 _check_signals_reference 的股票与原因一致"""
+
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        dates = pd.bdate_range(end='2024-06-28', periods=320)
+        trend = np.linspace(10, 20, 320) * (1 + rng.normal(0, 0.003, 320))
+
+        frames = [
+            make_bars('UP', trend, dates, rng),                          # 趋势向上 + RPS 极强 -> MRGC
+            make_bars('SX', trend * 1.5, dates, rng),                    # RPS 不够 MRGC，够 SXHCG
+            make_bars('HOT', trend, dates, rng, turnover=30.0),          # 换手率过高
+            make_bars('DOWN', trend[::-1], dates, rng),                  # 趋势向下
+            make_bars('SHORT', trend[-200:], dates[-200:], rng),         # K线不足 250 根
+            make_bars('EXACT', trend[-250:], dates[-250:], rng),         # 恰好 250 根
+            make_bars('NORPS', trend, dates, rng),                       # 无 RPS 记录
+        ]
+        # 停牌：中间和最近各缺一段K线（按自身K线序号对齐，不占窗口）
+        suspended = make_bars('SUSP', trend, dates, rng)
+        frames.append(suspended.drop(suspended.index[list(range(100, 130)) + list(range(310, 315))]))
+        suspended_short = make_bars('SUSP_SHORT', trend[-260:], dates[-260:], rng)
+        frames.append(suspended_short.drop(suspended_short.index[50:60]))
+        # 随机游走若干只，RPS 随机
+        for i in range(12):
+            walk = 10 * np.exp(np.cumsum(rng.normal(0.001, 0.02, 320)))
+            frames.append(make_bars(f'R{i:02d}', walk, dates, rng, turnover=float(rng.uniform(1, 30))))
+        self.kline = pd.concat(frames, ignore_index=True)
+        self.kline.loc[self.kline.sample(frac=0.01, random_state=3).index, 'turnover_rate'] = np.nan
+
+        self.rps = {
+            'UP': {'rps_50': 99, 'rps_120': 99, 'rps_250': 99},
+            'SX': {'rps_50': 90, 'rps_120': 93, 'rps_250': 93},
+            'HOT': {'rps_50': 99, 'rps_120': 99, 'rps_250': 99},
+            'DOWN': {'rps_50': 99, 'rps_120': 99, 'rps_250': 99},
+            'SHORT': {'rps_50': 99, 'rps_120': 99, 'rps_250': 99},
+            'EXACT': {'rps_50': 99, 'rps_120': 99, 'rps_250': 99},
+            'SUSP': {'rps_50': 99, 'rps_120': 98.5, 'rps_250': None},
+            'SUSP_SHORT': {'rps_50': 99, 'rps_120': 99, 'rps_250': 99},
+        }
+        for i in range(12):
+            self.rps[f'R{i:02d}'] = {k: float(rng.uniform(80, 100)) for k in ('rps_50', 'rps_120', 'rps_250')}
+
+        self.strategy = MrgcStrategy()
+
+    def test_panel_matches_reference(self):
+        symbols = list(self.kline['symbol'].unique())
+        reference = self.strategy._check_signals_reference(self.kline, symbols, self.rps)
+        panel = self.strategy._check_signals_panel(self.kline, self.rps)
+
+        self.assertEqual(panel, reference)
+        # 两种信号都被覆盖，K线不足的不出信号
+        self.assertEqual(panel.get('UP'), 'MRGC触发')
+        self.assertEqual(panel.get('SX'), 'SXHCG触发')
+        self.assertNotIn('SHORT', panel)
+        self.assertNotIn('HOT', panel)
+
+
+if __name__ == '__main__':
+    unittest.main()
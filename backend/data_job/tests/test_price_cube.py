@@ -0,0 +1,105 @@
+"""
+测试内存映射价格立方体
+"""
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+
+sys.path.insert(0, '.')
+
+from app.core.price_cube import PriceCube
+
+
+class TestPriceCube(unittest.TestCase):
+    """追加、重建与读取"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cube = PriceCube(self.tmp_dir.name, 'sector')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _kline(self, rows):
+        return pd.DataFrame(rows, columns=['sector_name', 'trade_date', 'close'])
+
+    def test_append_and_overwrite(self):
+        self.cube.update(self._kline([('a', '2024-01-02', 1.0), ('b', '2024-01-02', 2.0)]))
+        self.cube.update(self._kline([('a', '2024-01-02', 1.5), ('a', '2024-01-03', 3.0)]))
+
+        panel = self.cube.panel('close')
+        self.assertEqual(list(panel.columns), ['a', 'b'])
+        self.assertEqual(panel.loc['2024-01-02', 'a'], 1.5)
+        self.assertTrue(np.isnan(panel.loc['2024-01-03', 'b']))
+
+    def test_insert_earlier_date_rebuilds(self):
+        self.cube.update(self._kline([('a', '2024-01-03', 1.0)]))
+        self.cube.update(self._kline([('c', '2024-01-02', 3.0)]))
+
+        panel = self.cube.panel('close')
+        self.assertEqual(list(panel.index), [pd.Timestamp('2024-01-02'), pd.Timestamp('2024-01-03')])
+        self.assertEqual(panel.loc['2024-01-03', 'a'], 1.0)
+        self.assertEqual(panel.loc['2024-01-02', 'c'], 3.0)
+
+    def test_reopen_and_filters(self):
+        self.cube.update(self._kline([
+            ('a', '2024-01-02', 1.0), ('b', '2024-01-02', 2.0),
+            ('a', '2024-01-03', 1.1), ('a', '2024-01-04', 1.2),
+        ]))
+
+        reader = PriceCube(self.tmp_dir.name, 'sector')
+        df = reader.to_long(['close'], start_date='2024-01-03', symbols=['a', 'missing'])
+        self.assertEqual(list(df['sector_name']), ['a', 'a'])
+        self.assertEqual(list(df['close']), [1.1, 1.2])
+        self.assertEqual(reader.last_date, pd.Timestamp('2024-01-04'))
+
+
+class TestPriceCubeSync(unittest.TestCase):
+    """从数据库增量同步：重叠窗口内取值变化的标的整列重新载入"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f'sqlite:///{self.tmp_dir.name}/db.sqlite')
+        self.cube = PriceCube(self.tmp_dir.name, 'sector')
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmp_dir.cleanup()
+
+    def _write(self, closes: dict):
+        dates = pd.bdate_range('2024-01-01', periods=30)
+        rows = [(name, d.strftime('%Y-%m-%d'), close * (i + 1))
+                for name, close in closes.items() for i, d in enumerate(dates)]
+        df = pd.DataFrame(rows, columns=['sector_name', 'trade_date', 'close'])
+        for field in ('open', 'high', 'low', 'volume'):
+            df[field] = np.nan
+        df.to_sql('sector_daily_prices', self.engine, if_exists='replace', index=False)
+        return dates
+
+    def test_rewritten_history_is_reloaded(self):
+        dates = self._write({'a': 1.0, 'b': 2.0})
+        self.cube.sync_from_db(self.engine)
+        self.assertEqual(self.cube.panel('close').loc[dates[0], 'a'], 1.0)
+
+        # a 除权后前复权全历史重写（价格整体 ×0.5），b 不变
+        self._write({'a': 0.5, 'b': 2.0})
+        self.cube.sync_from_db(self.engine, overlap_days=5)
+
+        panel = self.cube.panel('close')
+        self.assertEqual(panel.loc[dates[0], 'a'], 0.5)
+        self.assertEqual(panel.loc[dates[-1], 'a'], 0.5 * 30)
+        self.assertEqual(panel.loc[dates[0], 'b'], 2.0)
+
+    def test_unchanged_overlap_does_not_reload(self):
+        self._write({'a': 1.0})
+        self.cube.sync_from_db(self.engine)
+        df = pd.read_sql('SELECT * FROM sector_daily_prices', self.engine)
+        self.assertEqual(self.cube.changed_symbols(df), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+测试 R2 并行上传、内容哈希跳过与清单（本地目录模拟 S3）
+"""
+import sys
+import os
+import json
+import tempfile
+import unittest
+
+sys.path.insert(0, '.')
+
+from app.sync.r2_manager import R2Manager, file_sha256
+from app.sync.local_object_store import LocalObjectStore
+
+
+class TestR2Manager(unittest.TestCase):
+    """上传、跳过与清单对象"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = LocalObjectStore(os.path.join(self.tmp_dir.name, 'r2'))
+        self.manager = R2Manager(bucket_name='bucket', s3_client=self.store, max_workers=4)
+        self.files = []
+        for i in range(6):
+            path = os.path.join(self.tmp_dir.name, f'part-{i}.csv.gz')
+            with open(path, 'wb') as f:
+                f.write(f'payload {i}'.encode() * 100)
+            self.files.append(path)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_unchanged_files_are_skipped(self):
+        manifest = self.manager.sync_files(self.files, prefix='delta/prices')
+        self.assertEqual(manifest['uploaded'], 6)
+        self.assertEqual([r['key'] for r in manifest['files']], [f'delta/prices/part-{i}.csv.gz' for i in range(6)])
+        head = self.store.head_object(Bucket='bucket', Key='delta/prices/part-0.csv.gz')
+        self.assertEqual(head['Metadata']['sha256'], file_sha256(self.files[0]))
+
+        with open(self.files[2], 'ab') as f:
+            f.write(b'changed')
+        manifest = self.manager.sync_files(self.files, prefix='delta/prices')
+        self.assertEqual((manifest['uploaded'], manifest['skipped']), (1, 5))
+        self.assertEqual(manifest['changed'], ['delta/prices/part-2.csv.gz'])
+
+        # 清单对象记录本次变化
+        body = self.store.get_object(Bucket='bucket', Key=manifest['manifest_key'])['Body'].read()
+        self.assertEqual(json.loads(body)['changed'], ['delta/prices/part-2.csv.gz'])
+        self.assertEqual(len(self.manager.list_objects('delta/prices/_manifests/')), 2)
+
+    def test_failures_are_reported(self):
+        missing = os.path.join(self.tmp_dir.name, 'missing.csv.gz')
+        urls = self.manager.upload_files(self.files[:2] + [missing])
+        self.assertEqual(len(urls), 2)
+        self.assertTrue(urls[0].endswith('/bucket/part-0.csv.gz'))
+
+        manifest = self.manager.sync_files([missing], write_manifest=False)
+        self.assertEqual(manifest['failed'], 1)
+        self.assertIsNone(manifest['manifest_key'])
+
+    def test_upload_file_returns_url(self):
+        url = self.manager.upload_file(self.files[0], key='a/b.csv.gz')
+        self.assertEqual(url, f"file://{self.store.root}/bucket/a/b.csv.gz")
+        self.assertTrue(os.path.exists(os.path.join(self.store.root, 'bucket', 'a', 'b.csv.gz')))
+
+
+if __name__ == '__main__':
+    unittest.main()
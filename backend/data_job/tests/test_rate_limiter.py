@@ -0,0 +1,118 @@
+"""
+测试 TokenBucket 令牌桶限流器
+"""
+import sys
+import time
+import threading
+import unittest
+
+sys.path.insert(0, '.')
+
+from data_job.core.deadline import ConnectionTimeout, run_with_timeout
+from data_job.core.rate_limiter import TokenBucket, get_host_limiter, get_host_slots
+
+
+class TestTokenBucket(unittest.TestCase):
+    """测试令牌桶限流"""
+
+    def test_burst_then_throttle(self):
+        """测试突发容量用尽后开始限流"""
+        bucket = TokenBucket(rate=20, capacity=2)
+
+        self.assertTrue(bucket.try_acquire())
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+
+        start = time.monotonic()
+        self.assertTrue(bucket.acquire())
+        self.assertGreaterEqual(time.monotonic() - start, 0.03)
+
+    def test_acquire_timeout(self):
+        """测试超时返回 False"""
+        bucket = TokenBucket(rate=1, capacity=1)
+        bucket.acquire()
+        self.assertFalse(bucket.acquire(timeout=0.05))
+
+    def test_shared_across_threads(self):
+        """测试多线程共享时总速率受限"""
+        bucket = TokenBucket(rate=50, capacity=1)
+        acquired = []
+
+        def worker():
+            for _ in range(5):
+                bucket.acquire()
+                acquired.append(time.monotonic())
+
+        start = time.monotonic()
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # 20 个令牌，初始 1 个，其余按 50/秒补充 → 至少约 0.38 秒
+        self.assertEqual(len(acquired), 20)
+        self.assertGreaterEqual(time.monotonic() - start, 0.3)
+
+    def test_host_limiter_is_shared(self):
+        """测试同一主机返回同一个限流器"""
+        self.assertIs(get_host_limiter("push2his.eastmoney.com"),
+                      get_host_limiter("push2his.eastmoney.com"))
+
+    def test_invalid_rate(self):
+        """测试非法速率"""
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0)
+
+
+class TestCallSlots(unittest.TestCase):
+    """测试调用槽：超时挂起的调用持续占槽，在途线程数不超过槽数"""
+
+    def test_hung_calls_do_not_exceed_cap(self):
+        slots = threading.BoundedSemaphore(2)
+        release = threading.Event()
+        lock = threading.Lock()
+        state = {"live": 0, "peak": 0, "started": 0}
+
+        def hung():
+            with lock:
+                state["live"] += 1
+                state["started"] += 1
+                state["peak"] = max(state["peak"], state["live"])
+            release.wait(5)
+            with lock:
+                state["live"] -= 1
+            return "late"
+
+        errors = []
+
+        def caller():
+            try:
+                run_with_timeout(hung, 0.1, slots=slots)
+            except ConnectionTimeout as e:
+                errors.append(e)
+
+        callers = [threading.Thread(target=caller) for _ in range(6)]
+        for t in callers:
+            t.start()
+        for t in callers:
+            t.join()
+
+        # 全部超时，但只有 2 个调用真正启动（其余在等待空闲槽时超时）
+        self.assertEqual(len(errors), 6)
+        self.assertEqual(state["started"], 2)
+        self.assertEqual(state["peak"], 2)
+
+        # 挂起的调用结束后归还调用槽
+        release.set()
+        self.assertEqual(run_with_timeout(lambda: "ok", 2, slots=slots), "ok")
+        self.assertEqual(state["live"], 0)
+
+    def test_host_slots_are_shared(self):
+        """测试同一主机返回同一组调用槽"""
+        self.assertIs(get_host_slots("push2his.eastmoney.com"), get_host_slots("push2his.eastmoney.com"))
+        self.assertIs(get_host_slots(), get_host_slots(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+测试滚动窗口内核与原实现一致
+（rolling().apply(python函数)、rolling().sum()、逐日调用 calc_dynamic_drawdown；含 NaN、并列值、窗口长于序列）
+"""
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, '.')
+
+from quant_engine.core.rolling_kernels import (
+    bars_since_high, bars_since_low, rolling_count, rolling_every, rolling_drawdown
+)
+from quant_engine.core.tdx_lib import calc_dynamic_drawdown
+
+
+# ================= 原实现（参照） =================
+
+def ref_hhvbars(series, n):
+    return series.rolling(n).apply(lambda x: len(x) - 1 - np.argmax(x), raw=True).to_numpy()
+
+
+def ref_llvbars(series, n):
+    return series.rolling(n).apply(lambda x: len(x) - 1 - np.argmin(x), raw=True).to_numpy()
+
+
+def ref_count(condition, n):
+    return condition.rolling(n).sum().to_numpy()
+
+
+def ref_every(condition, n):
+    return (condition.rolling(n).sum() == n).to_numpy()
+
+
+def ref_drawdown(high, low, window):
+    return np.array([
+        calc_dynamic_drawdown(high.iloc[:i + 1], low.iloc[:i + 1], window) for i in range(len(high))
+    ])
+
+
+def random_case(rng, length, nan_ratio=0.0):
+    """价格取整以制造大量并列值，可按比例在收盘价中插入 NaN"""
+    close = np.round(10 + np.cumsum(rng.normal(0, 0.3, length)), 1)
+    high = close + np.round(np.abs(rng.normal(0, 0.2, length)), 1)
+    low = close - np.round(np.abs(rng.normal(0, 0.2, length)), 1)
+    if nan_ratio:
+        close[rng.random(length) < nan_ratio] = np.nan
+    return pd.Series(close), pd.Series(high), pd.Series(low)
+
+
+class TestRollingKernels(unittest.TestCase):
+    """HHVBARS / LLVBARS / COUNT / EVERY / DRAWDOWN"""
+
+    def assert_same(self, expected, actual, label):
+        np.testing.assert_array_equal(np.asarray(actual, dtype=float), np.asarray(expected, dtype=float), label)
+
+    def check(self, close, high, low, n):
+        label = f"长度 {len(close)}, 窗口 {n}"
+        condition = close > close.shift(1)
+        self.assert_same(ref_hhvbars(close, n), bars_since_high(close, n), f"HHVBARS {label}")
+        self.assert_same(ref_llvbars(close, n), bars_since_low(close, n), f"LLVBARS {label}")
+        self.assert_same(ref_count(condition, n), rolling_count(condition, n), f"COUNT {label}")
+        self.assert_same(ref_every(condition, n), rolling_every(condition, n), f"EVERY {label}")
+        self.assert_same(ref_drawdown(high, low, n), rolling_drawdown(high, low, n), f"DRAWDOWN {label}")
+
+    def test_random_series(self):
+        rng = np.random.default_rng(0)
+        for _ in range(60):
+            size = int(rng.integers(1, 200))
+            close, high, low = random_case(rng, size, nan_ratio=0.03 if rng.random() < 0.3 else 0.0)
+            self.check(close, high, low, int(rng.integers(1, 60)))
+
+    def test_ties_take_earliest(self):
+        close = pd.Series([1.0, 3.0, 3.0, 2.0, 3.0, 1.0, 1.0])
+        self.check(close, close + 0.5, close - 0.5, 3)
+        # 窗口 [3, 3, 2] 的最高点是第一个 3
+        self.assertEqual(bars_since_high(close, 3)[3], 2)
+        self.assertEqual(bars_since_low(close, 3)[6], 1)
+
+    def test_nan_in_window(self):
+        close = pd.Series([1.0, 2.0, np.nan, 4.0, 5.0, 6.0, 2.0])
+        # 原实现的回撤不处理 NaN（np.argmax 视 NaN 为最大），最高/最低价不含 NaN
+        high = close.fillna(3.0) + 1
+        self.check(close, high, high - 2, 3)
+        self.assertTrue(np.isnan(bars_since_high(close, 3)[4]))
+        self.assertEqual(bars_since_high(close, 3)[5], 0)
+        self.assertTrue(np.isnan(rolling_count(close > 1, 3)[1]))
+
+    def test_window_longer_than_series(self):
+        rng = np.random.default_rng(1)
+        close, high, low = random_case(rng, 8)
+        self.check(close, high, low, 20)
+        self.assertTrue(np.isnan(bars_since_high(close, 20)).all())
+        self.assertTrue(np.isnan(rolling_count(close > 10, 20)).all())
+        # 回撤按已有数据计算，最后一个值与 calc_dynamic_drawdown 一致
+        self.assertEqual(rolling_drawdown(high, low, 20)[-1], calc_dynamic_drawdown(high, low, 20))
+
+    def test_panel_columns_match_single_series(self):
+        rng = np.random.default_rng(2)
+        cases = [random_case(rng, 50, nan_ratio=0.05) for _ in range(4)]
+        close = np.column_stack([c for c, _, _ in cases])
+        high = np.column_stack([h for _, h, _ in cases])
+        low = np.column_stack([l for _, _, l in cases])
+
+        for j, (c, h, l) in enumerate(cases):
+            self.assert_same(bars_since_high(c, 7), bars_since_high(close, 7)[:, j], f"HHVBARS 列 {j}")
+            self.assert_same(rolling_drawdown(h, l, 7), rolling_drawdown(high, low, 7)[:, j], f"DRAWDOWN 列 {j}")
+
+
+if __name__ == '__main__':
+    unittest.main()
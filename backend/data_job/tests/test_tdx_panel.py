@@ -0,0 +1,79 @@
+"""
+测试 TdxPanel（全池一次计算）与逐只 TdxFuncs 结果一致（交易日历错位、停牌缺口、K线数不同）
+"""
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, '.')
+
+from quant_engine.core.tdx_lib import TdxFuncs, TdxPanel
+
+
+class TestTdxPanelParity(unittest.TestCase):
+    """按K线序号对齐（align='bar'）时每列与逐只计算逐位相同"""
+
+    def setUp(self):
+        rng = np.random.default_rng(5)
+        calendar = pd.bdate_range('2024-01-01', periods=80)
+        spans = {
+            'A': calendar,                                           # 完整
+            'B': calendar[20:],                                      # 晚上市
+            'C': calendar[:60],                                      # 提前停止
+            'D': calendar.delete(list(range(30, 45))),               # 中间长停牌
+            'E': calendar[::3],                                      # 隔日交易，日历与其他标的错位
+            'F': calendar[-4:],                                      # K线少于窗口
+        }
+        frames = []
+        for symbol, dates in spans.items():
+            # 取整制造并列值
+            close = np.round(10 + np.cumsum(rng.normal(0, 0.3, len(dates))), 1)
+            frames.append(pd.DataFrame({
+                'symbol': symbol, 'trade_date': dates, 'close': close,
+                'open': close, 'high': close + 0.2, 'low': close - 0.2,
+                'volume': rng.uniform(1e5, 1e6, len(dates)),
+            }))
+        # 乱序输入
+        self.df = pd.concat(frames, ignore_index=True).sample(frac=1, random_state=0)
+        self.panel = TdxPanel(self.df)
+
+    @staticmethod
+    def formulas(T):
+        """同一组公式分别作用在 TdxFuncs（Series）与 TdxPanel（DataFrame）上"""
+        C = T.C
+        up = C > T.REF(C, 1)
+        above = C >= T.MA(C, 3)
+        return {
+            'REF': T.REF(C, 2),
+            'HHV': T.HHV(T.H, 5),
+            'LLV': T.LLV(T.L, 5),
+            'MA': T.MA(C, 5),
+            'COUNT': T.COUNT(up, 4),
+            'EVERY': T.EVERY(above, 3),
+            'HHVBARS': T.HHVBARS(C, 6),
+            'LLVBARS': T.LLVBARS(C, 6),
+            'HHV_LONG': T.HHV(C, 50),
+            'COUNT_LONG': T.COUNT(up, 50),
+        }
+
+    def test_matches_per_symbol(self):
+        panel_results = self.formulas(self.panel)
+        for symbol, group in self.df.groupby('symbol'):
+            group = group.sort_values('trade_date').reset_index(drop=True)
+            single_results = self.formulas(TdxFuncs(group))
+            bars = len(group)
+            for name, expected in single_results.items():
+                # 右对齐：该标的的K线占面板最后 bars 行
+                actual = panel_results[name][symbol].iloc[-bars:].to_numpy(dtype=float)
+                np.testing.assert_array_equal(actual, expected.to_numpy(dtype=float), f"{name} {symbol}")
+
+    def test_last_row_is_latest_bar(self):
+        last = self.panel.last(self.panel.C)
+        latest = self.df.sort_values('trade_date').groupby('symbol')['close'].last()
+        pd.testing.assert_series_equal(last.sort_index(), latest.sort_index(), check_names=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
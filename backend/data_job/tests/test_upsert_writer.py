@@ -0,0 +1,104 @@
+"""
+测试 UpsertWriter 批量写入
+"""
+import sys
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, '.')
+
+from data_job.core.upsert_writer import UpsertWriter
+
+
+class TestUpsertWriter(unittest.TestCase):
+    """测试 UpsertWriter 的三种写入路径"""
+
+    def setUp(self):
+        """测试前准备：临时 SQLite 数据库"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.tmp_dir.name, "test.db")
+        self.engine = create_engine(f"sqlite:///{db_path}")
+        with self.engine.begin() as conn:
+            conn.execute(text("""
+                CREATE TABLE prices (
+                    symbol VARCHAR(20),
+                    trade_date DATE,
+                    close FLOAT,
+                    PRIMARY KEY (symbol, trade_date)
+                )
+            """))
+            conn.execute(text("CREATE TABLE no_pk (symbol VARCHAR(20), trade_date DATE, close FLOAT)"))
+
+        self.writer = UpsertWriter(self.engine, batch_size=2, staging_threshold=100)
+
+    def tearDown(self):
+        """测试后清理"""
+        self.engine.dispose()
+        self.tmp_dir.cleanup()
+
+    def _make_df(self, closes):
+        return pd.DataFrame({
+            'symbol': ['000001', '000001', '000002'],
+            'trade_date': pd.to_datetime(['2024-01-02', '2024-01-03', '2024-01-02']).date,
+            'close': closes,
+        })
+
+    def _read(self, table):
+        with self.engine.connect() as conn:
+            return pd.read_sql(text(f"SELECT * FROM {table} ORDER BY symbol, trade_date"), conn)
+
+    def test_upsert_updates_existing_rows(self):
+        """测试 ON CONFLICT 更新已有数据"""
+        self.writer.upsert(self._make_df([1.0, 2.0, 3.0]), 'prices', ['symbol', 'trade_date'])
+        self.writer.upsert(self._make_df([1.5, 2.5, None]), 'prices', ['symbol', 'trade_date'])
+
+        result = self._read('prices')
+        self.assertEqual(len(result), 3)
+        self.assertEqual(result['close'].iloc[0], 1.5)
+        self.assertTrue(pd.isna(result['close'].iloc[2]))
+
+    def test_staged_merge_matches_direct_upsert(self):
+        """测试大批量临时表合并路径"""
+        self.writer.staging_threshold = 1
+        self.writer.upsert(self._make_df([1.0, 2.0, 3.0]), 'prices', ['symbol', 'trade_date'])
+        self.writer.upsert(self._make_df([4.0, 5.0, 6.0]), 'prices', ['symbol', 'trade_date'])
+
+        result = self._read('prices')
+        self.assertEqual(result['close'].tolist(), [4.0, 5.0, 6.0])
+        self.assertEqual(self.writer.stats['staged_merges'], 2)
+
+    def test_table_without_constraint(self):
+        """测试无主键表走 DELETE + INSERT 替换路径"""
+        self.writer.upsert(self._make_df([1.0, 2.0, 3.0]), 'no_pk', ['symbol', 'trade_date'])
+        self.writer.upsert(self._make_df([7.0, 8.0, 9.0]), 'no_pk', ['symbol', 'trade_date'])
+
+        result = self._read('no_pk')
+        self.assertEqual(result['close'].tolist(), [7.0, 8.0, 9.0])
+
+    def test_duplicate_keys_in_batch(self):
+        """测试同一批次内重复主键保留最后一条"""
+        df = pd.DataFrame({
+            'symbol': ['000001', '000001'],
+            'trade_date': pd.to_datetime(['2024-01-02', '2024-01-02']).date,
+            'close': [1.0, 2.0],
+        })
+        count = self.writer.upsert(df, 'prices', ['symbol', 'trade_date'])
+
+        self.assertEqual(count, 1)
+        self.assertEqual(self._read('prices')['close'].tolist(), [2.0])
+
+    def test_insert_and_stats(self):
+        """测试纯追加写入和速度统计"""
+        self.writer.insert(self._make_df([1.0, 2.0, 3.0]), 'no_pk')
+
+        self.assertEqual(len(self._read('no_pk')), 3)
+        self.assertEqual(self.writer.stats['rows'], 3)
+        self.assertGreater(self.writer.rows_per_sec, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+测试向量化回测引擎与绩效指标（手工可算的小面板）
+"""
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, '.')
+
+from quant_engine.backtest.metrics import TRADING_DAYS_PER_YEAR, compute_metrics, max_drawdown
+from quant_engine.backtest.vector_engine import BacktestRules, VectorBacktester
+
+DATES = pd.bdate_range('2024-01-01', periods=6)
+
+
+def panel(values: dict) -> pd.DataFrame:
+    return pd.DataFrame(values, index=DATES, dtype=float)
+
+
+def signals(*rows) -> pd.DataFrame:
+    return pd.DataFrame([(symbol, DATES[day]) for symbol, day in rows], columns=['symbol', 'trade_date'])
+
+
+def rules(**kwargs) -> BacktestRules:
+    params = dict(stop_loss=None, max_hold_days=2, buy_fee=0.0, sell_fee=0.0)
+    params.update(kwargs)
+    return BacktestRules(**params)
+
+
+class TestVectorBacktester(unittest.TestCase):
+    """入场、出场、止损、停牌、重叠信号与仓位上限"""
+
+    def setUp(self):
+        self.open = panel({'A': [10.0] * 6, 'B': [20.0] * 6})
+        self.close = panel({'A': [10, 11, 12, 13, 14, 15], 'B': [20.0] * 6})
+
+    def _run(self, sig, **kwargs):
+        return VectorBacktester(self.open, self.close, rules(**kwargs)).run(sig)
+
+    def test_enters_at_next_open_and_exits_after_hold_days(self):
+        result = self._run(signals(('A', 0)))
+
+        trade = result.trades.iloc[0]
+        self.assertEqual(trade['entry_date'], DATES[1])
+        self.assertEqual(trade['exit_date'], DATES[2])
+        self.assertEqual(trade['entry_price'], 10.0)
+        self.assertEqual(trade['exit_price'], 12.0)
+        self.assertEqual(trade['hold_days'], 2)
+        self.assertAlmostEqual(trade['return'], 0.2)
+        np.testing.assert_allclose(result.returns.to_numpy(), [0, 0.1, 12 / 11 - 1, 0, 0, 0])
+        self.assertAlmostEqual(result.metrics['total_return'], 0.2)
+
+    def test_signal_skipped_when_entry_day_suspended(self):
+        self.open.loc[DATES[1], 'A'] = np.nan
+        self.close.loc[DATES[1], 'A'] = np.nan
+
+        result = self._run(signals(('A', 0), ('A', 1)))
+        self.assertEqual(len(result.trades), 1)
+        self.assertEqual(result.trades.iloc[0]['entry_date'], DATES[2])
+
+    def test_stop_loss_exits_on_first_breach(self):
+        self.close['A'] = [10, 9.5, 9.1, 8.0, 12, 12]
+
+        result = self._run(signals(('A', 0)), stop_loss=0.08, max_hold_days=5)
+        trade = result.trades.iloc[0]
+        # 止损线 9.2：第一次收盘跌破在 DATES[2]
+        self.assertEqual(trade['exit_date'], DATES[2])
+        self.assertEqual(trade['exit_price'], 9.1)
+        self.assertAlmostEqual(trade['return'], -0.09)
+        self.assertEqual(result.positions.loc[DATES[3], 'A'], 0.0)
+
+    def test_suspended_exit_rolls_forward(self):
+        self.open.loc[DATES[2], 'A'] = np.nan
+        self.close.loc[DATES[2], 'A'] = np.nan
+
+        result = self._run(signals(('A', 0)))
+        trade = result.trades.iloc[0]
+        self.assertEqual(trade['exit_date'], DATES[3])
+        self.assertEqual(trade['exit_price'], 13.0)
+        self.assertEqual(trade['hold_days'], 3)
+        # 停牌日收益为 0，复牌日按 收盘 / 停牌前收盘
+        np.testing.assert_allclose(result.returns.to_numpy()[1:4], [0.1, 0.0, 13 / 11 - 1])
+
+    def test_overlapping_signals_are_ignored(self):
+        result = self._run(signals(('A', 0), ('A', 1), ('A', 3)), max_hold_days=3)
+
+        self.assertEqual(list(result.trades['entry_date']), [DATES[1], DATES[4]])
+        self.assertEqual(result.metrics['trade_count'], 2)
+
+    def test_max_positions_caps_weight(self):
+        sig = signals(('A', 0), ('B', 0))
+
+        full = self._run(sig)
+        self.assertEqual(list(full.positions.loc[DATES[1]]), [0.5, 0.5])
+
+        capped = self._run(sig, max_positions=4)
+        self.assertEqual(list(capped.positions.loc[DATES[1]]), [0.25, 0.25])
+        # 剩余资金空仓：组合收益 = 0.25 × A 的收益
+        self.assertAlmostEqual(capped.returns[DATES[1]], 0.25 * 0.1)
+        self.assertEqual(capped.positions.loc[DATES[3]].sum(), 0.0)
+
+    def test_fees(self):
+        self.close['A'] = 10.0
+
+        result = self._run(signals(('A', 0)), buy_fee=0.001, sell_fee=0.002)
+        np.testing.assert_allclose(result.returns.to_numpy(), [0, -0.001, -0.002, 0, 0, 0])
+        self.assertAlmostEqual(result.trades.iloc[0]['return'], 0.998 / 1.001 - 1)
+
+        # 当日入场当日出场：买卖费用同一天扣除
+        same_day = self._run(signals(('A', 0)), max_hold_days=1, buy_fee=0.001, sell_fee=0.002)
+        self.assertAlmostEqual(same_day.returns[DATES[1]], -0.003)
+
+
+class TestMetrics(unittest.TestCase):
+    """绩效指标"""
+
+    def test_compute_metrics(self):
+        returns = pd.Series([0.1, -0.1, 0.05], index=DATES[:3])
+        metrics = compute_metrics(returns, np.array([0.1, -0.05, 0.0]))
+
+        self.assertAlmostEqual(metrics['total_return'], 1.1 * 0.9 * 1.05 - 1)
+        self.assertAlmostEqual(metrics['annual_return'], (1.1 * 0.9 * 1.05) ** (TRADING_DAYS_PER_YEAR / 3) - 1)
+        self.assertAlmostEqual(metrics['max_drawdown'], 0.1)
+        daily = np.array([0.1, -0.1, 0.05])
+        self.assertAlmostEqual(metrics['sharpe'], daily.mean() / daily.std(ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR))
+        self.assertAlmostEqual(metrics['win_rate'], 1 / 3)
+        self.assertEqual(metrics['trade_count'], 3)
+        self.assertEqual(metrics['start_date'], '2024-01-01')
+        self.assertEqual(metrics['end_date'], '2024-01-03')
+
+    def test_drawdown_counts_initial_capital_as_peak(self):
+        self.assertAlmostEqual(max_drawdown(np.array([0.9, 0.95, 1.2, 0.96])), 0.2)
+
+    def test_empty(self):
+        metrics = compute_metrics(pd.Series([], dtype=float, index=pd.DatetimeIndex([])), np.array([]))
+        self.assertEqual(metrics['total_return'], 0.0)
+        self.assertEqual(metrics['sharpe'], 0.0)
+        self.assertEqual(metrics['trade_count'], 0)
+        self.assertIsNone(metrics['start_date'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+测试 WatermarkStore 采集水位
+"""
+import sys
+import unittest
+from datetime import date
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, '.')
+
+from data_job.core.watermark_store import WatermarkStore
+
+
+class TestWatermarkStore(unittest.TestCase):
+    """测试水位推进、读取与回填"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.engine = create_engine("sqlite://")
+        self.store = WatermarkStore()
+
+    def tearDown(self):
+        """测试后清理"""
+        self.engine.dispose()
+
+    def test_advance_and_load(self):
+        """测试推进后可读取每个标的的最后日期"""
+        df = pd.DataFrame({
+            'symbol': ['000001', '000001', '600000'],
+            'trade_date': ['2024-01-02', '2024-01-03', '2024-01-02'],
+        })
+        with self.engine.begin() as conn:
+            self.assertEqual(self.store.advance(conn, 'stock_daily_prices', df, 'symbol', 'trade_date'), 2)
+
+        marks = self.store.load(self.engine, 'stock_daily_prices')
+        self.assertEqual(marks, {'000001': date(2024, 1, 3), '600000': date(2024, 1, 2)})
+        self.assertEqual(self.store.load(self.engine, 'other_table'), {})
+
+    def test_never_moves_backwards(self):
+        """测试回补历史数据时水位不后退"""
+        with self.engine.begin() as conn:
+            self.store.advance(conn, 't', pd.DataFrame({'symbol': ['a'], 'trade_date': ['2024-03-01']}),
+                               'symbol', 'trade_date')
+            self.store.advance(conn, 't', pd.DataFrame({'symbol': ['a'], 'trade_date': ['2023-01-01']}),
+                               'symbol', 'trade_date')
+
+        self.assertEqual(self.store.load(self.engine, 't'), {'a': date(2024, 3, 1)})
+
+    def test_rolled_back_with_data(self):
+        """测试水位与数据同事务回滚"""
+        df = pd.DataFrame({'symbol': ['a'], 'trade_date': ['2024-03-01']})
+        with self.assertRaises(RuntimeError):
+            with self.engine.begin() as conn:
+                self.store.advance(conn, 't', df, 'symbol', 'trade_date')
+                raise RuntimeError("写入失败")
+
+        self.assertEqual(self.store.load(self.engine, 't'), {})
+
+    def test_bootstrap_from_source(self):
+        """测试首次运行从源表回填"""
+        pd.DataFrame({
+            'sector_name': ['银行', '银行', '半导体'],
+            'trade_date': ['2024-01-02', '2024-01-05', '2024-01-04'],
+        }).to_sql('sector_daily_prices', self.engine, index=False)
+
+        marks = self.store.load_or_bootstrap(self.engine, 'sector_daily_prices', 'sector_name', 'trade_date')
+        self.assertEqual(marks, {'银行': date(2024, 1, 5), '半导体': date(2024, 1, 4)})
+
+        # 已有水位时不再扫描源表
+        with self.engine.begin() as conn:
+            conn.execute(text("DELETE FROM sector_daily_prices"))
+        self.assertEqual(self.store.bootstrap(self.engine, 'sector_daily_prices', 'sector_name', 'trade_date'), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -18,33 +18,33 @@ setup_network_emergency_kit()
 # Logger配置
 logger = setup_logger(__name__)
 
-# 导入所有采集器
-from data_job.collectors import (
-    StockSectorListCollector,
-    ETFInfoCollector,
-    StockValuationCollector,
-    MacroDataCollector,
-    FinanceSummaryCollector,
-    FundHoldingsCollector,
-    NorthboundHoldingsCollector,
-    StockKlineCollector,
-    SectorKlineCollector,
-    ETFKlineCollector,
-    NewsCollector,
-    LimitBoardsCollector,
-)
+from data_job.core.dag_executor import DagExecutor
+from data_job.core.collection_graph import build_collection_graph
 
+# 全量采集阶段（依赖关系见 data_job.core.collection_graph）
+ALL_STAGES = [
+    'StockSectorList', 'ETFInfo',
+    'StockValuation', 'MacroData',
+    'FinanceSummary', 'FundHoldings',
+    'NorthboundHoldings',
+    'StockKline', 'SectorKline', 'ETFKline',
+    'News', 'LimitBoards',
+]
 
-def run_all_collectors():
+# 每日增量阶段（不重采股票 / ETF 列表，直接使用库中已有数据）
+DAILY_STAGES = ['StockValuation', 'MacroData', 'StockKline', 'SectorKline', 'ETFKline', 'News', 'LimitBoards']
+DAILY_RUN_KWARGS = {'News': {'days': 1}, 'LimitBoards': {'days': 1}}
+
+
+def run_all_collectors(max_workers=None):
     """
     运行所有数据采集器
 
-    执行顺序（按依赖关系）：
-    1. 基础数据：StockSectorList, ETFInfo
-    2. 市场数据：StockValuation, MacroData
-    3. 财务数据：FinanceSummary, CapitalFlow
-    4. K线数据：StockKline, SectorKline, ETFKline
-    5. 舆情数据：News, LimitBoards
+    按依赖图并行执行（max_workers 为最大并行数，默认 CollectorConfig.DAG_MAX_WORKERS）：
+    - StockSectorList -> StockKline / SectorKline / NorthboundHoldings
+    - ETFInfo -> ETFKline
+    - 估值、宏观、财务、基金持仓、新闻、连板互不依赖，与上述链并行
+    北向资金持股（约3-4小时）是关键路径，最先启动；Ctrl+C 不再启动新阶段并等待运行中的阶段结束
     """
 
     logger.info("=" * 80)
@@ -52,143 +52,10 @@ def run_all_collectors():
     logger.info(f"📅 开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     logger.info("=" * 80)
 
-    results = {
-        'success': [],
-        'failed': [],
-        'total': 0
-    }
-
-    # ==================== Step 1: 基础数据 ====================
-    logger.info("\n" + "=" * 80)
-    logger.info("📋 Step 1/5: 采集基础数据")
-    logger.info("=" * 80)
-
-    collectors_step1 = [
-        ('StockSectorList', StockSectorListCollector()),
-        ('ETFInfo', ETFInfoCollector()),
-    ]
-
-    for name, collector in collectors_step1:
-        results['total'] += 1
-        try:
-            logger.info(f"\n▶️  正在运行: {name}")
-            collector.run()
-            results['success'].append(name)
-            logger.info(f"✅ {name} 完成")
-        except Exception as e:
-            results['failed'].append((name, str(e)))
-            logger.error(f"❌ {name} 失败: {e}")
-
-    # ==================== Step 2: 市场数据 ====================
-    logger.info("\n" + "=" * 80)
-    logger.info("📊 Step 2/5: 采集市场数据")
-    logger.info("=" * 80)
-
-    collectors_step2 = [
-        ('StockValuation', StockValuationCollector()),
-        ('MacroData', MacroDataCollector()),
-    ]
-
-    for name, collector in collectors_step2:
-        results['total'] += 1
-        try:
-            logger.info(f"\n▶️  正在运行: {name}")
-            collector.run()
-            results['success'].append(name)
-            logger.info(f"✅ {name} 完成")
-        except Exception as e:
-            results['failed'].append((name, str(e)))
-            logger.error(f"❌ {name} 失败: {e}")
-
-    # ==================== Step 3: 财务数据 ====================
-    logger.info("\n" + "=" * 80)
-    logger.info("💰 Step 3/5: 采集财务数据")
-    logger.info("=" * 80)
-
-    collectors_step3 = [
-        ('FinanceSummary', FinanceSummaryCollector()),
-        ('FundHoldings', FundHoldingsCollector()),
-    ]
-
-    for name, collector in collectors_step3:
-        results['total'] += 1
-        try:
-            logger.info(f"\n▶️  正在运行: {name}")
-            collector.run()
-            results['success'].append(name)
-            logger.info(f"✅ {name} 完成")
-        except Exception as e:
-            results['failed'].append((name, str(e)))
-            logger.error(f"❌ {name} 失败: {e}")
-
-    # ==================== Step 3.5: 长时间运行任务 ====================
-    logger.info("\n" + "=" * 80)
-    logger.info("⏰ Step 3.5/5: 长时间运行任务（可选）")
-    logger.info("⚠️  注意：北向资金持股采集需要约3-4小时，采集5800只股票")
-    logger.info("💡 提示：如需跳过，请按 Ctrl+C 中断")
-    logger.info("=" * 80)
-
-    collectors_step3_5 = [
-        ('NorthboundHoldings', NorthboundHoldingsCollector()),
-    ]
-
-    for name, collector in collectors_step3_5:
-        results['total'] += 1
-        try:
-            logger.info(f"\n▶️  正在运行: {name}")
-            # 北向资金采集需要特殊参数
-            collector.run(collect_all_stocks=True)
-            results['success'].append(name)
-            logger.info(f"✅ {name} 完成")
-        except KeyboardInterrupt:
-            logger.warning(f"⚠️  用户中断 {name}")
-            results['failed'].append((name, '用户中断'))
-        except Exception as e:
-            results['failed'].append((name, str(e)))
-            logger.error(f"❌ {name} 失败: {e}")
-
-    # ==================== Step 4: K线数据 ====================
-    logger.info("\n" + "=" * 80)
-    logger.info("📈 Step 4/6: 采集K线数据（耗时较长）")
-    logger.info("=" * 80)
-
-    collectors_step4 = [
-        ('StockKline', StockKlineCollector()),
-        ('SectorKline', SectorKlineCollector()),
-        ('ETFKline', ETFKlineCollector()),
-    ]
-
-    for name, collector in collectors_step4:
-        results['total'] += 1
-        try:
-            logger.info(f"\n▶️  正在运行: {name}")
-            collector.run()
-            results['success'].append(name)
-            logger.info(f"✅ {name} 完成")
-        except Exception as e:
-            results['failed'].append((name, str(e)))
-            logger.error(f"❌ {name} 失败: {e}")
-
-    # ==================== Step 5: 舆情数据 ====================
-    logger.info("\n" + "=" * 80)
-    logger.info("📰 Step 5/6: 采集舆情数据")
-    logger.info("=" * 80)
-
-    collectors_step5 = [
-        ('News', NewsCollector()),
-        ('LimitBoards', LimitBoardsCollector()),
-    ]
-
-    for name, collector in collectors_step5:
-        results['total'] += 1
-        try:
-            logger.info(f"\n▶️  正在运行: {name}")
-            collector.run()
-            results['success'].append(name)
-            logger.info(f"✅ {name} 完成")
-        except Exception as e:
-            results['failed'].append((name, str(e)))
-            logger.error(f"❌ {name} 失败: {e}")
+    executor = DagExecutor(build_collection_graph(ALL_STAGES), max_workers=max_workers, logger=logger)
+    executor.run()
+    executor.log_summary("采集阶段图执行完成")
+    results = executor.summary()
 
     # ==================== 总结报告 ====================
     logger.info("\n" + "=" * 80)
@@ -214,35 +81,21 @@ def run_all_collectors():
     return results
 
 
-def run_daily_update():
+def run_daily_update(max_workers=None):
     """
     运行每日更新任务（仅更新增量数据）
     适合定时任务调用
     """
     logger.info("🔄 运行每日数据更新...")
 
-    # 只运行需要每日更新的采集器
-    daily_collectors = [
-        ('StockValuation', StockValuationCollector()),
-        ('MacroData', MacroDataCollector()),
-        ('StockKline', StockKlineCollector()),
-        ('SectorKline', SectorKlineCollector()),
-        ('ETFKline', ETFKlineCollector()),
-        ('News', NewsCollector(days=1)),
-        ('LimitBoards', LimitBoardsCollector(days=1)),
-    ]
-
-    success_count = 0
-    for name, collector in daily_collectors:
-        try:
-            logger.info(f"▶️  {name}")
-            collector.run()
-            success_count += 1
-        except Exception as e:
-            logger.error(f"❌ {name}: {e}")
+    # 只运行需要每日更新的采集器；新闻 / 连板只补最近1天
+    executor = DagExecutor(build_collection_graph(DAILY_STAGES, DAILY_RUN_KWARGS),
+                           max_workers=max_workers, logger=logger)
+    results = executor.run()
+    success_count = sum(1 for r in results.values() if r.success)
 
-    logger.info(f"✅ 每日更新完成: {success_count}/{len(daily_collectors)}")
-    return success_count == len(daily_collectors)
+    logger.info(f"✅ 每日更新完成: {success_count}/{len(results)}")
+    return success_count == len(results)
 
 
 if __name__ == "__main__":
@@ -255,10 +108,11 @@ if __name__ == "__main__":
         default='all',
         help='运行模式: all=全量采集, daily=每日增量更新'
     )
+    parser.add_argument('--workers', type=int, default=None, help='最大并行采集器数（默认 DAG_MAX_WORKERS）')
 
     args = parser.parse_args()
 
     if args.mode == 'all':
-        run_all_collectors()
+        run_all_collectors(max_workers=args.workers)
     else:
-        run_daily_update()
+        run_daily_update(max_workers=args.workers)
@@ -23,20 +23,8 @@ setup_network_emergency_kit()
 # Logger配置
 logger = setup_logger(__name__)
 
-# 导入所有采集器
-from data_job.collectors import (
-    StockKlineCollector,
-    SectorKlineCollector,
-    ETFKlineCollector,
-    StockValuationCollector,
-    LimitBoardsCollector,
-    NewsCollector,
-    MacroDataCollector,
-    ETFInfoCollector,
-    StockSectorListCollector,
-    FundHoldingsCollector,
-    FinanceSummaryCollector,
-)
+from data_job.core.dag_executor import DagExecutor
+from data_job.core.collection_graph import build_collection_graph
 
 
 class CollectionScheduler:
@@ -49,6 +37,13 @@ class CollectionScheduler:
         logger.info("🚀 EvoAlpha OS - 数据采集调度器启动")
         logger.info("=" * 80)
 
+    def _run_stages(self, title, names):
+        """按采集依赖图并行执行一组采集器并输出结果"""
+        executor = DagExecutor(build_collection_graph(names), logger=logger)
+        executor.run()
+        executor.log_summary(title)
+        return executor.summary()
+
     # ==================== 每日采集任务 ====================
 
     def run_daily_collection(self):
@@ -58,43 +53,9 @@ class CollectionScheduler:
         logger.info(f"⏰ 开始时间: {date.today()}")
         logger.info("=" * 80)
 
-        collectors = [
-            ('StockKline', StockKlineCollector(), "5-10分钟"),
-            ('SectorKline', SectorKlineCollector(), "2-5分钟"),
-            ('ETFKline', ETFKlineCollector(), "2-5分钟"),
-            ('StockValuation', StockValuationCollector(), "2-3分钟"),
-            ('LimitBoards', LimitBoardsCollector(), "1-2分钟"),
-            ('News', NewsCollector(), "2-3分钟"),
-        ]
-
-        success_count = 0
-        failed_count = 0
-        results = []
-
-        for name, collector, estimated_time in collectors:
-            logger.info(f"\n▶️  正在运行: {name} (预计耗时: {estimated_time})")
-            try:
-                collector.run()
-                success_count += 1
-                results.append((name, "✅ 成功"))
-                logger.info(f"✅ {name} 完成")
-            except Exception as e:
-                failed_count += 1
-                results.append((name, f"❌ 失败: {e}"))
-                logger.error(f"❌ {name} 失败: {e}")
-
-        # 输出结果
-        logger.info("\n" + "=" * 80)
-        logger.info("📊 每日采集任务完成")
-        logger.info(f"✅ 成功: {success_count}/{len(collectors)}")
-        logger.info(f"❌ 失败: {failed_count}/{len(collectors)}")
-
-        if results:
-            logger.info("\n详细结果:")
-            for name, status in results:
-                logger.info(f"  {name}: {status}")
-
-        logger.info("=" * 80 + "\n")
+        return self._run_stages("每日采集任务完成", [
+            'StockKline', 'SectorKline', 'ETFKline', 'StockValuation', 'LimitBoards', 'News',
+        ])
 
     # ==================== 每月采集任务 ====================
 
@@ -105,40 +66,7 @@ class CollectionScheduler:
         logger.info(f"⏰ 开始时间: {date.today()}")
         logger.info("=" * 80)
 
-        collectors = [
-            ('MacroData', MacroDataCollector(), "10-15分钟"),
-            ('ETFInfo', ETFInfoCollector(), "5-10分钟"),
-            ('StockSectorList', StockSectorListCollector(), "10-15分钟"),
-        ]
-
-        success_count = 0
-        failed_count = 0
-        results = []
-
-        for name, collector, estimated_time in collectors:
-            logger.info(f"\n▶️  正在运行: {name} (预计耗时: {estimated_time})")
-            try:
-                collector.run()
-                success_count += 1
-                results.append((name, "✅ 成功"))
-                logger.info(f"✅ {name} 完成")
-            except Exception as e:
-                failed_count += 1
-                results.append((name, f"❌ 失败: {e}"))
-                logger.error(f"❌ {name} 失败: {e}")
-
-        # 输出结果
-        logger.info("\n" + "=" * 80)
-        logger.info("📊 每月采集任务完成")
-        logger.info(f"✅ 成功: {success_count}/{len(collectors)}")
-        logger.info(f"❌ 失败: {failed_count}/{len(collectors)}")
-
-        if results:
-            logger.info("\n详细结果:")
-            for name, status in results:
-                logger.info(f"  {name}: {status}")
-
-        logger.info("=" * 80 + "\n")
+        return self._run_stages("每月采集任务完成", ['MacroData', 'ETFInfo', 'StockSectorList'])
 
     # ==================== 每季度采集任务 ====================
 
@@ -149,39 +77,7 @@ class CollectionScheduler:
         logger.info(f"⏰ 开始时间: {date.today()}")
         logger.info("=" * 80)
 
-        collectors = [
-            ('FundHoldings', FundHoldingsCollector(), "10-15分钟"),
-            ('FinanceSummary', FinanceSummaryCollector(), "2-3小时"),
-        ]
-
-        success_count = 0
-        failed_count = 0
-        results = []
-
-        for name, collector, estimated_time in collectors:
-            logger.info(f"\n▶️  正在运行: {name} (预计耗时: {estimated_time})")
-            try:
-                collector.run()
-                success_count += 1
-                results.append((name, "✅ 成功"))
-                logger.info(f"✅ {name} 完成")
-            except Exception as e:
-                failed_count += 1
-                results.append((name, f"❌ 失败: {e}"))
-                logger.error(f"❌ {name} 失败: {e}")
-
-        # 输出结果
-        logger.info("\n" + "=" * 80)
-        logger.info("📊 每季度采集任务完成")
-        logger.info(f"✅ 成功: {success_count}/{len(collectors)}")
-        logger.info(f"❌ 失败: {failed_count}/{len(collectors)}")
-
-        if results:
-            logger.info("\n详细结果:")
-            for name, status in results:
-                logger.info(f"  {name}: {status}")
-
-        logger.info("=" * 80 + "\n")
+        return self._run_stages("每季度采集任务完成", ['FundHoldings', 'FinanceSummary'])
 
     # ==================== 调度器配置 ====================
 
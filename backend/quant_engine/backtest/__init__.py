@@ -0,0 +1,23 @@
+"""
+量化引擎 - 回测模块（量化兵工厂）
+信号表 -> 持仓矩阵 -> 资金曲线与绩效指标
+"""
+
+from .vector_engine import BacktestRules, BacktestResult, VectorBacktester
+from .metrics import compute_metrics, max_drawdown
+from .data_loader import load_signals, load_price_panel
+from .shared_panel import SharedArrays
+from .grid_search import GridSearchOptimizer, expand_grid
+
+__all__ = [
+    'BacktestRules',
+    'BacktestResult',
+    'VectorBacktester',
+    'compute_metrics',
+    'max_drawdown',
+    'load_signals',
+    'load_price_panel',
+    'SharedArrays',
+    'GridSearchOptimizer',
+    'expand_grid',
+]
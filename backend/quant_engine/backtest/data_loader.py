@@ -0,0 +1,101 @@
+"""
+EvoAlpha OS - 回测数据加载
+从 quant_preselect_results 读取信号，从 stock_daily_prices 读取价格宽表
+"""
+
+import json
+import logging
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from app.core.kline_store import KlineStore, get_kline_store
+from app.core.price_cube import PriceCube, get_price_cube
+
+logger = logging.getLogger(__name__)
+
+# meta_info 中可作为信号强度的字段（按优先级）
+SCORE_KEYS = ('rps_250', 'stock_rps')
+
+
+def _next_day(day: str) -> str:
+    """开区间上界，兼容带时间戳的日期格式"""
+    return (pd.to_datetime(day) + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+
+
+def _score_of(meta_info) -> float:
+    try:
+        meta = json.loads(meta_info) if meta_info else {}
+    except (TypeError, ValueError):
+        return np.nan
+    for key in SCORE_KEYS:
+        value = meta.get(key)
+        if value is not None:
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                continue
+    return np.nan
+
+
+def load_signals(engine, strategy_name: str, start_date: str, end_date: str,
+                 table: str = "quant_preselect_results") -> pd.DataFrame:
+    """
+    读取策略信号
+
+    Returns:
+        pd.DataFrame: symbol, trade_date (datetime64), score
+    """
+    query = text(f"""
+        SELECT symbol, trade_date, meta_info
+        FROM {table}
+        WHERE strategy_name = :strategy
+          AND trade_date >= :start AND trade_date < :end
+    """)
+    df = pd.read_sql(query, engine, params={'strategy': strategy_name, 'start': start_date, 'end': _next_day(end_date)})
+    if df.empty:
+        return pd.DataFrame(columns=['symbol', 'trade_date', 'score'])
+
+    df['trade_date'] = pd.to_datetime(df['trade_date']).dt.normalize()
+    df['score'] = [_score_of(m) for m in df['meta_info']]
+    return df[['symbol', 'trade_date', 'score']]
+
+
+def load_price_panel(engine, symbols, start_date: str, end_date: str,
+                     table: str = "stock_daily_prices"):
+    """
+    读取开盘价/收盘价宽表（日期 × 标的），停牌日为 NaN
+
+    Returns:
+        (open_df, close_df)
+    """
+    symbols = sorted(set(symbols))
+    if not symbols:
+        empty = pd.DataFrame(index=pd.DatetimeIndex([], name='trade_date'))
+        return empty, empty.copy()
+
+    cube = get_price_cube(PriceCube.asset_for_table(table), engine)
+    store = get_kline_store(for_read=True)
+    asset = KlineStore.asset_for_table(table)
+    if cube is not None:
+        df = cube.to_long(['open', 'close'], start_date=start_date[:10], end_date=end_date[:10], symbols=symbols)
+    elif store is not None and asset is not None and store.has_data(asset):
+        df = store.read(asset, start_date=start_date[:10], end_date=end_date[:10], symbols=symbols,
+                        columns=['symbol', 'trade_date', 'open', 'close'])
+    else:
+        sym_str = "'" + "','".join(symbols) + "'"
+        query = text(f"""
+            SELECT symbol, trade_date, open, close
+            FROM {table}
+            WHERE trade_date >= '{start_date}' AND trade_date < '{_next_day(end_date)}'
+              AND symbol IN ({sym_str})
+        """)
+        df = pd.read_sql(query, engine)
+    logger.info(f"   ✅ 价格数据: {len(df)} 行, {df['symbol'].nunique() if not df.empty else 0} 个标的")
+
+    df['trade_date'] = pd.to_datetime(df['trade_date']).dt.normalize()
+    df = df.drop_duplicates(['trade_date', 'symbol'], keep='last')
+    open_df = df.pivot(index='trade_date', columns='symbol', values='open').sort_index()
+    close_df = df.pivot(index='trade_date', columns='symbol', values='close').reindex_like(open_df)
+    return open_df.astype(float), close_df.astype(float)
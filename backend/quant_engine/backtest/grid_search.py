@@ -0,0 +1,177 @@
+"""
+EvoAlpha OS - 参数网格寻优
+对策略阈值 × 持仓规则的参数网格逐组回测，按指标排名
+
+- 与阈值无关的中间量（特征长表）和价格面板只计算一次，
+  放进一块共享内存，进程池中的每个 worker 挂载同一份数据（零拷贝）
+- 每组参数：signal_mask(特征, 阈值) -> 信号 -> VectorBacktester -> 指标
+- 各组参数互相独立，耗时随进程数近似线性下降
+"""
+
+import os
+import time
+import inspect
+import itertools
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from quant_engine.backtest.shared_panel import SharedArrays
+from quant_engine.backtest.vector_engine import BacktestRules, VectorBacktester
+
+logger = logging.getLogger(__name__)
+
+# BacktestRules 的参数名：网格中的这些键用于持仓规则，其余键作为策略阈值
+RULE_KEYS = tuple(p for p in inspect.signature(BacktestRules.__init__).parameters if p != 'self')
+
+
+def expand_grid(grid: dict) -> list:
+    """{'a': [1, 2], 'b': [3]} -> [{'a': 1, 'b': 3}, {'a': 2, 'b': 3}]"""
+    keys = list(grid.keys())
+    values = [v if isinstance(v, (list, tuple)) else [v] for v in grid.values()]
+    return [dict(zip(keys, combo)) for combo in itertools.product(*values)]
+
+
+# ================= worker =================
+
+_worker = {}
+
+
+def _init_worker(spec, dates, symbols, feature_names, mask_func, base_params, base_rules):
+    """子进程初始化：挂载共享内存，构造一次回测器"""
+    shm, arrays = SharedArrays.attach(spec)
+    _worker.clear()
+    _worker.update(_build_context(arrays, dates, symbols, feature_names, mask_func, base_params, base_rules))
+    _worker['shm'] = shm  # 保持映射存活
+
+
+def _build_context(arrays, dates, symbols, feature_names, mask_func, base_params, base_rules):
+    backtester = VectorBacktester.from_arrays(
+        dates, symbols, arrays['open'], arrays['close'], base_rules,
+        close_filled=arrays['close_filled'], next_valid=arrays['next_valid'],
+    )
+    return {
+        'backtester': backtester,
+        'features': {name: arrays[f'f_{name}'] for name in feature_names},
+        'row': arrays['row'],
+        'col': arrays['col'],
+        'score': arrays['score'],
+        'mask_func': mask_func,
+        'base_params': base_params,
+        'base_rules': base_rules,
+    }
+
+
+def _evaluate(combo, context=None):
+    """回测一组参数，返回 参数 + 指标"""
+    ctx = context or _worker
+    rule_args = {k: v for k, v in combo.items() if k in RULE_KEYS}
+    params = {**ctx['base_params'], **{k: v for k, v in combo.items() if k not in RULE_KEYS}}
+    base = ctx['base_rules']
+    rules = BacktestRules(**{k: rule_args.get(k, getattr(base, k)) for k in RULE_KEYS})
+
+    masks = ctx['mask_func'](ctx['features'], params)
+    hit = np.logical_or.reduce(masks) if isinstance(masks, tuple) else masks
+    idx = np.flatnonzero(hit)
+
+    bt = ctx['backtester']
+    signals = pd.DataFrame({
+        'symbol': bt.symbols[ctx['col'][idx]],
+        'trade_date': bt.dates[ctx['row'][idx]],
+        'score': ctx['score'][idx],
+    })
+    metrics = bt.run(signals, rules).metrics
+    return {**combo, 'signal_count': int(len(idx)), **metrics}
+
+
+# ================= 寻优器 =================
+
+class GridSearchOptimizer:
+    """
+    参数网格寻优
+
+    Args:
+        features: 特征长表，必须包含 symbol, trade_date（信号日）及 mask_func 需要的数值/布尔列
+        mask_func: (特征字典, 阈值参数) -> 布尔数组 或 布尔数组元组（任一成立即为信号）；
+                   需为模块级函数或静态方法（可 pickle）
+        open_df / close_df: 开盘价 / 收盘价宽表（日期 × 标的）
+        base_params: 阈值默认值（网格中未出现的键使用默认值）
+        base_rules: 持仓规则默认值
+        score_col: 信号强度列（排名加权用），缺失时视为等强
+    """
+
+    def __init__(self, features: pd.DataFrame, mask_func, open_df: pd.DataFrame, close_df: pd.DataFrame,
+                 base_params: dict = None, base_rules: BacktestRules = None, score_col: str = 'rps_250'):
+        self.mask_func = mask_func
+        self.base_params = dict(base_params or {})
+        self.base_rules = base_rules or BacktestRules()
+
+        self.dates = pd.DatetimeIndex(open_df.index)
+        self.symbols = pd.Index(open_df.columns)
+        self.open = open_df.to_numpy(dtype=float)
+        self.close = close_df.reindex_like(open_df).to_numpy(dtype=float)
+
+        # 特征定位到价格面板的 (行, 列)；信号日或标的不在价格面板中的行直接丢弃
+        row = self.dates.get_indexer(pd.to_datetime(features['trade_date']))
+        col = self.symbols.get_indexer(features['symbol'])
+        keep = (row >= 0) & (col >= 0)
+        if not keep.all():
+            logger.info(f"   ⚠️ {int((~keep).sum())} 行特征不在价格面板中，已忽略")
+        features = features[keep]
+
+        self.row = row[keep].astype(np.int64)
+        self.col = col[keep].astype(np.int64)
+        self.score = (pd.to_numeric(features[score_col], errors='coerce').to_numpy(dtype=float)
+                      if score_col in features.columns else np.ones(len(features)))
+        self.feature_names = [c for c in features.columns if c not in ('symbol', 'trade_date')]
+        self.features = {name: features[name].to_numpy() for name in self.feature_names}
+
+    def _shared_arrays(self):
+        close_filled, next_valid = VectorBacktester.prepare(self.close)
+        arrays = {
+            'open': self.open, 'close': self.close,
+            'close_filled': close_filled, 'next_valid': next_valid,
+            'row': self.row, 'col': self.col, 'score': self.score,
+        }
+        arrays.update({f'f_{name}': np.asarray(values) for name, values in self.features.items()})
+        return arrays
+
+    def run(self, grid: dict, workers: int = None, sort_by: str = 'sharpe', ascending: bool = False) -> pd.DataFrame:
+        """
+        执行网格寻优
+
+        Args:
+            grid: {参数名: 候选值列表}，参数名为策略阈值或 BacktestRules 参数
+            workers: 进程数，默认 CPU 核数；1 表示在当前进程串行执行
+            sort_by: 排名指标
+            ascending: 是否升序（如按 max_drawdown 排名时为 True）
+
+        Returns:
+            pd.DataFrame: 每组参数一行（参数 + signal_count + 指标），按 sort_by 排名，rank 从 1 开始
+        """
+        combos = expand_grid(grid)
+        workers = max(1, min(workers or os.cpu_count() or 1, len(combos)))
+        logger.info(f"🔍 参数网格: {len(combos)} 组, 进程数: {workers}")
+        start = time.time()
+
+        init_args = (self.dates, self.symbols, self.feature_names, self.mask_func, self.base_params, self.base_rules)
+        if workers == 1:
+            context = _build_context(self._shared_arrays(), *init_args)
+            rows = [_evaluate(combo, context) for combo in combos]
+        else:
+            with SharedArrays(self._shared_arrays()) as shared:
+                logger.info(f"   📦 共享内存: {shared.nbytes / 1024 / 1024:.0f} MB")
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                         initargs=(shared.spec, *init_args)) as pool:
+                    rows = list(pool.map(_evaluate, combos))
+
+        logger.info(f"   ✅ 寻优完成，耗时 {time.time() - start:.1f} 秒")
+
+        table = pd.DataFrame(rows)
+        if table.empty:
+            return table
+        table = table.sort_values(sort_by, ascending=ascending, kind='stable').reset_index(drop=True)
+        table.insert(0, 'rank', np.arange(1, len(table) + 1))
+        return table
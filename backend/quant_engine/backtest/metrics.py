@@ -0,0 +1,56 @@
+"""
+EvoAlpha OS - 回测绩效指标
+总收益率、年化收益、最大回撤、夏普比率、胜率、交易次数
+"""
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+def max_drawdown(equity: np.ndarray) -> float:
+    """资金曲线的最大回撤（正数，0.123 = 回撤 12.3%）"""
+    if len(equity) == 0:
+        return 0.0
+    peak = np.maximum.accumulate(np.maximum(equity, 1.0))  # 初始资金 1.0 也算峰值
+    return float(np.max(1 - equity / peak))
+
+
+def compute_metrics(returns: pd.Series, trade_returns: np.ndarray, risk_free: float = 0.0) -> dict:
+    """
+    计算核心指标
+
+    Args:
+        returns: 每日组合收益（索引为日期）
+        trade_returns: 逐笔交易收益（已扣费）
+        risk_free: 年化无风险利率（夏普比率用）
+
+    Returns:
+        dict: total_return, annual_return, max_drawdown, sharpe, win_rate, trade_count, start_date, end_date
+    """
+    daily = returns.to_numpy(dtype=float)
+    equity = np.cumprod(1 + daily)
+    days = len(daily)
+
+    total_return = float(equity[-1] - 1) if days else 0.0
+    annual_return = float((1 + total_return) ** (TRADING_DAYS_PER_YEAR / days) - 1) if days else 0.0
+
+    excess = daily - risk_free / TRADING_DAYS_PER_YEAR
+    std = excess.std(ddof=1) if days > 1 else 0.0
+    sharpe = float(excess.mean() / std * np.sqrt(TRADING_DAYS_PER_YEAR)) if std > 0 else 0.0
+
+    trade_returns = np.asarray(trade_returns, dtype=float)
+    trade_count = int(len(trade_returns))
+    win_rate = float((trade_returns > 0).mean()) if trade_count else 0.0
+
+    return {
+        'start_date': str(returns.index[0].date()) if days else None,
+        'end_date': str(returns.index[-1].date()) if days else None,
+        'total_return': total_return,
+        'annual_return': annual_return,
+        'max_drawdown': max_drawdown(equity),
+        'sharpe': sharpe,
+        'win_rate': win_rate,
+        'trade_count': trade_count,
+    }
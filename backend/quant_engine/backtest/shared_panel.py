@@ -0,0 +1,67 @@
+"""
+EvoAlpha OS - 共享内存数组
+把一组 NumPy 数组放进同一块 multiprocessing.shared_memory，
+子进程凭可 pickle 的 spec 挂载为零拷贝视图（价格面板 / 因子长表只需一份物理内存）
+"""
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+_ALIGN = 64
+
+
+class SharedArrays:
+    """
+    用法（主进程）:
+        with SharedArrays({'close': close, 'open': open_}) as shared:
+            pool = ProcessPoolExecutor(initializer=worker_init, initargs=(shared.spec,))
+    子进程:
+        shm, arrays = SharedArrays.attach(spec)   # 需保留 shm 引用直到不再使用 arrays
+    """
+
+    def __init__(self, arrays: dict):
+        layout = []
+        offset = 0
+        for name, arr in arrays.items():
+            arr = np.ascontiguousarray(arr)
+            if arr.dtype == object:
+                raise TypeError(f"共享内存不支持 object 数组: {name}")
+            layout.append((name, arr.dtype.str, arr.shape, offset))
+            offset += -(-arr.nbytes // _ALIGN) * _ALIGN
+
+        self._shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        self.arrays = {}
+        for (name, dtype, shape, start), source in zip(layout, arrays.values()):
+            view = np.ndarray(shape, dtype=dtype, buffer=self._shm.buf, offset=start)
+            view[...] = source
+            self.arrays[name] = view
+
+        self.spec = {'name': self._shm.name, 'layout': layout}
+        self.nbytes = offset
+
+    @staticmethod
+    def attach(spec):
+        """挂载已存在的共享内存，返回 (shm, {名称: 只读数组})"""
+        shm = shared_memory.SharedMemory(name=spec['name'])
+        arrays = {}
+        for name, dtype, shape, start in spec['layout']:
+            view = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)
+            view.flags.writeable = False
+            arrays[name] = view
+        return shm, arrays
+
+    def close(self):
+        """释放并删除共享内存（只由创建者调用）"""
+        if self._shm is None:
+            return
+        self.arrays = {}
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
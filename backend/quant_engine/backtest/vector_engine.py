@@ -0,0 +1,270 @@
+"""
+EvoAlpha OS - 向量化回测引擎
+把信号表转换为 (日期 × 标的) 的持仓矩阵，用数组运算计算每日组合收益和资金曲线
+
+交易规则（收盘后出信号，次日开盘买入）：
+- 入场：信号日之后的第一个交易日开盘价；该日停牌（无开盘价）则放弃该信号
+- 出场：持有满 max_hold_days 个交易日的收盘价，或收盘价跌破 入场价 × (1 - stop_loss) 当日的收盘价；
+        出场日停牌则顺延到下一个有收盘价的交易日；回测结束时仍未出场的按最后一日收盘价计
+- 同一标的持仓期间的新信号忽略（不加仓）
+- 每日按当日持仓重新分配权重（等权 / 按信号强度排名加权），不足 max_positions 只时剩余资金空仓
+"""
+
+import numpy as np
+import pandas as pd
+
+from quant_engine.backtest.metrics import compute_metrics
+
+
+class BacktestRules:
+    """持仓规则"""
+
+    WEIGHTINGS = ('equal', 'rank')
+
+    def __init__(self, stop_loss=0.08, max_hold_days=20, weighting='equal',
+                 max_positions=None, buy_fee=0.0003, sell_fee=0.0013):
+        """
+        Args:
+            stop_loss: 止损比例（0.08 = 收盘价较入场价下跌 8% 止损），None 表示不止损
+            max_hold_days: 最长持有交易日数（含入场日）
+            weighting: 'equal' 等权 / 'rank' 按信号强度排名加权
+            max_positions: 单只仓位上限为 1 / max_positions；None 表示始终满仓
+            buy_fee: 买入费率（佣金）
+            sell_fee: 卖出费率（佣金 + 印花税）
+        """
+        if weighting not in self.WEIGHTINGS:
+            raise ValueError(f"weighting 必须是 {self.WEIGHTINGS} 之一: {weighting}")
+        if max_hold_days < 1:
+            raise ValueError("max_hold_days 必须 >= 1")
+
+        self.stop_loss = stop_loss
+        self.max_hold_days = int(max_hold_days)
+        self.weighting = weighting
+        self.max_positions = max_positions
+        self.buy_fee = buy_fee
+        self.sell_fee = sell_fee
+
+    def __repr__(self):
+        return (f"BacktestRules(stop_loss={self.stop_loss}, max_hold_days={self.max_hold_days}, "
+                f"weighting='{self.weighting}', max_positions={self.max_positions})")
+
+
+class BacktestResult:
+    """回测结果"""
+
+    def __init__(self, returns, positions, trades, metrics):
+        self.returns = returns        # pd.Series: 每日组合收益
+        self.equity = (1 + returns).cumprod()  # pd.Series: 资金曲线（初始 1.0）
+        self.positions = positions    # pd.DataFrame: 每日持仓权重（日期 × 标的）
+        self.trades = trades          # pd.DataFrame: 逐笔交易
+        self.metrics = metrics        # dict: 核心指标
+
+    def report(self, title=""):
+        """文本报告"""
+        m = self.metrics
+        lines = [
+            f"📊 回测报告{('：' + title) if title else ''}",
+            f"   时间范围：{m['start_date']} ~ {m['end_date']}",
+            f"   总收益率：{m['total_return']:+.2%}",
+            f"   年化收益：{m['annual_return']:+.2%}",
+            f"   最大回撤：{-m['max_drawdown']:.2%}",
+            f"   夏普比率：{m['sharpe']:.2f}",
+            f"   胜率：{m['win_rate']:.2%}",
+            f"   总交易次数：{m['trade_count']}次",
+        ]
+        return "\n".join(lines)
+
+
+class VectorBacktester:
+    """
+    向量化回测器
+
+    价格面板按日期对齐（行 = 交易日，列 = 标的），停牌日为 NaN
+    """
+
+    def __init__(self, open_prices: pd.DataFrame, close_prices: pd.DataFrame, rules: BacktestRules = None):
+        """
+        Args:
+            open_prices: 开盘价宽表（日期 × 标的）
+            close_prices: 收盘价宽表，索引与列需与 open_prices 一致
+            rules: 持仓规则
+        """
+        if not open_prices.index.equals(close_prices.index) or not open_prices.columns.equals(close_prices.columns):
+            raise ValueError("开盘价与收盘价面板的日期/标的不一致")
+
+        self._setup(open_prices.index, open_prices.columns,
+                    open_prices.to_numpy(dtype=float), close_prices.to_numpy(dtype=float), rules)
+
+    @classmethod
+    def from_arrays(cls, dates, symbols, open_, close, rules=None, close_filled=None, next_valid=None):
+        """
+        直接用数组构造（不复制），可传入预先算好的 close_filled / next_valid（如共享内存中的数组）
+        """
+        backtester = cls.__new__(cls)
+        backtester._setup(dates, symbols, open_, close, rules, close_filled, next_valid)
+        return backtester
+
+    @staticmethod
+    def prepare(close: np.ndarray):
+        """
+        由收盘价计算辅助数组
+
+        Returns:
+            (close_filled, next_valid): 停牌日沿用最近收盘价的估值价；
+            next_valid[t, j] 为 t 及之后第一个有收盘价的行（没有则为行数）
+        """
+        rows = close.shape[0]
+        close_filled = pd.DataFrame(close).ffill().to_numpy()
+        row_idx = np.where(~np.isnan(close), np.arange(rows)[:, None], rows)
+        next_valid = np.minimum.accumulate(row_idx[::-1], axis=0)[::-1]
+        return close_filled, next_valid
+
+    def _setup(self, dates, symbols, open_, close, rules, close_filled=None, next_valid=None):
+        self.rules = rules or BacktestRules()
+        self.dates = pd.DatetimeIndex(dates)
+        self.symbols = pd.Index(symbols)
+        self.open = open_
+        self.close = close
+        if close_filled is None or next_valid is None:
+            close_filled, next_valid = self.prepare(close)
+        self.close_filled = close_filled
+        self.next_valid = next_valid
+
+    # ================= 信号 -> 交易 =================
+
+    def _candidate_trades(self, signals: pd.DataFrame, rules: BacktestRules) -> pd.DataFrame:
+        """每个信号一笔候选交易：入场行、出场行（彼此独立，尚未去重叠）"""
+        rows = len(self.dates)
+        col_of = pd.Series(np.arange(len(self.symbols)), index=self.symbols)
+
+        sig = signals[signals['symbol'].isin(col_of.index)]
+        col = col_of.loc[sig['symbol']].to_numpy()
+        sig_dates = pd.to_datetime(sig['trade_date']).to_numpy()
+        entry = np.searchsorted(self.dates.to_numpy(), sig_dates, side='right')
+        score = sig['score'].to_numpy(dtype=float) if 'score' in sig.columns else np.ones(len(sig))
+
+        # 入场日需在面板内且有开盘价
+        ok = entry < rows
+        ok[ok] = ~np.isnan(self.open[entry[ok], col[ok]])
+        col, entry, score, sig_dates = col[ok], entry[ok], score[ok], sig_dates[ok]
+
+        # 持有窗口 (交易数 × max_hold_days)，超出面板的部分截到最后一行
+        hold = rules.max_hold_days
+        window = np.minimum(entry[:, None] + np.arange(hold), rows - 1)
+        exit_raw = window[:, -1]
+
+        stop_loss = rules.stop_loss
+        if stop_loss is not None and len(entry):
+            entry_price = self.open[entry, col]
+            closes = self.close[window, col[:, None]]  # 停牌日为 NaN，不触发止损
+            with np.errstate(invalid='ignore'):
+                hit = closes <= entry_price[:, None] * (1 - stop_loss)
+            first_hit = np.argmax(hit, axis=1)
+            exit_raw = np.where(hit.any(axis=1), window[np.arange(len(entry)), first_hit], exit_raw)
+
+        # 出场日停牌则顺延；之后再无成交的按最后一行估值
+        exit_row = self.next_valid[exit_raw, col]
+        exit_row = np.where(exit_row >= rows, rows - 1, exit_row)
+
+        return pd.DataFrame({
+            'col': col, 'entry_row': entry, 'exit_row': exit_row,
+            'score': score, 'signal_date': sig_dates,
+        })
+
+    @staticmethod
+    def _drop_overlaps(trades: pd.DataFrame) -> pd.DataFrame:
+        """同一标的持仓期间的后续信号忽略（按入场顺序贪心）"""
+        trades = trades.sort_values(['col', 'entry_row', 'exit_row'], kind='stable')
+        cols = trades['col'].to_numpy()
+        entries = trades['entry_row'].to_numpy()
+        exits = trades['exit_row'].to_numpy()
+
+        keep = np.zeros(len(trades), dtype=bool)
+        last_col, last_exit = -1, -1
+        for i in range(len(trades)):
+            if cols[i] != last_col or entries[i] > last_exit:
+                keep[i] = True
+                last_col, last_exit = cols[i], exits[i]
+        return trades[keep].reset_index(drop=True)
+
+    # ================= 持仓矩阵与收益 =================
+
+    def _interval_matrix(self, trades: pd.DataFrame, values) -> np.ndarray:
+        """把每笔交易的 [入场行, 出场行] 区间填上 value（差分 + 累加，O(日期 × 标的)）"""
+        rows, cols = len(self.dates), len(self.symbols)
+        diff = np.zeros((rows + 1, cols))
+        np.add.at(diff, (trades['entry_row'].to_numpy(), trades['col'].to_numpy()), values)
+        np.add.at(diff, (trades['exit_row'].to_numpy() + 1, trades['col'].to_numpy()), -np.asarray(values))
+        return np.cumsum(diff[:-1], axis=0)
+
+    def run(self, signals: pd.DataFrame, rules: BacktestRules = None) -> BacktestResult:
+        """
+        执行回测
+
+        Args:
+            signals: 信号表，列 symbol, trade_date（信号日），可选 score（信号强度，用于排名加权）
+            rules: 本次使用的持仓规则，默认 self.rules
+
+        Returns:
+            BacktestResult
+        """
+        rules = rules or self.rules
+        rows, cols = len(self.dates), len(self.symbols)
+
+        trades = self._drop_overlaps(self._candidate_trades(signals, rules))
+
+        # 排名加权：信号强度在信号当日所有信号中的百分位排名
+        if rules.weighting == 'rank' and len(trades):
+            trades['weight'] = trades.groupby('signal_date')['score'].rank(pct=True).fillna(1.0).to_numpy()
+        else:
+            trades['weight'] = 1.0
+
+        held = self._interval_matrix(trades, trades['weight'].to_numpy())
+        entering = np.zeros((rows, cols), dtype=bool)
+        exiting = np.zeros((rows, cols), dtype=bool)
+        entering[trades['entry_row'].to_numpy(), trades['col'].to_numpy()] = True
+        exiting[trades['exit_row'].to_numpy(), trades['col'].to_numpy()] = True
+
+        # 每日权重：按持仓强度归一化，单只上限 1 / max_positions
+        total = held.sum(axis=1, keepdims=True)
+        if rules.max_positions:
+            total = np.maximum(total, held.max(axis=1, keepdims=True) * rules.max_positions)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weights = np.where(total > 0, held / total, 0.0)
+
+        # 每日个股收益：入场日 收盘/开盘，其余 收盘/前收盘（停牌为 0），扣除买卖费用
+        prev_close = np.vstack([np.full((1, cols), np.nan), self.close_filled[:-1]])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            asset_ret = np.where(entering, self.close_filled / self.open, self.close_filled / prev_close) - 1
+        asset_ret = np.nan_to_num(asset_ret, nan=0.0, posinf=0.0, neginf=0.0)
+        asset_ret -= entering * rules.buy_fee + exiting * rules.sell_fee
+
+        daily = (weights * asset_ret).sum(axis=1)
+        returns = pd.Series(daily, index=self.dates, name='return')
+        positions = pd.DataFrame(weights, index=self.dates, columns=self.symbols)
+
+        trade_log = self._trade_log(trades, rules)
+        metrics = compute_metrics(returns, trade_log['return'].to_numpy())
+        return BacktestResult(returns, positions, trade_log, metrics)
+
+    def _trade_log(self, trades: pd.DataFrame, rules: BacktestRules) -> pd.DataFrame:
+        """逐笔交易记录"""
+        col = trades['col'].to_numpy()
+        entry = trades['entry_row'].to_numpy()
+        exit_ = trades['exit_row'].to_numpy()
+        entry_price = self.open[entry, col]
+        exit_price = self.close_filled[exit_, col]
+        gross = exit_price / entry_price
+        net = gross * (1 - rules.sell_fee) / (1 + rules.buy_fee) - 1
+
+        return pd.DataFrame({
+            'symbol': np.asarray(self.symbols)[col],
+            'signal_date': trades['signal_date'].to_numpy(),
+            'entry_date': self.dates[entry],
+            'exit_date': self.dates[exit_],
+            'entry_price': entry_price,
+            'exit_price': exit_price,
+            'hold_days': exit_ - entry + 1,
+            'weight': trades['weight'].to_numpy(),
+            'return': net,
+        })
@@ -1,14 +1,26 @@
 """
 量化引擎 - 因子计算器模块
 包含个股、板块、ETF的RPS因子计算器
+
+计算器类在首次访问时才导入对应模块
 """
 
-from .stock_rps_calculator import StockRPSCalculator
-from .sector_rps_calculator import SectorRPSCalculator
-from .etf_rps_calculator import ETFRPSCalculator
+import importlib
+
+# 类名 -> 模块名
+_CALCULATOR_MODULES = {
+    'StockRPSCalculator': 'stock_rps_calculator',
+    'SectorRPSCalculator': 'sector_rps_calculator',
+    'ETFRPSCalculator': 'etf_rps_calculator',
+}
+
+__all__ = list(_CALCULATOR_MODULES)
+
 
-__all__ = [
-    'StockRPSCalculator',
-    'SectorRPSCalculator',
-    'ETFRPSCalculator'
-]
+def __getattr__(name):
+    module_name = _CALCULATOR_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    calculator_class = getattr(importlib.import_module(f"{__name__}.{module_name}"), name)
+    globals()[name] = calculator_class
+    return calculator_class
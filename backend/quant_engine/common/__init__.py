@@ -1,7 +1,10 @@
 """
 Quant Engine - 公共工具模块
-提供路径、日志、异常等通用功能
+提供路径、日志、异常、日期等通用功能
+
+日期工具依赖 pandas，在首次访问时才导入（命令行 --help / --list 不加载 pandas）
 """
+import importlib
 
 from .path_utils import setup_quant_path
 from .logger_utils import setup_logger
@@ -11,6 +14,7 @@ from .exception_utils import (
     DataSourceError,
     ValidationError
 )
+from .lazy_utils import import_string
 
 __all__ = [
     'setup_quant_path',
@@ -18,5 +22,22 @@ __all__ = [
     'QuantEngineException',
     'CalculationError',
     'DataSourceError',
-    'ValidationError'
+    'ValidationError',
+    'import_string',
+    'DAY_CONDITION',
+    'to_iso_date',
+    'day_bounds',
+    'day_bounds_list',
+    'normalize_date_column'
 ]
+
+
+_DATE_UTILS = ('DAY_CONDITION', 'to_iso_date', 'day_bounds', 'day_bounds_list', 'normalize_date_column')
+
+
+def __getattr__(name):
+    if name not in _DATE_UTILS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.date_utils"), name)
+    globals()[name] = value
+    return value
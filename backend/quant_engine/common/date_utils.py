@@ -0,0 +1,42 @@
+"""
+日期工具 - 统一日期列格式与按日期的查询条件
+
+规范格式为纯 ISO 日期文本 YYYY-MM-DD：
+- 与 TEXT / DATE 列都兼容，字符串序即日期序，可直接走 trade_date 索引
+- 库中历史数据可能带时间戳（'2024-01-02 00:00:00'），半开区间
+  trade_date >= '2024-01-02' AND trade_date < '2024-01-03' 同时匹配两种写法，
+  迁移前后都可用（见 quant_engine/scripts/normalize_dates.py）
+"""
+from typing import Iterable, List
+
+import pandas as pd
+
+# 单日条件：半开区间，可走索引范围扫描（替代 LIKE 'YYYY-MM-DD%'）
+DAY_CONDITION = "trade_date >= :day_start AND trade_date < :day_end"
+
+
+def to_iso_date(value) -> str:
+    """任意日期表示（字符串 / date / datetime / Timestamp）-> 'YYYY-MM-DD'"""
+    return pd.Timestamp(value).strftime('%Y-%m-%d')
+
+
+def day_bounds(value) -> dict:
+    """单日的半开区间参数，配合 DAY_CONDITION 使用"""
+    day = pd.Timestamp(value).normalize()
+    return {
+        'day_start': day.strftime('%Y-%m-%d'),
+        'day_end': (day + pd.Timedelta(days=1)).strftime('%Y-%m-%d'),
+    }
+
+
+def day_bounds_list(values: Iterable) -> List[dict]:
+    """多个日期（去重、排序）的区间参数列表，用于 executemany"""
+    days = sorted({to_iso_date(v) for v in values})
+    return [day_bounds(day) for day in days]
+
+
+def normalize_date_column(df: pd.DataFrame, column: str = 'trade_date') -> pd.DataFrame:
+    """把日期列转换为 'YYYY-MM-DD' 文本（写库前调用，原地修改并返回 df）"""
+    if column in df.columns and not df.empty:
+        df[column] = pd.to_datetime(df[column]).dt.strftime('%Y-%m-%d')
+    return df
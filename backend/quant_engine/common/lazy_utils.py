@@ -0,0 +1,20 @@
+"""
+懒加载工具 - 注册表中按路径登记类，运行时才导入对应模块
+"""
+import importlib
+
+
+def import_string(path: str):
+    """
+    按 'package.module:Attr' 路径导入对象
+
+    Args:
+        path: 模块路径与属性名，以冒号分隔
+
+    Returns:
+        导入的对象（类 / 函数）
+    """
+    module_name, _, attr = path.partition(':')
+    if not attr:
+        raise ValueError(f"无效的导入路径: {path}（应为 'package.module:Attr'）")
+    return getattr(importlib.import_module(module_name), attr)
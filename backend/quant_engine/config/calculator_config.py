@@ -2,8 +2,11 @@
 量化引擎配置管理
 集中管理所有因子计算相关的配置参数
 """
+import os
 import logging
 
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 class CalculatorConfig:
     """因子计算器配置类"""
 
@@ -18,6 +21,15 @@ class CalculatorConfig:
     # 保存时保留的最新天数
     SAVE_RECENT_DAYS = 3
 
+    # ================= 增量状态配置 =================
+    # 增量模式：持久化每个标的最近 N 个交易日的收盘价，每日只计算新到达的日期
+    USE_ROLLING_STATE = True
+    ROLLING_STATE_ROWS = 270  # 需大于 最长周期(250) + 每日重算的尾部交易日数
+    FEATURE_STATE_DIR = os.path.join(BACKEND_DIR, "data", "feature_state")
+    # 每次增量至少重读状态最后 N 个交易日，与状态比对收盘价（除权后前复权重写的标的整列重新载入）
+    STATE_VERIFY_ROWS = 5
+    STATE_VERIFY_RTOL = 1e-6
+
     # ================= 数据库配置 =================
     USE_TRANSACTION = True
     CHUNK_SIZE = 50  # 批量插入大小（SQLite限制：999/14≈71行，设置为50安全）
@@ -38,3 +50,6 @@ class CalculatorConfig:
 
     # 是否显示进度条
     SHOW_PROGRESS = True
+
+    # 因子计算使用 float32（计算数组内存减半，末位可能存在舍入差异）
+    USE_FLOAT32 = False
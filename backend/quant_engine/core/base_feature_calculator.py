@@ -11,7 +11,7 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from abc import ABC, abstractmethod
-from sqlalchemy import text
+from sqlalchemy import bindparam, text
 
 # ================= 环境路径适配 =================
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -22,7 +22,11 @@ if project_root not in sys.path:
 # ================= 公共工具导入 =================
 from quant_engine.common import setup_quant_path, setup_logger
 from quant_engine.common.exception_utils import CalculationError, DataSourceError, ValidationError
+from quant_engine.common.date_utils import DAY_CONDITION, day_bounds_list, normalize_date_column
 from quant_engine.config.calculator_config import CalculatorConfig
+from quant_engine.core.feature_kernels import compute_feature_cube, cube_to_long
+from app.core.kline_store import KlineStore, get_kline_store
+from app.core.price_cube import PriceCube, get_price_cube
 
 # ================= 路径初始化 =================
 setup_quant_path()
@@ -124,28 +128,40 @@ class BaseFeatureCalculator(ABC):
         else:
             logger.warning(f"⚠️ 跳过表初始化（非标准表名）")
 
-    def load_data(self, start_date=None):
+    def load_data(self, start_date=None, symbols: list = None):
         """
         加载数据（支持增量窗口）
 
         Args:
             start_date: 起始日期（YYYY-MM-DD），None表示加载全量
+            symbols: 只加载这些标的，None表示全部
 
         Returns:
             pd.DataFrame: 加载的数据
         """
-        condition = f"WHERE trade_date >= '{start_date}'" if start_date else ""
-        query = f"""
+        conditions = []
+        params = {}
+        if start_date:
+            conditions.append(f"trade_date >= '{start_date}'")
+        if symbols is not None:
+            conditions.append(f"{self.entity_column} IN :symbols")
+            params['symbols'] = list(symbols)
+        condition = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = text(f"""
             SELECT {self.entity_column}, trade_date, close
             FROM {self.source_table}
             {condition}
             ORDER BY trade_date
-        """
+        """)
+        if symbols is not None:
+            query = query.bindparams(bindparam('symbols', expanding=True))
 
         logger.info(f"📥 正在读取数据 (Start: {start_date if start_date else 'All'})...")
 
         try:
-            df = pd.read_sql(query, self.engine)
+            df = self._load_from_kline_store(start_date, symbols)
+            if df is None:
+                df = pd.read_sql(query, self.engine, params=params)
         except Exception as e:
             raise DataSourceError(f"读取数据失败: {e}")
 
@@ -162,21 +178,27 @@ class BaseFeatureCalculator(ABC):
 
         return df
 
-    def compute_features(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _load_from_kline_store(self, start_date=None, symbols: list = None):
+        """primary 模式下从列式K线仓库读取（只读所需列），仓库未启用或无数据时返回 None"""
+        store = get_kline_store(for_read=True)
+        asset = KlineStore.asset_for_table(self.source_table)
+        if store is None or asset is None or not store.has_data(asset):
+            return None
+        logger.info(f"   📦 数据源: 列式K线仓库 ({asset})")
+        return store.read(asset, start_date=start_date, symbols=symbols,
+                          columns=[self.entity_column, 'trade_date', 'close'])
+
+    def build_close_panel(self, df: pd.DataFrame, fill: bool = True) -> pd.DataFrame:
         """
-        核心计算逻辑（向量化）
+        过滤并转换为收盘价宽表（日期 × 标的），停牌日向前填充
 
         Args:
             df: 原始K线数据
+            fill: False 时不向前填充（保留无K线的空值，用于确定各标的最后一根真实K线）
 
         Returns:
-            pd.DataFrame: 计算后的因子数据
+            pd.DataFrame: 收盘价宽表
         """
-        if df.empty:
-            raise ValidationError("数据为空，无法计算因子")
-
-        logger.info("🧮 开始计算RPS因子...")
-
         # 1. 应用子类过滤逻辑
         df_filtered = self.should_filter(df)
         if len(df_filtered) < len(df):
@@ -188,57 +210,270 @@ class BaseFeatureCalculator(ABC):
             columns=self.entity_column,
             values='close'
         )
-        df_pivot = df_pivot.fillna(method='ffill')  # 填充停牌
+        if fill:
+            df_pivot = df_pivot.ffill()  # 填充停牌
 
         logger.info(f"   📊 Pivot表形状: {df_pivot.shape}")
+        return df_pivot
 
-        # 3. 计算RPS和涨幅
-        feature_dfs = []
-
-        for period in self.periods:
-            # 涨幅
-            chg = df_pivot.pct_change(period)
-            # RPS (排名百分比 0-100)
-            rps = chg.rank(axis=1, pct=True, method='min') * 100
-
-            # Stack 堆叠
-            chg_stack = chg.stack().reset_index()
-            chg_stack.columns = ['trade_date', self.entity_column, f'chg_{period}']
-            chg_stack.set_index([self.entity_column, 'trade_date'], inplace=True)
-
-            rps_stack = rps.stack().reset_index()
-            rps_stack.columns = ['trade_date', self.entity_column, f'rps_{period}']
-            rps_stack.set_index([self.entity_column, 'trade_date'], inplace=True)
-
-            feature_dfs.append(chg_stack)
-            feature_dfs.append(rps_stack)
-
-        # 4. 合并
-        df_final = pd.concat(feature_dfs, axis=1).reset_index()
-
-        # 5. 确保列顺序正确（与表结构一致）
-        # 构建正确的列顺序：entity_column, trade_date, chg_x, rps_x, chg_y, rps_y, ...
-        ordered_columns = [self.entity_column, 'trade_date']
-        for period in self.periods:
-            ordered_columns.append(f'chg_{period}')
-            ordered_columns.append(f'rps_{period}')
-
-        # 只保留存在的列（防止某些列缺失）
-        ordered_columns = [col for col in ordered_columns if col in df_final.columns]
-        df_final = df_final[ordered_columns]
-
-        # 6. 格式化
-        float_cols = [c for c in df_final.columns if c not in [self.entity_column, 'trade_date']]
-        for col in float_cols:
-            if 'rps' in col:
-                df_final[col] = df_final[col].round(2)
-            else:
-                df_final[col] = df_final[col].round(4)
+    def load_close_panel(self, start_date=None, fill: bool = True, symbols: list = None) -> pd.DataFrame:
+        """
+        加载收盘价宽表（已过滤、停牌向前填充）
+
+        价格立方体可用时直接从内存映射取宽表（不查库、不 pivot），否则 load_data + build_close_panel
 
-        logger.info(f"   ✅ 计算完成: {len(df_final)} 行, {len(float_cols)} 个因子")
+        Args:
+            start_date: 起始日期（YYYY-MM-DD），None表示加载全量
+            fill: 是否向前填充停牌日
+            symbols: 只加载这些标的，None表示全部
+
+        Returns:
+            pd.DataFrame: 收盘价宽表，无数据时为空表
+        """
+        cube = get_price_cube(PriceCube.asset_for_table(self.source_table), self.engine)
+        if cube is None:
+            df = self.load_data(start_date=start_date, symbols=symbols)
+            return self.build_close_panel(df, fill) if not df.empty else pd.DataFrame()
+
+        logger.info(f"📥 正在读取价格立方体 (Start: {start_date if start_date else 'All'})...")
+        panel = cube.panel('close', start_date=start_date, symbols=symbols)
+
+        # 与 pivot 结果对齐：只保留过滤后且区间内有K线的标的、有K线的交易日，标的按名称排序
+        kept = self.should_filter(pd.DataFrame({self.entity_column: panel.columns}))[self.entity_column]
+        has_bar = panel.notna()
+        panel = panel.loc[has_bar.any(axis=1).to_numpy(),
+                          panel.columns.isin(kept) & has_bar.any(axis=0).to_numpy()]
+        panel = panel.sort_index(axis=1)
+        if fill:
+            panel = panel.ffill()
+        panel.columns.name = self.entity_column
+
+        logger.info(f"   📊 Pivot表形状: {panel.shape}")
+        return panel
+
+    def features_from_panel(self, df_pivot: pd.DataFrame, start: int = 0) -> pd.DataFrame:
+        """
+        由收盘价宽表计算涨幅与RPS
+
+        Args:
+            df_pivot: 收盘价宽表
+            start: 只输出第 start 行（含）之后的日期，之前的行仅作为回看窗口
+
+        Returns:
+            pd.DataFrame: 长表因子数据
+        """
+        # 3. 计算RPS和涨幅（所有周期写入同一个预分配数组）
+        dtype = np.float32 if self.config.USE_FLOAT32 else np.float64
+        cube = compute_feature_cube(df_pivot.to_numpy(), self.periods, start=start, dtype=dtype)
+
+        # 4. 一次性展开为长表（列顺序与表结构一致，已格式化）
+        df_final = cube_to_long(
+            cube, df_pivot.index[start:], df_pivot.columns, self.entity_column, self.periods
+        )
+
+        logger.info(f"   ✅ 计算完成: {len(df_final)} 行, {cube.shape[2]} 个因子")
 
         return df_final
 
+    def compute_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        核心计算逻辑（向量化）
+
+        Args:
+            df: 原始K线数据
+
+        Returns:
+            pd.DataFrame: 计算后的因子数据
+        """
+        if df.empty:
+            raise ValidationError("数据为空，无法计算因子")
+
+        logger.info("🧮 开始计算RPS因子...")
+
+        df_pivot = self.build_close_panel(df)
+        return self.features_from_panel(df_pivot)
+
+    # ================= 增量状态（滚动收盘价窗口） =================
+
+    def _state_path(self) -> str:
+        """状态文件路径"""
+        return os.path.join(self.config.FEATURE_STATE_DIR, f"{self.target_table}.pkl")
+
+    def _state_key(self) -> dict:
+        """状态标识：数据库或周期配置变化时状态失效"""
+        return {
+            "engine": self.engine.url.render_as_string(hide_password=True),
+            "periods": list(self.periods),
+        }
+
+    def window_start(self) -> str:
+        """窗口模式的起始日期（今天 - INCREMENTAL_WINDOW_DAYS）"""
+        return (datetime.now() - timedelta(days=self.config.INCREMENTAL_WINDOW_DAYS)).strftime("%Y-%m-%d")
+
+    @staticmethod
+    def last_bar_dates(panel: pd.DataFrame) -> pd.Series:
+        """未向前填充的宽表中每个标的最后一根真实K线的日期（无K线为 NaT）"""
+        has_bar = panel.notna().to_numpy()
+        last = len(panel) - 1 - has_bar[::-1].argmax(axis=0)
+        return pd.Series(panel.index[last], index=panel.columns).where(has_bar.any(axis=0))
+
+    def drop_stale_columns(self, panel: pd.DataFrame, last_bar: pd.Series):
+        """
+        去掉最后一根真实K线早于窗口起点的标的（退市 / 长期停牌）
+
+        向前填充会把这类标的的最后收盘价一直延续下去（涨幅 0% 且继续参与 RPS 排名），
+        窗口模式在其K线移出 INCREMENTAL_WINDOW_DAYS 后自然不再包含它，增量模式按同一规则剔除
+
+        Returns:
+            (宽表, 最后K线日期)
+        """
+        last_bar = last_bar.reindex(panel.columns)
+        active = (last_bar >= pd.Timestamp(self.window_start())).to_numpy()
+        if not active.all():
+            logger.info(f"   🧹 剔除 {int((~active).sum())} 个窗口内无K线的标的")
+        return panel.loc[:, active], last_bar[active]
+
+    def load_state(self):
+        """
+        读取持久化的滚动收盘价窗口
+
+        Returns:
+            (pd.DataFrame, pd.Series) | None: (收盘价宽表, 各标的最后一根真实K线日期)；
+            不存在或与当前配置不符时返回 None
+        """
+        path = self._state_path()
+        if not os.path.exists(path):
+            return None
+
+        try:
+            state = pd.read_pickle(path)
+        except Exception as e:
+            logger.warning(f"⚠️ 状态文件损坏，将重新建立: {e}")
+            return None
+
+        if state.get("key") != self._state_key() or "last_bar" not in state:
+            logger.info("ℹ️ 状态与当前数据库/周期配置不一致，将重新建立")
+            return None
+
+        closes = state["closes"]
+        return (closes, state["last_bar"]) if not closes.empty else None
+
+    def save_state(self, df_pivot: pd.DataFrame, last_bar: pd.Series):
+        """
+        持久化最近 ROLLING_STATE_ROWS 个交易日的收盘价（写临时文件后原子替换）
+
+        Args:
+            df_pivot: 已向前填充的收盘价宽表
+            last_bar: 各标的最后一根真实K线日期（见 last_bar_dates）
+        """
+        os.makedirs(self.config.FEATURE_STATE_DIR, exist_ok=True)
+        path = self._state_path()
+        tmp_path = path + ".tmp"
+
+        df_pivot, last_bar = self.drop_stale_columns(df_pivot, last_bar)
+        closes = df_pivot.iloc[-self.config.ROLLING_STATE_ROWS:].copy()
+        pd.to_pickle({"key": self._state_key(), "closes": closes, "last_bar": last_bar}, tmp_path)
+        os.replace(tmp_path, path)
+
+        logger.info(f"   💾 滚动状态已更新: {closes.shape[0]} 个交易日 × {closes.shape[1]} 个标的")
+
+    def reset_state(self):
+        """删除状态文件（下次增量时按窗口模式重建）"""
+        path = self._state_path()
+        if os.path.exists(path):
+            os.remove(path)
+
+    def changed_columns(self, closes: pd.DataFrame, fresh: pd.DataFrame) -> list:
+        """
+        状态与源数据在重叠交易日上收盘价不一致的标的（除权后前复权历史被整体重写）
+
+        Args:
+            closes: 状态中的收盘价宽表（已向前填充）
+            fresh: 重读的收盘价宽表（未向前填充，只比较有真实K线的格子）
+        """
+        dates = closes.index.intersection(fresh.index)
+        columns = closes.columns.intersection(fresh.columns)
+        if dates.empty or columns.empty:
+            return []
+        old = closes.loc[dates, columns].to_numpy(dtype=np.float64)
+        new = fresh.loc[dates, columns].to_numpy(dtype=np.float64)
+        both = ~np.isnan(old) & ~np.isnan(new)
+        differs = both & ~np.isclose(new, old, rtol=self.config.STATE_VERIFY_RTOL, atol=0.0)
+        return list(columns[differs.any(axis=0)])
+
+    def reload_columns(self, base: pd.DataFrame, last_bar: pd.Series, symbols: list):
+        """
+        从源数据重新载入指定标的（覆盖状态的全部交易日），替换状态中对应的列
+
+        Returns:
+            (宽表, 最后K线日期)
+        """
+        logger.info(f"   🔄 {len(symbols)} 个标的历史收盘价已变化（除权重算），从源数据重新载入")
+        start = min(base.index[0], pd.Timestamp(self.window_start())).strftime("%Y-%m-%d")
+        reloaded = self.load_close_panel(start_date=start, fill=False, symbols=symbols)
+        last_bar = last_bar.drop(symbols, errors='ignore')
+        base = base.drop(columns=symbols)
+        if reloaded.empty:
+            return base, last_bar
+        last_bar = pd.concat([last_bar, self.last_bar_dates(reloaded)])
+        # 先在自身日历上向前填充，再对齐到状态日历（与窗口模式的填充结果一致）
+        reloaded = reloaded.reindex(reloaded.index.union(base.index)).ffill().reindex(base.index)
+        return pd.concat([base, reloaded], axis=1).sort_index(axis=1), last_bar
+
+    def run_incremental(self, closes: pd.DataFrame, last_bar: pd.Series) -> bool:
+        """
+        基于持久化窗口只计算新到达的日期
+
+        每次重读最近 SAVE_RECENT_DAYS 天及状态之后的源数据并覆盖窗口尾部，
+        以吸收迟到或修正的行情；更早的回看数据直接取自状态。
+        重读区间至少覆盖状态最后 STATE_VERIFY_ROWS 个交易日，收盘价与状态不一致的标的
+        （除权后前复权历史被整体重写）整列从源数据重新载入
+
+        Args:
+            closes: load_state() 返回的收盘价宽表
+            last_bar: load_state() 返回的各标的最后一根真实K线日期
+
+        Returns:
+            bool: False 表示状态不足以覆盖最长周期，需要按窗口模式重建
+        """
+        recent_start = pd.Timestamp(datetime.now().date()) - timedelta(days=self.config.SAVE_RECENT_DAYS)
+        tail_start = min(closes.index[-1] + timedelta(days=1), recent_start)
+
+        base = closes[closes.index < tail_start]
+        if len(base) < max(self.periods):
+            logger.info(f"ℹ️ 状态窗口不足 {max(self.periods)} 个交易日")
+            return False
+
+        logger.info(f"📅 滚动状态: {base.index[0].date()} 至 {base.index[-1].date()}，"
+                    f"增量区间: {tail_start.date()} 至今")
+
+        verify_start = min(tail_start, closes.index[-max(1, min(len(closes), self.config.STATE_VERIFY_ROWS))])
+        fresh = self.load_close_panel(start_date=verify_start.strftime("%Y-%m-%d"), fill=False)
+        changed = self.changed_columns(closes, fresh) if not fresh.empty else []
+        if changed:
+            base, last_bar = self.reload_columns(base, last_bar, changed)
+        fresh = fresh[fresh.index >= tail_start] if not fresh.empty else fresh
+        if fresh.empty:
+            logger.info("⚠️ 无最新数据需要更新（可能是假期）")
+            if changed:
+                self.save_state(base, last_bar)
+            return True
+
+        last_bar = self.last_bar_dates(fresh).combine_first(last_bar)
+        columns = base.columns.union(fresh.columns)
+        panel = pd.concat([base.reindex(columns=columns), fresh.reindex(columns=columns)]).ffill()
+        panel, last_bar = self.drop_stale_columns(panel, last_bar)
+
+        result = self.features_from_panel(panel, start=len(base))
+        if result.empty:
+            logger.info("⚠️ 无最新日期数据需要更新")
+        else:
+            logger.info(f"📅 捕获更新日期: {result['trade_date'].unique()}")
+            self.save_to_db(result, mode='append')
+
+        self.save_state(panel, last_bar)
+        return True
+
     def save_to_db(self, df: pd.DataFrame, mode: str = 'append'):
         """
         保存数据到数据库（幂等性）
@@ -254,18 +489,15 @@ class BaseFeatureCalculator(ABC):
         logger.info(f"💾 正在保存到 {self.target_table} ({len(df)} 行)...")
 
         try:
-            # 幂等性删除：删除当天的数据
+            # 统一日期格式（YYYY-MM-DD 文本，与索引和区间条件一致）
+            df = normalize_date_column(df.copy())
+
+            # 幂等性删除：删除当天的数据（半开区间走日期索引，兼容迁移前带时间戳的旧数据）
             if mode == 'append':
-                dates = df['trade_date'].unique()
-                date_strs = [pd.to_datetime(d).strftime('%Y-%m-%d') for d in dates]
-                if date_strs:
+                bounds = day_bounds_list(df['trade_date'].unique())
+                if bounds:
                     with self.engine.begin() as conn:
-                        for date_str in date_strs:
-                            # 使用 LIKE 匹配日期（处理带时间戳的日期）
-                            conn.execute(text(f"""
-                                DELETE FROM {self.target_table}
-                                WHERE trade_date LIKE '{date_str}%'
-                            """))
+                        conn.execute(text(f"DELETE FROM {self.target_table} WHERE {DAY_CONDITION}"), bounds)
 
             # 去除DataFrame内部的重复记录（保留最后一条）
             original_len = len(df)
@@ -322,17 +554,22 @@ class BaseFeatureCalculator(ABC):
             logger.info(f"📅 数据范围: {cutoff_date} 至今")
 
             # 4. 加载数据
-            df = self.load_data(start_date=cutoff_date)
+            df_pivot = self.load_close_panel(start_date=cutoff_date, fill=False)
 
-            if df.empty:
+            if df_pivot.empty:
                 logger.warning("⚠️ 数据为空，跳过计算")
                 return
+            last_bar = self.last_bar_dates(df_pivot)
+            df_pivot = df_pivot.ffill()
 
             # 5. 计算因子
-            result = self.compute_features(df)
+            logger.info("🧮 开始计算RPS因子...")
+            result = self.features_from_panel(df_pivot)
 
-            # 6. 保存
+            # 6. 保存（同时重建增量状态）
             self.save_to_db(result, mode='append')
+            if self.config.USE_ROLLING_STATE:
+                self.save_state(df_pivot, last_bar)
 
             cost = time.time() - start_time
             logger.info(f"✅ 全量任务完成！耗时: {cost:.1f}秒")
@@ -345,6 +582,9 @@ class BaseFeatureCalculator(ABC):
         """
         【增量模式】只算最新几天
 
+        启用滚动状态时只读取新日期的行情，计算量与新增日期数成正比；
+        状态缺失或失效时按 INCREMENTAL_WINDOW_DAYS 窗口计算并建立状态
+
         用途：
         - 每日定时任务
         - 补充缺失数据
@@ -359,24 +599,34 @@ class BaseFeatureCalculator(ABC):
             # 1. 初始化表
             self._init_table()
 
-            # 2. 确定增量窗口
-            cutoff_date = (
-                datetime.now() - timedelta(days=self.config.INCREMENTAL_WINDOW_DAYS)
-            ).strftime("%Y-%m-%d")
+            # 2. 优先使用滚动状态
+            if self.config.USE_ROLLING_STATE:
+                state = self.load_state()
+                if state is not None and self.run_incremental(*state):
+                    cost = time.time() - start_time
+                    logger.info(f"✅ 增量任务完成！耗时: {cost:.1f}秒")
+                    return
+                logger.info("ℹ️ 无可用滚动状态，按窗口模式计算并建立状态")
+
+            # 3. 确定增量窗口
+            cutoff_date = self.window_start()
 
             logger.info(f"📅 增量窗口: {cutoff_date} 至今")
 
-            # 3. 加载滑动窗口数据
-            df = self.load_data(start_date=cutoff_date)
+            # 4. 加载滑动窗口数据
+            df_pivot = self.load_close_panel(start_date=cutoff_date, fill=False)
 
-            if df.empty:
+            if df_pivot.empty:
                 logger.info("⚠️ 无最新数据需要更新（可能是假期）")
                 return
+            last_bar = self.last_bar_dates(df_pivot)
+            df_pivot = df_pivot.ffill()
 
-            # 4. 计算
-            result_full = self.compute_features(df)
+            # 5. 计算
+            logger.info("🧮 开始计算RPS因子...")
+            result_full = self.features_from_panel(df_pivot)
 
-            # 5. 截取最近几天
+            # 6. 截取最近几天
             target_date_threshold = (
                 datetime.now() - timedelta(days=self.config.SAVE_RECENT_DAYS)
             )
@@ -384,12 +634,15 @@ class BaseFeatureCalculator(ABC):
 
             if result_daily.empty:
                 logger.info("⚠️ 无最新日期数据需要更新")
-                return
+            else:
+                logger.info(f"📅 捕获更新日期: {result_daily['trade_date'].unique()}")
 
-            logger.info(f"📅 捕获更新日期: {result_daily['trade_date'].unique()}")
+                # 7. 保存
+                self.save_to_db(result_daily, mode='append')
 
-            # 6. 保存
-            self.save_to_db(result_daily, mode='append')
+            # 8. 建立增量状态
+            if self.config.USE_ROLLING_STATE:
+                self.save_state(df_pivot, last_bar)
 
             cost = time.time() - start_time
             logger.info(f"✅ 增量任务完成！耗时: {cost:.1f}秒")
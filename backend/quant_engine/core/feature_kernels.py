@@ -0,0 +1,116 @@
+"""
+EvoAlpha OS - 因子计算内核（NumPy）
+在连续数组上一次性计算所有周期的涨幅与RPS，并一次性展开为长表，
+避免逐周期 stack / set_index / concat 带来的开销和内存峰值
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def pct_rank(values: np.ndarray) -> np.ndarray:
+    """
+    按行计算百分比排名（与 DataFrame.rank(axis=1, pct=True, method='min') 一致）
+
+    Args:
+        values: 二维数组（行 = 日期，列 = 标的），NaN 不参与排名
+
+    Returns:
+        np.ndarray: 排名百分比（0-1]，NaN 位置保持 NaN
+    """
+    rows, cols = values.shape
+    if cols == 0:
+        return np.empty_like(values)
+
+    order = np.argsort(values, axis=1, kind='stable')  # NaN 排在最后
+    sorted_vals = np.take_along_axis(values, order, axis=1)
+
+    # 并列值取最小名次：每段相同值的起始位置向右传播
+    positions = np.broadcast_to(np.arange(cols), (rows, cols))
+    starts = np.ones((rows, cols), dtype=bool)
+    starts[:, 1:] = sorted_vals[:, 1:] != sorted_vals[:, :-1]
+    min_pos = np.maximum.accumulate(np.where(starts, positions, 0), axis=1)
+
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=1, keepdims=True)
+
+    ranks = np.empty_like(values)
+    np.put_along_axis(ranks, order, (min_pos + 1).astype(values.dtype), axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ranks /= counts
+    ranks[~valid] = np.nan
+    return ranks
+
+
+def compute_feature_cube(closes: np.ndarray, periods: list, start: int = 0,
+                         dtype=np.float64) -> np.ndarray:
+    """
+    计算所有周期的涨幅与RPS
+
+    Args:
+        closes: 收盘价宽表数组（日期 × 标的），已向前填充
+        periods: 周期列表
+        start: 只计算第 start 行（含）之后的日期，之前的行仅作为回看窗口
+        dtype: 计算精度（np.float64 / np.float32）
+
+    Returns:
+        np.ndarray: 形状 (日期数 - start, 标的数, 2 × 周期数)，
+                    第三维按 chg_p1, rps_p1, chg_p2, rps_p2, ... 排列
+    """
+    closes = np.ascontiguousarray(closes, dtype=dtype)
+    total, entities = closes.shape
+    out_rows = max(total - start, 0)
+
+    cube = np.full((out_rows, entities, 2 * len(periods)), np.nan, dtype=dtype)
+    if out_rows == 0:
+        return cube
+
+    current = closes[start:]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for i, period in enumerate(periods):
+            # 涨幅：close[t] / close[t - period] - 1（回看不足的行保持 NaN）
+            first = max(period - start, 0)
+            if first >= out_rows:
+                continue
+            chg = cube[:, :, 2 * i]
+            chg[first:] = current[first:] / closes[start + first - period: total - period] - 1
+
+            # RPS（排名百分比 0-100）
+            cube[:, :, 2 * i + 1] = pct_rank(chg) * 100
+
+    return cube
+
+
+def cube_to_long(cube: np.ndarray, dates, entities, entity_column: str, periods: list) -> pd.DataFrame:
+    """
+    把因子立方体一次性展开为长表（标的, 日期, chg_x, rps_x, ...），
+    只保留至少有一个因子非空的 (标的, 日期)
+
+    Args:
+        cube: compute_feature_cube 的结果
+        dates: 与 cube 第一维对应的日期
+        entities: 与 cube 第二维对应的标的
+        entity_column: 标的列名
+        periods: 周期列表
+
+    Returns:
+        pd.DataFrame: 长表（chg 保留4位小数，rps 保留2位小数，float64）
+    """
+    columns = []
+    for period in periods:
+        columns.append(f'chg_{period}')
+        columns.append(f'rps_{period}')
+
+    # 按 (标的, 日期) 顺序展开
+    by_entity = cube.transpose(1, 0, 2)
+    mask = ~np.isnan(by_entity).all(axis=2)
+    entity_idx, date_idx = np.nonzero(mask)
+
+    values = by_entity[mask].astype(np.float64)
+    values[:, 0::2] = np.round(values[:, 0::2], 4)
+    values[:, 1::2] = np.round(values[:, 1::2], 2)
+
+    df = pd.DataFrame(values, columns=columns)
+    df.insert(0, 'trade_date', np.asarray(dates)[date_idx])
+    df.insert(0, entity_column, np.asarray(entities, dtype=object)[entity_idx])
+    return df
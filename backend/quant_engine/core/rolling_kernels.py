@@ -0,0 +1,200 @@
+"""
+EvoAlpha OS - 滚动窗口内核（NumPy，O(n)）
+为 TdxFuncs / TdxPanel 提供不依赖 rolling().apply(python函数) 的实现：
+- 滚动最高/最低点位置（HHVBARS / LLVBARS）：分块前缀/后缀扫描（van Herk / Gil-Werman），
+  每个元素常数次数组运算，等价于单调队列但可对整块二维数组向量化
+- 创新高后的最大回撤：每个日期都可计算（不再只有最后一天）
+- COUNT / EVERY：基于累加和
+
+所有函数第 0 维为时间，支持一维（单只）或二维（日期 × 标的）数组
+"""
+
+import numpy as np
+
+
+def _as_2d(values):
+    arr = np.asarray(values, dtype=float)
+    return (arr[:, None], True) if arr.ndim == 1 else (arr, False)
+
+
+def _window_nan_count(arr: np.ndarray, n: int) -> np.ndarray:
+    """每个位置向前 n 行（含当前）内的 NaN 个数（不足 n 行时按已有行计）"""
+    cum = np.cumsum(np.isnan(arr), axis=0)
+    out = cum.copy()
+    out[n:] -= cum[:-n]
+    return out
+
+
+def rolling_argmax(values, n: int):
+    """
+    滚动窗口 [i-n+1, i] 内最大值的位置（并列取最早出现的位置，与 np.argmax 一致）
+
+    NaN 不参与比较；前 n-1 行按已有数据的部分窗口计算；窗口全为 NaN 时位置为 -1
+
+    Args:
+        values: 一维或二维数组（第 0 维为时间）
+        n: 窗口长度
+
+    Returns:
+        (idx, vmax): 最大值所在行号（int 数组）与最大值（窗口全为 NaN 时为 -inf）
+    """
+    if n < 1:
+        raise ValueError("窗口长度必须 >= 1")
+    arr, squeeze = _as_2d(values)
+    rows, cols = arr.shape
+    if rows == 0:
+        empty = np.empty((0, cols))
+        return (empty.astype(int)[:, 0], empty[:, 0]) if squeeze else (empty.astype(int), empty)
+
+    # 前补 n-1 行 -inf，使每个窗口都完整；再补齐到 n 的整数倍后按块重排
+    pad = n - 1
+    blocks = -(-(rows + pad) // n)
+    buf = np.full((blocks * n, cols), -np.inf)
+    buf[pad:pad + rows] = np.where(np.isnan(arr), -np.inf, arr)
+    shaped = buf.reshape(blocks, n, cols)
+    position = np.arange(blocks * n).reshape(blocks, n, 1)
+
+    # 块内前缀最大值及其最早位置：只有严格大于此前最大值时才更新位置
+    prefix_max = np.maximum.accumulate(shaped, axis=1)
+    new_high = np.ones(shaped.shape, dtype=bool)
+    new_high[:, 1:] = shaped[:, 1:] > prefix_max[:, :-1]
+    prefix_idx = np.maximum.accumulate(np.where(new_high, position, -1), axis=1)
+
+    # 块内后缀最大值及其最早位置：从右往左，不小于右侧最大值时更新（并列取更早）
+    suffix_max = np.maximum.accumulate(shaped[:, ::-1], axis=1)[:, ::-1]
+    new_high = np.ones(shaped.shape, dtype=bool)
+    new_high[:, :-1] = shaped[:, :-1] >= suffix_max[:, 1:]
+    suffix_idx = np.minimum.accumulate(np.where(new_high, position, blocks * n)[:, ::-1], axis=1)[:, ::-1]
+
+    prefix_max = prefix_max.reshape(-1, cols)
+    prefix_idx = prefix_idx.reshape(-1, cols)
+    suffix_max = suffix_max.reshape(-1, cols)
+    suffix_idx = suffix_idx.reshape(-1, cols)
+
+    # 窗口 [s, e] = s 所在块的后缀 + e 所在块的前缀
+    ends = np.arange(pad, pad + rows)
+    starts = ends - pad
+    left_max, left_idx = suffix_max[starts], suffix_idx[starts]
+    right_max, right_idx = prefix_max[ends], prefix_idx[ends]
+
+    take_left = left_max >= right_max
+    vmax = np.where(take_left, left_max, right_max)
+    idx = np.where(take_left, left_idx, right_idx) - pad
+    idx[np.isneginf(vmax)] = -1
+
+    if squeeze:
+        return idx[:, 0], vmax[:, 0]
+    return idx, vmax
+
+
+def rolling_argmin(values, n: int):
+    """滚动窗口内最小值的位置（并列取最早），返回 (idx, vmin)，语义同 rolling_argmax"""
+    idx, vmax = rolling_argmax(-np.asarray(values, dtype=float), n)
+    return idx, -vmax
+
+
+def _bars_since(values, n: int, argfunc) -> np.ndarray:
+    arr = np.asarray(values, dtype=float)
+    idx, _ = argfunc(arr, n)
+    now = np.arange(len(arr)).reshape((-1,) + (1,) * (arr.ndim - 1))
+    dist = (now - idx).astype(float)
+
+    # 与 rolling(n).apply(raw=True) 一致：窗口不满或含 NaN 时为 NaN
+    dist[_window_nan_count(arr, n) > 0] = np.nan
+    dist[:n - 1] = np.nan
+    return dist
+
+
+def bars_since_high(values, n: int) -> np.ndarray:
+    """HHVBARS：N周期内最高值到当前的周期数"""
+    return _bars_since(values, n, rolling_argmax)
+
+
+def bars_since_low(values, n: int) -> np.ndarray:
+    """LLVBARS：N周期内最低值到当前的周期数"""
+    return _bars_since(values, n, rolling_argmin)
+
+
+def rolling_count(condition, n: int) -> np.ndarray:
+    """
+    COUNT：N周期内条件成立的次数（与 condition.rolling(n).sum() 一致）
+
+    前 n-1 行或窗口内含 NaN 时为 NaN
+    """
+    arr = np.asarray(condition, dtype=float)
+    cum = np.cumsum(np.nan_to_num(arr, nan=0.0), axis=0)
+    out = cum.copy()
+    out[n:] -= cum[:-n]
+    out[_window_nan_count(arr, n) > 0] = np.nan
+    out[:n - 1] = np.nan
+    return out
+
+
+def rolling_every(condition, n: int) -> np.ndarray:
+    """EVERY：N周期内条件一直成立"""
+    return rolling_count(condition, n) == n
+
+
+def _range_min(values: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """
+    二维区间最小值查询：out[i, j] = min(values[lo[i, j]:hi[i, j] + 1, j])
+
+    逐层倍增（稀疏表），同一时刻只保留一层，内存 O(rows × cols)
+    """
+    rows, cols = values.shape
+    length = np.maximum(hi - lo + 1, 1)
+    level_of = np.floor(np.log2(length)).astype(int)
+    col_idx = np.broadcast_to(np.arange(cols), values.shape)
+
+    out = np.full(values.shape, np.inf)
+    level = values
+    k = 0
+    while True:
+        sel = level_of == k
+        if sel.any():
+            span = 1 << k
+            r_lo, r_hi, c = lo[sel], hi[sel] - span + 1, col_idx[sel]
+            out[sel] = np.minimum(level[r_lo, c], level[r_hi, c])
+        span = 1 << k
+        if span * 2 > rows:
+            break
+        nxt = level.copy()
+        nxt[:-span] = np.minimum(level[:-span], level[span:])
+        level = nxt
+        k += 1
+    return out
+
+
+def rolling_drawdown(high, low, window: int = 120) -> np.ndarray:
+    """
+    创新高后的最大回撤（每个日期一个值，最后一行与 calc_dynamic_drawdown 一致）
+
+    对每个位置 i，取窗口 [i-window+1, i]（开头不足时取已有数据）内最高价首次出现的位置，
+    回撤 = (最高价 - 此后区间内最低价) / 最高价；最高点即当日或最高价为 0 时为 0
+
+    NaN 不参与计算（可用于右对齐的面板数据），窗口全为 NaN 时为 NaN
+
+    Args:
+        high: 最高价，一维或二维数组
+        low: 最低价，形状同 high
+        window: 窗口长度
+
+    Returns:
+        np.ndarray: 回撤比例
+    """
+    h, squeeze = _as_2d(high)
+    l, _ = _as_2d(low)
+    rows = h.shape[0]
+
+    idx, hmax = rolling_argmax(h, window)
+    now = np.broadcast_to(np.arange(rows)[:, None], h.shape)
+    valid = idx >= 0
+    lo = np.where(valid, idx, now)
+
+    low_after = _range_min(np.where(np.isnan(l), np.inf, l), lo, now)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        dd = (hmax - low_after) / hmax
+
+    dd[(idx == now) | (hmax == 0)] = 0.0
+    dd[~valid] = np.nan
+    return dd[:, 0] if squeeze else dd
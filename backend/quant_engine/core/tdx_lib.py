@@ -2,6 +2,11 @@
 
 import pandas as pd
 import numpy as np
+from pandas.api.indexers import BaseIndexer
+
+from quant_engine.core.rolling_kernels import (
+    bars_since_high, bars_since_low, rolling_count, rolling_drawdown
+)
 
 class TdxFuncs:
     """
@@ -41,23 +46,155 @@ class TdxFuncs:
 
     def COUNT(self, condition, n):
         """统计N天中满足条件的天数"""
-        return condition.rolling(n).sum()
+        return pd.Series(rolling_count(condition, n), index=condition.index)
 
     def EVERY(self, condition, n):
         """一直满足: N天内条件一直成立"""
-        return condition.rolling(n).sum() == n
+        return self.COUNT(condition, n) == n
 
     def HHVBARS(self, series, n):
         """N周期内最高价到当前的周期数"""
-        def _argmax_dist(x):
-            return len(x) - 1 - np.argmax(x)
-        return series.rolling(n).apply(_argmax_dist, raw=True)
-        
+        return pd.Series(bars_since_high(series, n), index=series.index)
+
     def LLVBARS(self, series, n):
         """N周期内最低价到当前的周期数"""
-        def _argmin_dist(x):
-            return len(x) - 1 - np.argmin(x)
-        return series.rolling(n).apply(_argmin_dist, raw=True)
+        return pd.Series(bars_since_low(series, n), index=series.index)
+
+    def DRAWDOWN(self, window=120):
+        """每日的“创新高后的最大回撤”，最后一个值等于 calc_dynamic_drawdown(H, L, window)"""
+        return pd.Series(rolling_drawdown(self.H, self.L, window), index=self.H.index)
+
+
+class _ColumnWindowIndexer(BaseIndexer):
+    """
+    把 (行 × 列) 面板按列首尾相接成一维序列后的滚动窗口：窗口不跨列，
+    每列开头处 pandas 会重置累加状态，结果与对每列单独 rolling 逐位相同
+    """
+    def get_window_bounds(self, num_values=0, min_periods=None, center=None, closed=None, step=None):
+        pos = np.arange(num_values, dtype=np.int64)
+        row = pos % self.rows
+        end = pos + 1
+        start = pos - np.minimum(row, self.window_size - 1)
+        return start, end
+
+
+class TdxPanel:
+    """
+    通达信公式的面板版本：一次对整个股票池计算（行 = K线，列 = 标的）
+    传入长表 df，必须包含: symbol, trade_date, close, open, high, low, volume，turnover_rate 可选
+
+    对齐方式 align:
+    - 'bar'（默认）: 每个标的按自身K线序号右对齐，最后一行即各标的最新一根K线。
+      停牌缺口不占用窗口，结果与逐只 TdxFuncs(df).XXX(...).iloc[-1] 完全一致
+    - 'date': 按交易日对齐，停牌日为 NaN
+    所有函数返回与输入同形状的 DataFrame
+    """
+    def __init__(self, df, symbol_col='symbol', date_col='trade_date', align='bar'):
+        if align not in ('bar', 'date'):
+            raise ValueError(f"未知对齐方式: {align}")
+        self.align = align
+
+        df = df.sort_values([symbol_col, date_col], kind='stable')
+        self.symbols = pd.Index(df[symbol_col].unique(), name=symbol_col)
+        col_idx = self.symbols.get_indexer(df[symbol_col])
+
+        if align == 'bar':
+            # 每只标的的K线数，右对齐到同一长度
+            counts = np.bincount(col_idx, minlength=len(self.symbols))
+            rows_total = int(counts.max()) if len(counts) else 0
+            bar_no = df.groupby(symbol_col, sort=False).cumcount().to_numpy()
+            row_idx = rows_total - counts[col_idx] + bar_no
+            index = pd.RangeIndex(rows_total)
+        else:
+            index = pd.Index(np.sort(df[date_col].unique()), name=date_col)
+            row_idx = index.get_indexer(df[date_col])
+            rows_total = len(index)
+
+        self.index = index
+        self._rows = row_idx
+        self._cols = col_idx
+
+        self.C = self._place(df['close'].astype(float))
+        self.H = self._place(df['high'].astype(float))
+        self.L = self._place(df['low'].astype(float))
+        self.O = self._place(df['open'].astype(float))
+        self.V = self._place(df['volume'].astype(float))
+
+        # 换手率容错处理
+        if 'turnover_rate' in df.columns:
+            self.TURNOVER = self._place(df['turnover_rate'].fillna(0).astype(float))
+        else:
+            self.TURNOVER = self._place(pd.Series(0.0, index=df.index))
+
+        # 交易日期与每个位置在该标的自身序列中的序号（0 起，无K线处为 NaN）
+        self.DATES = self._place(df[date_col], dtype=object)
+        valid = self.DATES.notna().to_numpy()
+        self._bars = np.where(valid, np.cumsum(valid, axis=0) - 1, -1)
+        self.BARS = self._frame(np.where(valid, self._bars, np.nan), self.C)
+        self.COUNTS = pd.Series(valid.sum(axis=0), index=self.symbols)
+
+    def _place(self, values, dtype=float):
+        """把长表中的一列放进 (行 × 标的) 的二维数组"""
+        fill = np.nan if dtype is float else None
+        arr = np.full((len(self.index), len(self.symbols)), fill, dtype=dtype)
+        arr[self._rows, self._cols] = values.to_numpy()
+        return pd.DataFrame(arr, index=self.index, columns=self.symbols)
+
+    def _warmup(self, frame, n):
+        """标的自身K线不足 n 根的位置置为 NaN（与逐只 rolling 的 min_periods 一致）"""
+        return self._frame(np.where(self._bars >= n - 1, frame.to_numpy(), np.nan), frame)
+
+    def last(self, frame):
+        """每个标的最后一行的值（Series，索引为标的）"""
+        return frame.iloc[-1]
+
+    def REF(self, frame, n):
+        """引用N天前的数据"""
+        return frame.shift(n)
+
+    def _rolling(self, frame, n, how):
+        """对所有列一次性滚动计算（一次 Cython 调用，结果为单块 DataFrame）"""
+        rows, cols = frame.shape
+        flat = pd.Series(frame.to_numpy(dtype=float).ravel(order='F'))
+        indexer = _ColumnWindowIndexer(window_size=n, rows=rows)
+        result = getattr(flat.rolling(indexer, min_periods=n), how)()
+        return self._frame(result.to_numpy().reshape((rows, cols), order='F'), frame)
+
+    def HHV(self, frame, n):
+        """N天内最高值"""
+        return self._rolling(frame, n, 'max')
+
+    def LLV(self, frame, n):
+        """N天内最低值"""
+        return self._rolling(frame, n, 'min')
+
+    def MA(self, frame, n):
+        """N日简单移动平均"""
+        return self._rolling(frame, n, 'mean')
+
+    def COUNT(self, condition, n):
+        """统计N天中满足条件的天数"""
+        return self._warmup(self._frame(rolling_count(condition, n), condition), n)
+
+    def EVERY(self, condition, n):
+        """一直满足: N天内条件一直成立"""
+        return self.COUNT(condition, n) == n
+
+    def HHVBARS(self, frame, n):
+        """N周期内最高价到当前的周期数"""
+        return self._frame(bars_since_high(frame, n), frame)
+
+    def LLVBARS(self, frame, n):
+        """N周期内最低价到当前的周期数"""
+        return self._frame(bars_since_low(frame, n), frame)
+
+    def DRAWDOWN(self, window=120):
+        """每个位置的“创新高后的最大回撤”，最后一行等于逐只 calc_dynamic_drawdown(H, L, window)"""
+        return self._frame(rolling_drawdown(self.H, self.L, window), self.H)
+
+    @staticmethod
+    def _frame(values, like):
+        return pd.DataFrame(values, index=like.index, columns=like.columns)
 
 # ==========================================
 # 👇 关键：这个函数必须在类定义外面
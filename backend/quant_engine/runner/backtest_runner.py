@@ -0,0 +1,136 @@
+"""
+量化引擎 - 回测运行器
+读取已入库的策略预选结果，向量化回测并输出核心指标
+"""
+import sys
+import os
+import time
+import argparse
+
+# 环境路径适配
+current_dir = os.path.dirname(os.path.abspath(__file__))
+quant_engine_dir = os.path.dirname(current_dir)
+backend_dir = os.path.dirname(quant_engine_dir)
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from quant_engine.common import setup_quant_path, setup_logger
+
+# 路径初始化
+setup_quant_path()
+
+# Logger配置
+logger = setup_logger(__name__)
+
+
+# ================= 策略信号注册表（命令行名称 -> quant_preselect_results.strategy_name） =================
+BACKTEST_STRATEGIES = {
+    'mrgc': 'mrgc_v1',
+    'resonance': 'sector_resonance_v1',
+}
+
+
+class BacktestRunner:
+    """回测运行器"""
+
+    def __init__(self, engine=None):
+        if engine is None:
+            from app.core.database import get_engine
+            engine = get_engine()
+        self.engine = engine
+
+    def run(self, strategy, start_date, end_date, rules=None):
+        """
+        回测指定策略
+
+        Args:
+            strategy: 策略名称（'mrgc' / 'resonance'，或直接使用 strategy_name）
+            start_date: 开始日期 (YYYY-MM-DD)
+            end_date: 结束日期 (YYYY-MM-DD)
+            rules: BacktestRules
+
+        Returns:
+            dict: {'success': bool, 'result': BacktestResult, 'elapsed': 秒}
+        """
+        from quant_engine.backtest import BacktestRules, VectorBacktester, load_signals, load_price_panel
+
+        strategy_name = BACKTEST_STRATEGIES.get(strategy, strategy)
+        rules = rules or BacktestRules()
+        start_time = time.time()
+
+        logger.info("=" * 80)
+        logger.info(f"🧪 开始回测: {strategy_name}  {start_date} ~ {end_date}")
+        logger.info(f"📋 规则: {rules}")
+        logger.info("=" * 80)
+
+        signals = load_signals(self.engine, strategy_name, start_date, end_date)
+        if signals.empty:
+            logger.warning(f"⚠️ {strategy_name} 在区间内没有信号，请先运行策略（可用 strategy_runner --start/--end 批量生成）")
+            return {'success': False, 'error': '没有信号'}
+        logger.info(f"   ✅ 信号: {len(signals)} 条, {signals['symbol'].nunique()} 个标的")
+
+        open_df, close_df = load_price_panel(self.engine, signals['symbol'].unique(), start_date, end_date)
+        if open_df.empty:
+            logger.warning("⚠️ 区间内没有价格数据")
+            return {'success': False, 'error': '没有价格数据'}
+
+        result = VectorBacktester(open_df, close_df, rules).run(signals)
+        elapsed = time.time() - start_time
+
+        print(result.report(strategy_name))
+        logger.info(f"✅ 回测完成！耗时: {elapsed:.1f}秒")
+        return {'success': True, 'result': result, 'elapsed': elapsed}
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(
+        description="EvoAlpha 量化引擎 - 回测运行器",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例:
+  # MRGC 策略回测（默认：8% 止损，最长持有 20 个交易日，等权）
+  python -m quant_engine.runner.backtest_runner --strategy mrgc --start 2023-01-01 --end 2024-12-31
+
+  # 板块共振，按信号强度排名加权，最多 10 只持仓
+  python -m quant_engine.runner.backtest_runner -s resonance --start 2024-01-01 --end 2024-12-31 \\
+      --weighting rank --max-positions 10
+
+  # 导出逐笔交易
+  python -m quant_engine.runner.backtest_runner -s mrgc --start 2024-01-01 --end 2024-12-31 --trades trades.csv
+        """
+    )
+    parser.add_argument('--strategy', '-s', type=str, required=True,
+                        help=f"策略名称: {list(BACKTEST_STRATEGIES.keys())}")
+    parser.add_argument('--start', type=str, required=True, help='开始日期 (YYYY-MM-DD)')
+    parser.add_argument('--end', type=str, required=True, help='结束日期 (YYYY-MM-DD)')
+    parser.add_argument('--stop-loss', type=float, default=0.08, help='止损比例，0 表示不止损 (默认 0.08)')
+    parser.add_argument('--max-hold', type=int, default=20, help='最长持有交易日数 (默认 20)')
+    parser.add_argument('--weighting', default='equal', help='仓位分配方式: equal / rank (默认 equal)')
+    parser.add_argument('--max-positions', type=int, default=None, help='单只仓位上限 1/N（不足 N 只时部分空仓）')
+    parser.add_argument('--trades', type=str, default=None, help='逐笔交易导出 CSV 路径')
+    args = parser.parse_args()
+
+    # 回测依赖在解析参数之后才导入（--help 无需加载 numpy/pandas）
+    from quant_engine.backtest import BacktestRules
+
+    try:
+        rules = BacktestRules(
+            stop_loss=args.stop_loss or None,
+            max_hold_days=args.max_hold,
+            weighting=args.weighting,
+            max_positions=args.max_positions,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    outcome = BacktestRunner().run(args.strategy, args.start, args.end, rules)
+
+    if outcome.get('success') and args.trades:
+        outcome['result'].trades.to_csv(args.trades, index=False)
+        logger.info(f"💾 逐笔交易已导出: {args.trades}")
+
+    return 0 if outcome.get('success') else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -15,10 +15,7 @@ backend_dir = os.path.dirname(quant_engine_dir)
 if backend_dir not in sys.path:
     sys.path.insert(0, backend_dir)
 
-from quant_engine.common import setup_quant_path, setup_logger
-from quant_engine.calculators.stock_rps_calculator import StockRPSCalculator
-from quant_engine.calculators.sector_rps_calculator import SectorRPSCalculator
-from quant_engine.calculators.etf_rps_calculator import ETFRPSCalculator
+from quant_engine.common import setup_quant_path, setup_logger, import_string
 
 # 路径初始化
 setup_quant_path()
@@ -27,16 +24,26 @@ setup_quant_path()
 logger = setup_logger(__name__)
 
 
+# ================= 计算器注册表（名称 -> 计算器类路径，运行时才导入） =================
+CALCULATOR_REGISTRY = {
+    'stock': 'quant_engine.calculators.stock_rps_calculator:StockRPSCalculator',
+    'sector': 'quant_engine.calculators.sector_rps_calculator:SectorRPSCalculator',
+    'etf': 'quant_engine.calculators.etf_rps_calculator:ETFRPSCalculator',
+}
+
+
 class FeatureRunner:
     """因子计算运行器"""
 
     def __init__(self):
-        """初始化运行器"""
-        self.calculators = {
-            'stock': StockRPSCalculator(),
-            'sector': SectorRPSCalculator(),
-            'etf': ETFRPSCalculator()
-        }
+        """初始化运行器（计算器在首次运行时才导入并实例化）"""
+        self.calculators = {}
+
+    def get_calculator(self, name):
+        """获取计算器实例（按需创建并缓存）"""
+        if name not in self.calculators:
+            self.calculators[name] = import_string(CALCULATOR_REGISTRY[name])()
+        return self.calculators[name]
 
     def run(self, calculator_names=None, mode='daily'):
         """
@@ -54,13 +61,13 @@ class FeatureRunner:
         """
         # 确定要运行的计算器
         if calculator_names is None:
-            calculator_names = list(self.calculators.keys())
+            calculator_names = list(CALCULATOR_REGISTRY.keys())
 
         # 验证计算器名称
-        invalid_names = [name for name in calculator_names if name not in self.calculators]
+        invalid_names = [name for name in calculator_names if name not in CALCULATOR_REGISTRY]
         if invalid_names:
             logger.error(f"❌ 无效的计算器名称: {invalid_names}")
-            logger.info(f"   可用的计算器: {list(self.calculators.keys())}")
+            logger.info(f"   可用的计算器: {list(CALCULATOR_REGISTRY.keys())}")
             return {'success': False, 'error': f'无效的计算器名称: {invalid_names}'}
 
         # 执行计算
@@ -74,11 +81,11 @@ class FeatureRunner:
         logger.info("=" * 80)
 
         for name in calculator_names:
-            calculator = self.calculators[name]
             start_time = time.time()
 
             try:
                 logger.info(f"\n▶️ [{name.upper()}] 开始计算...")
+                calculator = self.get_calculator(name)
 
                 if mode == 'init':
                     calculator.run_init()
@@ -137,7 +144,7 @@ def main():
     parser.add_argument(
         '--calculators', '-c',
         nargs='+',
-        choices=['stock', 'sector', 'etf'],
+        choices=list(CALCULATOR_REGISTRY),
         help='指定要运行的计算器（默认运行所有）'
     )
 
@@ -0,0 +1,124 @@
+"""
+量化引擎 - 参数寻优运行器
+对策略阈值 / 持仓规则做网格搜索，多进程共享同一份价格与特征数据，输出按指标排名的参数表
+"""
+import sys
+import os
+import json
+import time
+import argparse
+
+# 环境路径适配
+current_dir = os.path.dirname(os.path.abspath(__file__))
+quant_engine_dir = os.path.dirname(current_dir)
+backend_dir = os.path.dirname(quant_engine_dir)
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from quant_engine.common import setup_quant_path, setup_logger
+
+# 路径初始化
+setup_quant_path()
+
+# Logger配置
+logger = setup_logger(__name__)
+
+
+def _mrgc_strategy():
+    from quant_engine.strategies.mrgc_strategy import MrgcStrategy
+    return MrgcStrategy()
+
+
+def _resonance_strategy():
+    from quant_engine.strategies.select_resonance import ResonanceStrategy
+    return ResonanceStrategy()
+
+
+# ================= 策略注册表（命令行名称 -> (策略工厂, 信号强度列, 默认网格)） =================
+OPTIMIZE_STRATEGIES = {
+    'mrgc': (_mrgc_strategy, 'rps_250', {
+        'turnover_max': [15, 25],
+        'dd120_max': [0.4, 0.5],
+        'close_high_min': [0.7, 0.8],
+        'xg2_rps': [95.99, 96.99, 97.99],
+        'stop_loss': [0.05, 0.08, 0.1],
+        'max_hold_days': [10, 20, 40],
+    }),
+    'resonance': (_resonance_strategy, 'stock_rps', {
+        'sector_rps_min': [85, 90, 95],
+        'stock_rps_min': [80, 85, 90, 95],
+        'stop_loss': [0.05, 0.08],
+        'max_hold_days': [10, 20],
+    }),
+}
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(
+        description="EvoAlpha 量化引擎 - 参数网格寻优",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例:
+  # MRGC 默认网格，8 进程，按夏普比率排名
+  python -m quant_engine.runner.optimize_runner -s mrgc --start 2023-01-01 --end 2024-12-31 --workers 8
+
+  # 自定义网格（策略阈值与 BacktestRules 参数可混合）
+  python -m quant_engine.runner.optimize_runner -s resonance --start 2024-01-01 --end 2024-12-31 \\
+      --grid '{"sector_rps_min": [85, 90], "stock_rps_min": [90, 95], "weighting": ["equal", "rank"]}'
+
+  # 按最大回撤升序排名并导出
+  python -m quant_engine.runner.optimize_runner -s mrgc --start 2024-01-01 --end 2024-12-31 \\
+      --sort-by max_drawdown --ascending --output grid.csv
+        """
+    )
+    parser.add_argument('--strategy', '-s', choices=list(OPTIMIZE_STRATEGIES), required=True, help='策略名称')
+    parser.add_argument('--start', type=str, required=True, help='开始日期 (YYYY-MM-DD)')
+    parser.add_argument('--end', type=str, required=True, help='结束日期 (YYYY-MM-DD)')
+    parser.add_argument('--grid', type=str, default=None, help='参数网格 JSON，默认使用策略内置网格')
+    parser.add_argument('--workers', type=int, default=None, help='进程数，默认 CPU 核数')
+    parser.add_argument('--sort-by', type=str, default='sharpe', help='排名指标 (默认 sharpe)')
+    parser.add_argument('--ascending', action='store_true', help='升序排名')
+    parser.add_argument('--top', type=int, default=20, help='显示前 N 组')
+    parser.add_argument('--output', type=str, default=None, help='完整结果导出 CSV 路径')
+    args = parser.parse_args()
+
+    # 回测依赖在解析参数之后才导入（--help 无需加载 numpy/pandas）
+    from quant_engine.backtest import BacktestRules, GridSearchOptimizer, load_price_panel
+
+    factory, score_col, default_grid = OPTIMIZE_STRATEGIES[args.strategy]
+    grid = json.loads(args.grid) if args.grid else default_grid
+    strategy = factory()
+    start_time = time.time()
+
+    logger.info("=" * 80)
+    logger.info(f"🔍 参数寻优: {strategy.strategy_name}  {args.start} ~ {args.end}")
+    logger.info("=" * 80)
+
+    # 1. 特征与价格只计算/加载一次
+    features = strategy.history_features(args.start, args.end)
+    if features.empty:
+        logger.error("❌ 区间内没有可用的特征数据")
+        return 1
+    logger.info(f"   ✅ 特征: {len(features)} 行")
+
+    open_df, close_df = load_price_panel(strategy.engine, features['symbol'].unique(), args.start, args.end)
+
+    # 2. 网格寻优
+    optimizer = GridSearchOptimizer(
+        features, type(strategy).signal_mask, open_df, close_df,
+        base_params=strategy.params, base_rules=BacktestRules(), score_col=score_col,
+    )
+    table = optimizer.run(grid, workers=args.workers, sort_by=args.sort_by, ascending=args.ascending)
+
+    print(table.head(args.top).to_string(index=False))
+    if args.output:
+        table.to_csv(args.output, index=False)
+        logger.info(f"💾 寻优结果已导出: {args.output}")
+
+    logger.info(f"✅ 完成！总耗时: {time.time() - start_time:.1f}秒")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
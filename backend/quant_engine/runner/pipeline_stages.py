@@ -0,0 +1,85 @@
+"""
+量化引擎 - 流水线阶段声明
+把因子计算 / 策略运行声明为阶段图（data_job.core.dag_executor.StageGraph）中的阶段，
+与采集阶段组成一张图：每个因子只等待自己依赖的行情表，而不是等全部采集结束
+
+    StockKline  ─> StockRPS ─> MRGC
+    SectorKline ─> SectorRPS
+    ETFKline    ─> ETFRPS
+"""
+
+# 计算器名称 -> (阶段名, 上游采集阶段, 预计耗时(分钟))
+FEATURE_STAGES = {
+    'stock': ('StockRPS', ['StockKline'], 10),
+    'sector': ('SectorRPS', ['SectorKline'], 2),
+    'etf': ('ETFRPS', ['ETFKline'], 2),
+}
+
+
+def feature_stage(feature_runner, name: str, mode: str = 'daily'):
+    """返回阶段函数：运行单个计算器，失败时抛出异常"""
+    def run():
+        result = feature_runner.run([name], mode=mode).get(name, {})
+        if not result.get('success'):
+            raise RuntimeError(result.get('error', f'计算器 {name} 失败'))
+    return run
+
+
+def strategy_stage(strategy_runner, strategy_name: str, trade_date=None):
+    """返回阶段函数：运行策略，失败时抛出异常"""
+    def run():
+        result = strategy_runner.run(strategy_name, trade_date)
+        if not result.get('success'):
+            raise RuntimeError(result.get('error', f'策略 {strategy_name} 失败'))
+    return run
+
+
+def add_feature_stages(graph, feature_runner, names=('stock', 'sector', 'etf'), deps=None, mode='daily'):
+    """
+    向阶段图追加因子计算阶段
+
+    因子阶段设置 allow_failed_deps：采集部分失败时仍用库中已有数据计算（与原串行流程一致）
+
+    Args:
+        graph: StageGraph
+        feature_runner: FeatureRunner 实例
+        names: 计算器名称
+        deps: 覆盖默认上游（如季度流程依赖 StockPool），None 使用 FEATURE_STAGES；不在图中的上游被忽略
+        mode: 'daily' / 'init'
+
+    Returns:
+        list: 追加的阶段名
+    """
+    added = []
+    for name in names:
+        stage_name, default_deps, estimate = FEATURE_STAGES[name]
+        upstream = default_deps if deps is None else deps
+        graph.add(
+            stage_name,
+            feature_stage(feature_runner, name, mode),
+            deps=[d for d in upstream if d in graph],
+            estimate=estimate,
+            description=f"{name} RPS",
+            allow_failed_deps=True,
+        )
+        added.append(stage_name)
+    return added
+
+
+def add_strategy_stage(graph, strategy_runner, strategy_name: str = 'mrgc', deps=('StockRPS',),
+                       trade_date=None, estimate: float = 2):
+    """
+    向阶段图追加策略阶段（上游因子失败时跳过，避免基于过期因子出信号）
+
+    Returns:
+        str: 阶段名
+    """
+    stage_name = strategy_name.upper()
+    graph.add(
+        stage_name,
+        strategy_stage(strategy_runner, strategy_name, trade_date),
+        deps=[d for d in deps if d in graph],
+        estimate=estimate,
+        description=f"{strategy_name} 策略",
+    )
+    return stage_name
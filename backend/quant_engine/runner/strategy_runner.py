@@ -1,6 +1,6 @@
 """
 量化引擎 - 策略运行器
-支持指定日期运行策略选股
+支持指定日期运行策略选股，或按日期区间批量选股（--start/--end）
 """
 import sys
 import os
@@ -15,8 +15,7 @@ backend_dir = os.path.dirname(quant_engine_dir)
 if backend_dir not in sys.path:
     sys.path.insert(0, backend_dir)
 
-from quant_engine.common import setup_quant_path, setup_logger
-from quant_engine.strategies.mrgc_strategy import MrgcStrategy
+from quant_engine.common import setup_quant_path, setup_logger, import_string
 
 # 路径初始化
 setup_quant_path()
@@ -25,9 +24,9 @@ setup_quant_path()
 logger = setup_logger(__name__)
 
 
-# ================= 策略注册表 =================
+# ================= 策略注册表（名称 -> (策略类路径, strategy_name)，运行时才导入） =================
 STRATEGY_REGISTRY = {
-    'mrgc': MrgcStrategy,
+    'mrgc': ('quant_engine.strategies.mrgc_strategy:MrgcStrategy', 'mrgc_v1'),
     # 未来可以在这里添加更多策略
     # 'oversold': OversoldStrategy,
     # 'breakout': BreakoutStrategy,
@@ -71,8 +70,7 @@ class StrategyRunner:
                 return {'success': False, 'error': '日期格式错误'}
 
         # 获取策略实例
-        StrategyClass = STRATEGY_REGISTRY[strategy_name]
-        strategy = StrategyClass()
+        strategy = self._create_strategy(strategy_name)
 
         # 执行策略
         start_time = time.time()
@@ -99,6 +97,68 @@ class StrategyRunner:
 
             return {'success': False, 'error': str(e), 'elapsed': elapsed}
 
+    def run_range(self, strategy_name, start_date, end_date=None):
+        """
+        按日期区间批量运行策略（K线/因子一次加载，逐交易日计算，一次写入）
+
+        Args:
+            strategy_name: 策略名称，如 'mrgc'
+            start_date: 开始日期 (YYYY-MM-DD)
+            end_date: 结束日期 (YYYY-MM-DD)，None表示最新交易日
+
+        Returns:
+            dict: 运行结果
+        """
+        if strategy_name not in STRATEGY_REGISTRY:
+            logger.error(f"❌ 未找到策略: {strategy_name}")
+            logger.info(f"   可用策略: {list(STRATEGY_REGISTRY.keys())}")
+            return {'success': False, 'error': f'策略不存在: {strategy_name}'}
+
+        if end_date is None:
+            end_date = self._get_latest_trade_date()[:10]
+            logger.info(f"📅 结束日期使用最新交易日: {end_date}")
+
+        try:
+            start = datetime.strptime(start_date, '%Y-%m-%d')
+            end = datetime.strptime(end_date, '%Y-%m-%d')
+        except ValueError:
+            logger.error(f"❌ 日期格式错误: {start_date} ~ {end_date}，应为 YYYY-MM-DD")
+            return {'success': False, 'error': '日期格式错误'}
+        if start > end:
+            logger.error(f"❌ 开始日期晚于结束日期: {start_date} > {end_date}")
+            return {'success': False, 'error': '日期区间错误'}
+
+        strategy = self._create_strategy(strategy_name)
+
+        start_time = time.time()
+
+        logger.info("=" * 80)
+        logger.info(f"🚀 开始区间批量选股")
+        logger.info(f"📋 策略名称: {strategy.strategy_name}")
+        logger.info(f"📅 选股区间: {start_date} ~ {end_date}")
+        logger.info("=" * 80)
+
+        try:
+            strategy.run_range(start_date, end_date)
+
+            elapsed = time.time() - start_time
+            logger.info(f"\n✅ 区间选股完成！耗时: {elapsed:.1f}秒")
+
+            return {'success': True, 'elapsed': elapsed}
+
+        except Exception as e:
+            elapsed = time.time() - start_time
+            logger.error(f"\n❌ 区间选股失败: {e}")
+            import traceback
+            traceback.print_exc()
+
+            return {'success': False, 'error': str(e), 'elapsed': elapsed}
+
+    def _create_strategy(self, strategy_name):
+        """导入并实例化策略"""
+        class_path, _ = STRATEGY_REGISTRY[strategy_name]
+        return import_string(class_path)()
+
     def _get_latest_trade_date(self):
         """获取数据库中最新的交易日期"""
         from app.core.database import get_engine
@@ -129,6 +189,9 @@ def main():
   # 运行MRGC策略（指定日期）
   python -m quant_engine.runner.strategy_runner --strategy mrgc --date 2026-01-19
 
+  # 区间批量选股（一次加载，逐日计算）
+  python -m quant_engine.runner.strategy_runner --strategy mrgc --start 2025-10-01 --end 2025-12-31
+
   # 列出所有可用策略
   python -m quant_engine.runner.strategy_runner --list
 
@@ -149,6 +212,18 @@ def main():
         help='选股日期 (YYYY-MM-DD)，默认为最新交易日'
     )
 
+    parser.add_argument(
+        '--start',
+        type=str,
+        help='区间开始日期 (YYYY-MM-DD)，与 --end 配合批量选股'
+    )
+
+    parser.add_argument(
+        '--end',
+        type=str,
+        help='区间结束日期 (YYYY-MM-DD)，默认为最新交易日'
+    )
+
     parser.add_argument(
         '--list', '-l',
         action='store_true',
@@ -160,19 +235,25 @@ def main():
     # 列出策略
     if args.list:
         print("📋 可用策略列表:")
-        for key, StrategyClass in STRATEGY_REGISTRY.items():
-            # 实例化以获取策略名称
-            strategy = StrategyClass()
-            print(f"   - {key}: {strategy.strategy_name}")
+        for key, (_, name) in STRATEGY_REGISTRY.items():
+            print(f"   - {key}: {name}")
         return 0
 
     # 验证必需参数
     if not args.strategy:
         parser.error("需要指定 --strategy 参数，或使用 --list 查看可用策略")
 
+    if args.end and not args.start:
+        parser.error("--end 需要与 --start 一起使用")
+    if args.start and args.date:
+        parser.error("--date 与 --start/--end 不能同时使用")
+
     # 运行策略
     runner = StrategyRunner()
-    results = runner.run(strategy_name=args.strategy, trade_date=args.date)
+    if args.start:
+        results = runner.run_range(strategy_name=args.strategy, start_date=args.start, end_date=args.end)
+    else:
+        results = runner.run(strategy_name=args.strategy, trade_date=args.date)
 
     # 返回退出码
     return 0 if results.get('success') else 1
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+量化引擎 - 日期条件基准测试
+在临时 SQLite 中构造与 quant_feature_stock_rps 同结构的RPS表（trade_date 为带时间戳的旧格式），对比：
+    迁移前  LIKE 'YYYY-MM-DD%'        （原 get_daily_features / save_to_db 的写法）
+    迁移前  半开区间 >= day AND < next （兼容旧格式，走索引）
+    迁移后  半开区间 / 等值
+的单日查询（按标的 / 全市场）与多日幂等删除耗时，并输出查询计划
+
+用法:
+    python quant_engine/scripts/benchmark_date_predicates.py --entities 5000 --days 500
+"""
+import sys
+import os
+import time
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+# 环境路径适配
+current_dir = os.path.dirname(os.path.abspath(__file__))
+quant_engine_dir = os.path.dirname(current_dir)
+backend_dir = os.path.dirname(quant_engine_dir)
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from quant_engine.common.date_utils import DAY_CONDITION, day_bounds, day_bounds_list
+from quant_engine.scripts.normalize_dates import normalize_table_dates
+
+TABLE = 'quant_feature_stock_rps'
+
+
+def build_table(engine, entities: int, days: int, seed: int = 0):
+    """生成带时间戳日期的RPS表（结构与 BaseFeatureCalculator._init_table 一致）"""
+    rng = np.random.default_rng(seed)
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            CREATE TABLE {TABLE} (
+                symbol TEXT, trade_date TEXT, rps_50 FLOAT, rps_120 FLOAT, rps_250 FLOAT,
+                PRIMARY KEY (symbol, trade_date)
+            )
+        """))
+        conn.execute(text(f"CREATE INDEX idx_{TABLE}_date ON {TABLE} (trade_date)"))
+
+    dates = pd.bdate_range('2023-01-02', periods=days).strftime('%Y-%m-%d 00:00:00')
+    symbols = np.array([f"{i:06d}" for i in range(entities)], dtype=object)
+    for chunk in np.array_split(np.arange(days), max(1, days // 50)):
+        df = pd.DataFrame({
+            'symbol': np.tile(symbols, len(chunk)),
+            'trade_date': np.repeat(dates[chunk], entities),
+        })
+        for col in ('rps_50', 'rps_120', 'rps_250'):
+            df[col] = rng.uniform(0, 100, len(df)).round(2)
+        df.to_sql(TABLE, engine, if_exists='append', index=False)
+    return pd.to_datetime(dates).strftime('%Y-%m-%d')
+
+
+def timed(func, repeat: int):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def plan(engine, sql, params=None):
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params or {}).fetchall()
+    return " | ".join(str(r[-1]) for r in rows)
+
+
+def run_suite(engine, label, days, symbols, repeat):
+    """单日查询 + 3日幂等删除（删除在事务中执行后回滚，保持数据不变）"""
+    day = days[len(days) // 2]
+    sym_str = "'" + "','".join(symbols) + "'"
+    recent = days[-3:]
+
+    like_sql = f"SELECT symbol, rps_50 FROM {TABLE} WHERE trade_date LIKE '{day}%' AND symbol IN ({sym_str})"
+    range_sql = f"SELECT symbol, rps_50 FROM {TABLE} WHERE {DAY_CONDITION} AND symbol IN ({sym_str})"
+    eq_sql = f"SELECT symbol, rps_50 FROM {TABLE} WHERE trade_date = :d AND symbol IN ({sym_str})"
+    all_like_sql = f"SELECT symbol, rps_50 FROM {TABLE} WHERE trade_date LIKE '{day}%' AND rps_50 > 90"
+    all_range_sql = f"SELECT symbol, rps_50 FROM {TABLE} WHERE {DAY_CONDITION} AND rps_50 > 90"
+
+    def delete_like():
+        with engine.connect() as conn:
+            tx = conn.begin()
+            for d in recent:
+                conn.execute(text(f"DELETE FROM {TABLE} WHERE trade_date LIKE '{d}%'"))
+            tx.rollback()
+
+    def delete_range():
+        with engine.connect() as conn:
+            tx = conn.begin()
+            conn.execute(text(f"DELETE FROM {TABLE} WHERE {DAY_CONDITION}"), day_bounds_list(recent))
+            tx.rollback()
+
+    cases = [
+        ('单日查询 LIKE', lambda: pd.read_sql(text(like_sql), engine), plan(engine, like_sql)),
+        ('单日查询 区间', lambda: pd.read_sql(text(range_sql), engine, params=day_bounds(day)),
+         plan(engine, range_sql, day_bounds(day))),
+        ('单日查询 等值', lambda: pd.read_sql(text(eq_sql), engine, params={'d': day}),
+         plan(engine, eq_sql, {'d': day})),
+        ('全市场 LIKE', lambda: pd.read_sql(text(all_like_sql), engine), plan(engine, all_like_sql)),
+        ('全市场 区间', lambda: pd.read_sql(text(all_range_sql), engine, params=day_bounds(day)),
+         plan(engine, all_range_sql, day_bounds(day))),
+        ('3日删除 LIKE', delete_like, None),
+        ('3日删除 区间', delete_range, None),
+    ]
+
+    print(f"\n[{label}]")
+    for name, func, query_plan in cases:
+        cost = timed(func, repeat)
+        print(f"   {name:<12} {cost * 1000:9.1f} ms" + (f"   计划: {query_plan}" if query_plan else ""))
+
+    rows = len(pd.read_sql(text(range_sql), engine, params=day_bounds(day)))
+    print(f"   区间查询命中 {rows} 行")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="日期条件基准测试 (LIKE vs 区间/等值)")
+    parser.add_argument('--entities', type=int, default=5000)
+    parser.add_argument('--days', type=int, default=500)
+    parser.add_argument('--symbols', type=int, default=300, help='单日查询的 IN 列表长度')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        print(f"⏳ 构造 {args.entities} × {args.days} = {args.entities * args.days} 行RPS表...")
+        days = build_table(engine, args.entities, args.days)
+        symbols = [f"{i:06d}" for i in range(0, args.entities, max(1, args.entities // args.symbols))]
+
+        run_suite(engine, "迁移前（带时间戳）", days, symbols, args.repeat)
+
+        start = time.perf_counter()
+        stats = normalize_table_dates(engine, TABLE, ['symbol'])
+        print(f"\n🔧 迁移: 改写 {stats['updated']} 行，耗时 {time.perf_counter() - start:.1f}秒")
+
+        run_suite(engine, "迁移后（YYYY-MM-DD）", days, symbols, args.repeat)
+        engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+量化引擎 - 因子计算内核基准测试
+对比原 pandas 实现（逐周期 stack/concat）与 NumPy 内核的耗时、内存峰值和结果一致性
+
+用法:
+    python quant_engine/scripts/benchmark_feature_kernel.py --entities 5000 --days 400
+"""
+import sys
+import os
+import time
+import argparse
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+# 环境路径适配
+current_dir = os.path.dirname(os.path.abspath(__file__))
+quant_engine_dir = os.path.dirname(current_dir)
+backend_dir = os.path.dirname(quant_engine_dir)
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from quant_engine.config.calculator_config import CalculatorConfig
+from quant_engine.core.feature_kernels import compute_feature_cube, cube_to_long
+
+ENTITY_COLUMN = 'symbol'
+
+
+def make_panel(entities: int, days: int, seed: int = 0) -> pd.DataFrame:
+    """生成随机游走收盘价宽表（含少量停牌缺口，已向前填充）"""
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0, 0.02, size=(days, entities))
+    closes = 10 * np.cumprod(1 + returns, axis=0)
+    closes[rng.random(closes.shape) < 0.01] = np.nan
+
+    panel = pd.DataFrame(
+        closes,
+        index=pd.bdate_range('2023-01-02', periods=days, name='trade_date'),
+        columns=pd.Index([f"{i:06d}" for i in range(entities)], name=ENTITY_COLUMN),
+    )
+    return panel.ffill()
+
+
+def pandas_features(df_pivot: pd.DataFrame, periods: list) -> pd.DataFrame:
+    """原实现：逐周期 pct_change/rank → stack → concat → 逐列 round"""
+    feature_dfs = []
+    for period in periods:
+        chg = df_pivot.pct_change(period)
+        rps = chg.rank(axis=1, pct=True, method='min') * 100
+
+        chg_stack = chg.stack().reset_index()
+        chg_stack.columns = ['trade_date', ENTITY_COLUMN, f'chg_{period}']
+        chg_stack.set_index([ENTITY_COLUMN, 'trade_date'], inplace=True)
+
+        rps_stack = rps.stack().reset_index()
+        rps_stack.columns = ['trade_date', ENTITY_COLUMN, f'rps_{period}']
+        rps_stack.set_index([ENTITY_COLUMN, 'trade_date'], inplace=True)
+
+        feature_dfs.append(chg_stack)
+        feature_dfs.append(rps_stack)
+
+    df_final = pd.concat(feature_dfs, axis=1).reset_index()
+
+    ordered_columns = [ENTITY_COLUMN, 'trade_date']
+    for period in periods:
+        ordered_columns += [f'chg_{period}', f'rps_{period}']
+    df_final = df_final[ordered_columns]
+
+    for col in ordered_columns[2:]:
+        df_final[col] = df_final[col].round(2 if 'rps' in col else 4)
+    return df_final
+
+
+def kernel_features(df_pivot: pd.DataFrame, periods: list, dtype) -> pd.DataFrame:
+    """NumPy 内核"""
+    cube = compute_feature_cube(df_pivot.to_numpy(), periods, dtype=dtype)
+    return cube_to_long(cube, df_pivot.index, df_pivot.columns, ENTITY_COLUMN, periods)
+
+
+def measure(func, *args):
+    """返回 (结果, 耗时秒, 内存峰值MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+
+def max_diff(expected: pd.DataFrame, actual: pd.DataFrame) -> float:
+    """按 (标的, 日期) 对齐后的最大绝对误差"""
+    keys = [ENTITY_COLUMN, 'trade_date']
+    merged = expected.merge(actual, on=keys, suffixes=('', '_new'), how='outer', indicator=True)
+    if (merged['_merge'] != 'both').any():
+        return float('inf')
+    cols = [c for c in expected.columns if c not in keys]
+    diffs = [np.nanmax(np.abs(merged[c].to_numpy() - merged[f'{c}_new'].to_numpy())) for c in cols]
+    return float(max(diffs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='因子计算内核基准测试')
+    parser.add_argument('--entities', type=int, default=5000, help='标的数量')
+    parser.add_argument('--days', type=int, default=400, help='交易日数量')
+    parser.add_argument('--repeat', type=int, default=1, help='重复次数（取最快一次）')
+    args = parser.parse_args()
+
+    periods = CalculatorConfig.RPS_PERIODS
+    panel = make_panel(args.entities, args.days)
+    print(f"📊 宽表: {args.days} 日 × {args.entities} 个标的, 周期 {periods}")
+
+    cases = [
+        ("pandas (原实现)", pandas_features, (panel, periods)),
+        ("numpy float64", kernel_features, (panel, periods, np.float64)),
+        ("numpy float32", kernel_features, (panel, periods, np.float32)),
+    ]
+
+    baseline = None
+    baseline_time = None
+    print(f"\n{'实现':<18}{'耗时(秒)':>10}{'加速比':>10}{'内存峰值(MB)':>14}{'行数':>12}{'最大误差':>12}")
+    for name, func, func_args in cases:
+        runs = [measure(func, *func_args) for _ in range(args.repeat)]
+        result, elapsed, peak = min(runs, key=lambda r: r[1])
+        if baseline is None:
+            baseline, baseline_time = result, elapsed
+            diff = 0.0
+        else:
+            diff = max_diff(baseline, result)
+        print(f"{name:<18}{elapsed:>10.2f}{baseline_time / elapsed:>10.1f}x{peak:>13.0f}{len(result):>12}{diff:>12.2g}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+量化引擎 - 滚动窗口内核基准测试
+对比 rolling_kernels 与原实现（rolling().apply(python函数)、rolling().sum()、逐日调用 calc_dynamic_drawdown）的耗时
+（结果一致性见 data_job/tests/test_rolling_kernels.py）
+
+用法:
+    python quant_engine/scripts/benchmark_rolling_kernels.py --length 2000 --window 120
+"""
+import sys
+import os
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# 环境路径适配
+current_dir = os.path.dirname(os.path.abspath(__file__))
+quant_engine_dir = os.path.dirname(current_dir)
+backend_dir = os.path.dirname(quant_engine_dir)
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from quant_engine.core.tdx_lib import calc_dynamic_drawdown
+from quant_engine.core.rolling_kernels import (
+    bars_since_high, bars_since_low, rolling_count, rolling_drawdown
+)
+
+
+# ================= 原实现（参照） =================
+
+def ref_hhvbars(series, n):
+    return series.rolling(n).apply(lambda x: len(x) - 1 - np.argmax(x), raw=True).to_numpy()
+
+
+def ref_llvbars(series, n):
+    return series.rolling(n).apply(lambda x: len(x) - 1 - np.argmin(x), raw=True).to_numpy()
+
+
+def ref_count(condition, n):
+    return condition.rolling(n).sum().to_numpy()
+
+
+def ref_drawdown(high, low, window):
+    return np.array([
+        calc_dynamic_drawdown(high.iloc[:i + 1], low.iloc[:i + 1], window) for i in range(len(high))
+    ])
+
+
+# ================= 基准 =================
+
+def random_case(rng, length):
+    """价格取整以制造大量并列值，部分样本插入 NaN"""
+    close = np.round(10 + np.cumsum(rng.normal(0, 0.3, length)), 1)
+    high = close + np.round(np.abs(rng.normal(0, 0.2, length)), 1)
+    low = close - np.round(np.abs(rng.normal(0, 0.2, length)), 1)
+    if rng.random() < 0.3:
+        close[rng.random(length) < 0.02] = np.nan
+    return pd.Series(close), pd.Series(high), pd.Series(low)
+
+
+def benchmark(length, window, seed):
+    rng = np.random.default_rng(seed)
+    close, high, low = random_case(rng, length)
+    condition = close > close.shift(1)
+
+    cases = [
+        ("HHVBARS", lambda: ref_hhvbars(close, window), lambda: bars_since_high(close, window)),
+        ("LLVBARS", lambda: ref_llvbars(close, window), lambda: bars_since_low(close, window)),
+        ("COUNT", lambda: ref_count(condition, window), lambda: rolling_count(condition, window)),
+        ("DRAWDOWN(全历史)", lambda: ref_drawdown(high, low, window), lambda: rolling_drawdown(high, low, window)),
+    ]
+
+    print(f"\n⏱️  基准: 长度 {length}, 窗口 {window}")
+    print(f"{'函数':<18}{'原实现(秒)':>12}{'内核(秒)':>12}{'加速比':>10}")
+    for name, ref_func, kernel_func in cases:
+        start = time.perf_counter()
+        ref_func()
+        ref_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        kernel_func()
+        kernel_time = time.perf_counter() - start
+        print(f"{name:<18}{ref_time:>12.4f}{kernel_time:>12.4f}{ref_time / max(kernel_time, 1e-9):>9.0f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='滚动窗口内核基准测试')
+    parser.add_argument('--length', type=int, default=2000, help='序列长度')
+    parser.add_argument('--window', type=int, default=120, help='窗口长度')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    args = parser.parse_args()
+
+    benchmark(args.length, args.window, args.seed)
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+量化引擎 - 日期列规范化迁移
+把量化表中带时间戳的 trade_date（'2024-01-02 00:00:00'）改写为规范格式 'YYYY-MM-DD'，
+并确保 trade_date 索引存在；迁移后等值 / 区间条件都能走索引（不再需要 LIKE 'YYYY-MM-DD%'）
+
+- 同一主键下已存在规范格式的行时，带时间戳的旧行视为过期并删除
+- 同一主键同一天有多条带时间戳的行时，保留字符串最大（最晚）的一条
+- 可重复执行：没有待迁移的行时不做任何修改
+
+用法:
+    python quant_engine/scripts/normalize_dates.py --dry-run
+    python quant_engine/scripts/normalize_dates.py
+    python quant_engine/scripts/normalize_dates.py --table my_table:symbol
+"""
+import sys
+import os
+import time
+import argparse
+
+# 环境路径适配
+current_dir = os.path.dirname(os.path.abspath(__file__))
+quant_engine_dir = os.path.dirname(current_dir)
+backend_dir = os.path.dirname(quant_engine_dir)
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from sqlalchemy import inspect, text
+
+from quant_engine.common import setup_quant_path, setup_logger
+
+# 路径初始化
+setup_quant_path()
+
+# Logger配置
+logger = setup_logger(__name__)
+
+# 表名 -> 主键中除 trade_date 以外的列
+DATE_TABLES = {
+    'quant_feature_stock_rps': ['symbol'],
+    'quant_feature_sector_rps': ['sector_name'],
+    'quant_feature_etf_rps': ['symbol'],
+    'quant_preselect_results': ['strategy_name', 'symbol', 'result_type'],
+}
+
+
+def normalize_table_dates(engine, table: str, keys: list, column: str = 'trade_date', dry_run: bool = False) -> dict:
+    """
+    规范化一张表的日期列
+
+    Args:
+        engine: 数据库引擎
+        table: 表名
+        keys: 主键中除日期列以外的列
+        column: 日期列
+        dry_run: 只统计不修改
+
+    Returns:
+        dict: {'legacy': 待迁移行数, 'dropped': 删除的重复行数, 'updated': 改写的行数}
+    """
+    if not keys:
+        raise ValueError(f"{table} 需要指定主键列")
+    value = f"CAST({table}.{column} AS TEXT)"
+    legacy = f"length({value}) > 10"
+    day = f"substr({value}, 1, 10)"
+    same_key = " AND ".join(f"c.{k} = {table}.{k}" for k in keys)
+
+    with engine.begin() as conn:
+        count = conn.execute(text(f"SELECT COUNT(*) FROM {table} WHERE {legacy}")).scalar()
+        stats = {'legacy': int(count or 0), 'dropped': 0, 'updated': 0}
+        if dry_run or not stats['legacy']:
+            return stats
+
+        # 1. 已有规范格式的同键行：旧行过期
+        stats['dropped'] += conn.execute(text(f"""
+            DELETE FROM {table}
+            WHERE {legacy}
+              AND EXISTS (SELECT 1 FROM {table} c WHERE {same_key} AND c.{column} = {day})
+        """)).rowcount
+        # 2. 同键同日多条带时间戳的行：只保留最晚一条（'~' 大于日期后的任何分隔符）
+        stats['dropped'] += conn.execute(text(f"""
+            DELETE FROM {table}
+            WHERE {legacy}
+              AND EXISTS (SELECT 1 FROM {table} c WHERE {same_key}
+                          AND c.{column} > {table}.{column} AND c.{column} < {day} || '~')
+        """)).rowcount
+        # 3. 改写为 YYYY-MM-DD
+        stats['updated'] = conn.execute(text(f"UPDATE {table} SET {column} = {day} WHERE {legacy}")).rowcount
+
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS idx_{table}_date ON {table} ({column})"))
+
+    return stats
+
+
+def main():
+    """命令行入口"""
+    from app.core.database import get_engine
+
+    parser = argparse.ArgumentParser(description="量化表日期列规范化迁移 (YYYY-MM-DD)")
+    parser.add_argument('--table', action='append', default=None,
+                        help='表名:主键列1,主键列2（可重复指定），默认迁移全部量化表')
+    parser.add_argument('--dry-run', action='store_true', help='只统计待迁移行数')
+    args = parser.parse_args()
+
+    tables = DATE_TABLES
+    if args.table:
+        tables = {}
+        for spec in args.table:
+            name, _, keys = spec.partition(':')
+            tables[name] = keys.split(',') if keys else DATE_TABLES.get(name, [])
+
+    engine = get_engine()
+    existing = set(inspect(engine).get_table_names())
+
+    for table, keys in tables.items():
+        if table not in existing:
+            logger.info(f"⏭️ {table} 不存在，跳过")
+            continue
+        start = time.time()
+        stats = normalize_table_dates(engine, table, keys, dry_run=args.dry_run)
+        action = "待迁移" if args.dry_run else "已迁移"
+        logger.info(f"✅ {table}: {action} {stats['legacy']} 行，删除过期重复 {stats['dropped']} 行，"
+                    f"改写 {stats['updated']} 行，耗时 {time.time() - start:.1f}秒")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -15,6 +15,7 @@ if project_root not in sys.path:
     sys.path.append(project_root)
 
 from app.core.database import get_engine
+from quant_engine.common.date_utils import DAY_CONDITION, day_bounds, day_bounds_list, normalize_date_column
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -74,15 +75,15 @@ class BaseStrategy(ABC):
         sym_str = "'" + "','".join(symbols) + "'"
 
         try:
-            # 使用 LIKE 匹配日期（处理带时间戳的日期格式）
+            # 半开区间匹配当日（走日期索引，兼容带时间戳的日期格式）
             query = text(f"""
                 SELECT symbol, rps_50, rps_120, rps_250
                 FROM {self.rps_table}
-                WHERE trade_date LIKE '{trade_date}%'
+                WHERE {DAY_CONDITION}
                   AND symbol IN ({sym_str})
             """)
 
-            df = pd.read_sql(query, self.engine)
+            df = pd.read_sql(query, self.engine, params=day_bounds(trade_date))
             if df.empty:
                 logger.warning(f"⚠️ {trade_date} 没有因子数据！可能是当日数据未更新。")
             else:
@@ -92,6 +93,55 @@ class BaseStrategy(ABC):
             logger.error(f"❌ 获取因子数据失败: {e}")
             return pd.DataFrame()
 
+    def get_features_range(self, start_date, end_date, symbols):
+        """
+        2b. 一次性获取日期区间内的量化因子（区间批量模式）
+
+        Returns:
+            pd.DataFrame: symbol, trade_date (YYYY-MM-DD), rps_50, rps_120, rps_250
+        """
+        if not symbols: return pd.DataFrame()
+
+        logger.info(f"📊 [{self.strategy_display_name}] 加载因子数据 ({start_date} ~ {end_date})...")
+
+        sym_str = "'" + "','".join(symbols) + "'"
+        # 上界取次日（开区间），兼容带时间戳的日期格式
+        end_next = (pd.to_datetime(end_date) + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+
+        try:
+            query = text(f"""
+                SELECT symbol, trade_date, rps_50, rps_120, rps_250
+                FROM {self.rps_table}
+                WHERE trade_date >= '{start_date}' AND trade_date < '{end_next}'
+                  AND symbol IN ({sym_str})
+            """)
+
+            df = pd.read_sql(query, self.engine)
+            if df.empty:
+                logger.warning(f"⚠️ {start_date} ~ {end_date} 没有因子数据！")
+            else:
+                df['trade_date'] = pd.to_datetime(df['trade_date']).dt.strftime('%Y-%m-%d')
+                logger.info(f"   ✅ 因子数据就绪: {len(df)} 条")
+            return df
+        except Exception as e:
+            logger.error(f"❌ 获取因子数据失败: {e}")
+            return pd.DataFrame()
+
+    def get_trade_dates(self, start_date, end_date):
+        """区间内的交易日列表 (YYYY-MM-DD)，以K线表中出现过的日期为准"""
+        end_next = (pd.to_datetime(end_date) + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+        query = text(f"""
+            SELECT DISTINCT trade_date FROM stock_daily_prices
+            WHERE trade_date >= '{start_date}' AND trade_date < '{end_next}'
+        """)
+        try:
+            df = pd.read_sql(query, self.engine)
+        except Exception as e:
+            logger.error(f"❌ 获取交易日失败: {e}")
+            return []
+        dates = pd.to_datetime(df['trade_date']).dt.strftime('%Y-%m-%d')
+        return sorted(dates.unique())
+
     def save_results(self, df_results):
         """
         保存预选结果到quant_preselect_results表
@@ -124,7 +174,7 @@ class BaseStrategy(ABC):
             if col not in df_results.columns:
                 df_results[col] = None
 
-        df_save = df_results[required_cols].copy()
+        df_save = normalize_date_column(df_results[required_cols].copy())
 
         try:
             with self.engine.begin() as conn:
@@ -147,15 +197,11 @@ class BaseStrategy(ABC):
                 """))
                 conn.execute(text(f"CREATE INDEX IF NOT EXISTS idx_{self.preselect_table}_date ON {self.preselect_table} (trade_date);"))
 
-                # 幂等性删除：删除当天的数据
+                # 幂等性删除：删除当天的数据（半开区间走日期索引）
                 dates = df_save['trade_date'].unique()
-                date_strs = [pd.to_datetime(d).strftime('%Y-%m-%d') for d in dates]
-                if date_strs:
-                    for date_str in date_strs:
-                        conn.execute(text(f"""
-                            DELETE FROM {self.preselect_table}
-                            WHERE trade_date LIKE '{date_str}%'
-                        """))
+                bounds = day_bounds_list(dates)
+                if bounds:
+                    conn.execute(text(f"DELETE FROM {self.preselect_table} WHERE {DAY_CONDITION}"), bounds)
 
                 # 写入新数据
                 df_save.to_sql(self.preselect_table, conn, if_exists='append', index=False)
@@ -167,4 +213,13 @@ class BaseStrategy(ABC):
 
     @abstractmethod
     def run(self, trade_date=None):
-        pass
\ No newline at end of file
+        pass
+
+    def run_range(self, start_date, end_date):
+        """
+        区间批量选股：默认逐个交易日调用 run（子类可覆盖为一次加载、滑动窗口的实现）
+        """
+        trade_dates = self.get_trade_dates(start_date, end_date)
+        logger.info(f"📅 [{self.strategy_name}] 区间 {start_date} ~ {end_date}: {len(trade_dates)} 个交易日")
+        for trade_date in trade_dates:
+            self.run(trade_date=trade_date)
\ No newline at end of file
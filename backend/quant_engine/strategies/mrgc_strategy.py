@@ -3,6 +3,7 @@
 import sys
 import os
 import pandas as pd
+import numpy as np
 import json
 from datetime import datetime, date
 
@@ -13,13 +14,36 @@ if engine_root not in sys.path:
     sys.path.append(engine_root)
 
 # 模块导入
-from quant_engine.core.tdx_lib import TdxFuncs, calc_dynamic_drawdown
+from quant_engine.core.tdx_lib import TdxFuncs, TdxPanel, calc_dynamic_drawdown
 from quant_engine.strategies.base_strategy import BaseStrategy
+from app.core.kline_store import get_kline_store
+from app.core.price_cube import get_price_cube
 
 class MrgcStrategy(BaseStrategy):
-    def __init__(self):
+    # 默认阈值（可通过 params 覆盖；参数寻优见 quant_engine/backtest/grid_search.py）
+    DEFAULT_PARAMS = {
+        'turnover_max': 25,           # MRGC 换手率上限
+        'dd120_max': 0.5,             # 120日创新高后最大回撤上限
+        'close_high_min': 0.7,        # 收盘价 / 250日最高收盘价 下限
+        'hc_dd_max': 0.35,            # XG4 回撤上限
+        'hc_close_high_min': 0.8,     # XG4 位置下限
+        'xg1_rps': 95.99,             # XG1 RPS120 或 RPS250
+        'xg1_rps_pair': 94.99,        # XG1 RPS120 且 RPS50
+        'xg2_close_high': 0.85,       # XG2 收盘价 / 250日最高价 下限
+        'xg2_rps': 96.99,
+        'xg3_close_high': 0.70,
+        'xg3_rps': 97.99,
+        'xg4_rps': 94.99,
+        'sxhcg_rps_sum': 185,         # SXHCG RPS120 + RPS250 下限
+        'sxhcg_dd20_max': 0.25,
+        'sxhcg_close_high_min': 0.8,
+        'sxhcg_turnover_max': 15,
+    }
+
+    def __init__(self, params=None):
         # 初始化基类
         super().__init__("mrgc_v1")
+        self.params = {**self.DEFAULT_PARAMS, **(params or {})}
 
         # ✅ 策略元数据（将在预选结果中展示）
         self.strategy_display_name = "陶博士MRGC"
@@ -69,6 +93,9 @@ class MrgcStrategy(BaseStrategy):
         """
         self.load_days = 400 
 
+        # 评估模式：'panel' 全池向量化（默认）；'reference' 逐只计算（参照/调试）
+        self.eval_mode = 'panel'
+
     def _check_signal(self, df, rps_row):
         """核心选股逻辑"""
         if df.empty or len(df) < 250:
@@ -92,46 +119,47 @@ class MrgcStrategy(BaseStrategy):
         RPS50  = get_rps('rps_50')
         RPS120 = get_rps('rps_120')
         RPS250 = get_rps('rps_250')
+        p = self.params
 
         # === MRGC ===
         curr_turnover = T.TURNOVER.iloc[-1] if hasattr(T, 'TURNOVER') else 0
-        mrgc00 = curr_turnover < 25
+        mrgc00 = curr_turnover < p['turnover_max']
         dd_120 = calc_dynamic_drawdown(T.H, T.L, 120)
-        mrgc001 = dd_120 <= 0.5
+        mrgc001 = dd_120 <= p['dd120_max']
         hhv_c_250 = T.HHV(T.C, 250).iloc[-1]
         if hhv_c_250 == 0: return False, "异常HHV"
-        mrgc002 = (T.C.iloc[-1] / hhv_c_250) > 0.7
+        mrgc002 = (T.C.iloc[-1] / hhv_c_250) > p['close_high_min']
         mrgc01 = mrgc001 and mrgc002
-        mrgc_hc = (dd_120 <= 0.35) and ((T.C.iloc[-1] / hhv_c_250) > 0.8)
+        mrgc_hc = (dd_120 <= p['hc_dd_max']) and ((T.C.iloc[-1] / hhv_c_250) > p['hc_close_high_min'])
 
         # XG1
         is_new_high = T.C >= T.HHV(T.C, 250)
         xg11 = T.COUNT(is_new_high, 5).iloc[-1] >= 1
-        xg12 = (RPS120 > 95.99) or (RPS250 > 95.99)
-        xg13 = (RPS120 > 94.99) and (RPS50 > 94.99)
+        xg12 = (RPS120 > p['xg1_rps']) or (RPS250 > p['xg1_rps'])
+        xg13 = (RPS120 > p['xg1_rps_pair']) and (RPS50 > p['xg1_rps_pair'])
         xg1 = xg11 and (xg12 or xg13)
 
         # XG2
         hhv_h_250 = T.HHV(T.H, 250).iloc[-1]
         if hhv_h_250 == 0: hhv_h_250 = 1
-        xg21 = (T.C.iloc[-1] / hhv_h_250) >= 0.85
-        xg22 = (RPS120 > 96.99) or (RPS250 > 96.99)
+        xg21 = (T.C.iloc[-1] / hhv_h_250) >= p['xg2_close_high']
+        xg22 = (RPS120 > p['xg2_rps']) or (RPS250 > p['xg2_rps'])
         xg2 = xg21 and xg22
 
         # XG3
-        xg31 = (T.C.iloc[-1] / hhv_h_250) >= 0.70
-        xg32 = (RPS120 > 97.99) or (RPS250 > 97.99)
+        xg31 = (T.C.iloc[-1] / hhv_h_250) >= p['xg3_close_high']
+        xg32 = (RPS120 > p['xg3_rps']) or (RPS250 > p['xg3_rps'])
         xg3 = xg31 and xg32
 
         # XG4
         xg41 = mrgc_hc
-        xg42 = (RPS120 > 94.99) or (RPS250 > 94.99)
+        xg42 = (RPS120 > p['xg4_rps']) or (RPS250 > p['xg4_rps'])
         xg4 = xg41 and xg42
 
         MRGC_SIGNAL = mrgc00 and mrgc01 and (xg1 or xg2 or xg3 or xg4)
 
         # === SXHCG ===
-        sxhcg1 = (RPS120 + RPS250) > 185
+        sxhcg1 = (RPS120 + RPS250) > p['sxhcg_rps_sum']
         ma10, ma20, ma200, ma250 = T.MA(T.C, 10), T.MA(T.C, 20), T.MA(T.C, 200), T.MA(T.C, 250)
 
         try:
@@ -145,8 +173,8 @@ class MrgcStrategy(BaseStrategy):
             sxhcg2 = sxhcg20 and sxhcg21 and sxhcg22 and (sxhcg23 or sxhcg24)
 
             dd_20 = calc_dynamic_drawdown(T.H, T.L, 20)
-            sxhcg31 = dd_20 <= 0.25
-            sxhcg32 = (T.C.iloc[-1] / hhv_c_250) > 0.8
+            sxhcg31 = dd_20 <= p['sxhcg_dd20_max']
+            sxhcg32 = (T.C.iloc[-1] / hhv_c_250) > p['sxhcg_close_high_min']
             sxhcg3 = sxhcg31 and sxhcg32
 
             ma20_up = ma20 >= T.REF(ma20, 1)
@@ -160,7 +188,7 @@ class MrgcStrategy(BaseStrategy):
             sxhcg42 = sxhcg421 and sxhcg422 and sxhcg423
             sxhcg4 = sxhcg41 or sxhcg42
 
-            sxhcg5 = curr_turnover < 15
+            sxhcg5 = curr_turnover < p['sxhcg_turnover_max']
             sxhcg6 = mrgc001
             
             SXHCG_SIGNAL = sxhcg1 and sxhcg2 and sxhcg3 and sxhcg4 and sxhcg5 and sxhcg6
@@ -172,9 +200,277 @@ class MrgcStrategy(BaseStrategy):
         
         return False, ""
 
-    def run(self, trade_date=None):
-        """执行策略"""
+    @staticmethod
+    def _last_drawdown(P, window):
+        """
+        面板最后一行的 calc_dynamic_drawdown（逐列复现其 np.argmax / np.min 语义，含缺失值情形）
+
+        Returns:
+            pd.Series: {symbol: 回撤}
+        """
+        h = P.H.iloc[-window:].to_numpy()
+        l = P.L.iloc[-window:].to_numpy()
+        padding = P.DATES.iloc[-window:].isna().to_numpy()
+        rows = np.arange(len(h))[:, None]
+
+        h = np.where(padding, -np.inf, h)  # 右对齐补位不属于该标的
+        max_idx = np.argmax(h, axis=0)
+        max_val = h[max_idx, np.arange(h.shape[1])]
+        min_low = np.min(np.where(rows >= max_idx, l, np.inf), axis=0)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            dd = (max_val - min_low) / max_val
+        dd[max_idx == len(h) - 1] = 0.0
+        dd[max_val == 0] = 0.0
+        return pd.Series(dd, index=P.symbols)
+
+    @staticmethod
+    def _panel_features(P, pick, drawdown):
+        """
+        与阈值无关的中间量（每个被选中的位置一个值）
+
+        Args:
+            P: TdxPanel
+            pick: frame -> 一维数组，选出需要评估的位置（最后一行 / 历史上每个交易日）
+            drawdown: window -> 一维数组，对应位置的创新高后最大回撤
+
+        Returns:
+            dict: {名称: 一维数组}
+        """
+        C = P.C
+        hhv_c_250 = P.HHV(C, 250)
+        close = pick(C)
+        hhv_c = pick(hhv_c_250)
+        hhv_h = pick(P.HHV(P.H, 250))
+        hhv_h = np.where(hhv_h == 0, 1, hhv_h)
+
+        ma10, ma20, ma200, ma250 = P.MA(C, 10), P.MA(C, 20), P.MA(C, 200), P.MA(C, 250)
+
+        # SXHCG 趋势条件（不含阈值参数）
+        sxhcg20 = close > pick(ma20)
+        sxhcg21 = pick(P.COUNT(C > ma250, 30)) >= 25
+        sxhcg22 = pick(P.COUNT(C > ma200, 30)) >= 25
+        sxhcg23 = pick(P.COUNT(C > ma20, 10)) >= 9
+        sxhcg24 = (pick(P.COUNT(C > ma10, 4)) >= 3) & (pick(P.COUNT(C > ma20, 4)) >= 3)
+
+        sxhcg41 = pick(P.EVERY(ma20 >= P.REF(ma20, 1), 5)) & pick(P.EVERY(ma10 >= ma20, 5))
+        sxhcg42 = ((pick(ma10) >= pick(P.REF(ma10, 1))) & (pick(ma20) >= pick(P.REF(ma20, 1)))
+                   & (pick(ma10) >= pick(ma20)))
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return {
+                'eligible': (pick(P.BARS) >= 249) & (hhv_c != 0),
+                'turnover': pick(P.TURNOVER),
+                'dd_120': drawdown(120),
+                'dd_20': drawdown(20),
+                'close_high_c': close / hhv_c,
+                'close_high_h': close / hhv_h,
+                'new_high_5': pick(P.COUNT(C >= hhv_c_250, 5)) >= 1,
+                'sxhcg_trend': sxhcg20 & sxhcg21 & sxhcg22 & (sxhcg23 | sxhcg24),
+                'sxhcg_ma': sxhcg41 | sxhcg42,
+            }
+
+    @staticmethod
+    def signal_mask(f, p):
+        """
+        阈值判定（向量化）：f 为 _panel_features 结果加 rps_50/rps_120/rps_250，p 为阈值参数
+
+        Returns:
+            (mrgc, sxhcg): 两个布尔数组，SXHCG 只在未触发 MRGC 时成立
+        """
+        rps50, rps120, rps250 = f['rps_50'], f['rps_120'], f['rps_250']
+        dd_120, close_high_c, close_high_h = f['dd_120'], f['close_high_c'], f['close_high_h']
+
+        # === MRGC ===
+        mrgc001 = dd_120 <= p['dd120_max']
+        mrgc01 = mrgc001 & (close_high_c > p['close_high_min'])
+        mrgc_hc = (dd_120 <= p['hc_dd_max']) & (close_high_c > p['hc_close_high_min'])
+
+        xg1 = f['new_high_5'] & ((rps120 > p['xg1_rps']) | (rps250 > p['xg1_rps'])
+                                 | ((rps120 > p['xg1_rps_pair']) & (rps50 > p['xg1_rps_pair'])))
+        xg2 = (close_high_h >= p['xg2_close_high']) & ((rps120 > p['xg2_rps']) | (rps250 > p['xg2_rps']))
+        xg3 = (close_high_h >= p['xg3_close_high']) & ((rps120 > p['xg3_rps']) | (rps250 > p['xg3_rps']))
+        xg4 = mrgc_hc & ((rps120 > p['xg4_rps']) | (rps250 > p['xg4_rps']))
+
+        mrgc = f['eligible'] & (f['turnover'] < p['turnover_max']) & mrgc01 & (xg1 | xg2 | xg3 | xg4)
+
+        # === SXHCG ===
+        sxhcg = (((rps120 + rps250) > p['sxhcg_rps_sum'])
+                 & f['sxhcg_trend']
+                 & (f['dd_20'] <= p['sxhcg_dd20_max']) & (close_high_c > p['sxhcg_close_high_min'])
+                 & f['sxhcg_ma']
+                 & (f['turnover'] < p['sxhcg_turnover_max'])
+                 & mrgc001)
+
+        return mrgc, f['eligible'] & ~mrgc & sxhcg
+
+    def _check_signals_panel(self, kline_all, rps_dict):
+        """
+        全池向量化选股：与逐只 _check_signal 结果一致
+
+        Returns:
+            dict: {symbol: 原因}（只包含触发信号的股票）
+        """
+        P = TdxPanel(kline_all)
+        features = self._panel_features(
+            P,
+            pick=lambda frame: P.last(frame).to_numpy(),
+            drawdown=lambda window: self._last_drawdown(P, window).to_numpy(),
+        )
+
+        # RPS（缺失/非法值按 0 处理）
+        rps = pd.DataFrame.from_dict(rps_dict, orient='index').reindex(P.symbols)
+        for k in ('rps_50', 'rps_120', 'rps_250'):
+            values = pd.to_numeric(rps[k], errors='coerce') if k in rps.columns else pd.Series(np.nan, index=P.symbols)
+            features[k] = values.fillna(0.0).to_numpy()
+
+        mrgc_hit, sxhcg_hit = self.signal_mask(features, self.params)
+
+        signals = {symbol: "MRGC触发" for symbol in P.symbols[mrgc_hit]}
+        signals.update({symbol: "SXHCG触发" for symbol in P.symbols[sxhcg_hit]})
+        return signals
+
+    def history_features(self, start_date, end_date):
+        """
+        区间内每个 (交易日, 标的) 的中间量，供参数寻优批量判定（一次加载、一次计算）
+
+        与逐日 run 的区别：滚动窗口使用全部已加载的历史（不按 load_days 截断）；
+        只在标的当日有K线时判定（逐日 run 对停牌股沿用最近一根K线）；
+        回撤使用 TdxPanel.DRAWDOWN（不复现 calc_dynamic_drawdown 在缺失值上的特殊行为）
+
+        Returns:
+            pd.DataFrame: symbol, trade_date, 各中间量, rps_50, rps_120, rps_250
+        """
+        pool_df = self.get_stock_pool(pool_name='core_pool')
+        if pool_df.empty:
+            return pd.DataFrame()
+        target_symbols = pool_df['symbol'].drop_duplicates().tolist()
+
+        start_dt = (pd.to_datetime(start_date) - pd.Timedelta(days=self.load_days)).strftime('%Y-%m-%d')
+        end_next = (pd.to_datetime(end_date) + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+        kline_all = self._load_kline(target_symbols, start_dt, end_next)
+        if kline_all is None or kline_all.empty:
+            return pd.DataFrame()
+        kline_all['trade_date'] = pd.to_datetime(kline_all['trade_date']).dt.normalize()
+
+        P = TdxPanel(kline_all)
+        dates = P.DATES.to_numpy()
+        filled = pd.notna(dates)
+        cell_dates = pd.to_datetime(np.where(filled, dates, pd.NaT).ravel()).to_numpy().reshape(dates.shape)
+        selected = filled & (cell_dates >= np.datetime64(start_date)) & (cell_dates <= np.datetime64(end_date))
+        rows, cols = np.nonzero(selected)
+
+        drawdowns = {}
+
+        def drawdown(window):
+            if window not in drawdowns:
+                drawdowns[window] = P.DRAWDOWN(window).to_numpy()[rows, cols]
+            return drawdowns[window]
+
+        features = self._panel_features(P, pick=lambda frame: frame.to_numpy()[rows, cols], drawdown=drawdown)
+        df = pd.DataFrame(features)
+        df.insert(0, 'trade_date', cell_dates[rows, cols])
+        df.insert(0, 'symbol', np.asarray(P.symbols)[cols])
+
+        rps_df = self.get_features_range(start_date, end_date, target_symbols)
+        if rps_df.empty:
+            rps_df = pd.DataFrame(columns=['symbol', 'trade_date', 'rps_50', 'rps_120', 'rps_250'])
+        rps_df = rps_df.assign(trade_date=pd.to_datetime(rps_df['trade_date']))
+        df = df.merge(rps_df.drop_duplicates(['symbol', 'trade_date']), on=['symbol', 'trade_date'], how='left')
+        for k in ('rps_50', 'rps_120', 'rps_250'):
+            df[k] = pd.to_numeric(df[k], errors='coerce').fillna(0.0)
+        return df
+
+    def _check_signals_reference(self, kline_all, target_symbols, rps_dict):
+        """
+        逐只选股（参照实现，用于核对和调试）
+
+        Returns:
+            dict: {symbol: 原因}（只包含触发信号的股票）
+        """
+        signals = {}
+        grouped = kline_all.groupby('symbol')
+        total = len(target_symbols)
+
+        for count, symbol in enumerate(target_symbols, 1):
+            if count % 50 == 0: print(f"   进度: {count}/{total}...", end="\r")
+
+            if symbol not in grouped.groups: continue
+            df_k = grouped.get_group(symbol).copy().sort_values('trade_date')
+
+            try:
+                is_signal, reason = self._check_signal(df_k, rps_dict.get(symbol, {}))
+                if is_signal:
+                    signals[symbol] = reason
+            except: continue
+
+        return signals
+
+    def _evaluate(self, kline, target_symbols, rps_dict, mode):
+        """按评估模式计算信号"""
+        if mode == 'reference':
+            return self._check_signals_reference(kline, target_symbols, rps_dict)
+        return self._check_signals_panel(kline, rps_dict)
+
+    def _load_kline(self, symbols, start_dt, end_dt):
+        """加载 [start_dt, end_dt] 的K线，失败返回 None"""
+        columns = ['symbol', 'trade_date', 'open', 'high', 'low', 'close', 'volume', 'turnover_rate']
+        cube = get_price_cube('stock', self.engine)
+        if cube is not None:
+            return cube.to_long(columns[2:], start_date=start_dt, end_date=end_dt, symbols=symbols)
+
+        store = get_kline_store(for_read=True)
+        if store is not None and store.has_data('stock'):
+            try:
+                return store.read('stock', start_date=str(start_dt)[:10], end_date=str(end_dt)[:10],
+                                  symbols=symbols, columns=columns)
+            except Exception as e:
+                print(f"❌ 列式K线仓库读取失败: {e}")
+                return None
+
+        symbols_str = "'" + "','".join(symbols) + "'"
+        sql_kline = f"""
+            SELECT symbol, trade_date, open, high, low, close, volume, turnover_rate
+            FROM stock_daily_prices 
+            WHERE trade_date >= '{start_dt}' AND trade_date <= '{end_dt}'
+            AND symbol IN ({symbols_str}) 
+            ORDER BY trade_date
+        """
+        try:
+            return pd.read_sql(sql_kline, self.engine)
+        except Exception as e:
+            print(f"❌ K线读取失败: {e}")
+            return None
+
+    def _build_results(self, trade_date, target_symbols, signals, rps_dict, names):
+        """信号 -> 预选结果行"""
+        results = []
+        for symbol in target_symbols:
+            reason = signals.get(symbol)
+            if reason is None: continue
+            rps_row = rps_dict.get(symbol, {})
+            results.append({
+                'trade_date': trade_date,
+                'symbol': symbol,
+                'name': names.get(symbol),
+                'signal_type': 'BUY',
+                'meta_info': json.dumps({
+                    'reason': reason,
+                    'rps_250': rps_row.get('rps_250', 0)
+                })
+            })
+        return results
+
+    def run(self, trade_date=None, mode=None):
+        """
+        执行策略
+
+        Args:
+            trade_date: 选股日期 (YYYY-MM-DD)
+            mode: 'panel' / 'reference'，默认 self.eval_mode
+        """
         if not trade_date: trade_date = str(date.today())
+        mode = mode or self.eval_mode
         print(f"🚀 正在执行策略 [{self.strategy_name}] 日期: {trade_date}")
 
         # 1. 获取股票池
@@ -183,6 +479,7 @@ class MrgcStrategy(BaseStrategy):
             print("⚠️ 股票池为空")
             return
         target_symbols = pool_df['symbol'].tolist()
+        names = pool_df.drop_duplicates('symbol').set_index('symbol')['name']
         
         # 2. 获取 RPS
         rps_df = self.get_daily_features(trade_date, target_symbols)
@@ -191,59 +488,99 @@ class MrgcStrategy(BaseStrategy):
         # 3. 加载 K 线
         print(f"⏳ 加载 K 线 ({len(target_symbols)} 只)...")
         start_dt = (pd.to_datetime(trade_date) - pd.Timedelta(days=self.load_days)).strftime('%Y-%m-%d')
-        symbols_str = "'" + "','".join(target_symbols) + "'"
-        
-        sql_kline = f"""
-            SELECT symbol, trade_date, open, high, low, close, volume, turnover_rate
-            FROM stock_daily_prices 
-            WHERE trade_date >= '{start_dt}' AND trade_date <= '{trade_date}'
-            AND symbol IN ({symbols_str}) 
-            ORDER BY trade_date
-        """
-        
-        try:
-            kline_all = pd.read_sql(sql_kline, self.engine)
-        except Exception as e:
-            print(f"❌ K线读取失败: {e}")
+        kline_all = self._load_kline(target_symbols, start_dt, trade_date)
+        if kline_all is None:
             return
 
         if kline_all.empty:
             print("⚠️ K线为空")
             return
             
-        # 4. 遍历计算
-        results = []
-        grouped = kline_all.groupby('symbol')
-        total = len(target_symbols)
-        count = 0
-        
-        for symbol in target_symbols:
-            count += 1
-            if count % 50 == 0: print(f"   进度: {count}/{total}...", end="\r")
-            
-            if symbol not in grouped.groups: continue
-            df_k = grouped.get_group(symbol).copy().sort_values('trade_date')
-            rps_row = rps_dict.get(symbol, {})
-            
-            try:
-                is_signal, reason = self._check_signal(df_k, rps_row)
-                if is_signal:
-                    stock_name = pool_df.loc[pool_df['symbol'] == symbol, 'name'].values[0]
-                    results.append({
-                        'trade_date': trade_date,
-                        'symbol': symbol,
-                        'name': stock_name,
-                        'signal_type': 'BUY',
-                        'meta_info': json.dumps({
-                            'reason': reason,
-                            'rps_250': rps_row.get('rps_250', 0)
-                        })
-                    })
-            except: continue
+        # 4. 计算信号
+        signals = self._evaluate(kline_all, target_symbols, rps_dict, mode)
+        results = self._build_results(trade_date, target_symbols, signals, rps_dict, names)
 
         print(f"\n✅ 发现 {len(results)} 个信号")
         if results:
             self.save_results(pd.DataFrame(results))
 
+    def run_range(self, start_date, end_date, mode=None):
+        """
+        区间批量选股：股票池、RPS 和K线各只加载一次，
+        在内存中按交易日滑动 load_days 窗口逐日计算，最后一次性写入
+
+        Args:
+            start_date: 开始日期 (YYYY-MM-DD)
+            end_date: 结束日期 (YYYY-MM-DD)
+            mode: 'panel' / 'reference'，默认 self.eval_mode
+        """
+        mode = mode or self.eval_mode
+        print(f"🚀 正在执行策略 [{self.strategy_name}] 区间: {start_date} ~ {end_date}")
+
+        # 1. 股票池（区间内固定使用当前股票池）
+        pool_df = self.get_stock_pool(pool_name='core_pool')
+        if pool_df.empty:
+            print("⚠️ 股票池为空")
+            return
+        target_symbols = pool_df['symbol'].tolist()
+        names = pool_df.drop_duplicates('symbol').set_index('symbol')['name']
+
+        # 2. 区间内全部 RPS
+        rps_df = self.get_features_range(start_date, end_date, target_symbols)
+        rps_by_date = {
+            d: g.drop(columns='trade_date').set_index('symbol').to_dict('index')
+            for d, g in rps_df.groupby('trade_date')
+        } if not rps_df.empty else {}
+
+        # 3. 一次加载覆盖所有窗口的K线
+        print(f"⏳ 加载 K 线 ({len(target_symbols)} 只)...")
+        start_dt = (pd.to_datetime(start_date) - pd.Timedelta(days=self.load_days)).strftime('%Y-%m-%d')
+        end_next = (pd.to_datetime(end_date) + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+        kline_all = self._load_kline(target_symbols, start_dt, end_next)
+        if kline_all is None:
+            return
+        if kline_all.empty:
+            print("⚠️ K线为空")
+            return
+
+        # 按日期排序后，每个窗口都是一段连续行
+        bar_dates = pd.to_datetime(kline_all['trade_date']).dt.normalize()
+        order = np.argsort(bar_dates.to_numpy(), kind='stable')
+        kline_all = kline_all.iloc[order].reset_index(drop=True)
+        bar_dates = bar_dates.to_numpy()[order]
+
+        in_range = (bar_dates >= np.datetime64(start_date)) & (bar_dates <= np.datetime64(end_date))
+        trade_dates = np.unique(bar_dates[in_range])
+        print(f"📅 {len(trade_dates)} 个交易日")
+
+        # 4. 滑动窗口逐日计算
+        results = []
+        for i, day in enumerate(trade_dates, 1):
+            trade_date = str(pd.Timestamp(day).date())
+            lo = np.searchsorted(bar_dates, day - np.timedelta64(self.load_days, 'D'), side='left')
+            hi = np.searchsorted(bar_dates, day, side='right')
+            rps_dict = rps_by_date.get(trade_date, {})
+
+            signals = self._evaluate(kline_all.iloc[lo:hi], target_symbols, rps_dict, mode)
+            results.extend(self._build_results(trade_date, target_symbols, signals, rps_dict, names))
+            print(f"   [{i}/{len(trade_dates)}] {trade_date}: {len(signals)} 个信号")
+
+        print(f"\n✅ 区间内共发现 {len(results)} 个信号")
+        if results:
+            self.save_results(pd.DataFrame(results))
+
 if __name__ == "__main__":
-    MrgcStrategy().run()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--date', type=str, default=None, help='选股日期 (YYYY-MM-DD)')
+    parser.add_argument('--start', type=str, default=None, help='区间开始日期 (YYYY-MM-DD)')
+    parser.add_argument('--end', type=str, default=None, help='区间结束日期 (YYYY-MM-DD)，默认今天')
+    parser.add_argument('--reference', action='store_true', help='逐只计算（参照/调试模式）')
+    args = parser.parse_args()
+
+    mode = 'reference' if args.reference else None
+    if args.start:
+        MrgcStrategy().run_range(args.start, args.end or str(date.today()), mode=mode)
+    else:
+        MrgcStrategy().run(trade_date=args.date, mode=mode)
@@ -9,11 +9,12 @@ from sqlalchemy import text
 
 # 路径适配
 current_dir = os.path.dirname(os.path.abspath(__file__))
-engine_root = os.path.abspath(os.path.join(current_dir, "../"))
+engine_root = os.path.abspath(os.path.join(current_dir, "../../"))
 if engine_root not in sys.path:
     sys.path.append(engine_root)
 
-from strategies.base_strategy import BaseStrategy
+from quant_engine.strategies.base_strategy import BaseStrategy
+from quant_engine.common.date_utils import DAY_CONDITION, day_bounds
 
 class ResonanceStrategy(BaseStrategy):
     def __init__(self):
@@ -32,11 +33,11 @@ class ResonanceStrategy(BaseStrategy):
         query = text(f"""
             SELECT sector_name, rps_20 
             FROM quant_feature_sector_rps 
-            WHERE trade_date = '{trade_date}' 
+            WHERE {DAY_CONDITION}
               AND rps_20 > {self.SECTOR_RPS_THRESHOLD}
         """)
         
-        df = pd.read_sql(query, self.engine)
+        df = pd.read_sql(query, self.engine, params=day_bounds(trade_date))
         if df.empty:
             print("   ⚠️ 今日无强势板块 (RPS_20 > 90)")
             return []
@@ -130,6 +131,47 @@ class ResonanceStrategy(BaseStrategy):
         if results:
             self.save_results(pd.DataFrame(results))
 
+    @property
+    def params(self):
+        """阈值参数（参数寻优用）"""
+        return {'sector_rps_min': self.SECTOR_RPS_THRESHOLD, 'stock_rps_min': self.STOCK_RPS_THRESHOLD}
+
+    @staticmethod
+    def signal_mask(f, p):
+        """阈值判定（向量化）：所属板块最强 RPS_20 与个股 RPS_20 同时超过阈值"""
+        return (f['sector_rps'] > p['sector_rps_min']) & (f['stock_rps'] > p['stock_rps_min'])
+
+    def history_features(self, start_date, end_date):
+        """
+        区间内每个 (交易日, 标的) 的 所属板块最高 RPS_20 与个股 RPS_20，供参数寻优批量判定
+
+        Returns:
+            pd.DataFrame: symbol, trade_date, sector_rps, stock_rps
+        """
+        end_next = (pd.to_datetime(end_date) + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+        date_range = f"trade_date >= '{start_date}' AND trade_date < '{end_next}'"
+
+        sector_rps = pd.read_sql(text(f"""
+            SELECT sector_name, trade_date, rps_20 FROM quant_feature_sector_rps WHERE {date_range}
+        """), self.engine)
+        stock_rps = pd.read_sql(text(f"""
+            SELECT symbol, trade_date, rps_20 FROM {self.rps_table} WHERE {date_range}
+        """), self.engine)
+        df_map = pd.read_sql(text("SELECT DISTINCT symbol, sector_name FROM stock_sector_map"), self.engine)
+        if sector_rps.empty or stock_rps.empty or df_map.empty:
+            return pd.DataFrame(columns=['symbol', 'trade_date', 'sector_rps', 'stock_rps'])
+
+        for df in (sector_rps, stock_rps):
+            df['trade_date'] = pd.to_datetime(df['trade_date']).dt.normalize()
+
+        best_sector = (df_map.merge(sector_rps, on='sector_name')
+                       .groupby(['symbol', 'trade_date'], as_index=False)['rps_20'].max()
+                       .rename(columns={'rps_20': 'sector_rps'}))
+        df = best_sector.merge(stock_rps.rename(columns={'rps_20': 'stock_rps'}), on=['symbol', 'trade_date'])
+        df['sector_rps'] = pd.to_numeric(df['sector_rps'], errors='coerce')
+        df['stock_rps'] = pd.to_numeric(df['stock_rps'], errors='coerce')
+        return df[['symbol', 'trade_date', 'sector_rps', 'stock_rps']]
+
     def get_stock_names(self, symbols):
         """辅助：查名字"""
         if not symbols: return {}
@@ -29,25 +29,19 @@ setup_quant_path()
 # ================= Logger配置 =================
 logger = setup_logger(__name__)
 
-# ================= 导入数据采集器 =================
-from data_job.collectors import (
-    StockKlineCollector,
-    SectorKlineCollector,
-    ETFKlineCollector,
-    StockValuationCollector,
-    LimitBoardsCollector,
-    NewsCollector,
-    MacroDataCollector,
-    ETFInfoCollector,
-    StockSectorListCollector,
-    FundHoldingsCollector,
-    FinanceSummaryCollector,
-)
+# ================= 导入阶段图 =================
+from data_job.core.dag_executor import DagExecutor
+from data_job.core.collection_graph import build_collection_graph
 
 # ================= 导入量化引擎模块 =================
 from quant_engine.pool.maintain_pool import StockPoolMaintainer
 from quant_engine.runner.feature_runner import FeatureRunner
 from quant_engine.runner.strategy_runner import StrategyRunner
+from quant_engine.runner.pipeline_stages import add_feature_stages, add_strategy_stage
+
+# 每日 / 每季度采集阶段（依赖关系见 data_job.core.collection_graph）
+DAILY_COLLECTION_STAGES = ['StockKline', 'SectorKline', 'ETFKline', 'StockValuation', 'LimitBoards', 'News']
+QUARTERLY_COLLECTION_STAGES = ['FundHoldings', 'FinanceSummary']
 
 
 class AutoTradingPipeline:
@@ -63,47 +57,48 @@ class AutoTradingPipeline:
         logger.info("🚀 EvoAlpha OS - 自动化交易流水线调度器启动")
         logger.info("=" * 80)
 
+    # ==================== 阶段图执行 ====================
+
+    def _run_graph(self, graph, title):
+        """并行执行阶段图并输出逐阶段结果，返回 阶段名 -> StageResult"""
+        executor = DagExecutor(graph, logger=logger)
+        results = executor.run()
+        executor.log_summary(title)
+        return results
+
+    @staticmethod
+    def _all_success(results, names):
+        return all(results[name].success for name in names if name in results)
+
     # ==================== 每日自动化流程 ====================
 
     def run_daily_pipeline(self):
         """
-        每日自动化流程：
-        1. 数据采集（15:30-16:00）
-        2. RPS因子计算（16:00-16:15）
-        3. 策略选股（16:15-16:30）
+        每日自动化流程（一张阶段图，各阶段在其上游完成后立即启动）：
+        1. 数据采集
+        2. RPS因子计算：每个因子只等待对应的K线采集
+        3. 策略选股：等待个股RPS
         """
         logger.info("\n" + "=" * 80)
         logger.info("📅 开始每日自动化交易流水线")
         logger.info(f"⏰ 开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         logger.info("=" * 80)
 
-        # ========== Step 1: 数据采集 ==========
-        logger.info("\n" + "▶" * 40)
-        logger.info("📊 Step 1/3: 数据采集")
-        logger.info("▶" * 40)
-
-        collection_success = self._run_daily_collection()
+        graph = build_collection_graph(DAILY_COLLECTION_STAGES)
+        rps_stages = add_feature_stages(graph, self.feature_runner)
+        strategy_stage = add_strategy_stage(graph, self.strategy_runner, 'mrgc')
 
-        if not collection_success:
-            logger.warning("⚠️ 数据采集部分失败，但继续执行后续流程...")
+        results = self._run_graph(graph, "每日自动化交易流水线")
 
-        # ========== Step 2: RPS因子计算 ==========
-        logger.info("\n" + "▶" * 40)
-        logger.info("🧮 Step 2/3: RPS因子计算")
-        logger.info("▶" * 40)
+        if not self._all_success(results, DAILY_COLLECTION_STAGES):
+            logger.warning("⚠️ 数据采集部分失败，RPS计算已使用库中已有数据")
 
-        rps_success = self._run_rps_calculation()
-
-        if not rps_success:
-            logger.error("❌ RPS计算失败，跳过策略选股")
-            return
-
-        # ========== Step 3: 策略选股 ==========
-        logger.info("\n" + "▶" * 40)
-        logger.info("🎯 Step 3/3: 策略选股")
-        logger.info("▶" * 40)
+        if not self._all_success(results, rps_stages):
+            logger.error("❌ RPS计算失败")
+            return False
 
-        self._run_strategy_selection()
+        if results[strategy_stage].success:
+            logger.info("💡 请查看 quant_preselect_results 表获取选股结果")
 
         # ========== 完成 ==========
         logger.info("\n" + "=" * 80)
@@ -111,105 +106,22 @@ class AutoTradingPipeline:
         logger.info(f"⏰ 结束时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         logger.info("=" * 80 + "\n")
 
+        return True
+
     def _run_daily_collection(self):
-        """执行每日数据采集"""
+        """执行每日数据采集（按依赖图并行）"""
         logger.info("\n📡 启动数据采集...")
-
-        collectors = [
-            ('StockKline', StockKlineCollector(), "30-45分钟"),
-            ('SectorKline', SectorKlineCollector(), "5-10分钟"),
-            ('ETFKline', ETFKlineCollector(), "10-15分钟"),
-            ('StockValuation', StockValuationCollector(), "5-10分钟"),
-            ('LimitBoards', LimitBoardsCollector(), "2-5分钟"),
-            ('News', NewsCollector(), "10-20分钟"),
-        ]
-
-        success_count = 0
-        failed_count = 0
-        results = []
-
-        for name, collector, estimated_time in collectors:
-            logger.info(f"\n▶️  正在运行: {name} (预计耗时: {estimated_time})")
-            try:
-                collector.run()
-                success_count += 1
-                results.append((name, "✅ 成功"))
-                logger.info(f"✅ {name} 完成")
-            except Exception as e:
-                failed_count += 1
-                results.append((name, f"❌ 失败: {e}"))
-                logger.error(f"❌ {name} 失败: {e}")
-
-        # 输出结果
-        logger.info("\n📊 数据采集完成:")
-        logger.info(f"  ✅ 成功: {success_count}/{len(collectors)}")
-        logger.info(f"  ❌ 失败: {failed_count}/{len(collectors)}")
-
-        if results:
-            logger.info("\n详细结果:")
-            for name, status in results:
-                logger.info(f"  {name}: {status}")
-
-        return failed_count == 0
-
-    def _run_rps_calculation(self):
-        """执行RPS因子计算"""
-        logger.info("\n🧮 启动RPS因子计算（增量模式）...")
-
-        try:
-            # 使用 FeatureRunner 批量运行所有RPS计算器
-            results = self.feature_runner.run(mode='daily', calculators=['stock', 'sector', 'etf'])
-
-            # 检查结果
-            success_count = sum(1 for r in results.values() if r.get('success'))
-            total_count = len(results)
-
-            logger.info(f"\n📊 RPS计算完成:")
-            logger.info(f"  ✅ 成功: {success_count}/{total_count}")
-
-            for name, result in results.items():
-                status = "✅ 成功" if result.get('success') else "❌ 失败"
-                elapsed = result.get('elapsed', 0)
-                logger.info(f"  {name.upper()}: {status} (耗时: {elapsed:.1f}秒)")
-
-            return all(r.get('success') for r in results.values())
-
-        except Exception as e:
-            logger.error(f"❌ RPS计算失败: {e}")
-            import traceback
-            traceback.print_exc()
-            return False
-
-    def _run_strategy_selection(self):
-        """执行策略选股"""
-        logger.info("\n🎯 启动策略选股...")
-
-        # 运行 MRGC 策略
-        try:
-            result = self.strategy_runner.run(strategy_name='mrgc')
-
-            if result.get('success'):
-                logger.info(f"✅ MRGC策略选股完成 (耗时: {result.get('elapsed', 0):.1f}秒)")
-                logger.info(f"💡 请查看 quant_preselect_results 表获取选股结果")
-            else:
-                logger.error(f"❌ MRGC策略选股失败: {result.get('error')}")
-
-            return result.get('success', False)
-
-        except Exception as e:
-            logger.error(f"❌ 策略选股失败: {e}")
-            import traceback
-            traceback.print_exc()
-            return False
+        results = self._run_graph(build_collection_graph(DAILY_COLLECTION_STAGES), "数据采集完成")
+        return self._all_success(results, DAILY_COLLECTION_STAGES)
 
     # ==================== 每季度自动化流程 ====================
 
     def run_quarterly_pipeline(self):
         """
-        每季度自动化流程：
-        1. 数据采集（含基金持仓、财务摘要）
-        2. 更新核心股票池
-        3. RPS因子计算
+        每季度自动化流程（一张阶段图）：
+        1. 季度数据采集：基金持仓与财务摘要并行
+        2. 更新核心股票池：采集部分失败时仍执行
+        3. RPS因子计算：股票池更新失败时仍执行
         4. 策略选股
         """
         logger.info("\n" + "=" * 80)
@@ -217,40 +129,20 @@ class AutoTradingPipeline:
         logger.info(f"⏰ 开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         logger.info("=" * 80)
 
-        # ========== Step 1: 季度数据采集 ==========
-        logger.info("\n" + "▶" * 40)
-        logger.info("📊 Step 1/4: 季度数据采集")
-        logger.info("▶" * 40)
-
-        self._run_quarterly_collection()
-
-        # ========== Step 2: 更新核心股票池 ==========
-        logger.info("\n" + "▶" * 40)
-        logger.info("🏊‍♂️ Step 2/4: 更新核心股票池")
-        logger.info("▶" * 40)
-
-        pool_success = self._update_stock_pool()
-
-        if not pool_success:
-            logger.warning("⚠️ 股票池更新失败，但继续执行后续流程...")
+        graph = build_collection_graph(QUARTERLY_COLLECTION_STAGES)
+        graph.add('StockPool', self._update_stock_pool, deps=QUARTERLY_COLLECTION_STAGES,
+                  estimate=5, description="核心股票池", allow_failed_deps=True)
+        rps_stages = add_feature_stages(graph, self.feature_runner, deps=['StockPool'])
+        add_strategy_stage(graph, self.strategy_runner, 'mrgc')
 
-        # ========== Step 3: RPS因子计算 ==========
-        logger.info("\n" + "▶" * 40)
-        logger.info("🧮 Step 3/4: RPS因子计算")
-        logger.info("▶" * 40)
+        results = self._run_graph(graph, "每季度自动化交易流水线")
 
-        rps_success = self._run_rps_calculation()
+        if not results['StockPool'].success:
+            logger.warning("⚠️ 股票池更新失败，RPS计算已继续执行")
 
-        if not rps_success:
-            logger.error("❌ RPS计算失败，跳过策略选股")
-            return
-
-        # ========== Step 4: 策略选股 ==========
-        logger.info("\n" + "▶" * 40)
-        logger.info("🎯 Step 4/4: 策略选股")
-        logger.info("▶" * 40)
-
-        self._run_strategy_selection()
+        if not self._all_success(results, rps_stages):
+            logger.error("❌ RPS计算失败")
+            return False
 
         # ========== 完成 ==========
         logger.info("\n" + "=" * 80)
@@ -258,42 +150,13 @@ class AutoTradingPipeline:
         logger.info(f"⏰ 结束时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         logger.info("=" * 80 + "\n")
 
+        return True
+
     def _run_quarterly_collection(self):
-        """执行每季度数据采集"""
+        """执行每季度数据采集（两个采集器并行）"""
         logger.info("\n📡 启动季度数据采集...")
-
-        collectors = [
-            ('FundHoldings', FundHoldingsCollector(), "10-15分钟"),
-            ('FinanceSummary', FinanceSummaryCollector(), "2-3小时"),
-        ]
-
-        success_count = 0
-        failed_count = 0
-        results = []
-
-        for name, collector, estimated_time in collectors:
-            logger.info(f"\n▶️  正在运行: {name} (预计耗时: {estimated_time})")
-            try:
-                collector.run()
-                success_count += 1
-                results.append((name, "✅ 成功"))
-                logger.info(f"✅ {name} 完成")
-            except Exception as e:
-                failed_count += 1
-                results.append((name, f"❌ 失败: {e}"))
-                logger.error(f"❌ {name} 失败: {e}")
-
-        # 输出结果
-        logger.info("\n📊 季度数据采集完成:")
-        logger.info(f"  ✅ 成功: {success_count}/{len(collectors)}")
-        logger.info(f"  ❌ 失败: {failed_count}/{len(collectors)}")
-
-        if results:
-            logger.info("\n详细结果:")
-            for name, status in results:
-                logger.info(f"  {name}: {status}")
-
-        return failed_count == 0
+        results = self._run_graph(build_collection_graph(QUARTERLY_COLLECTION_STAGES), "季度数据采集完成")
+        return self._all_success(results, QUARTERLY_COLLECTION_STAGES)
 
     def _update_stock_pool(self):
         """更新核心股票池"""
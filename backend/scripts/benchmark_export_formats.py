@@ -0,0 +1,105 @@
+"""
+EvoAlpha OS - 导出格式基准测试
+同一张表分别导出为 CSV.gz 与 Parquet(zstd)，比较文件大小、导出吞吐与读回耗时
+
+用法:
+    python scripts/benchmark_export_formats.py                         # 本地库 stock_daily_prices
+    python scripts/benchmark_export_formats.py --table etf_daily_prices
+    python scripts/benchmark_export_formats.py --synthetic 2000000     # 临时库中生成模拟K线（无本地数据时）
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.abspath(os.path.join(current_dir, ".."))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.sync.csv_exporter import CSVExporter
+
+
+def build_synthetic_db(path: str, rows: int, batch: int = 200000):
+    """生成与 stock_daily_prices 同结构的模拟数据（约 5000 只股票 × 交易日）"""
+    with sqlite3.connect(path) as conn:
+        conn.execute("""
+            CREATE TABLE stock_daily_prices (
+                symbol VARCHAR(20), trade_date DATE,
+                open FLOAT, close FLOAT, high FLOAT, low FLOAT,
+                volume FLOAT, amount FLOAT, pct_chg FLOAT, turnover_rate FLOAT,
+                PRIMARY KEY (symbol, trade_date)
+            )
+        """)
+        symbols = np.array([f"{i:06d}" for i in range(5000)])
+        days = pd.bdate_range("2015-01-05", periods=rows // len(symbols) + 1).strftime("%Y-%m-%d").to_numpy()
+        rng = np.random.default_rng(0)
+        for offset in range(0, rows, batch):
+            n = min(batch, rows - offset)
+            idx = np.arange(offset, offset + n)
+            close = rng.uniform(3, 300, n).round(2)
+            df = pd.DataFrame({
+                "symbol": symbols[idx % len(symbols)],
+                "trade_date": days[idx // len(symbols)],
+                "open": (close * rng.uniform(0.95, 1.05, n)).round(2),
+                "close": close,
+                "high": (close * 1.05).round(2),
+                "low": (close * 0.95).round(2),
+                "volume": rng.integers(1e4, 1e8, n).astype(float),
+                "amount": rng.uniform(1e6, 1e10, n).round(2),
+                "pct_chg": rng.normal(0, 2, n).round(2),
+                "turnover_rate": rng.uniform(0, 20, n).round(2),
+            })
+            df.to_sql("stock_daily_prices", conn, if_exists="append", index=False)
+
+
+def read_back(path: str, format: str) -> float:
+    """读回整个文件的耗时（秒）"""
+    start = time.perf_counter()
+    if format == "parquet":
+        import pyarrow.parquet as pq
+        pq.read_table(path).to_pandas()
+    else:
+        pd.read_csv(path, dtype={"symbol": str}, parse_dates=["trade_date"])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV.gz 与 Parquet(zstd) 导出对比")
+    parser.add_argument("--db", default=None, help="SQLite 路径（默认 settings.LOCAL_DB_PATH）")
+    parser.add_argument("--table", default="stock_daily_prices", help="导出的表")
+    parser.add_argument("--synthetic", type=int, default=0, help="在临时库中生成 N 行模拟K线代替本地库")
+    parser.add_argument("--batch-size", type=int, default=100000, help="每批读取行数（Parquet 行组大小）")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = args.db
+        if args.synthetic:
+            db_path = os.path.join(tmp_dir, "synthetic.db")
+            print(f"生成模拟数据 {args.synthetic:,} 行...")
+            build_synthetic_db(db_path, args.synthetic)
+            args.table = "stock_daily_prices"
+        elif db_path is None:
+            from app.core.config import settings
+            db_path = settings.LOCAL_DB_PATH
+
+        exporter = CSVExporter(db_path=db_path, output_dir=os.path.join(tmp_dir, "exports"))
+        print(f"{'格式':<14} {'行数':>12} {'文件(MB)':>10} {'压缩比':>8} {'导出(秒)':>9} {'行/秒':>12} {'读回(秒)':>9}")
+        for format in ("csv", "parquet"):
+            path = exporter.export_table(args.table, format, batch_size=args.batch_size)
+            stats = exporter.stats[args.table]
+            ratio = stats["bytes"] / stats["file_bytes"] if stats["file_bytes"] else 0
+            label = "CSV.gz" if format == "csv" else "Parquet(zstd)"
+            print(f"{label:<14} {stats['rows']:>12,} {stats['file_bytes'] / 1024 / 1024:>10.2f} {ratio:>8.1f} "
+                  f"{stats['elapsed']:>9.2f} {stats['rows_per_sec']:>12,.0f} {read_back(path, format):>9.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
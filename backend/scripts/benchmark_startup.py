@@ -0,0 +1,85 @@
+"""
+EvoAlpha OS - 启动耗时基准测试
+在独立子进程中多次运行常用命令行入口，报告最短墙钟时间；
+--importtime 时用 python -X importtime 列出累计耗时最高的导入模块
+
+用法:
+    python scripts/benchmark_startup.py
+    python scripts/benchmark_startup.py --repeat 5 --importtime
+    python scripts/benchmark_startup.py --command "-m quant_engine.runner.strategy_runner --list"
+"""
+
+import os
+import re
+import sys
+import time
+import shlex
+import argparse
+import subprocess
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.abspath(os.path.join(current_dir, ".."))
+
+# 名称 -> python 参数（均不访问网络、不写数据）
+COMMANDS = {
+    'strategy --list': "-m quant_engine.runner.strategy_runner --list",
+    'strategy --help': "-m quant_engine.runner.strategy_runner --help",
+    'feature --help': "-m quant_engine.runner.feature_runner --help",
+    'backtest --help': "-m quant_engine.runner.backtest_runner --help",
+    'optimize --help': "-m quant_engine.runner.optimize_runner --help",
+    'replay_outbox --help': "data_job/scripts/replay_outbox.py --help",
+    'collector import': "-c 'from data_job.collectors import LimitBoardsCollector'",
+    'collector init': "-c 'from data_job.collectors import LimitBoardsCollector; LimitBoardsCollector()'",
+    'app.core.database': "-c 'import app.core.database'",
+}
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def run_once(args: str, extra=()) -> tuple:
+    """运行一次命令，返回 (耗时秒, returncode, stderr)"""
+    cmd = [sys.executable, *extra, *shlex.split(args)]
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=backend_dir, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    return time.perf_counter() - start, proc.returncode, proc.stderr
+
+
+def top_imports(args: str, limit: int) -> list:
+    """python -X importtime：累计耗时最高的顶层导入 [(模块, 毫秒), ...]"""
+    _, _, stderr = run_once(args, extra=('-X', 'importtime'))
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match and len(match.group(3)) <= 1:
+            rows.append((match.group(4), int(match.group(2)) / 1000))
+    return sorted(rows, key=lambda r: r[1], reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="常用命令行入口的启动耗时基准")
+    parser.add_argument('--repeat', type=int, default=3, help='每个命令运行次数（取最短）')
+    parser.add_argument('--command', action='append', default=None,
+                        help='自定义 python 参数（可重复），默认测试内置命令集')
+    parser.add_argument('--importtime', action='store_true', help='同时输出累计耗时最高的顶层导入')
+    parser.add_argument('--top', type=int, default=8, help='--importtime 输出的模块数')
+    args = parser.parse_args()
+
+    commands = {c: c for c in args.command} if args.command else COMMANDS
+    print(f"{'命令':<24} {'最短(秒)':>9} {'中位(秒)':>9}  状态")
+    for name, command in commands.items():
+        times, code, stderr = [], 0, ""
+        for _ in range(args.repeat):
+            cost, code, stderr = run_once(command)
+            times.append(cost)
+        times.sort()
+        status = "ok" if code == 0 else f"exit {code}: {stderr.strip().splitlines()[-1] if stderr.strip() else ''}"
+        print(f"{name:<24} {times[0]:>9.3f} {times[len(times) // 2]:>9.3f}  {status}")
+
+        if args.importtime:
+            for module, ms in top_imports(command, args.top):
+                print(f"{'':<6}{module:<40} {ms:>8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())